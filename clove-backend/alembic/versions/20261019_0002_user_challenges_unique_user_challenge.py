@@ -0,0 +1,59 @@
+"""20261019_0002_user_challenges_unique_user_challenge
+
+Revision ID: 20261019_0002
+Revises: 20250619_0001
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019_0002'
+down_revision: Union[str, None] = '20250619_0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# For each (user_id, challenge_id) keep the most recently attempted row
+RANKED_USER_CHALLENGES = """
+    WITH ranked AS (
+        SELECT id,
+               first_value(id) OVER (
+                   PARTITION BY user_id, challenge_id
+                   ORDER BY last_attempted_at DESC, id DESC
+               ) AS keep_id
+        FROM user_challenges
+    )
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Merge duplicate rows created by concurrent upserts: move their attempts
+    # onto the kept row, then delete the duplicates
+    op.execute(sa.text(RANKED_USER_CHALLENGES + """
+        UPDATE challenge_attempts ca
+        SET user_challenge_id = ranked.keep_id
+        FROM ranked
+        WHERE ca.user_challenge_id = ranked.id AND ranked.id <> ranked.keep_id
+    """))
+    op.execute(sa.text(RANKED_USER_CHALLENGES + """
+        DELETE FROM user_challenges uc
+        USING ranked
+        WHERE uc.id = ranked.id AND ranked.id <> ranked.keep_id
+    """))
+
+    op.create_unique_constraint(
+        'uq_user_challenges_user_id_challenge_id',
+        'user_challenges',
+        ['user_id', 'challenge_id']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_user_challenges_user_id_challenge_id', 'user_challenges', type_='unique')
@@ -0,0 +1,35 @@
+"""20261019_0003_user_challenges_active_session_index
+
+Revision ID: 20261019_0003
+Revises: 20261019_0002
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019_0003'
+down_revision: Union[str, None] = '20261019_0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Partial index: only active sessions, ordered by idle time
+    op.create_index(
+        'ix_user_challenges_active_last_activity_at',
+        'user_challenges',
+        ['last_activity_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'active'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_challenges_active_last_activity_at', table_name='user_challenges')
@@ -0,0 +1,181 @@
+"""20261019_0004_challenge_attempts_history_partitioned
+
+Revision ID: 20261019_0004
+Revises: 20261019_0003
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019_0004'
+down_revision: Union[str, None] = '20261019_0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Current take of every user_subtopic; finished takes are no longer deleted
+    op.add_column('user_subtopics', sa.Column('current_take', sa.Integer(), server_default=sa.text('1'), nullable=False))
+    op.add_column('user_subtopics', sa.Column('current_take_started_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False))
+
+    # Move the existing rows aside; the names are reused by the partitioned table
+    op.rename_table('challenge_attempts', 'challenge_attempts_unpartitioned')
+    op.execute("ALTER TABLE challenge_attempts_unpartitioned RENAME CONSTRAINT challenge_attempts_pkey TO challenge_attempts_unpartitioned_pkey")
+    op.execute("ALTER TABLE challenge_attempts_unpartitioned RENAME CONSTRAINT challenge_attempts_user_challenge_id_fkey TO challenge_attempts_unpartitioned_user_challenge_id_fkey")
+    op.execute("ALTER INDEX ix_challenge_attempts_id RENAME TO ix_challenge_attempts_unpartitioned_id")
+
+    # Range-partitioned by month on attempted_at; the partition key must be part of the primary key
+    op.execute("""
+        CREATE TABLE challenge_attempts (
+            id INTEGER NOT NULL DEFAULT nextval('challenge_attempts_id_seq'),
+            user_challenge_id INTEGER NOT NULL REFERENCES user_challenges (id),
+            user_subtopic_id INTEGER NOT NULL REFERENCES user_subtopics (id) ON DELETE CASCADE,
+            take_number INTEGER NOT NULL DEFAULT 1,
+            user_answer TEXT,
+            is_successful BOOLEAN NOT NULL,
+            time_spent INTEGER,
+            hints_used INTEGER,
+            points INTEGER,
+            attempted_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT challenge_attempts_pkey PRIMARY KEY (id, attempted_at)
+        ) PARTITION BY RANGE (attempted_at)
+    """)
+    op.execute("COMMENT ON COLUMN challenge_attempts.time_spent IS 'Seconds'")
+    op.execute("ALTER SEQUENCE challenge_attempts_id_seq OWNED BY challenge_attempts.id")
+
+    # Monthly partitions from the oldest attempt through three months ahead,
+    # plus a DEFAULT partition; app startup keeps adding the upcoming months
+    op.execute("""
+        DO $$
+        DECLARE
+            month DATE;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', COALESCE((SELECT min(attempted_at) FROM challenge_attempts_unpartitioned), now())),
+                    date_trunc('month', now()) + interval '3 months',
+                    interval '1 month'
+                )::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF challenge_attempts FOR VALUES FROM (%L) TO (%L)',
+                    'challenge_attempts_' || to_char(month, '"y"YYYY"m"MM'),
+                    month,
+                    (month + interval '1 month')::date
+                );
+            END LOOP;
+        END $$
+    """)
+    op.execute("CREATE TABLE IF NOT EXISTS challenge_attempts_default PARTITION OF challenge_attempts DEFAULT")
+
+    # Attempts need a user_subtopic now. Users who attempted a subtopic's
+    # challenges without having its user_subtopic get one, locked and at the
+    # initial knowledge level as init_user_data creates them, so their
+    # attempts are kept
+    created = op.get_bind().execute(sa.text("""
+        INSERT INTO user_subtopics (
+            user_id, subtopic_id, lessons_completed, practice_completed, challenges_completed,
+            is_unlocked, is_completed, progress_percent, knowledge_level
+        )
+        SELECT DISTINCT uc.user_id, c.subtopic_id, false, false, false, false, false, 0.0, 0.1
+        FROM challenge_attempts_unpartitioned ca
+        JOIN user_challenges uc ON uc.id = ca.user_challenge_id
+        JOIN challenges c ON c.id = uc.challenge_id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM user_subtopics us
+            WHERE us.user_id = uc.user_id AND us.subtopic_id = c.subtopic_id
+        )
+    """)).rowcount
+    if created:
+        logger.warning(f"Created {created} missing user_subtopics for existing challenge attempts")
+
+    # Every stored attempt belongs to the user's (single) current take
+    op.execute("""
+        INSERT INTO challenge_attempts (
+            id, user_challenge_id, user_subtopic_id, take_number, user_answer,
+            is_successful, time_spent, hints_used, points, attempted_at
+        )
+        SELECT ca.id, ca.user_challenge_id, us.id, 1, ca.user_answer,
+               ca.is_successful, ca.time_spent, ca.hints_used, ca.points, ca.attempted_at
+        FROM challenge_attempts_unpartitioned ca
+        JOIN user_challenges uc ON uc.id = ca.user_challenge_id
+        JOIN challenges c ON c.id = uc.challenge_id
+        JOIN LATERAL (
+            SELECT min(id) AS id FROM user_subtopics
+            WHERE user_id = uc.user_id AND subtopic_id = c.subtopic_id
+        ) us ON us.id IS NOT NULL
+    """)
+    op.execute("""
+        UPDATE user_subtopics us
+        SET current_take_started_at = first.attempted_at
+        FROM (
+            SELECT user_subtopic_id, min(attempted_at) AS attempted_at
+            FROM challenge_attempts
+            GROUP BY user_subtopic_id
+        ) first
+        WHERE first.user_subtopic_id = us.id
+    """)
+
+    op.create_index(op.f('ix_challenge_attempts_id'), 'challenge_attempts', ['id'], unique=False)
+    op.create_index('ix_challenge_attempts_user_challenge_id', 'challenge_attempts', ['user_challenge_id'], unique=False)
+    op.create_index('ix_challenge_attempts_user_subtopic_take', 'challenge_attempts', ['user_subtopic_id', 'take_number', 'attempted_at'], unique=False)
+
+    # The old table is dropped next; stop rather than lose an attempt
+    missing = op.get_bind().execute(sa.text("""
+        SELECT count(*) FROM challenge_attempts_unpartitioned ca
+        WHERE NOT EXISTS (SELECT 1 FROM challenge_attempts p WHERE p.id = ca.id)
+    """)).scalar()
+    if missing:
+        raise RuntimeError(f"{missing} challenge attempts were not copied into the partitioned table")
+
+    op.drop_table('challenge_attempts_unpartitioned')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Back to a plain table holding only the attempts of each current take
+    # No SERIAL: the id keeps using challenge_attempts_id_seq
+    op.create_table('challenge_attempts_unpartitioned',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_challenge_id', sa.Integer(), nullable=False),
+    sa.Column('user_answer', sa.Text(), nullable=True),
+    sa.Column('is_successful', sa.Boolean(), nullable=False),
+    sa.Column('time_spent', sa.Integer(), nullable=True, comment='Seconds'),
+    sa.Column('hints_used', sa.Integer(), nullable=True),
+    sa.Column('points', sa.Integer(), nullable=True),
+    sa.Column('attempted_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_challenge_id'], ['user_challenges.id'], ),
+    sa.PrimaryKeyConstraint('id', name='challenge_attempts_unpartitioned_pkey')
+    )
+    op.execute("""
+        INSERT INTO challenge_attempts_unpartitioned (
+            id, user_challenge_id, user_answer, is_successful, time_spent, hints_used, points, attempted_at
+        )
+        SELECT ca.id, ca.user_challenge_id, ca.user_answer, ca.is_successful,
+               ca.time_spent, ca.hints_used, ca.points, ca.attempted_at
+        FROM challenge_attempts ca
+        JOIN user_subtopics us ON us.id = ca.user_subtopic_id
+        WHERE ca.take_number = us.current_take
+    """)
+    op.execute("ALTER TABLE challenge_attempts_unpartitioned ALTER COLUMN id SET DEFAULT nextval('challenge_attempts_id_seq')")
+    op.execute("ALTER SEQUENCE challenge_attempts_id_seq OWNED BY challenge_attempts_unpartitioned.id")
+
+    # Dropping the parent drops every partition
+    op.drop_table('challenge_attempts')
+    op.rename_table('challenge_attempts_unpartitioned', 'challenge_attempts')
+    op.execute("ALTER TABLE challenge_attempts RENAME CONSTRAINT challenge_attempts_unpartitioned_pkey TO challenge_attempts_pkey")
+    op.execute("ALTER TABLE challenge_attempts RENAME CONSTRAINT challenge_attempts_unpartitioned_user_challenge_id_fkey TO challenge_attempts_user_challenge_id_fkey")
+    op.create_index(op.f('ix_challenge_attempts_id'), 'challenge_attempts', ['id'], unique=False)
+
+    op.drop_column('user_subtopics', 'current_take_started_at')
+    op.drop_column('user_subtopics', 'current_take')
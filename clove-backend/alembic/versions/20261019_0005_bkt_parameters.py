@@ -0,0 +1,45 @@
+"""20261019_0005_bkt_parameters
+
+Revision ID: 20261019_0005
+Revises: 20261019_0004
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019_0005'
+down_revision: Union[str, None] = '20261019_0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('bkt_parameters',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('subtopic_id', sa.Integer(), nullable=False),
+    sa.Column('challenge_type', sa.String(), nullable=False),
+    sa.Column('p_init', sa.Float(), nullable=False),
+    sa.Column('p_transit', sa.Float(), nullable=False),
+    sa.Column('p_guess', sa.Float(), nullable=False),
+    sa.Column('p_slip', sa.Float(), nullable=False),
+    sa.Column('log_likelihood', sa.Float(), nullable=True),
+    sa.Column('n_sequences', sa.Integer(), nullable=False),
+    sa.Column('n_attempts', sa.Integer(), nullable=False),
+    sa.Column('fitted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['subtopic_id'], ['subtopics.subtopic_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('subtopic_id', 'challenge_type', name='uq_bkt_parameters_subtopic_type')
+    )
+    op.create_index(op.f('ix_bkt_parameters_id'), 'bkt_parameters', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_bkt_parameters_id'), table_name='bkt_parameters')
+    op.drop_table('bkt_parameters')
@@ -0,0 +1,116 @@
+"""20261019_0006_incremental_backup_watermarks
+
+Revision ID: 20261019_0006
+Revises: 20261019_0005
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019_0006'
+down_revision: Union[str, None] = '20261019_0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables backed up incrementally: (table, watermark column, primary key column)
+TRACKED_TABLES = [
+    ('users', 'updated_at', 'id'),
+    ('statistics', 'last_updated', 'id'),
+    ('user_topics', 'updated_at', 'id'),
+    ('pre_assessments', 'updated_at', 'pre_assessment_id'),
+    ('post_assessments', 'updated_at', 'post_assessment_id'),
+    ('retention_tests', 'updated_at', 'id'),
+    ('user_subtopics', 'updated_at', 'id'),
+    ('q_values', 'updated_at', 'id'),
+    ('user_challenges', 'updated_at', 'id'),
+    ('challenge_attempts', 'updated_at', 'id'),
+]
+# Watermark columns that already exist
+EXISTING_COLUMNS = {'users', 'statistics'}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('backup_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=16), nullable=False, comment='base or delta'),
+    sa.Column('base_run_id', sa.Integer(), nullable=True),
+    sa.Column('since', sa.DateTime(timezone=True), nullable=True, comment='Lower bound of the exported changes'),
+    sa.Column('watermark', sa.DateTime(timezone=True), nullable=False, comment='Snapshot time of the backup'),
+    sa.Column('manifest', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['base_run_id'], ['backup_runs.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_backup_runs_id'), 'backup_runs', ['id'], unique=False)
+    op.create_table('backup_deletions',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('row_id', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_backup_deletions_deleted_at'), 'backup_deletions', ['deleted_at'], unique=False)
+
+    # Watermark columns bumped on every UPDATE, also by raw SQL and upserts that
+    # bypass the ORM's onupdate. A restore replaying deltas sets
+    # clove.backup_restore = 'on' so it keeps the restored values.
+    for table, column, _ in TRACKED_TABLES:
+        if table not in EXISTING_COLUMNS:
+            op.add_column(table, sa.Column(column, sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+        op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False)
+
+    for column in sorted({column for _, column, _ in TRACKED_TABLES}):
+        op.execute(f"""
+            CREATE OR REPLACE FUNCTION backup_touch_{column}() RETURNS trigger AS $$
+            BEGIN
+                IF coalesce(current_setting('clove.backup_restore', true), '') <> 'on' THEN
+                    NEW.{column} := now();
+                END IF;
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION backup_record_deletion() RETURNS trigger AS $$
+        BEGIN
+            IF coalesce(current_setting('clove.backup_restore', true), '') <> 'on' THEN
+                INSERT INTO backup_deletions (table_name, row_id)
+                VALUES (TG_ARGV[0], (to_jsonb(OLD) ->> TG_ARGV[1])::bigint);
+            END IF;
+            RETURN OLD;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table, column, key in TRACKED_TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table}_backup_touch BEFORE UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION backup_touch_{column}()"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_backup_deletion AFTER DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION backup_record_deletion('{table}', '{key}')"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column, _ in reversed(TRACKED_TABLES):
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_backup_deletion ON {table}")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_backup_touch ON {table}")
+        op.drop_index(op.f(f'ix_{table}_{column}'), table_name=table)
+        if table not in EXISTING_COLUMNS:
+            op.drop_column(table, column)
+    op.execute("DROP FUNCTION IF EXISTS backup_record_deletion()")
+    for column in sorted({column for _, column, _ in TRACKED_TABLES}):
+        op.execute(f"DROP FUNCTION IF EXISTS backup_touch_{column}()")
+
+    op.drop_index(op.f('ix_backup_deletions_deleted_at'), table_name='backup_deletions')
+    op.drop_table('backup_deletions')
+    op.drop_index(op.f('ix_backup_runs_id'), table_name='backup_runs')
+    op.drop_table('backup_runs')
@@ -0,0 +1,38 @@
+"""20261019_0007_q_values_unique_user_subtopic
+
+Revision ID: 20261019_0007
+Revises: 20261019_0006
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019_0007'
+down_revision: Union[str, None] = '20261019_0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Concurrent first selections could create a second Q-table; keep the most
+    # recently updated one (lowest id on ties) and drop the rest
+    op.execute(sa.text("""
+        DELETE FROM q_values AS q
+        USING q_values AS keep
+        WHERE q.user_subtopic_id = keep.user_subtopic_id
+          AND q.id <> keep.id
+          AND (q.updated_at < keep.updated_at
+               OR (q.updated_at = keep.updated_at AND q.id > keep.id))
+    """))
+    op.create_unique_constraint('uq_q_values_user_subtopic_id', 'q_values', ['user_subtopic_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_q_values_user_subtopic_id', 'q_values', type_='unique')
@@ -0,0 +1,44 @@
+"""20261019_0008_user_challenges_idle_session_index
+
+Revision ID: 20261019_0008
+Revises: 20261019_0007
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019_0008'
+down_revision: Union[str, None] = '20261019_0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The reaper filters on coalesce(last_activity_at, last_attempted_at); an
+    # index on last_activity_at alone only served the status predicate
+    op.drop_index('ix_user_challenges_active_last_activity_at', table_name='user_challenges')
+    op.create_index(
+        'ix_user_challenges_active_idle_since',
+        'user_challenges',
+        [sa.text('coalesce(last_activity_at, last_attempted_at)')],
+        unique=False,
+        postgresql_where=sa.text("status = 'active'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_challenges_active_idle_since', table_name='user_challenges')
+    op.create_index(
+        'ix_user_challenges_active_last_activity_at',
+        'user_challenges',
+        ['last_activity_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'active'")
+    )
@@ -17,8 +17,8 @@ from app.crud.assessment_question import (
     submit_retention_test_answer,
     check_retention_test_availability
 )
-from app.db.session import get_db
-from app.api.auth import get_current_user, get_current_superuser
+from app.db.session import get_db, get_read_db
+from app.api.auth import get_current_user, get_current_reader, get_current_superuser
 from app.db.models.users import User
 
 router = APIRouter(prefix="/assessment_questions", tags=["AssessmentQuestions"])
@@ -132,8 +132,8 @@ async def delete_question(
 async def get_retention_test_status_endpoint(
     topic_id: int,
     stage: int = Query(1, description="Retention test stage (1 or 2)"),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_reader)
 ):
     """
     Get retention test status for a specific topic.
@@ -156,8 +156,8 @@ async def get_retention_test_status_endpoint(
 async def get_retention_test_results_endpoint(
     topic_id: int,
     stage: int = Query(None, description="Retention test stage (1 or 2). If not provided, returns latest completed stage."),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_reader)
 ):
     """
     Get comprehensive retention test results for a specific topic.
@@ -185,8 +185,7 @@ async def get_retention_test_questions_endpoint(
 ):
     """
     Get retention test questions for a specific topic and stage.
-    Stage 1 (12 hours): Questions with IDs 136-150 (15 questions)
-    Stage 2 (5 days): Questions with IDs 151-165 (15 questions)
+    Each stage serves 15 fixed retention questions for the topic (5 per subtopic).
     Requires user authentication and completion of pre/post assessments.
     """
     try:
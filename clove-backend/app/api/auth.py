@@ -2,11 +2,12 @@
 
 import os
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status, Form
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Form
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +20,7 @@ from app.crud.user import (
     get_by_id,
     update_user
 )
-from app.db.session import get_db
+from app.db.session import WRITE_MARKER_HEADER, get_db, get_read_db, async_session, read_router
 from app.utils.security import (
     get_password_hash,
     verify_password,
@@ -48,12 +49,7 @@ COOLDOWN_THRESHOLDS = {
     10: 60   # 10 attempts = 1 hour
 }
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db)
-):
-    payload = verify_token(token)
-    user = await get_by_id(db, int(payload["sub"]))
+def _ensure_active(user: Optional[User]) -> User:
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -66,6 +62,35 @@ async def get_current_user(
         )
     return user
 
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    payload = verify_token(token)
+    user = _ensure_active(await get_by_id(db, int(payload["sub"])))
+    # Lets get_db send this user's reads to the primary after a write
+    db.info["user_id"] = user.id
+    return user
+
+async def get_current_reader(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """get_current_user for read-only endpoints; loads the user through get_read_db."""
+    payload = verify_token(token)
+    user_id = int(payload["sub"])
+    # Routes the read session to the primary if this user has just written,
+    # on this worker or (by the client's X-Last-Write marker) on any other
+    db.info["user_id"] = user_id
+    db.info["written_at"] = read_router.marker_written_at(user_id, request.headers.get(WRITE_MARKER_HEADER))
+    user = await get_by_id(db, user_id)
+    if not user:
+        # A user created moments ago may not have reached the replica yet
+        async with async_session() as primary:
+            user = await get_by_id(primary, user_id)
+    return _ensure_active(user)
+
 async def get_current_superuser(current_user: User = Depends(get_current_user)):
     if not current_user.is_superuser:
         raise HTTPException(
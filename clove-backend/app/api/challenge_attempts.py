@@ -1,6 +1,7 @@
 # app/api/challenge_attempts.py
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
@@ -17,14 +18,19 @@ from app.crud.user_subtopic import get_by_user_and_subtopic as get_user_subtopic
 from app.crud.user_challenge import (
     upsert as upsert_user_challenge,
     get_by_id as get_user_challenge_by_id,
-    get_by_user_and_challenge
+    get_by_user_and_challenge,
+    lock_user_sessions
 )
 from app.services.selection import select_challenge
-from app.db.session import get_db
-from app.crud.challenge_attempt import delete_last_take_if_full
-from app.api.auth import get_current_user, get_current_superuser
+from app.db.session import get_db, get_read_db
+from app.crud.challenge_attempt import close_take_if_full
+from app.api.auth import get_current_user, get_current_reader, get_current_superuser
 from app.db.models.users import User
 from app.crud.challenge import get_by_id as get_challenge_by_id
+from app.services.session_registry import session_registry
+from app.services.session_reaper import session_reaper
+from app.services.partition_maintainer import partition_maintainer
+from app.utils.cache import curriculum_cache
 from datetime import datetime, timedelta
 import secrets
 
@@ -44,8 +50,8 @@ class SessionValidationRequest(BaseModel):
 async def get_my_challenge_attempts(
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_reader)
 ):
     """Get current user's challenge attempts"""
     return await get_by_user_id(db, user_id=current_user.id, skip=skip, limit=limit)
@@ -97,11 +103,10 @@ async def get_next_challenge(
     if not user_subtopic:
         raise HTTPException(404, "User subtopic not found")
 
-    # ❗️Delete all 5 attempts if we've just completed a take
-    await delete_last_take_if_full(
+    # ❗️Start a new take if we've just completed one; its 5 attempts are kept as history
+    await close_take_if_full(
         db,
-        user_id=user_id,
-        subtopic_id=subtopic_id,
+        user_subtopic,
         take_size=5
     )
         
@@ -133,11 +138,12 @@ async def get_next_challenge(
                 status="pending"
             )
 
-        return {
-            "challenge": challenge,
+        # Splice the challenge's pre-encoded JSON instead of re-validating its payload
+        return ORJSONResponse({
+            "challenge": curriculum_cache.rows.fragment(ChallengeRead, challenge),
             "user_challenge_id": user_challenge.id,
             "user_challenge_status": user_challenge.status
-        }
+        })
     except Exception as e:
         raise HTTPException(500, str(e))
 
@@ -158,14 +164,16 @@ async def activate_challenge_session(
     if not challenge:
         raise HTTPException(404, "Challenge not found")
     
-    # Check for existing active sessions in OTHER subtopics (not the current one)
-    from app.crud.user_challenge import get_active_sessions_by_user_and_subtopic, get_all_active_sessions_by_user
-    all_active_sessions = await get_all_active_sessions_by_user(db, user_id=user_id)
+    # Activations of this user on any worker run one at a time from here on
+    await lock_user_sessions(db, user_id)
+    
+    # All active sessions of the user come from the session registry (one query
+    # at most), then split into OTHER subtopics and the SAME subtopic
+    all_active_sessions = await session_registry.active_sessions(db, user_id)
     
-    # Filter out sessions from the current subtopic (allow multiple in same subtopic)
     other_subtopic_sessions = [
         session for session in all_active_sessions 
-        if session.challenge.subtopic_id != challenge.subtopic_id
+        if session.subtopic_id != challenge.subtopic_id
     ]
     
     if other_subtopic_sessions:
@@ -176,8 +184,8 @@ async def activate_challenge_session(
             "existing_sessions": [
                 {
                     "challenge_id": session.challenge_id,
-                    "subtopic_id": session.challenge.subtopic_id,
-                    "subtopic_name": session.challenge.subtopic.name if hasattr(session.challenge, 'subtopic') else "Unknown",
+                    "subtopic_id": session.subtopic_id,
+                    "subtopic_name": session.subtopic_title or "Unknown",
                     "started_at": session.session_started_at
                 }
                 for session in other_subtopic_sessions
@@ -186,11 +194,10 @@ async def activate_challenge_session(
         }
     
     # Check for existing active sessions in the SAME subtopic
-    same_subtopic_sessions = await get_active_sessions_by_user_and_subtopic(
-        db, 
-        user_id=user_id, 
-        subtopic_id=challenge.subtopic_id
-    )
+    same_subtopic_sessions = [
+        session for session in all_active_sessions
+        if session.subtopic_id == challenge.subtopic_id
+    ]
     
     if same_subtopic_sessions:
         # User already has an active session in this subtopic
@@ -225,7 +232,7 @@ async def activate_challenge_session(
     hints_enabled = None
     
     # Update user_challenge with session data and timer/hints flags
-    await upsert_user_challenge(
+    activated = await upsert_user_challenge(
         db,
         user_id=user_id,
         challenge_id=challenge_id,
@@ -237,6 +244,7 @@ async def activate_challenge_session(
         timer_enabled=timer_enabled,
         hints_enabled=hints_enabled
     )
+    await session_registry.record_activation(activated, challenge.subtopic_id)
     
     return {
         "success": True,
@@ -259,33 +267,13 @@ async def validate_challenge_session(
     if user_id != current_user.id:
         raise HTTPException(403, "Not authorized to validate session for this user")
     
-    # Get the user_challenge record
-    user_challenge = await get_by_user_and_challenge(db, user_id, challenge_id)
-    if not user_challenge:
-        return {"valid": False, "message": "User challenge not found"}
-    
-    # Check if session is active and valid
-    if user_challenge.status != "active":
-        return {"valid": False, "message": "Challenge session is not active"}
-    
-    if user_challenge.session_token != session_request.session_token:
-        return {"valid": False, "message": "Invalid session token"}
-    
+    # Validated in memory by the session registry; last_activity_at is written
+    # to user_challenges by its periodic batched flush
     # NO EXPIRATION CHECK - sessions last until manually deactivated
-    
-    # Update last activity
-    await upsert_user_challenge(
-        db,
-        user_id=user_id,
-        challenge_id=challenge_id,
-        is_solved=user_challenge.is_solved,
-        status="active",
-        session_token=user_challenge.session_token,
-        session_started_at=user_challenge.session_started_at,
-        last_activity_at=datetime.utcnow()
+    valid, message = await session_registry.validate(
+        db, user_id, challenge_id, session_request.session_token
     )
-    
-    return {"valid": True, "message": "Session is valid"}
+    return {"valid": valid, "message": message}
 
 @router.post("/deactivate-session/user/{user_id}/challenge/{challenge_id}", status_code=200)
 async def deactivate_challenge_session(
@@ -319,6 +307,7 @@ async def deactivate_challenge_session(
         session_started_at=None,
         last_activity_at=None
     )
+    await session_registry.forget(user_id, challenge_id)
     
     return {"message": "Challenge session deactivated"}
 
@@ -333,33 +322,31 @@ async def force_deactivate_all_sessions(
     if user_id != current_user.id:
         raise HTTPException(403, "Not authorized to deactivate sessions for this user")
     
-    # Get all active sessions for the user
-    from app.crud.user_challenge import get_all_active_sessions_by_user
-    all_active_sessions = await get_all_active_sessions_by_user(db, user_id=user_id)
+    # Mark all active sessions as cancelled (user chose to close) in one statement
+    from app.crud.user_challenge import deactivate_all_sessions_for_user
+    deactivated_challenge_ids = await deactivate_all_sessions_for_user(db, user_id=user_id)
+    await session_registry.forget_user(user_id)
     
-    if not all_active_sessions:
+    if not deactivated_challenge_ids:
         return {"message": "No active sessions found", "deactivated_count": 0}
     
-    # Deactivate all sessions
-    deactivated_count = 0
-    for session in all_active_sessions:
-        await upsert_user_challenge(
-            db,
-            user_id=user_id,
-            challenge_id=session.challenge_id,
-            is_solved=session.is_solved,
-            status="cancelled",  # Mark as cancelled since user chose to close
-            session_token=None,
-            session_started_at=None,
-            last_activity_at=None
-        )
-        deactivated_count += 1
-    
+    deactivated_count = len(deactivated_challenge_ids)
     return {
         "message": f"Deactivated {deactivated_count} active session(s)",
         "deactivated_count": deactivated_count
     }
 
+@router.get("/sessions/metrics", status_code=200)
+async def get_session_metrics(
+    current_user: User = Depends(get_current_superuser)
+):
+    """Session registry, stale-session reaper and partition check counters of this worker (admin only)"""
+    return {
+        "reaper": session_reaper.stats,
+        "registry": session_registry.stats,
+        "partitions": partition_maintainer.stats
+    }
+
 @router.post("/", response_model=ChallengeAttemptRead, status_code=status.HTTP_201_CREATED)
 async def create_attempt(
     attempt_in: ChallengeAttemptRequest,
@@ -422,6 +409,7 @@ async def create_attempt(
         timer_enabled=timer_enabled,
         hints_enabled=hints_enabled
     )
+    await session_registry.forget(user_challenge.user_id, user_challenge.challenge_id)
     print(f"Upsert completed for user_challenge: user_id={user_challenge.user_id}, challenge_id={user_challenge.challenge_id}")
 
     return attempt
@@ -467,6 +455,7 @@ async def cancel_challenge(
         hints_enabled=hints_enabled,
         was_cancelled=True
     )
+    await session_registry.forget(uc.user_id, uc.challenge_id)
     return {"message": "Marked cancelled"}
 
 @router.delete("/user/{user_id}/subtopic/{subtopic_id}", status_code=200)
@@ -476,21 +465,21 @@ async def delete_all_challenge_attempts_for_subtopic(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Delete all challenge attempts for a user in a specific subtopic"""
-    # Users can only delete their own challenge attempts
+    """Abandon the current take for a user in a specific subtopic (its attempts are kept as history)"""
+    # Users can only abandon their own takes
     if user_id != current_user.id:
-        raise HTTPException(403, "Not authorized to delete challenge attempts for this user")
+        raise HTTPException(403, "Not authorized to abandon takes for this user")
     
-    # Import the delete function from challenge_attempt CRUD
-    from app.crud.challenge_attempt import delete_by_user_and_subtopic
+    # Import the abandon function from challenge_attempt CRUD
+    from app.crud.challenge_attempt import abandon_current_take
     
     try:
-        deleted_count = await delete_by_user_and_subtopic(db, user_id, subtopic_id)
+        abandoned_count = await abandon_current_take(db, user_id, subtopic_id)
         return {
-            "message": f"Successfully deleted {deleted_count} challenge attempts",
-            "deleted_count": deleted_count,
+            "message": f"Abandoned current take ({abandoned_count} challenge attempts kept as history)",
+            "abandoned_count": abandoned_count,
             "user_id": user_id,
             "subtopic_id": subtopic_id
         }
     except Exception as e:
-        raise HTTPException(500, f"Error deleting challenge attempts: {str(e)}")
+        raise HTTPException(500, f"Error abandoning current take: {str(e)}")
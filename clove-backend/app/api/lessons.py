@@ -1,12 +1,13 @@
 # app/api/lessons.py
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession 
 from app.schemas.lesson import LessonRead, LessonCreate, LessonUpdate
 from app.crud.lesson import get_by_id, list_for_subtopic, create, update, delete
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.api.auth import get_current_superuser
 from app.db.models.users import User
+from app.utils.cache import curriculum_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,37 +21,44 @@ async def create_lesson(
 ):
     """Create a new lesson. Requires superuser privileges."""
     created = await create(db, lesson_in)
+    curriculum_cache.invalidate()
     return created
 
 @router.get("/{lesson_id}", response_model=LessonRead)
 async def read_lesson(
+    request: Request,
     lesson_id: int, 
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get a specific lesson by ID. Public endpoint for reading."""
-    lesson_obj = await get_by_id(db, lesson_id=lesson_id)
-    if not lesson_obj:
-        raise HTTPException(status_code=404, detail="Lesson not found")
-    return lesson_obj
+    """Get a specific lesson by ID. Public endpoint for reading (cached, supports ETag revalidation)."""
+    async def load():
+        lesson_obj = await get_by_id(db, lesson_id=lesson_id)
+        if not lesson_obj:
+            raise HTTPException(status_code=404, detail="Lesson not found")
+        return lesson_obj
+    return await curriculum_cache.respond(request, LessonRead, load, row_schema=LessonRead)
 
 @router.get("/", response_model=List[LessonRead])
 async def list_lessons(
+    request: Request,
     subtopic_id: Optional[int] = Query(None),
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """List lessons for a subtopic. Public endpoint for reading."""
+    """List lessons for a subtopic. Public endpoint for reading (cached, supports ETag revalidation)."""
     logger.info(f"🔍 [LessonsAPI] Fetching lessons for subtopic_id: {subtopic_id}")
     
     if subtopic_id is None:
         logger.error("❌ [LessonsAPI] subtopic_id query parameter is required")
         raise HTTPException(status_code=400, detail="subtopic_id query parameter is required")
     
-    lessons = await list_for_subtopic(db, subtopic_id=subtopic_id, skip=skip, limit=limit)
-    logger.info(f"✅ [LessonsAPI] Found {len(lessons)} lessons for subtopic_id: {subtopic_id}")
+    async def load():
+        lessons = await list_for_subtopic(db, subtopic_id=subtopic_id, skip=skip, limit=limit)
+        logger.info(f"✅ [LessonsAPI] Found {len(lessons)} lessons for subtopic_id: {subtopic_id}")
+        return lessons
     
-    return lessons
+    return await curriculum_cache.respond(request, List[LessonRead], load, row_schema=LessonRead)
 
 @router.patch("/{lesson_id}", response_model=LessonRead)
 async def update_lesson(
@@ -64,6 +72,7 @@ async def update_lesson(
     if not lesson_obj:
         raise HTTPException(status_code=404, detail="Lesson not found")
     updated = await update(db, lesson_obj, lesson_in)
+    curriculum_cache.invalidate()
     return updated
 
 @router.delete("/{lesson_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -77,4 +86,5 @@ async def delete_lesson(
     if not lesson_obj:
         raise HTTPException(status_code=404, detail="Lesson not found")
     await delete(db, lesson_obj)
+    curriculum_cache.invalidate()
     return
@@ -11,8 +11,8 @@ from app.crud.q_value import (
     list_for_user,
     get_by_user_and_subtopic
 )
-from app.db.session import get_db
-from app.api.auth import get_current_user, get_current_superuser
+from app.db.session import get_db, get_read_db
+from app.api.auth import get_current_user, get_current_reader, get_current_superuser
 from app.db.models.users import User
 
 router = APIRouter(prefix="/q_values", tags=["QValues"])
@@ -24,8 +24,8 @@ def tuple_keys_to_str_for_api(q_table):
 async def get_my_q_values(
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_reader)
 ):
     """Get current user's Q-learning values"""
     q_values = await list_for_user(db, user_id=current_user.id, skip=skip, limit=limit)
@@ -42,7 +42,10 @@ async def create_q_table_route(
     current_user: User = Depends(get_current_user)
 ):
     """Create a new Q-table for a user-subtopic pair"""
-    created = await create_q_table(db, qv_in.user_subtopic_id)
+    try:
+        created = await create_q_table(db, qv_in.user_subtopic_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if created and created.q_table:
         created.q_table = tuple_keys_to_str_for_api(created.q_table)
     return created
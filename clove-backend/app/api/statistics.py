@@ -1,19 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
-from app.db.session import get_db
-from app.api.auth import get_current_user
+from app.db.session import get_db, get_read_db
+from app.api.auth import get_current_user, get_current_reader
 from app.db.models.users import User
 from app.schemas.statistic import StatisticRead, StatisticCreate
 from app.crud import statistic as crud_stat
 from app.crud.challenge import count_all as count_all_challenges
 
-router = APIRouter(prefix="/statistics", tags=["Statistics"], dependencies=[Depends(get_current_user)])
+# Every endpoint authenticates itself: /me through get_current_reader, so it does not
+# also check out a primary connection for get_current_user
+router = APIRouter(prefix="/statistics", tags=["Statistics"])
 
 @router.get("/me", response_model=StatisticRead)
 async def get_my_statistics(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_reader),
 ):
     stat = await crud_stat.get_by_user_id(db, current_user.id)
     if not stat:
@@ -26,7 +28,7 @@ async def get_my_statistics(
     stat_dict.pop("_sa_instance_state", None)
     return stat_dict
 
-@router.post("/", response_model=StatisticRead)
+@router.post("/", response_model=StatisticRead, dependencies=[Depends(get_current_user)])
 async def create_statistic(
     data: StatisticCreate,
     db: AsyncSession = Depends(get_db),
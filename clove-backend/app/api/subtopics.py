@@ -1,47 +1,73 @@
 # app/api/subtopics.py
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.subtopic import SubtopicRead, SubtopicCreate, SubtopicUpdate
 from app.crud.subtopic import get_by_id, list_for_topic, list_for_user, create, update, delete
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.api.auth import get_current_superuser
 from app.db.models.users import User
+from app.utils.cache import curriculum_cache
+from app.services.curriculum_fanout import run_subtopic_fanout, get_subtopic_fanout_progress
 
 router = APIRouter(prefix="/subtopics", tags=["Subtopics"])
 
 @router.post("/", response_model=SubtopicRead, status_code=status.HTTP_201_CREATED)
 async def create_subtopic(
     subtopic_in: SubtopicCreate, 
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_superuser)
 ):
-    """Create a new subtopic. Requires superuser privileges."""
+    """
+    Create a new subtopic. Requires superuser privileges.
+    Records for existing users are created by a background job; see /subtopics/{subtopic_id}/seed-status.
+    """
     created = await create(db, subtopic_in)
+    curriculum_cache.invalidate()
+    background_tasks.add_task(run_subtopic_fanout, created.subtopic_id)
     return created
 
+@router.get("/{subtopic_id}/seed-status")
+async def read_subtopic_seed_status(
+    subtopic_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_superuser)
+):
+    """Progress of seeding user records for a subtopic. Requires superuser privileges."""
+    try:
+        return await get_subtopic_fanout_progress(db, subtopic_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 @router.get("/{subtopic_id}", response_model=SubtopicRead)
 async def read_subtopic(
+    request: Request,
     subtopic_id: int, 
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get a specific subtopic by ID. Public endpoint for reading."""
-    sub_obj = await get_by_id(db, subtopic_id=subtopic_id)
-    if not sub_obj:
-        raise HTTPException(status_code=404, detail="Subtopic not found")
-    return sub_obj
+    """Get a specific subtopic by ID. Public endpoint for reading (cached, supports ETag revalidation)."""
+    async def load():
+        sub_obj = await get_by_id(db, subtopic_id=subtopic_id)
+        if not sub_obj:
+            raise HTTPException(status_code=404, detail="Subtopic not found")
+        return sub_obj
+    return await curriculum_cache.respond(request, SubtopicRead, load)
 
 @router.get("/", response_model=List[SubtopicRead])
 async def list_subtopics(
+    request: Request,
     topic_id: Optional[int] = Query(None),
     user_id: Optional[int] = Query(None),
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """List subtopics. Public endpoint for reading."""
+    """List subtopics. Public endpoint for reading; per-topic listings are cached."""
     if topic_id is not None:
-        return await list_for_topic(db, topic_id=topic_id, skip=skip, limit=limit)
+        return await curriculum_cache.respond(
+            request, List[SubtopicRead], lambda: list_for_topic(db, topic_id=topic_id, skip=skip, limit=limit)
+        )
     if user_id is not None:
         return await list_for_user(db, user_id=user_id, skip=skip, limit=limit)
     raise HTTPException(status_code=400, detail="Either topic_id or user_id query parameter is required")
@@ -58,6 +84,7 @@ async def update_subtopic(
     if not sub_obj:
         raise HTTPException(status_code=404, detail="Subtopic not found")
     updated = await update(db, sub_obj, subtopic_in)
+    curriculum_cache.invalidate()
     return updated
 
 @router.delete("/{subtopic_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -71,4 +98,5 @@ async def delete_subtopic(
     if not sub_obj:
         raise HTTPException(status_code=404, detail="Subtopic not found")
     await delete(db, sub_obj)
+    curriculum_cache.invalidate()
     return
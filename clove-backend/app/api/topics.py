@@ -1,45 +1,68 @@
 # app/api/topics.py
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.topic import TopicRead, TopicCreate, TopicUpdate
 from app.crud.topic import get_by_id, list_all, create, update, delete
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.api.auth import get_current_superuser
 from app.db.models.users import User
+from app.utils.cache import curriculum_cache
+from app.services.curriculum_fanout import run_topic_fanout, get_topic_fanout_progress
 
 router = APIRouter(prefix="/topics", tags=["Topics"])
 
 @router.get("/", response_model=List[TopicRead])
 async def list_topics(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get all topics. Public endpoint for reading."""
-    return await list_all(db, skip=skip, limit=limit)
+    """Get all topics. Public endpoint for reading (cached, supports ETag revalidation)."""
+    return await curriculum_cache.respond(
+        request, List[TopicRead], lambda: list_all(db, skip=skip, limit=limit)
+    )
 
 @router.get("/{topic_id}", response_model=TopicRead)
 async def read_topic(
+    request: Request,
     topic_id: int, 
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get a specific topic by ID. Public endpoint for reading."""
-    topic_obj = await get_by_id(db, topic_id=topic_id)
-    if not topic_obj:
-        raise HTTPException(status_code=404, detail="Topic not found")
-    return topic_obj
+    """Get a specific topic by ID. Public endpoint for reading (cached, supports ETag revalidation)."""
+    async def load():
+        topic_obj = await get_by_id(db, topic_id=topic_id)
+        if not topic_obj:
+            raise HTTPException(status_code=404, detail="Topic not found")
+        return topic_obj
+    return await curriculum_cache.respond(request, TopicRead, load)
 
 @router.post("/", response_model=TopicRead, status_code=status.HTTP_201_CREATED)
 async def create_topic(
     topic_in: TopicCreate, 
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_superuser)
 ):
-    """Create a new topic. Requires superuser privileges."""
+    """
+    Create a new topic. Requires superuser privileges.
+    Records for existing users are created by a background job; see /topics/{topic_id}/seed-status.
+    """
     created = await create(db, topic_in)
+    curriculum_cache.invalidate()
+    background_tasks.add_task(run_topic_fanout, created.topic_id)
     return created
 
+@router.get("/{topic_id}/seed-status")
+async def read_topic_seed_status(
+    topic_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_superuser)
+):
+    """Progress of seeding user records for a topic. Requires superuser privileges."""
+    return await get_topic_fanout_progress(db, topic_id)
+
 @router.patch("/{topic_id}", response_model=TopicRead)
 async def update_topic(
     topic_id: int, 
@@ -52,6 +75,7 @@ async def update_topic(
     if not topic_obj:
         raise HTTPException(status_code=404, detail="Topic not found")
     updated = await update(db, topic_obj, topic_in)
+    curriculum_cache.invalidate()
     return updated
 
 @router.delete("/{topic_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -65,4 +89,5 @@ async def delete_topic(
     if not topic_obj:
         raise HTTPException(status_code=404, detail="Topic not found")
     await delete(db, topic_obj)
+    curriculum_cache.invalidate()
     return
@@ -14,12 +14,13 @@ from app.crud.user_challenge import (
     get_by_user_and_challenge,
     create as create_uc,
     delete_all,
-    delete_all_for_user
+    delete_all_for_user,
+    reset_challenge_fields_for_subtopic as reset_challenge_fields
 )
 from app.crud.challenge import get_all_challenges_by_subtopic
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.db.models.user_challenges import UserChallenge
-from app.api.auth import get_current_user, get_current_superuser
+from app.api.auth import get_current_user, get_current_reader, get_current_superuser
 from app.db.models.users import User
 
 router = APIRouter(prefix="/user_challenges", tags=["UserChallenges"])
@@ -44,8 +45,8 @@ async def create_user_challenge(
 async def read_user_challenge(
     user_id: int,
     challenge_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_reader)
 ):
     # Users can only view their own user_challenges, superusers can view any
     if not current_user.is_superuser and user_id != current_user.id:
@@ -85,8 +86,8 @@ async def update_user_challenge(
 @router.get("/by_user/{user_id}", response_model=List[UserChallengeRead])
 async def list_user_challenges(
     user_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_reader)
 ):
     # Users can only view their own user_challenges, superusers can view any
     if not current_user.is_superuser and user_id != current_user.id:
@@ -152,32 +153,13 @@ async def reset_challenge_fields_for_subtopic(
         raise HTTPException(status_code=403, detail="Not authorized to reset challenge fields for this user")
     
     try:
-        # Get all challenges for this subtopic
-        challenges = await get_all_challenges_by_subtopic(db, subtopic_id)
-        if not challenges:
-            raise HTTPException(status_code=404, detail="No challenges found for this subtopic")
-        
-        # Reset fields for all user_challenges in this subtopic
-        reset_count = 0
-        for challenge in challenges:
-            user_challenge = await get_by_user_and_challenge(db, user_id, challenge.id)
-            if user_challenge:
-                # Reset all challenge-specific fields to defaults
-                await db.execute(
-                    update(UserChallenge)
-                    .where(UserChallenge.id == user_challenge.id)
-                    .values(
-                        partial_answer=None,
-                        time_spent=0,
-                        hints_used=0,
-                        timer_enabled=None,
-                        hints_enabled=None,
-                        was_cancelled=False
-                    )
-                )
-                reset_count += 1
+        # Reset fields for all user_challenges in this subtopic in one statement
+        reset_ids = await reset_challenge_fields(db, user_id=user_id, subtopic_id=subtopic_id)
+        reset_count = len(reset_ids)
         
-        await db.commit()
+        # Nothing to reset: only report 404 if the subtopic has no challenges at all
+        if not reset_count and not await get_all_challenges_by_subtopic(db, subtopic_id):
+            raise HTTPException(status_code=404, detail="No challenges found for this subtopic")
         
         return {
             "message": f"Successfully reset challenge fields for {reset_count} challenges in subtopic {subtopic_id}",
@@ -186,6 +168,8 @@ async def reset_challenge_fields_for_subtopic(
             "reset_count": reset_count
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error resetting challenge fields: {str(e)}")
\ No newline at end of file
@@ -7,8 +7,8 @@ from app.crud.user_subtopic import (
     get_by_id, get_by_user_and_subtopic, list_for_user,
     create, update, delete, update_user_subtopic_progress
 )
-from app.db.session import get_db
-from app.api.auth import get_current_user, get_current_superuser
+from app.db.session import get_db, get_read_db
+from app.api.auth import get_current_user, get_current_reader, get_current_superuser
 from app.db.models.users import User
 
 router = APIRouter(prefix="/user_subtopics", tags=["UserSubtopics"])
@@ -30,8 +30,8 @@ async def create_user_subtopic(
 async def read_user_subtopic(
     user_id: int,
     subtopic_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_reader)
 ):
     # Users can only view their own user_subtopics, superusers can view any
     if not current_user.is_superuser and user_id != current_user.id:
@@ -62,8 +62,8 @@ async def list_user_subtopics(
     user_id: int,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_reader)
 ):
     # Users can only view their own user_subtopics, superusers can view any
     if not current_user.is_superuser and user_id != current_user.id:
@@ -124,12 +124,9 @@ async def complete_lesson(
             raise HTTPException(status_code=404, detail="User subtopic not found")
         
         user_subtopic.lessons_completed = True
-        await db.commit()
-        await db.refresh(user_subtopic)
         
-        # Update progress
+        # Update progress (commits the flag with it)
         await update_user_subtopic_progress(db, user_id, subtopic_id)
-        await db.refresh(user_subtopic)
         
         return {
             "id": user_subtopic.id,
@@ -169,12 +166,9 @@ async def complete_practice(
         
         # Use the proper update function instead of direct modification
         user_subtopic.practice_completed = True
-        await db.commit()
-        await db.refresh(user_subtopic)
         
-        # Update progress
+        # Update progress (commits the flag with it)
         await update_user_subtopic_progress(db, user_id, subtopic_id)
-        await db.refresh(user_subtopic)
         
         return {
             "id": user_subtopic.id,
@@ -213,14 +207,10 @@ async def complete_challenge(
             raise HTTPException(status_code=404, detail="User subtopic not found")
         
         user_subtopic.challenges_completed = True
-        await db.commit()
-        await db.refresh(user_subtopic)
         
+        # Update progress (commits the flag with it)
         await update_user_subtopic_progress(db, user_id, subtopic_id)
         
-        # Final refresh to ensure the object is in a valid state
-        await db.refresh(user_subtopic)
-        
         return {
             "id": user_subtopic.id,
             "user_id": user_subtopic.user_id,
@@ -4,8 +4,8 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.user_topic import UserTopicRead, UserTopicCreate, UserTopicUpdate
 from app.crud.user_topic import get_by_id, get_by_user_and_topic, list_for_user, create, update, delete
-from app.db.session import get_db
-from app.api.auth import get_current_user, get_current_superuser
+from app.db.session import get_db, get_read_db
+from app.api.auth import get_current_user, get_current_reader, get_current_superuser
 from app.db.models.users import User
 from app.crud.user_subtopic import list_for_user as list_user_subtopics
 from app.schemas.user_subtopic import UserSubtopicRead
@@ -34,8 +34,8 @@ async def create_user_topic(
 async def read_user_topic(
     user_id: int,
     topic_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_reader)
 ):
     # Users can only view their own user_topics, superusers can view any
     if not current_user.is_superuser and user_id != current_user.id:
@@ -52,8 +52,8 @@ async def list_user_topics(
     user_id: int,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_reader)
 ):
     # Users can only view their own user_topics, superusers can view any
     if not current_user.is_superuser and user_id != current_user.id:
@@ -100,8 +100,8 @@ async def list_user_topics(
 async def get_topic_overview(
     user_id: int,
     topic_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_reader)
 ):
     # Users can only view their own data
     if not current_user.is_superuser and user_id != current_user.id:
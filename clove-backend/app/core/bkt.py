@@ -1,11 +1,14 @@
 # app/core/bkt.py
+from typing import Iterable, Optional
+
 from app.core.utils import p_T, p_G, p_S
 
 class BKT:
-    def __init__(self):
-        self.p_T = float(p_T)  # Convert to float
-        self.p_G = float(p_G)  # Convert to float
-        self.p_S = float(p_S)  # Convert to float
+    def __init__(self, p_transit: Optional[float] = None, p_guess: Optional[float] = None, p_slip: Optional[float] = None):
+        # Defaults are the global parameters in app/core/utils.py
+        self.p_T = float(p_T if p_transit is None else p_transit)  # Convert to float
+        self.p_G = float(p_G if p_guess is None else p_guess)  # Convert to float
+        self.p_S = float(p_S if p_slip is None else p_slip)  # Convert to float
 
     def update_knowledge(self, knowledge_prob: float, is_correct: bool) -> float:
         """
@@ -35,3 +38,9 @@ class BKT:
         # Ensure knowledge stays within bounds [0.1, 1.0]
         # Minimum of 0.1 ensures users always have at least 10% baseline knowledge
         return round(max(0.1, min(1.0, updated_knowledge)), 2)
+
+    def replay(self, knowledge_prob: float, outcomes: Iterable[bool]) -> float:
+        """Apply update_knowledge for each attempt outcome in order; returns the final knowledge."""
+        for is_correct in outcomes:
+            knowledge_prob = self.update_knowledge(knowledge_prob, is_correct)
+        return knowledge_prob
@@ -0,0 +1,153 @@
+# app/core/bkt_fit.py
+"""
+Expectation-Maximization fit of the BKT parameters from attempt sequences.
+
+BKT is a two-state hidden Markov model: a skill is unknown (0) or known (1),
+it is learned with probability p_T after each attempt and never forgotten,
+and an attempt is correct with probability p_G when unknown and 1 - p_S
+when known. `fit_bkt` estimates (p_L0, p_T, p_G, p_S) with Baum-Welch.
+
+The sequences are packed into one (n_sequences, max_length) matrix, with a
+mask for the padding, so the scaled forward-backward recursions loop over
+positions only and are vectorized over all sequences of a subtopic at once.
+"""
+from typing import NamedTuple, Sequence
+
+import numpy as np
+
+from app.core.utils import p_T, p_G, p_S
+
+# Usual BKT bounds: above them guess/slip make the model non-identifiable
+# (a "known" state that answers worse than the "unknown" one)
+MAX_GUESS = 0.3
+MAX_SLIP = 0.3
+TRANSIT_BOUNDS = (0.001, 0.5)
+_EPS = 1e-12
+
+
+class BKTFit(NamedTuple):
+    p_init: float
+    p_transit: float
+    p_guess: float
+    p_slip: float
+    log_likelihood: float
+    iterations: int
+    n_sequences: int
+    n_attempts: int
+
+
+def pack_sequences(sequences: Sequence[Sequence[bool]], max_length: int = 0):
+    """
+    (outcomes, mask) matrices of shape (n_sequences, length), left aligned.
+    With max_length > 0 only the first max_length attempts of each sequence are kept.
+    Empty sequences carry no evidence and are dropped.
+    """
+    sequences = [s for s in sequences if len(s)]
+    lengths = np.fromiter((len(s) for s in sequences), dtype=np.int64, count=len(sequences))
+    if max_length > 0:
+        lengths = np.minimum(lengths, max_length)
+    width = int(lengths.max()) if len(lengths) else 0
+    mask = np.arange(width)[None, :] < lengths[:, None]
+    outcomes = np.zeros((len(sequences), width), dtype=bool)
+    outcomes[mask] = np.fromiter(
+        (bool(o) for s, n in zip(sequences, lengths) for o in s[:n]),
+        dtype=bool,
+        count=int(lengths.sum())
+    )
+    return outcomes, mask
+
+
+def _emissions(outcomes: np.ndarray, p_guess: float, p_slip: float) -> np.ndarray:
+    """P(observation | state) as (n, length, 2): [unknown, known]."""
+    emission = np.empty(outcomes.shape + (2,), dtype=np.float64)
+    emission[..., 0] = np.where(outcomes, p_guess, 1 - p_guess)
+    emission[..., 1] = np.where(outcomes, 1 - p_slip, p_slip)
+    return emission
+
+
+def fit_bkt(
+    outcomes: np.ndarray,
+    mask: np.ndarray,
+    p_init: float = 0.3,
+    p_transit: float = p_T,
+    p_guess: float = p_G,
+    p_slip: float = p_S,
+    max_iterations: int = 100,
+    tolerance: float = 1e-4
+) -> BKTFit:
+    """Baum-Welch over packed sequences; starts from the given parameters."""
+    n, length = outcomes.shape
+    n_attempts = int(mask.sum())
+    if n == 0 or n_attempts == 0:
+        return BKTFit(p_init, p_transit, p_guess, p_slip, 0.0, 0, n, 0)
+
+    valid = mask.astype(np.float64)
+    correct = outcomes & mask
+    alpha = np.empty((n, length, 2), dtype=np.float64)
+    beta = np.empty((n, length, 2), dtype=np.float64)
+    scale = np.ones((n, length), dtype=np.float64)
+    previous_ll = -np.inf
+    log_likelihood = 0.0
+
+    for iteration in range(1, max_iterations + 1):
+        emission = _emissions(outcomes, p_guess, p_slip)
+
+        # E-step, forward: alpha[t] = P(state_t | o_1..o_t), scale[t] = P(o_t | o_1..o_t-1)
+        prior = np.array([1 - p_init, p_init])
+        a = prior * emission[:, 0]
+        scale[:, 0] = a.sum(axis=1)
+        alpha[:, 0] = a / scale[:, 0, None]
+        for t in range(1, length):
+            known = alpha[:, t - 1, 1] + alpha[:, t - 1, 0] * p_transit
+            a = np.stack((1 - known, known), axis=1) * emission[:, t]
+            s = a.sum(axis=1)
+            m = mask[:, t]
+            scale[:, t] = np.where(m, s, 1.0)
+            alpha[:, t] = np.where(m[:, None], a / np.maximum(s, _EPS)[:, None], alpha[:, t - 1])
+
+        # Backward, scaled with the same factors; padding positions keep beta = 1
+        beta[:, length - 1] = 1.0
+        for t in range(length - 2, -1, -1):
+            b = emission[:, t + 1] * beta[:, t + 1] / scale[:, t + 1, None]
+            from_unknown = (1 - p_transit) * b[:, 0] + p_transit * b[:, 1]
+            step = np.stack((from_unknown, b[:, 1]), axis=1)
+            beta[:, t] = np.where(mask[:, t + 1, None], step, 1.0)
+
+        log_likelihood = float(np.log(np.maximum(scale, _EPS)).sum())
+
+        # Posteriors: gamma[t] = P(state_t | all), learned[t] = P(unknown_t, known_t+1 | all)
+        gamma = alpha * beta
+        gamma /= np.maximum(gamma.sum(axis=2, keepdims=True), _EPS)
+        gamma *= valid[..., None]
+        transitions = mask[:, 1:]
+        learned = (
+            alpha[:, :-1, 0] * p_transit * emission[:, 1:, 1] * beta[:, 1:, 1]
+            / np.maximum(scale[:, 1:], _EPS)
+        ) * transitions
+
+        # M-step
+        unknown = gamma[..., 0]
+        known = gamma[..., 1]
+        p_init = float(gamma[:, 0, 1].mean())
+        unknown_before = (unknown[:, :-1] * transitions).sum()
+        if unknown_before > _EPS:
+            p_transit = float(learned.sum() / unknown_before)
+        p_guess = float((unknown * correct).sum() / max(unknown.sum(), _EPS))
+        p_slip = float((known * (mask & ~outcomes)).sum() / max(known.sum(), _EPS))
+
+        p_init = min(max(p_init, _EPS), 1 - _EPS)
+        p_transit = min(max(p_transit, TRANSIT_BOUNDS[0]), TRANSIT_BOUNDS[1])
+        p_guess = min(max(p_guess, _EPS), MAX_GUESS)
+        p_slip = min(max(p_slip, _EPS), MAX_SLIP)
+
+        if log_likelihood - previous_ll < tolerance * n_attempts:
+            break
+        previous_ll = log_likelihood
+
+    return BKTFit(p_init, p_transit, p_guess, p_slip, log_likelihood, iteration, n, n_attempts)
+
+
+def fit_sequences(sequences: Sequence[Sequence[bool]], max_length: int = 0, **kwargs) -> BKTFit:
+    """Pack and fit; see fit_bkt for the keyword arguments."""
+    outcomes, mask = pack_sequences(sequences, max_length)
+    return fit_bkt(outcomes, mask, **kwargs)
@@ -16,6 +16,35 @@ class Settings(BaseSettings):
     DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
     DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
     
+    # Optional read replica for read-only endpoints (get_read_db)
+    DATABASE_REPLICA_URL: str = os.getenv("DATABASE_REPLICA_URL", "")
+    DB_REPLICA_POOL_SIZE: int = int(os.getenv("DB_REPLICA_POOL_SIZE", "20"))
+    DB_REPLICA_MAX_OVERFLOW: int = int(os.getenv("DB_REPLICA_MAX_OVERFLOW", "10"))
+    DB_REPLICA_MAX_LAG_SECONDS: int = int(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+    DB_REPLICA_CHECK_INTERVAL_SECONDS: int = int(os.getenv("DB_REPLICA_CHECK_INTERVAL_SECONDS", "5"))
+    # Carried by the client in the signed X-Last-Write header, so every worker honours it
+    DB_READ_YOUR_WRITES_SECONDS: int = int(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "10"))
+    
+    # Connection budget shared by all worker processes (0 = use the pool sizes above)
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "1"))
+    DB_CONNECTION_BUDGET: int = int(os.getenv("DB_CONNECTION_BUDGET", "0"))
+    DB_REPLICA_CONNECTION_BUDGET: int = int(os.getenv("DB_REPLICA_CONNECTION_BUDGET", "0"))
+    DB_RESERVED_CONNECTIONS: int = int(os.getenv("DB_RESERVED_CONNECTIONS", "5"))
+    
+    # Request admission in front of the pool (pool_governor)
+    DB_ADMISSION_CONCURRENCY: int = int(os.getenv("DB_ADMISSION_CONCURRENCY", "0"))
+    DB_ADMISSION_QUEUE_LIMIT: int = int(os.getenv("DB_ADMISSION_QUEUE_LIMIT", "100"))
+    DB_ADMISSION_LOW_RESERVED_SLOTS: int = int(os.getenv("DB_ADMISSION_LOW_RESERVED_SLOTS", "0"))
+    DB_ADMISSION_WAIT_MS_CRITICAL: int = int(os.getenv("DB_ADMISSION_WAIT_MS_CRITICAL", "5000"))
+    DB_ADMISSION_WAIT_MS_NORMAL: int = int(os.getenv("DB_ADMISSION_WAIT_MS_NORMAL", "2000"))
+    DB_ADMISSION_WAIT_MS_LOW: int = int(os.getenv("DB_ADMISSION_WAIT_MS_LOW", "500"))
+    
+    # Server process (python -m app.server)
+    PREPARE_DATABASE_ON_STARTUP: bool = os.getenv("PREPARE_DATABASE_ON_STARTUP", "true").lower() == "true"
+    SERVER_KEEP_ALIVE_SECONDS: int = int(os.getenv("SERVER_KEEP_ALIVE_SECONDS", "75"))
+    SERVER_BACKLOG: int = int(os.getenv("SERVER_BACKLOG", "2048"))
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = int(os.getenv("SERVER_GRACEFUL_SHUTDOWN_SECONDS", "30"))
+    
     # JWT settings
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY")
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
@@ -28,6 +57,34 @@ class Settings(BaseSettings):
     # Rate limiting
     RATE_LIMIT_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_PER_MINUTE", "500"))
     
+    # Curriculum response cache (topics, subtopics, lessons, challenges)
+    CURRICULUM_CACHE_TTL_SECONDS: int = int(os.getenv("CURRICULUM_CACHE_TTL_SECONDS", "300"))
+    CURRICULUM_CACHE_MAX_AGE: int = int(os.getenv("CURRICULUM_CACHE_MAX_AGE", "60"))
+    
+    # Users per chunk when seeding records for a newly added topic/subtopic
+    FANOUT_BATCH_SIZE: int = int(os.getenv("FANOUT_BATCH_SIZE", "5000"))
+    
+    # Challenge session registry (validate-session heartbeats)
+    SESSION_REGISTRY_BACKEND: str = os.getenv("SESSION_REGISTRY_BACKEND", "auto")
+    SESSION_REGISTRY_TTL_SECONDS: int = int(os.getenv("SESSION_REGISTRY_TTL_SECONDS", "30"))
+    SESSION_FLUSH_INTERVAL_SECONDS: int = int(os.getenv("SESSION_FLUSH_INTERVAL_SECONDS", "15"))
+    
+    # Stale challenge session reaper
+    SESSION_IDLE_TIMEOUT_MINUTES: int = int(os.getenv("SESSION_IDLE_TIMEOUT_MINUTES", "60"))
+    SESSION_REAPER_INTERVAL_SECONDS: int = int(os.getenv("SESSION_REAPER_INTERVAL_SECONDS", "300"))
+    SESSION_REAPER_BATCH_SIZE: int = int(os.getenv("SESSION_REAPER_BATCH_SIZE", "1000"))
+    
+    # Monthly challenge_attempts partitions created ahead at startup and on every check
+    CHALLENGE_ATTEMPT_PARTITION_MONTHS_AHEAD: int = int(os.getenv("CHALLENGE_ATTEMPT_PARTITION_MONTHS_AHEAD", "3"))
+    CHALLENGE_ATTEMPT_PARTITION_CHECK_INTERVAL_SECONDS: int = int(os.getenv("CHALLENGE_ATTEMPT_PARTITION_CHECK_INTERVAL_SECONDS", "3600"))
+    
+    # Fitted per-subtopic BKT parameters (scripts/fit_bkt_parameters.py)
+    BKT_USE_FITTED_PARAMETERS: bool = os.getenv("BKT_USE_FITTED_PARAMETERS", "true").lower() == "true"
+    BKT_PARAMETER_CACHE_TTL_SECONDS: int = int(os.getenv("BKT_PARAMETER_CACHE_TTL_SECONDS", "600"))
+    
+    # Global seed of the per-user_subtopic random streams (app/core/rng.py)
+    RL_RANDOM_SEED: str = os.getenv("RL_RANDOM_SEED", "clove")
+    
     # API settings
     API_V1_PREFIX: str = "/api/v1"
     PROJECT_NAME: str = "CLOVE Learning Backend"
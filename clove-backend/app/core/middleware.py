@@ -7,6 +7,8 @@ import logging
 from typing import Callable
 import asyncio
 from app.core.config import settings
+from app.db.pool_governor import admission
+from app.db.session import WRITE_MARKER_HEADER, has_writes, read_router
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +56,83 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
 
         return await call_next(request)
 
+class AdmissionMiddleware(BaseHTTPMiddleware):
+    """
+    Admits requests through the pool governor: at most as many run at once as
+    the worker has database connections, the rest queue by priority and get a
+    503 with Retry-After once their lane's wait is over.
+    """
+    # Path fragments of work a learner is waiting on: answers, attempts, selection
+    critical_paths = (
+        "/submit-answer",  # also submit-answers
+        "/submit-single-answer",
+        "/select-challenge/",
+        "/activate-session/",
+        "/validate-session/",
+        "/complete-lesson",
+        "/complete-practice",
+        "/complete-challenge",
+        "/auth/login",
+        "/auth/refresh",
+    )
+    # Dashboards and stats: GETs that can be retried a little later
+    low_priority_prefixes = (
+        "/statistics",
+        "/user_topics",
+        "/q_values/me",
+        "/challenge_attempts/me",
+        "/challenge_attempts/sessions/metrics",
+        "/assessment_questions/topic/",
+    )
+    exempt_paths = ("/health",)
+
+    def lane_for(self, request: Request) -> str:
+        path = request.url.path
+        if request.method == "POST" and path.rstrip("/") == "/challenge_attempts":
+            return "critical"
+        if any(fragment in path for fragment in self.critical_paths):
+            return "critical"
+        if request.method == "GET" and path.startswith(self.low_priority_prefixes):
+            # Retention-test status/results are dashboards; the test itself is not
+            if path.startswith("/assessment_questions/topic/") and not path.endswith(("/status", "/results")):
+                return "normal"
+            return "low"
+        return "normal"
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        if request.method == "OPTIONS" or request.url.path.startswith(self.exempt_paths):
+            return await call_next(request)
+
+        lane = self.lane_for(request)
+        if not await admission.acquire(lane):
+            return JSONResponse(
+                status_code=503,
+                content={"detail": "The server is busy. Please try again shortly."},
+                headers={
+                    "Retry-After": str(admission.lanes[lane].retry_after_seconds),
+                    "X-Queue-Depth": str(admission.queue_depth()),
+                }
+            )
+        try:
+            return await call_next(request)
+        finally:
+            admission.release()
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """
+    Gives a signed X-Last-Write marker to a user whose request wrote through
+    get_db. The client sends it back, and get_current_reader on any worker then
+    reads from the primary for DB_READ_YOUR_WRITES_SECONDS.
+    """
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        response = await call_next(request)
+        session = getattr(request.state, "db_session", None)
+        if session is not None and read_router.replica is not None:
+            user_id = session.info.get("user_id")
+            if user_id is not None and has_writes(session):
+                response.headers[WRITE_MARKER_HEADER] = read_router.write_marker(user_id)
+        return response
+
 class LoggingMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         start_time = time.time()
@@ -91,6 +170,12 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         return response
 
 def setup_middleware(app):
+    # Admission control, innermost so turned-away requests still get CORS headers
+    app.add_middleware(AdmissionMiddleware)
+    
+    # Read-your-writes marker for the next reads, whichever worker serves them
+    app.add_middleware(ReadYourWritesMiddleware)
+    
     # CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -98,7 +183,7 @@ def setup_middleware(app):
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
         allow_headers=["*"],
-        expose_headers=["Content-Length", "X-Request-ID"],
+        expose_headers=["Content-Length", "X-Request-ID", "ETag", WRITE_MARKER_HEADER],
         max_age=3600
     )
     
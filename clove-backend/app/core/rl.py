@@ -1,19 +1,22 @@
 # app/core/rl.py
 
 import random
+from typing import Optional
 from app.core.utils import (
     alpha, gamma, epsilon, epsilon_decay, min_epsilon,
     CHALLENGE_TYPES, initialize_q_table
 )
 
 class QLearning:
-    def __init__(self):
+    def __init__(self, rng: Optional[random.Random] = None):
         self.alpha = float(alpha)
         self.gamma = float(gamma)
         self.epsilon = float(epsilon)  # Convert to float
         self.epsilon_decay = float(epsilon_decay)
         self.min_epsilon = float(min_epsilon)
         self.q_table = {}  # keys: state tuples, values: dict(action→q)
+        # Exploration and new states draw from this (an app.core.rng stream)
+        self.rng = rng if rng is not None else random.Random()
 
     def get_q_values(self, state):
         """Get Q-values for a given state"""
@@ -23,7 +26,7 @@ class QLearning:
         """Initialize Q-values for a state if it doesn't exist"""
         if state not in self.q_table:
             actions = actions or CHALLENGE_TYPES
-            self.q_table[state] = {action: random.uniform(-1, 1) for action in actions}
+            self.q_table[state] = {action: self.rng.uniform(-1, 1) for action in actions}
 
     def select_action(self, state):
         """
@@ -35,10 +38,10 @@ class QLearning:
         """
         state_key = str(state)
         if state_key not in self.q_table:
-            self.q_table[state_key] = {action: random.uniform(-1, 1) for action in CHALLENGE_TYPES}
+            self.q_table[state_key] = {action: self.rng.uniform(-1, 1) for action in CHALLENGE_TYPES}
         
-        if random.random() < self.epsilon:
-            return random.choice(CHALLENGE_TYPES)  # Exploration
+        if self.rng.random() < self.epsilon:
+            return self.rng.choice(CHALLENGE_TYPES)  # Exploration
         return max(self.q_table[state_key], key=self.q_table[state_key].get)  # Exploitation
 
     def update_q_value(self, current_state, action, reward, next_state):
@@ -53,9 +56,9 @@ class QLearning:
         
         # Initialize states if they don't exist
         if current_state_key not in self.q_table:
-            self.q_table[current_state_key] = {action: random.uniform(-1, 1) for action in CHALLENGE_TYPES}
+            self.q_table[current_state_key] = {action: self.rng.uniform(-1, 1) for action in CHALLENGE_TYPES}
         if next_state_key not in self.q_table:
-            self.q_table[next_state_key] = {action: random.uniform(-1, 1) for action in CHALLENGE_TYPES}
+            self.q_table[next_state_key] = {action: self.rng.uniform(-1, 1) for action in CHALLENGE_TYPES}
         
         # Get current Q-value and max future Q-value
         old_q = self.q_table[current_state_key][action]
@@ -0,0 +1,216 @@
+# app/core/rl_kernel.py
+"""
+Table-driven state transition and reward kernel for the adaptive engine.
+
+The RL state space is tiny: 3 mastery levels x 3 streak-flag combinations,
+with 3 actions (challenge types). Everything that `classify_mastery`,
+`determine_streak_flags` and `calculate_reward` compute by branching is
+precomputed here once from those same functions, so:
+
+- `transition()` evaluates one update (the online path in the engine) with
+  plain tuple lookups;
+- `transition_batch()` evaluates arrays of updates with NumPy indexing, for
+  offline simulation and policy evaluation. NumPy is only imported when a
+  batch function is first called; the online path does not need it.
+
+States are numbered `state_index = (mastery - 1) * 3 + flag_index`, in the
+order of `initialize_q_table`: flag 0 = (timer 0, hint 0), 1 = (0, 1), 2 = (1, 0).
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterable, NamedTuple, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+from app.core.utils import (
+    CHALLENGE_TYPES, MASTERY_THRESHOLDS, p_T, p_G, p_S,
+    calculate_reward, determine_streak_flags
+)
+
+FLAGS: Tuple[Tuple[int, int], ...] = ((0, 0), (0, 1), (1, 0))  # (timer_active, hint_active)
+STATES: Tuple[Tuple[int, int, int], ...] = tuple(
+    (mastery, timer, hint) for mastery in (1, 2, 3) for timer, hint in FLAGS
+)
+STATE_KEYS: Tuple[str, ...] = tuple(str(state) for state in STATES)  # keys of the stored Q-table
+ACTIONS: Tuple[str, ...] = tuple(CHALLENGE_TYPES)
+ACTION_INDEX: Dict[str, int] = {action: i for i, action in enumerate(ACTIONS)}
+
+_THRESHOLDS = (MASTERY_THRESHOLDS["beginner"], MASTERY_THRESHOLDS["intermediate"])
+_FLAG_INDEX_OF = {flags: i for i, flags in enumerate(FLAGS)}
+
+# Streaks only matter up to 2, so they are clipped to 0..2 before lookup.
+# FLAG_INDEX[incorrect][correct] -> flag index of determine_streak_flags
+FLAG_INDEX: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(_FLAG_INDEX_OF[determine_streak_flags(incorrect, correct)] for correct in range(3))
+    for incorrect in range(3)
+)
+# NEXT_FLAG_INDEX[incorrect][correct][is_correct] -> flag index once the current attempt is rolled in
+NEXT_FLAG_INDEX: Tuple[Tuple[Tuple[int, ...], ...], ...] = tuple(
+    tuple(
+        tuple(
+            _FLAG_INDEX_OF[determine_streak_flags(min(incorrect + 1 - c, 2), min(correct + c, 2))]
+            for c in range(2)
+        )
+        for correct in range(3)
+    )
+    for incorrect in range(3)
+)
+# Reward without the hint term: REWARD_BASE[is_correct][timer_active][on_time]
+REWARD_BASE: Tuple[Tuple[Tuple[float, ...], ...], ...] = tuple(
+    tuple(
+        tuple(calculate_reward(bool(c), 0, timer, on_time) for on_time in range(2))
+        for timer in range(2)
+    )
+    for c in range(2)
+)
+HINT_PENALTY = 0.5 / 3  # per hint used, as in calculate_reward
+_TIMER_OF_FLAG = tuple(timer for timer, _ in FLAGS)
+
+
+class _NumpyTables(NamedTuple):
+    flag_index: np.ndarray
+    next_flag_index: np.ndarray
+    reward_base: np.ndarray
+    timer_of_flag: np.ndarray
+    thresholds: np.ndarray
+
+
+@lru_cache(maxsize=None)
+def _np_tables() -> _NumpyTables:
+    """NumPy views of the same tables for the batch functions, built on first use."""
+    import numpy as np
+
+    return _NumpyTables(
+        flag_index=np.array(FLAG_INDEX, dtype=np.int8),
+        next_flag_index=np.array(NEXT_FLAG_INDEX, dtype=np.int8),
+        reward_base=np.array(REWARD_BASE, dtype=np.float64),
+        timer_of_flag=np.array(_TIMER_OF_FLAG, dtype=np.int8),
+        thresholds=np.array(_THRESHOLDS, dtype=np.float64),
+    )
+
+
+class Transition(NamedTuple):
+    state: Tuple[int, int, int]
+    next_state: Tuple[int, int, int]
+    reward: float
+
+
+def count_streaks(successes: Iterable[bool]) -> Tuple[int, int]:
+    """
+    (correct_streak, incorrect_streak) over attempt outcomes, in the order given
+    (the engine and selection pass the most recent attempts first).
+    """
+    correct_streak = incorrect_streak = 0
+    for is_successful in successes:
+        if is_successful:
+            correct_streak += 1
+            incorrect_streak = 0
+        else:
+            incorrect_streak += 1
+            correct_streak = 0
+    return correct_streak, incorrect_streak
+
+
+def mastery_index(p_kn: float) -> int:
+    """0-based mastery level; same boundaries as classify_mastery (<= 0.33, <= 0.66)."""
+    return bisect_left(_THRESHOLDS, p_kn)
+
+
+def transition(
+    old_know: float,
+    new_know: float,
+    incorrect_streak: int,
+    correct_streak: int,
+    is_correct: bool,
+    hints_used: int,
+    on_time: int
+) -> Transition:
+    """
+    Current state, next state and reward of one challenge attempt.
+    Streaks are those of the previous attempts; the next state rolls in this one.
+    """
+    c = int(is_correct)
+    incorrect = min(incorrect_streak, 2)
+    correct = min(correct_streak, 2)
+    flag = FLAG_INDEX[incorrect][correct]
+    state = mastery_index(old_know) * 3 + flag
+    next_state = mastery_index(new_know) * 3 + NEXT_FLAG_INDEX[incorrect][correct][c]
+    reward = REWARD_BASE[c][_TIMER_OF_FLAG[flag]][on_time] - HINT_PENALTY * hints_used
+    return Transition(STATES[state], STATES[next_state], reward)
+
+
+def mastery_index_batch(p_kn: np.ndarray) -> np.ndarray:
+    import numpy as np
+
+    return np.searchsorted(_np_tables().thresholds, np.asarray(p_kn, dtype=np.float64), side="left")
+
+
+def transition_batch(
+    old_know: np.ndarray,
+    new_know: np.ndarray,
+    incorrect_streak: np.ndarray,
+    correct_streak: np.ndarray,
+    is_correct: np.ndarray,
+    hints_used: np.ndarray,
+    on_time: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized `transition` over equally shaped arrays.
+    Returns (state_index, next_state_index, reward) arrays; index into STATES.
+    """
+    import numpy as np
+
+    tables = _np_tables()
+    c = np.asarray(is_correct).astype(np.int8)
+    incorrect = np.minimum(np.asarray(incorrect_streak), 2)
+    correct = np.minimum(np.asarray(correct_streak), 2)
+    flag = tables.flag_index[incorrect, correct]
+    state = mastery_index_batch(old_know) * 3 + flag
+    next_state = mastery_index_batch(new_know) * 3 + tables.next_flag_index[incorrect, correct, c]
+    reward = (
+        tables.reward_base[c, tables.timer_of_flag[flag], np.asarray(on_time).astype(np.int8)]
+        - HINT_PENALTY * np.asarray(hints_used, dtype=np.float64)
+    )
+    return state, next_state, reward
+
+
+def bkt_update_batch(
+    knowledge: np.ndarray,
+    is_correct: np.ndarray,
+    p_transit: float = p_T,
+    p_guess: float = p_G,
+    p_slip: float = p_S
+) -> np.ndarray:
+    """Vectorized BKT.update_knowledge, including its [0.1, 1.0] bounds and rounding."""
+    import numpy as np
+
+    k = np.clip(np.asarray(knowledge, dtype=np.float64), 0.0, 1.0)
+    correct = np.asarray(is_correct, dtype=bool)
+    numerator = np.where(correct, k * (1 - p_slip), k * p_slip)
+    denominator = numerator + (1 - k) * np.where(correct, p_guess, 1 - p_guess)
+    posterior = np.divide(numerator, denominator, out=np.zeros_like(k), where=denominator != 0)
+    updated = posterior + (1 - posterior) * p_transit
+    return np.round(np.clip(updated, 0.1, 1.0), 2)
+
+
+def q_table_to_array(q_table: Dict[str, Dict[str, float]]) -> np.ndarray:
+    """Stored Q-table dict -> (9, 3) array in STATES x ACTIONS order; missing entries are 0."""
+    import numpy as np
+
+    q = np.zeros((len(STATES), len(ACTIONS)), dtype=np.float64)
+    for s, key in enumerate(STATE_KEYS):
+        values = q_table.get(key, {})
+        for a, action in enumerate(ACTIONS):
+            q[s, a] = values.get(action, 0.0)
+    return q
+
+
+def array_to_q_table(q: np.ndarray) -> Dict[str, Dict[str, float]]:
+    """(9, 3) array -> Q-table dict keyed like the stored one."""
+    return {
+        key: {action: float(q[s, a]) for a, action in enumerate(ACTIONS)}
+        for s, key in enumerate(STATE_KEYS)
+    }
@@ -0,0 +1,33 @@
+# app/core/rng.py
+"""
+Seeded random streams for the adaptive engine.
+
+Each draw for a user_subtopic comes from its own random.Random. The generator
+is seeded from RL_RANDOM_SEED, the user_subtopic id, what the draw is for, and
+where in that user_subtopic's history it happens, e.g. the take and the number
+of attempts in it. So the same history always gives the same initial Q-table
+and the same choices, in the API and in the simulator. No generator state has
+to be stored, and nothing is shared with other users or with the global
+`random` module.
+
+    initialize_q_table(stream(user_subtopic_id, "init"))
+    QLearning(rng=stream(user_subtopic_id, "select", take, attempt_index))
+"""
+import random
+from typing import Optional
+
+
+def stream(user_subtopic_id, purpose: str, *position, seed: Optional[str] = None) -> random.Random:
+    """
+    Generator for one purpose ("init", "select", "update") at one position.
+    user_subtopic_id may be any key that identifies a learner's run, and seed
+    replaces RL_RANDOM_SEED (the simulator passes its own for both, so it
+    does not need the app settings).
+    """
+    if seed is None:
+        # Deferred so scripts that pass a seed don't load (and validate) the settings
+        from app.core.config import settings
+        seed = settings.RL_RANDOM_SEED
+    key = ":".join(str(part) for part in (seed, user_subtopic_id, purpose, *position))
+    # str seeds are hashed with SHA-512, the same on every platform and run
+    return random.Random(key)
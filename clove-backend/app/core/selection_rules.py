@@ -0,0 +1,32 @@
+# app/core/selection_rules.py
+"""
+Selection rules shared by app/services/selection.py and the offline policy
+simulator. No database imports, so the simulator runs without SQLAlchemy.
+"""
+from typing import Any, Iterable, List, Mapping, Tuple
+
+# Difficulty of each position in a non-adaptive take (2 easy, 2 medium, 1 hard)
+NON_ADAPTIVE_SEQUENCE = ("easy", "easy", "medium", "medium", "hard")
+
+
+def partition_by_progress(
+    candidates: Iterable[Any],
+    progress: Mapping[int, Any]
+) -> Tuple[List[Any], List[Any], List[Any], List[Any]]:
+    """
+    Split candidate challenges into (pending, unsolved, solved, other) by the
+    user's progress on each: `progress[challenge.id]` is the UserChallenge row
+    (anything with `status` and `is_solved`) or missing if never opened.
+    """
+    pending, unsolved, solved, other = [], [], [], []
+    for c in candidates:
+        uc = progress.get(c.id)
+        if not uc or uc.status == 'pending':
+            pending.append(c)
+        elif uc.status == 'completed' and not uc.is_solved:
+            unsolved.append(c)
+        elif uc.status == 'completed' and uc.is_solved:
+            solved.append(c)
+        else:
+            other.append(c)
+    return pending, unsolved, solved, other
@@ -1,5 +1,6 @@
 # app/core/utils.py
-import numpy as np
+import random
+from typing import Optional
 
 # BKT Parameters
 p_T = 0.1  # Transition probability
@@ -96,9 +97,10 @@ def get_difficulty(mastery: int) -> str:
     """Get difficulty level based on mastery as in pseudocode"""
     return DIFFICULTY_MAP[mastery]
 
-def initialize_q_table():
+def initialize_q_table(rng: Optional[random.Random] = None):
     """
-    Initialize Q-table exactly as in pseudocode:
+    Initialize Q-table as in pseudocode, drawing from rng (a seeded
+    app.core.rng stream; a fresh unseeded generator if omitted):
     states = [
         (1,0,0), (1,0,1), (1,1,0),  # Beginner states
         (2,0,0), (2,0,1), (2,1,0),  # Intermediate states
@@ -114,7 +116,8 @@ def initialize_q_table():
         (2, 0, 0), (2, 0, 1), (2, 1, 0),  # Intermediate states
         (3, 0, 0), (3, 0, 1), (3, 1, 0)   # Advanced states
     ]
+    rng = rng if rng is not None else random.Random()
     return {
-        str(state): {ctype: np.random.uniform(-1, 1) for ctype in CHALLENGE_TYPES}
+        str(state): {ctype: rng.uniform(-1, 1) for ctype in CHALLENGE_TYPES}
         for state in states
     }
\ No newline at end of file
@@ -1,18 +1,25 @@
 # app/crud/assessment_question.py
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-from sqlalchemy import func
+from sqlalchemy import func, and_
 import random
 from typing import List, Dict, Any, Optional
 from app.db.models.assessment_questions import AssessmentQuestion
-from app.db.models.subtopics import Subtopic
 from app.db.models.user_topics import UserTopic
+from app.db.models.pre_assessments import PreAssessment
+from app.db.models.post_assessments import PostAssessment
 from app.schemas.assessment_question import AssessmentQuestionCreate, AssessmentQuestionUpdate
 from app.crud.pre_assessment import list_for_user_topic as get_pre_assessment_for_user_topic
 from app.crud.post_assessment import list_for_user_topic as get_post_assessment_for_user_topic
 from app.db.models.retention_tests import RetentionTest
 from app.schemas.retention_test import RetentionTestSubmission, RetentionTestResult
+from app.services.question_bank import (
+    BankQuestion,
+    get_question_bank,
+    invalidate_question_bank,
+    RETENTION_QUESTION_START_ID,
+    RETENTION_TEST_SIZE
+)
 
 async def get_by_id(db: AsyncSession, question_id: int) -> AssessmentQuestion | None:
     result = await db.execute(select(AssessmentQuestion).where(AssessmentQuestion.id == question_id))
@@ -22,7 +29,7 @@ async def list_for_subtopic(db: AsyncSession, subtopic_id: int, skip: int = 0, l
     result = await db.execute(
         select(AssessmentQuestion)
         .where(AssessmentQuestion.subtopic_id == subtopic_id)
-        .where(AssessmentQuestion.id < 136)  # Exclude retention test questions (IDs 136+)
+        .where(AssessmentQuestion.id < RETENTION_QUESTION_START_ID)  # Exclude retention test questions
         .offset(skip).limit(limit)
     )
     return result.scalars().all()
@@ -35,7 +42,7 @@ async def create(db: AsyncSession, ques_in: AssessmentQuestionCreate) -> Assessm
     )
     db.add(new_q)
     await db.commit()
-    await db.refresh(new_q)
+    invalidate_question_bank()
     
     return new_q
 
@@ -44,12 +51,13 @@ async def update(db: AsyncSession, ques_db: AssessmentQuestion, ques_in: Assessm
     ques_db.difficulty = ques_in.difficulty
     db.add(ques_db)
     await db.commit()
-    await db.refresh(ques_db)
+    invalidate_question_bank()
     return ques_db
 
 async def delete(db: AsyncSession, ques_db: AssessmentQuestion) -> None:
     await db.delete(ques_db)
     await db.commit()
+    invalidate_question_bank()
 
 async def get_questions_by_ids(db: AsyncSession, question_ids: list[int]) -> List[AssessmentQuestion]:
     """Get multiple assessment questions by their IDs, preserving order."""
@@ -61,35 +69,22 @@ async def get_questions_by_ids(db: AsyncSession, question_ids: list[int]) -> Lis
     return [questions_map[qid] for qid in question_ids if qid in questions_map]
 
 # New functions for randomized questions logic
-async def get_subtopics_for_topic(db: AsyncSession, topic_id: int) -> List[Subtopic]:
-    """Get all subtopics for a given topic"""
-    result = await db.execute(select(Subtopic).where(Subtopic.topic_id == topic_id))
-    return result.scalars().all()
-
-async def get_questions_for_subtopics(db: AsyncSession, subtopic_ids: List[int]) -> List[AssessmentQuestion]:
-    """Get all questions for given subtopic IDs with subtopic relationship loaded"""
-    result = await db.execute(
-        select(AssessmentQuestion)
-        .where(AssessmentQuestion.subtopic_id.in_(subtopic_ids))
-        .where(AssessmentQuestion.id < 136)  # Exclude retention test questions (IDs 136+)
-        .options(selectinload(AssessmentQuestion.subtopic))
-    )
-    return result.scalars().all()
-
 async def get_randomized_questions_for_topic(
     db: AsyncSession, 
     topic_id: int, 
     user_id: int,
     assessment_type: str,
     questions_per_subtopic: int = 5
-) -> List[AssessmentQuestion]:
+) -> List[BankQuestion]:
     """
     Get randomized assessment questions from a topic.
     - For post-assessments, it reuses the full set of questions from a completed pre-assessment.
     - For pre-assessments, it automatically provides the remaining number of questions for an incomplete attempt,
       while maintaining the subtopic balance.
+    Questions are sampled from the in-memory question bank; only assessment progress is read from the database.
     """
-    
+    bank = await get_question_bank(db)
+
     # Get pre-assessment data once (needed for both pre and post assessment logic)
     pre_assessments = await get_pre_assessment_for_user_topic(db, user_id, topic_id)
     pre_assessment = pre_assessments[0] if pre_assessments else None
@@ -101,7 +96,7 @@ async def get_randomized_questions_for_topic(
         
         # Get the exact same questions that were used in pre-assessment
         question_ids_to_reuse = [int(qid) for qid in pre_assessment.questions_answers_iscorrect.keys()]
-        reused_questions = await get_questions_by_ids(db, question_ids_to_reuse)
+        reused_questions = bank.get_many(question_ids_to_reuse)
         
         # Check if user has partial progress in post-assessment
         post_assessments = await get_post_assessment_for_user_topic(db, user_id, topic_id)
@@ -119,87 +114,12 @@ async def get_randomized_questions_for_topic(
     # For pre-assessments, handle resume logic
     if assessment_type == 'pre':
         if pre_assessment and pre_assessment.questions_answers_iscorrect:
-            # User has partial progress - return only unanswered questions
-            answered_question_ids = set(int(qid) for qid in pre_assessment.questions_answers_iscorrect.keys())
-            answered_count_by_subtopic = {}
-            
-            # Count answered questions per subtopic
-            answered_questions = await get_questions_by_ids(db, list(answered_question_ids))
-            for q in answered_questions:
-                answered_count_by_subtopic[q.subtopic_id] = answered_count_by_subtopic.get(q.subtopic_id, 0) + 1
-            
-            # Get all subtopics and questions for this topic
-            subtopics = await get_subtopics_for_topic(db, topic_id)
-            if not subtopics:
-                raise ValueError(f"No subtopics found for topic_id {topic_id}")
-            
-            all_questions = await get_questions_for_subtopics(db, subtopic_ids=[s.subtopic_id for s in subtopics])
-            
-            # Filter out answered questions and group by subtopic
-            unanswered_questions = [q for q in all_questions if q.id not in answered_question_ids]
-            questions_by_subtopic = {}
-            for question in unanswered_questions:
-                subtopic_id = question.subtopic_id
-                if subtopic_id not in questions_by_subtopic:
-                    questions_by_subtopic[subtopic_id] = []
-                questions_by_subtopic[subtopic_id].append(question)
-            
-            # Select remaining questions needed for each subtopic
-            selected_questions = []
-            
-            for subtopic in subtopics:
-                sid = subtopic.subtopic_id
-                answered_count = answered_count_by_subtopic.get(sid, 0)
-                needed_count = questions_per_subtopic - answered_count
+            # User has partial progress - return only the remaining questions per subtopic
+            answered_question_ids = [int(qid) for qid in pre_assessment.questions_answers_iscorrect.keys()]
+            return bank.sample_assessment(topic_id, questions_per_subtopic, answered_ids=answered_question_ids)
 
-                if needed_count > 0:
-                    available_for_subtopic = questions_by_subtopic.get(sid, [])
-                    if len(available_for_subtopic) < needed_count:
-                        raise ValueError(
-                            f"Not enough new questions available for subtopic {sid} to create a balanced assessment. "
-                            f"Need {needed_count}, but only {len(available_for_subtopic)} found."
-                        )
-                    
-                    selected_for_subtopic = random.sample(available_for_subtopic, needed_count)
-                    selected_questions.extend(selected_for_subtopic)
-            
-            # Shuffle final selection for randomness
-            random.shuffle(selected_questions)
-            
-            return selected_questions
-        
-        else:
-            # No pre-assessment exists yet - create new one with balanced questions
-            subtopics = await get_subtopics_for_topic(db, topic_id)
-            if not subtopics:
-                raise ValueError(f"No subtopics found for topic_id {topic_id}")
-            
-            all_questions = await get_questions_for_subtopics(db, subtopic_ids=[s.subtopic_id for s in subtopics])
-            
-            # Group questions by subtopic and select balanced set
-            questions_by_subtopic = {}
-            for question in all_questions:
-                subtopic_id = question.subtopic_id
-                if subtopic_id not in questions_by_subtopic:
-                    questions_by_subtopic[subtopic_id] = []
-                questions_by_subtopic[subtopic_id].append(question)
-            
-            selected_questions = []
-            for subtopic in subtopics:
-                sid = subtopic.subtopic_id
-                available_for_subtopic = questions_by_subtopic.get(sid, [])
-                
-                if len(available_for_subtopic) < questions_per_subtopic:
-                    raise ValueError(
-                        f"Not enough questions available for subtopic {sid}. "
-                        f"Need {questions_per_subtopic}, but only {len(available_for_subtopic)} found."
-                    )
-                
-                selected_for_subtopic = random.sample(available_for_subtopic, questions_per_subtopic)
-                selected_questions.extend(selected_for_subtopic)
-            
-            random.shuffle(selected_questions)
-            return selected_questions
+        # No pre-assessment exists yet - create new one with balanced questions
+        return bank.sample_assessment(topic_id, questions_per_subtopic)
 
 async def get_randomized_questions_summary(
     db: AsyncSession, 
@@ -228,7 +148,7 @@ async def get_randomized_questions_summary(
                 "id": q.id,
                 "difficulty": q.difficulty,
                 "subtopic_id": q.subtopic_id,
-                "subtopic_name": q.subtopic.title if q.subtopic else None,
+                "subtopic_name": q.subtopic_title,
                 "question_number": i + 1
             }
             for i, q in enumerate(questions)
@@ -238,85 +158,96 @@ async def get_randomized_questions_summary(
     return summary
 
 # Retention Test Functions
+async def _get_retention_context(
+    db: AsyncSession,
+    user_id: int,
+    topic_id: int
+) -> Optional[Dict[str, Any]]:
+    """
+    Load what the retention-test endpoints need to know about a user and topic in a
+    single round trip: topic completion time, pre/post assessment completion and the
+    user's RetentionTest rows keyed by stage. Returns None if the user has no
+    UserTopic for this topic.
+    """
+    stmt = (
+        select(
+            UserTopic.completed_at,
+            PreAssessment.pre_assessment_id,
+            PreAssessment.is_completed.label("pre_completed"),
+            PostAssessment.post_assessment_id,
+            PostAssessment.is_completed.label("post_completed"),
+            RetentionTest
+        )
+        .select_from(UserTopic)
+        .outerjoin(PreAssessment, PreAssessment.user_topic_id == UserTopic.id)
+        .outerjoin(PostAssessment, PostAssessment.user_topic_id == UserTopic.id)
+        .outerjoin(
+            RetentionTest,
+            and_(
+                RetentionTest.user_id == UserTopic.user_id,
+                RetentionTest.topic_id == UserTopic.topic_id
+            )
+        )
+        .where(
+            UserTopic.user_id == user_id,
+            UserTopic.topic_id == topic_id
+        )
+    )
+    rows = (await db.execute(stmt)).all()
+    if not rows:
+        return None
+
+    first = rows[0]
+    retention_tests = {}
+    for row in rows:
+        if row.RetentionTest is not None:
+            retention_tests.setdefault(row.RetentionTest.stage, row.RetentionTest)
+
+    return {
+        "completed_at": first.completed_at,
+        "has_pre": first.pre_assessment_id is not None,
+        "has_post": first.post_assessment_id is not None,
+        "pre_completed": bool(first.pre_completed),
+        "post_completed": bool(first.post_completed),
+        "retention_tests": retention_tests
+    }
+
 async def get_retention_test_questions(
     db: AsyncSession, 
     topic_id: int, 
     user_id: int,
     stage: int = 1
-) -> List[AssessmentQuestion]:
+) -> List[BankQuestion]:
     """
     Get retention test questions for a specific topic and stage.
-    Stage 1 (10 hours): Questions with IDs 136-150 (15 questions)
-    Stage 2 (5 days): Questions with IDs 151-165 (15 questions)
+    Questions come from the in-memory retention catalog (15 per topic and stage);
+    only the user's progress is read from the database.
     """
-    
+    retention_set = (await get_question_bank(db)).get_retention_set(topic_id, stage)
+    if len(retention_set.questions) != RETENTION_TEST_SIZE:
+        raise ValueError(
+            f"Expected {RETENTION_TEST_SIZE} questions for stage {stage}, but found {len(retention_set.questions)}"
+        )
+
     # Verify user has completed pre and post assessments for this topic
-    pre_assessments = await get_pre_assessment_for_user_topic(db, user_id, topic_id)
-    post_assessments = await get_post_assessment_for_user_topic(db, user_id, topic_id)
-    
-    if not pre_assessments or not post_assessments:
+    context = await _get_retention_context(db, user_id, topic_id)
+    if not context or not context["has_pre"] or not context["has_post"]:
         raise ValueError("User must complete pre and post assessments before taking retention test")
-    
-    pre_assessment = pre_assessments[0]
-    post_assessment = post_assessments[0]
-    
-    if not pre_assessment.is_completed or not post_assessment.is_completed:
+
+    if not context["pre_completed"] or not context["post_completed"]:
         raise ValueError("User must complete both pre and post assessments before taking retention test")
-    
-    # Check if user has existing retention test progress for this stage
-    result = await db.execute(
-        select(RetentionTest).where(
-            RetentionTest.user_id == user_id,
-            RetentionTest.topic_id == topic_id,
-            RetentionTest.stage == stage
-        )
-    )
-    existing_retention_test = result.scalar_one_or_none()
-    
-    # Define question ID ranges for each topic and stage
-    # Topic 1: 136-150 (stage 1), 181-195 (stage 2)
-    # Topic 2: 151-165 (stage 1), 196-210 (stage 2)  
-    # Topic 3: 166-180 (stage 1), 211-225 (stage 2)
-    if stage == 1:
-        if topic_id == 1:
-            question_id_range = range(136, 151)  # IDs 136-150
-        elif topic_id == 2:
-            question_id_range = range(151, 166)  # IDs 151-165
-        elif topic_id == 3:
-            question_id_range = range(166, 181)  # IDs 166-180
-        else:
-            raise ValueError(f"Retention test not available for topic {topic_id}")
-    elif stage == 2:
-        if topic_id == 1:
-            question_id_range = range(181, 196)  # IDs 181-195
-        elif topic_id == 2:
-            question_id_range = range(196, 211)  # IDs 196-210
-        elif topic_id == 3:
-            question_id_range = range(211, 226)  # IDs 211-225
-        else:
-            raise ValueError(f"Retention test not available for topic {topic_id}")
-    else:
-        raise ValueError("Invalid retention test stage. Must be 1 or 2.")
-    
-    # Get questions by specific ID range
-    result = await db.execute(
-        select(AssessmentQuestion).where(
-            AssessmentQuestion.id.in_(question_id_range)
-        )
-    )
-    all_stage_questions = result.scalars().all()
-    
-    if len(all_stage_questions) != 15:
-        raise ValueError(f"Expected 15 questions for stage {stage}, but found {len(all_stage_questions)}")
-    
+
+    existing_retention_test = context["retention_tests"].get(stage)
+
     # If user has partial progress, return only remaining questions
     if existing_retention_test and existing_retention_test.questions_answers:
         answered_question_ids = set(int(qid) for qid in existing_retention_test.questions_answers.keys())
-        remaining_questions = [q for q in all_stage_questions if q.id not in answered_question_ids]
+        remaining_questions = [q for q in retention_set.questions if q.id not in answered_question_ids]
         random.shuffle(remaining_questions)
         return remaining_questions
-    
+
     # No existing progress - return all questions for this stage
+    all_stage_questions = list(retention_set.questions)
     random.shuffle(all_stage_questions)
     return all_stage_questions
 
@@ -333,17 +264,10 @@ async def check_retention_test_availability(
     Returns information about available stages and countdown timers.
     """
     from datetime import datetime, timezone, timedelta
-    
-    # Get user topic completion info (reference old logic)
-    result = await db.execute(
-        select(UserTopic).where(
-            UserTopic.user_id == user_id,
-            UserTopic.topic_id == topic_id
-        )
-    )
-    user_topic = result.scalar_one_or_none()
-    
-    if not user_topic:
+
+    context = await _get_retention_context(db, user_id, topic_id)
+
+    if not context:
         return {
             "first_stage_available": False,
             "second_stage_available": False,
@@ -352,16 +276,8 @@ async def check_retention_test_availability(
             "message": "User topic not found"
         }
     
-    # Verify both pre and post assessments are completed (requirement check)
-    pre_assessments = await get_pre_assessment_for_user_topic(db, user_id, topic_id)
-    post_assessments = await get_post_assessment_for_user_topic(db, user_id, topic_id)
-    
-    # Check if both assessments exist and are completed
-    pre_assessment = pre_assessments[0] if pre_assessments else None
-    post_assessment = post_assessments[0] if post_assessments else None
-    
     # Both assessments must exist
-    if not pre_assessment or not post_assessment:
+    if not context["has_pre"] or not context["has_post"]:
         return {
             "first_stage_available": False,
             "second_stage_available": False,
@@ -371,10 +287,7 @@ async def check_retention_test_availability(
         }
     
     # Both assessments must be completed
-    is_pre_completed = pre_assessment.is_completed
-    is_post_completed = post_assessment.is_completed
-    
-    if not is_pre_completed or not is_post_completed:
+    if not context["pre_completed"] or not context["post_completed"]:
         return {
             "first_stage_available": False,
             "second_stage_available": False,
@@ -384,7 +297,8 @@ async def check_retention_test_availability(
         }
     
     # Use user_topic.completed_at as the basis for countdown (reference old logic)
-    if not user_topic.completed_at:
+    completed_at = context["completed_at"]
+    if not completed_at:
         return {
             "first_stage_available": False,
             "second_stage_available": False,
@@ -394,7 +308,6 @@ async def check_retention_test_availability(
         }
     
     current_time = datetime.now(timezone.utc)
-    completed_at = user_topic.completed_at
     
     # Calculate time differences
     time_since_completion = current_time - completed_at
@@ -425,30 +338,11 @@ async def check_retention_test_availability(
         }
     
     # Check if stages are completed
-    first_stage_completed = False
-    second_stage_completed = False
-    
-    if first_stage_available:
-        result = await db.execute(
-            select(RetentionTest).where(
-                RetentionTest.user_id == user_id,
-                RetentionTest.topic_id == topic_id,
-                RetentionTest.stage == 1,
-                RetentionTest.is_completed == True
-            )
-        )
-        first_stage_completed = result.scalar_one_or_none() is not None
-    
-    if second_stage_available:
-        result = await db.execute(
-            select(RetentionTest).where(
-                RetentionTest.user_id == user_id,
-                RetentionTest.topic_id == topic_id,
-                RetentionTest.stage == 2,
-                RetentionTest.is_completed == True
-            )
-        )
-        second_stage_completed = result.scalar_one_or_none() is not None
+    retention_tests = context["retention_tests"]
+    first_stage_test = retention_tests.get(1)
+    second_stage_test = retention_tests.get(2)
+    first_stage_completed = first_stage_available and bool(first_stage_test and first_stage_test.is_completed)
+    second_stage_completed = second_stage_available and bool(second_stage_test and second_stage_test.is_completed)
     
     return {
         "first_stage_available": first_stage_available and not first_stage_completed,
@@ -474,12 +368,12 @@ async def submit_retention_test_answer(
     """
     
     # Get the question
-    question = await get_by_id(db, question_id)
+    question = (await get_question_bank(db)).get(question_id)
     if not question:
         raise ValueError("Question not found")
     
     # Check if answer is correct
-    correct_answer = question.question_choices_correctanswer.get('correct_answer')
+    correct_answer = question.correct_answer
     is_correct = user_answer == correct_answer
     
     # Get or create retention test record for this stage
@@ -521,10 +415,10 @@ async def submit_retention_test_answer(
     total_items = len(questions_answers)
     
     # Check if retention test is completed (15 questions)
-    is_completed = total_items >= 15
+    is_completed = total_items >= RETENTION_TEST_SIZE
     
     # Calculate final score
-    final_score = (total_correct / 15) * 100 if total_items >= 15 else (total_correct / total_items) * 100
+    final_score = (total_correct / RETENTION_TEST_SIZE) * 100 if is_completed else (total_correct / total_items) * 100
     
     # Update retention test record
     retention_test.questions_answers = questions_answers
@@ -552,7 +446,7 @@ async def submit_retention_test_answer(
             "total_correct": total_correct,
             "score_percentage": final_score,
             "is_completed": is_completed,
-            "questions_remaining": max(0, 15 - total_items)
+            "questions_remaining": max(0, RETENTION_TEST_SIZE - total_items)
         }
     )
 
@@ -574,7 +468,7 @@ async def get_retention_test_status(
             RetentionTest.stage == stage
         )
     )
-    retention_test = result.scalar_one_or_none()
+    retention_test = result.scalars().first()
     
     if not retention_test:
         return {
@@ -582,7 +476,7 @@ async def get_retention_test_status(
             "total_answered": 0,
             "total_correct": 0,
             "score_percentage": 0.0,
-            "questions_remaining": 15,
+            "questions_remaining": RETENTION_TEST_SIZE,
             "completed_at": None
         }
     
@@ -591,7 +485,7 @@ async def get_retention_test_status(
     total_correct = sum(1 for answer in retention_test.questions_answers.values() if answer.get('is_correct', False))
     score_percentage = retention_test.total_score or 0.0
     is_completed = retention_test.is_completed or False
-    questions_remaining = max(0, 15 - total_answered)
+    questions_remaining = max(0, RETENTION_TEST_SIZE - total_answered)
     
     return {
         "is_completed": is_completed,
@@ -613,134 +507,53 @@ async def get_retention_test_results(
     Returns questions, user answers, and detailed results.
     """
     # Get retention test record for specific stage or latest completed stage
+    stmt = select(RetentionTest).where(
+        RetentionTest.user_id == user_id,
+        RetentionTest.topic_id == topic_id,
+        RetentionTest.is_completed == True
+    )
     if stage:
-        result = await db.execute(
-            select(RetentionTest).where(
-                RetentionTest.user_id == user_id,
-                RetentionTest.topic_id == topic_id,
-                RetentionTest.stage == stage,
-                RetentionTest.is_completed == True
-            )
-        )
-        retention_test = result.scalar_one_or_none()
-        
-        if not retention_test:
-            raise ValueError(f"Retention test stage {stage} not found or not completed for this user and topic")
+        stmt = stmt.where(RetentionTest.stage == stage)
     else:
-        # Get the latest completed retention test
-        result = await db.execute(
-            select(RetentionTest).where(
-                RetentionTest.user_id == user_id,
-                RetentionTest.topic_id == topic_id,
-                RetentionTest.is_completed == True
-            ).order_by(RetentionTest.stage.desc())
-        )
-        retention_test = result.scalar_one_or_none()
-        
-        if not retention_test:
-            raise ValueError("No completed retention test found for this user and topic")
+        stmt = stmt.order_by(RetentionTest.stage.desc()).limit(1)
+    result = await db.execute(stmt)
+    retention_test = result.scalars().first()
+
+    if not retention_test:
+        if stage:
+            raise ValueError(f"Retention test stage {stage} not found or not completed for this user and topic")
+        raise ValueError("No completed retention test found for this user and topic")
     
-    # Get the specific questions that were used in this retention test
-    # For retention tests, we use specific question ID ranges based on topic and stage
     # Use the actual stage from the retention test record to ensure consistency
-    actual_stage = retention_test.stage
-    actual_topic_id = retention_test.topic_id
-    
-    # Topic 1: 136-150 (stage 1), 181-195 (stage 2)
-    # Topic 2: 151-165 (stage 1), 196-210 (stage 2)  
-    # Topic 3: 166-180 (stage 1), 211-225 (stage 2)
-    if actual_stage == 1:
-        if actual_topic_id == 1:
-            question_ids = list(range(136, 151))  # IDs 136-150
-        elif actual_topic_id == 2:
-            question_ids = list(range(151, 166))  # IDs 151-165
-        elif actual_topic_id == 3:
-            question_ids = list(range(166, 181))  # IDs 166-180
-        else:
-            raise ValueError(f"Retention test not available for topic {actual_topic_id}")
-    elif actual_stage == 2:
-        if actual_topic_id == 1:
-            question_ids = list(range(181, 196))  # IDs 181-195
-        elif actual_topic_id == 2:
-            question_ids = list(range(196, 211))  # IDs 196-210
-        elif actual_topic_id == 3:
-            question_ids = list(range(211, 226))  # IDs 211-225
-        else:
-            raise ValueError(f"Retention test not available for topic {actual_topic_id}")
-    else:
-        # Fallback to all retention test question ranges
-        question_ids = list(range(136, 226))
-    
-    # Get the specific questions used in this retention test
-    result = await db.execute(
-        select(AssessmentQuestion).where(
-            AssessmentQuestion.id.in_(question_ids)
-        )
+    retention_set = (await get_question_bank(db)).get_retention_set(
+        retention_test.topic_id, retention_test.stage
     )
-    all_questions = result.scalars().all()
-    
-    # Get subtopics for grouping (we'll group by the subtopics of the questions we actually used)
-    subtopics = await get_subtopics_for_topic(db, topic_id)
+    answers = retention_test.questions_answers or {}
     
     # Build results structure
     results = {
         "assessment": {
             "total_score": retention_test.total_score or 0.0,
-            "total_items": retention_test.total_items or 15,
+            "total_items": retention_test.total_items or RETENTION_TEST_SIZE,
             "is_completed": retention_test.is_completed,
             "completed_at": retention_test.completed_at
         },
         "questionsBySubtopic": {},
         "scorePercentage": retention_test.total_score or 0.0,
-        "totalQuestions": 15,
-        "totalCorrect": sum(1 for answer in retention_test.questions_answers.values() if answer.get('is_correct', False)),
-        "totalAnswered": len(retention_test.questions_answers)
+        "totalQuestions": RETENTION_TEST_SIZE,
+        "totalCorrect": sum(1 for answer in answers.values() if answer.get('is_correct', False)),
+        "totalAnswered": len(answers)
     }
     
-    # Group questions by subtopic using static mapping for retention tests
-    # Questions 1-5 (IDs 136-140) → Subtopic 1
-    # Questions 6-10 (IDs 141-145) → Subtopic 2  
-    # Questions 11-15 (IDs 146-150) → Subtopic 3
-    
-    # Sort questions by ID to ensure correct order
-    all_questions.sort(key=lambda q: q.id)
-    
-    # Create static mapping for retention test questions
-    retention_test_mapping = [
-        {"start_idx": 0, "end_idx": 5, "subtopic_index": 0},   # Questions 1-5 → Subtopic 1
-        {"start_idx": 5, "end_idx": 10, "subtopic_index": 1},  # Questions 6-10 → Subtopic 2
-        {"start_idx": 10, "end_idx": 15, "subtopic_index": 2}  # Questions 11-15 → Subtopic 3
-    ]
-    
-    # Build results for each subtopic using static mapping
-    for mapping in retention_test_mapping:
-        subtopic_index = mapping["subtopic_index"]
-        start_idx = mapping["start_idx"]
-        end_idx = mapping["end_idx"]
-        
-        # Get subtopic info
-        if subtopic_index < len(subtopics):
-            subtopic = subtopics[subtopic_index]
-            subtopic_id = subtopic.subtopic_id
-            subtopic_name = subtopic.title
-        else:
-            # Fallback if not enough subtopics
-            subtopic_id = f"subtopic_{subtopic_index + 1}"
-            subtopic_name = f"Subtopic {subtopic_index + 1}"
-        
-        # Get questions for this subtopic range
-        subtopic_questions = all_questions[start_idx:end_idx]
-        
-        # Filter questions that were actually answered in the retention test
-        answered_questions = []
-        for q in subtopic_questions:
-                if str(q.id) in retention_test.questions_answers:
-                    answered_questions.append(q)
+    # Group the stage's questions by subtopic using the catalog's precomputed grouping
+    for group in retention_set.subtopics:
+        # Only include questions that were actually answered in the retention test
+        answered_questions = [q for q in group.questions if str(q.id) in answers]
         
         # Build subtopic results
         subtopic_results = {
-            "id": subtopic_id,
-            "name": subtopic_name,
+            "id": group.subtopic_id,
+            "name": group.title,
             "questions": [],
             "correctCount": 0,
             "totalCount": len(answered_questions)
@@ -748,29 +561,25 @@ async def get_retention_test_results(
         
         for question in answered_questions:
             # Get user's answer for this question
-            user_answer_data = retention_test.questions_answers.get(str(question.id), {})
-            user_answer = user_answer_data.get('user_answer')
+            user_answer_data = answers.get(str(question.id), {})
             is_correct = user_answer_data.get('is_correct', False)
-            correct_answer = user_answer_data.get('correct_answer')
             
             if is_correct:
                 subtopic_results["correctCount"] += 1
             
             # Build question result
-            question_result = {
+            subtopic_results["questions"].append({
                 "id": question.id,
                 "question_text": question.question_choices_correctanswer.get('question', 'Question text not available'),
                 "question_choices": question.question_choices_correctanswer.get('choices', []),
-                "correct_answer": correct_answer,
-                "user_answer": user_answer,
+                "correct_answer": user_answer_data.get('correct_answer'),
+                "user_answer": user_answer_data.get('user_answer'),
                 "is_correct": is_correct,
                 "difficulty": question.difficulty,  # Include difficulty for frontend coloring
                 "explanation": question.question_choices_correctanswer.get('explanation', 'No explanation available')  # Include explanation
-            }
-            
-            subtopic_results["questions"].append(question_result)
+            })
         
         # Add subtopic results (even if no questions answered, to show structure)
-        results["questionsBySubtopic"][subtopic_id] = subtopic_results
+        results["questionsBySubtopic"][group.subtopic_id] = subtopic_results
     
     return results
@@ -0,0 +1,32 @@
+# app/crud/bkt_parameter.py
+from typing import Dict, Iterable, List
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models.bkt_parameters import BKTParameter
+
+FITTED_FIELDS = ("p_init", "p_transit", "p_guess", "p_slip", "log_likelihood", "n_sequences", "n_attempts")
+
+async def get_all(db: AsyncSession) -> List[BKTParameter]:
+    """All fitted parameter rows (one per subtopic and challenge type)"""
+    result = await db.execute(select(BKTParameter))
+    return result.scalars().all()
+
+async def upsert_many(
+    db: AsyncSession,
+    rows: Iterable[Dict],
+    commit: bool = True
+) -> int:
+    """Insert or replace fitted parameters keyed by (subtopic_id, challenge_type)"""
+    rows = list(rows)
+    if not rows:
+        return 0
+    stmt = pg_insert(BKTParameter).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[BKTParameter.subtopic_id, BKTParameter.challenge_type],
+        set_={**{field: stmt.excluded[field] for field in FITTED_FIELDS}, "fitted_at": func.now()}
+    )
+    await db.execute(stmt)
+    if commit:
+        await db.commit()
+    return len(rows)
@@ -50,7 +50,6 @@ async def create(db: AsyncSession, challenge_in: ChallengeCreate) -> Challenge:
     )
     db.add(new_chal)
     await db.commit()
-    await db.refresh(new_chal)
     
     return new_chal
 
@@ -63,7 +62,6 @@ async def update(db: AsyncSession, challenge_db: Challenge, challenge_in: Challe
             setattr(challenge_db, field, value)
     db.add(challenge_db)
     await db.commit()
-    await db.refresh(challenge_db)
     return challenge_db
 
 async def delete(db: AsyncSession, challenge_db: Challenge) -> None:
@@ -1,11 +1,13 @@
 # app/crud/challenge_attempt.py
 
 from typing import List, Optional
-from sqlalchemy import select, desc, func
+from sqlalchemy import select, desc, func, update
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models.challenge_attempts import ChallengeAttempt
 from app.db.models.user_challenges import UserChallenge
+from app.db.models.user_subtopics import UserSubtopic
 from app.db.models.challenges import Challenge
 from app.schemas.challenge_attempt import ChallengeAttemptCreate
 
@@ -42,40 +44,40 @@ async def get_by_user_id(
     result = await db.execute(stmt)
     return result.scalars().all()
 
+def _in_current_take(user_subtopic: UserSubtopic) -> list:
+    """
+    Conditions selecting the attempts of the user_subtopic's current take.
+    The attempted_at bound lets the planner skip the older monthly partitions,
+    and the (user_subtopic_id, take_number, attempted_at) index keeps the
+    lookup proportional to the take size.
+    """
+    return [
+        ChallengeAttempt.user_subtopic_id == user_subtopic.id,
+        ChallengeAttempt.take_number == user_subtopic.current_take,
+        ChallengeAttempt.attempted_at >= user_subtopic.current_take_started_at,
+    ]
+
 async def get_by_user_challenge(
     db: AsyncSession,
-    user_challenge_id: int
+    user_challenge_id: int,
+    user_subtopic: Optional[UserSubtopic] = None
 ) -> Optional[ChallengeAttempt]:
-    """Get attempt by user_challenge_id"""
-    result = await db.execute(
-        select(ChallengeAttempt)
-        .where(ChallengeAttempt.user_challenge_id == user_challenge_id)
-    )
+    """Get the latest attempt for a user_challenge, within the current take if a user_subtopic is given"""
+    stmt = select(ChallengeAttempt).where(ChallengeAttempt.user_challenge_id == user_challenge_id)
+    if user_subtopic is not None:
+        stmt = stmt.where(*_in_current_take(user_subtopic))
+    result = await db.execute(stmt.order_by(desc(ChallengeAttempt.attempted_at)).limit(1))
     return result.scalar_one_or_none()
 
 async def create(
     db: AsyncSession,
     attempt_in: ChallengeAttemptCreate
 ) -> ChallengeAttempt:
-    """Create or update a challenge attempt"""
-    # Check if attempt already exists for this user_challenge
-    existing_attempt = await get_by_user_challenge(db, attempt_in.user_challenge_id)
-    
-    if existing_attempt:
-        # Update existing attempt
-        for field, value in attempt_in.model_dump().items():
-            setattr(existing_attempt, field, value)
-        attempt = existing_attempt
-    else:
-        # Create new attempt
-        attempt = ChallengeAttempt(**attempt_in.model_dump())
-        db.add(attempt)
-
-    await db.commit()
-    await db.refresh(attempt)
-
+    """Record a challenge attempt in the current take (updating it if the challenge was already attempted in this take)"""
     # Get user_challenge and challenge to access subtopic_id
-    user_challenge = attempt.user_challenge
+    user_challenge = (await db.execute(
+        select(UserChallenge).where(UserChallenge.id == attempt_in.user_challenge_id)
+    )).scalar_one()
     challenge = await get_challenge_by_id(db, user_challenge.challenge_id)
     user = await get_user_by_id(db, user_challenge.user_id)
     
@@ -92,6 +94,25 @@ async def create(
     if not user_subtopic:
         raise ValueError(f"No user_subtopic found for user {user_challenge.user_id} and subtopic {challenge.subtopic_id}")
 
+    # Check if attempt already exists for this user_challenge in the current take
+    existing_attempt = await get_by_user_challenge(db, attempt_in.user_challenge_id, user_subtopic)
+    
+    if existing_attempt:
+        # Update existing attempt
+        for field, value in attempt_in.model_dump().items():
+            setattr(existing_attempt, field, value)
+        attempt = existing_attempt
+    else:
+        # Create new attempt; attempts of earlier takes are kept as history
+        attempt = ChallengeAttempt(
+            **attempt_in.model_dump(),
+            user_subtopic_id=user_subtopic.id,
+            take_number=user_subtopic.current_take
+        )
+        db.add(attempt)
+
+    await db.commit()
+
     # Run BKT-RL adaptiveness
     await run_updates(
         db=db,
@@ -108,19 +129,16 @@ async def create(
 
 async def get_last_attempts_for_user_subtopic(
     db: AsyncSession,
-    user_id: int,
-    subtopic_id: int,
+    user_subtopic: UserSubtopic,
     n: int
 ):
+    """Last n attempts of the user_subtopic's current take, newest first"""
     stmt = (
         select(ChallengeAttempt)
-        .join(UserChallenge, ChallengeAttempt.user_challenge_id == UserChallenge.id)
-        .join(Challenge, UserChallenge.challenge_id == Challenge.id)
         .options(
             selectinload(ChallengeAttempt.user_challenge).selectinload(UserChallenge.challenge)
         )
-        .where(UserChallenge.user_id == user_id)
-        .where(Challenge.subtopic_id == subtopic_id)
+        .where(*_in_current_take(user_subtopic))
         .order_by(desc(ChallengeAttempt.attempted_at))
         .limit(n)
     )
@@ -133,7 +151,10 @@ async def get_last_attempts_minimal_for_user_subtopic(
     subtopic_id: int,
     n: int
 ):
-    """Get minimal challenge attempt data for results page"""
+    """Get minimal challenge attempt data of the current take for results page"""
+    user_subtopic = await get_by_user_and_subtopic(db, user_id=user_id, subtopic_id=subtopic_id)
+    if not user_subtopic:
+        return []
     stmt = (
         select(
             ChallengeAttempt.id,
@@ -150,8 +171,7 @@ async def get_last_attempts_minimal_for_user_subtopic(
         )
         .join(UserChallenge, ChallengeAttempt.user_challenge_id == UserChallenge.id)
         .join(Challenge, UserChallenge.challenge_id == Challenge.id)
-        .where(UserChallenge.user_id == user_id)
-        .where(Challenge.subtopic_id == subtopic_id)
+        .where(*_in_current_take(user_subtopic))
         .order_by(desc(ChallengeAttempt.attempted_at))
         .limit(n)
     )
@@ -163,71 +183,71 @@ async def get_attempt_count_by_user_and_subtopic(
     user_id: int,
     subtopic_id: int
 ) -> int:
-    """Get the count of challenge attempts for a user and subtopic"""
-    stmt = (
-        select(func.count(ChallengeAttempt.id))
-        .join(UserChallenge, ChallengeAttempt.user_challenge_id == UserChallenge.id)
-        .join(Challenge, UserChallenge.challenge_id == Challenge.id)
-        .where(UserChallenge.user_id == user_id)
-        .where(Challenge.subtopic_id == subtopic_id)
-    )
+    """Get the count of challenge attempts in the current take for a user and subtopic"""
+    user_subtopic = await get_by_user_and_subtopic(db, user_id=user_id, subtopic_id=subtopic_id)
+    if not user_subtopic:
+        return 0
+    stmt = select(func.count(ChallengeAttempt.id)).where(*_in_current_take(user_subtopic))
     result = await db.execute(stmt)
     return result.scalar_one() or 0
 
-async def delete_last_take_if_full(
+async def start_new_take(
     db: AsyncSession,
-    user_id: int,
-    subtopic_id: int,
+    user_subtopic: UserSubtopic
+) -> UserSubtopic:
+    """Close the current take; its attempts stay as history under their take_number"""
+    result = await db.execute(
+        update(UserSubtopic)
+        .where(UserSubtopic.id == user_subtopic.id)
+        .where(UserSubtopic.current_take == user_subtopic.current_take)
+        .values(
+            current_take=UserSubtopic.current_take + 1,
+            current_take_started_at=func.now()
+        )
+        .returning(UserSubtopic.current_take, UserSubtopic.current_take_started_at)
+    )
+    row = result.first()
+    await db.commit()
+    if row is not None:
+        # Keep the loaded object in sync without another round trip
+        set_committed_value(user_subtopic, "current_take", row.current_take)
+        set_committed_value(user_subtopic, "current_take_started_at", row.current_take_started_at)
+    return user_subtopic
+
+async def close_take_if_full(
+    db: AsyncSession,
+    user_subtopic: UserSubtopic,
     take_size: int = 5
-):
+) -> bool:
+    """Start a new take once the current one holds take_size COMPLETED attempts"""
     stmt = (
-        select(ChallengeAttempt)
+        select(func.count(ChallengeAttempt.id))
         .join(UserChallenge, ChallengeAttempt.user_challenge_id == UserChallenge.id)
-        .join(Challenge, UserChallenge.challenge_id == Challenge.id)
-        .options(selectinload(ChallengeAttempt.user_challenge))
-        .where(UserChallenge.user_id == user_id)
-        .where(Challenge.subtopic_id == subtopic_id)
-        .order_by(ChallengeAttempt.attempted_at.asc())
+        .where(*_in_current_take(user_subtopic))
+        .where(UserChallenge.status == "completed")
     )
-    result = await db.execute(stmt)
-    all_attempts = result.scalars().all()
-
-    # Only delete if exactly 5 COMPLETED attempts exist
-    completed_attempts = [
-        a for a in all_attempts if a.user_challenge.status == "completed"
-    ]
+    completed_attempts = (await db.execute(stmt)).scalar_one()
 
-    if len(completed_attempts) == take_size:
-        for attempt in completed_attempts:
-            await db.delete(attempt)
-        await db.commit()
+    if completed_attempts == take_size:
+        await start_new_take(db, user_subtopic)
+        return True
+    return False
 
-async def delete_by_user_and_subtopic(
+async def abandon_current_take(
     db: AsyncSession,
     user_id: int,
     subtopic_id: int
 ) -> int:
-    """Delete all challenge attempts for a user in a specific subtopic"""
-    # Get all challenge attempts for the user in the specified subtopic
-    stmt = (
-        select(ChallengeAttempt)
-        .join(UserChallenge, ChallengeAttempt.user_challenge_id == UserChallenge.id)
-        .join(Challenge, UserChallenge.challenge_id == Challenge.id)
-        .where(UserChallenge.user_id == user_id)
-        .where(Challenge.subtopic_id == subtopic_id)
-    )
-    result = await db.execute(stmt)
-    attempts_to_delete = result.scalars().all()
-    
-    # Count the attempts before deletion
-    deleted_count = len(attempts_to_delete)
-    
-    # Delete all attempts
-    for attempt in attempts_to_delete:
-        await db.delete(attempt)
-    
-    # Commit the changes
-    await db.commit()
-    
-    return deleted_count
+    """Abandon the current take for a user in a specific subtopic; returns how many attempts it held"""
+    user_subtopic = await get_by_user_and_subtopic(db, user_id=user_id, subtopic_id=subtopic_id)
+    if not user_subtopic:
+        return 0
+
+    stmt = select(func.count(ChallengeAttempt.id)).where(*_in_current_take(user_subtopic))
+    abandoned_count = (await db.execute(stmt)).scalar_one() or 0
+
+    # An empty take is left open, so repeated calls do not inflate take numbers
+    if abandoned_count:
+        await start_new_take(db, user_subtopic)
 
+    return abandoned_count
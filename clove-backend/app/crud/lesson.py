@@ -27,7 +27,6 @@ async def create(db: AsyncSession, lesson_in: LessonCreate) -> Lesson:
     )
     db.add(new_lesson)
     await db.commit()
-    await db.refresh(new_lesson)
     
     return new_lesson
 
@@ -36,7 +35,6 @@ async def update(db: AsyncSession, lesson_db: Lesson, lesson_in: LessonUpdate) -
         setattr(lesson_db, field, value)
     db.add(lesson_db)
     await db.commit()
-    await db.refresh(lesson_db)
     return lesson_db
 
 async def delete(db: AsyncSession, lesson_db: Lesson) -> None:
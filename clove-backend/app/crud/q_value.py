@@ -1,8 +1,11 @@
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from app.db.models.q_values import QValue
 from app.core.utils import initialize_q_table, round_q_table_values, CHALLENGE_TYPES
+from app.core.rng import stream
 
 async def get_q_table(
     db: AsyncSession,
@@ -44,30 +47,54 @@ async def list_for_user(
     result = await db.execute(stmt)
     return result.scalars().all()
 
+def new_q_table_row(user_subtopic_id: int) -> dict:
+    """Column values of a new Q-table, drawn from the user_subtopic's own stream"""
+    q_table = initialize_q_table(stream(user_subtopic_id, "init"))
+    return {
+        "user_subtopic_id": user_subtopic_id,
+        # Round values for consistency
+        "q_table": round_q_table_values(q_table),
+        "epsilon": 0.8
+    }
+
 async def create_q_table(
     db: AsyncSession,
     user_subtopic_id: int
 ) -> QValue:
     """Create new Q-table using initialize_q_table from utils.py"""
-    # Get initialized Q-table with random values
-    q_table = initialize_q_table()
-    
-    # Round values for consistency
-    q_table = round_q_table_values(q_table)
-    
-    # Create database object
-    q = QValue(
-        user_subtopic_id=user_subtopic_id,
-        q_table=q_table,
-        epsilon=0.8
-    )
-    
-    # Save to database
+    q = QValue(**new_q_table_row(user_subtopic_id))
     db.add(q)
-    await db.commit()
-    await db.refresh(q)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise ValueError("Q-table already exists for this user_subtopic")
     return q
 
+async def get_or_create_q_table(
+    db: AsyncSession,
+    user_subtopic_id: int
+) -> QValue:
+    """
+    The user_subtopic's Q-table, created on first use. New users get theirs
+    from init_user_data, so this is normally the SELECT alone. Otherwise an
+    INSERT ... ON CONFLICT DO NOTHING RETURNING creates it in the caller's
+    transaction, without a commit of its own. When two first requests race,
+    the loser's insert waits for the winner and does nothing, then reads the
+    winner's row.
+    """
+    q = await get_q_table(db, user_subtopic_id)
+    if q is not None:
+        return q
+    stmt = (
+        pg_insert(QValue)
+        .values(**new_q_table_row(user_subtopic_id))
+        .on_conflict_do_nothing(index_elements=[QValue.user_subtopic_id])
+        .returning(QValue)
+    )
+    q = (await db.execute(stmt)).scalars().first()
+    return q if q is not None else await get_q_table(db, user_subtopic_id)
+
 async def update_q_table(
     db: AsyncSession,
     q_obj: QValue,
@@ -134,7 +161,6 @@ async def create_qvalue(
     )
     db.add(q)
     await db.commit()
-    await db.refresh(q)
     return q
 
 async def delete(
@@ -64,7 +64,6 @@ async def update_login_streak(db: AsyncSession, user_id: int, today_date):
     stat.current_streak = streak if streak > 0 else 1
 
     await db.commit()
-    await db.refresh(stat)
     return stat
 
 async def update_recent_topic(db: AsyncSession, user_id: int, topic_id: int):
@@ -90,7 +89,6 @@ async def increment_challenges_solved(
         stat = Statistic(user_id=user_id)
         db.add(stat)
         await db.commit()
-        await db.refresh(stat)
 
     # ── raw counts ──
     new_total_challenges = stat.total_challenges_solved + (1 if is_correct else 0)
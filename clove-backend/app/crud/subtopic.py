@@ -1,61 +1,61 @@
 # app/crud/subtopic.py
+from typing import Optional, Tuple
+from sqlalchemy import exists, false, insert, literal
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models.subtopics import Subtopic
 from app.db.models.user_subtopics import UserSubtopic
 from app.db.models.user_topics import UserTopic
 from app.schemas.subtopic import SubtopicCreate, SubtopicUpdate
+from app.services.question_bank import invalidate_question_bank
 
 
-async def seed_new_subtopic_for_existing_users(db: AsyncSession, subtopic_id: int):
+async def seed_new_subtopic_for_existing_users(
+    db: AsyncSession,
+    subtopic_id: int,
+    user_id_range: Optional[Tuple[int, int]] = None
+) -> int:
     """
     When a new subtopic is created, create UserSubtopic records for all existing users
-    who have access to the parent topic.
+    who have access to the parent topic, with one INSERT ... SELECT FROM user_topics.
+    `user_id_range` (inclusive lower, exclusive upper) limits it to one chunk of users.
+    Returns the number of rows created. The caller commits.
     """
-    try:
-        # Get the new subtopic and its parent topic
-        subtopic = await db.execute(select(Subtopic).where(Subtopic.subtopic_id == subtopic_id))
-        subtopic = subtopic.scalar_one_or_none()
-        if not subtopic:
-            raise ValueError(f"Subtopic with ID {subtopic_id} not found")
+    subtopic = await db.execute(select(Subtopic).where(Subtopic.subtopic_id == subtopic_id))
+    subtopic = subtopic.scalar_one_or_none()
+    if not subtopic:
+        raise ValueError(f"Subtopic with ID {subtopic_id} not found")
 
-        # Get all existing users who have UserTopic records for this topic
-        user_topics = await db.execute(
-            select(UserTopic).where(UserTopic.topic_id == subtopic.topic_id)
+    source = (
+        select(
+            UserTopic.user_id, literal(subtopic.subtopic_id), false(), false(),
+            false(), false(), false(), literal(0.0),
+            literal(0.1)
         )
-        user_topics = user_topics.scalars().all()
-
-        for user_topic in user_topics:
-            # Check if UserSubtopic already exists (in case of race conditions)
-            existing_user_subtopic = await db.execute(
-                select(UserSubtopic).where(
-                    UserSubtopic.user_id == user_topic.user_id,
-                    UserSubtopic.subtopic_id == subtopic_id
-                )
+        .where(UserTopic.topic_id == subtopic.topic_id)
+        .where(
+            ~exists().where(
+                UserSubtopic.user_id == UserTopic.user_id,
+                UserSubtopic.subtopic_id == subtopic.subtopic_id
             )
-            existing_user_subtopic = existing_user_subtopic.scalar_one_or_none()
-
-            if not existing_user_subtopic:
-                user_subtopic = UserSubtopic(
-                    user_id=user_topic.user_id,
-                    subtopic_id=subtopic.subtopic_id,
-                    lessons_completed=False,
-                    practice_completed=False,
-                    challenges_completed=False,
-                    is_unlocked=False,
-                    is_completed=False,
-                    progress_percent=0.0,
-                    knowledge_level=0.1,
-                    unlocked_at=None,
-                    completed_at=None
-                )
-                db.add(user_subtopic)
-
-        await db.commit()
+        )
+    )
+    if user_id_range is not None:
+        source = source.where(UserTopic.user_id >= user_id_range[0], UserTopic.user_id < user_id_range[1])
 
-    except Exception as e:
-        await db.rollback()
-        raise
+    result = await db.execute(
+        insert(UserSubtopic)
+        .from_select(
+            [
+                "user_id", "subtopic_id", "lessons_completed", "practice_completed",
+                "challenges_completed", "is_unlocked", "is_completed", "progress_percent",
+                "knowledge_level"
+            ],
+            source
+        )
+        .returning(UserSubtopic.id)
+    )
+    return len(result.all())
 
 
 async def get_by_id(db: AsyncSession, subtopic_id: int) -> Subtopic | None:
@@ -81,11 +81,10 @@ async def create(db: AsyncSession, subtopic_in: SubtopicCreate) -> Subtopic:
     )
     db.add(new_sub)
     await db.commit()
-    await db.refresh(new_sub)
-    
-    # Seed user data for existing users
-    await seed_new_subtopic_for_existing_users(db, new_sub.subtopic_id)
+    invalidate_question_bank()
     
+    # User data for existing users is seeded by a background job
+    # (app/services/curriculum_fanout.py) scheduled from the API route
     return new_sub
 
 async def update(db: AsyncSession, subtopic_db: Subtopic, subtopic_in: SubtopicUpdate) -> Subtopic:
@@ -93,16 +92,16 @@ async def update(db: AsyncSession, subtopic_db: Subtopic, subtopic_in: SubtopicU
         setattr(subtopic_db, field, value)
     db.add(subtopic_db)
     await db.commit()
-    await db.refresh(subtopic_db)
+    invalidate_question_bank()
     return subtopic_db
 
 async def delete(db: AsyncSession, subtopic_db: Subtopic) -> None:
     await db.delete(subtopic_db)
     await db.commit()
+    invalidate_question_bank()
 
 async def update_knowledge_level(db: AsyncSession, subtopic: Subtopic, new_knowledge: float) -> Subtopic:
     subtopic.knowledge_level = round(new_knowledge, 2)
     db.add(subtopic)
     await db.commit()
-    await db.refresh(subtopic)
     return subtopic
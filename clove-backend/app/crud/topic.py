@@ -1,76 +1,102 @@
 # app/crud/topic.py
+from typing import Optional, Tuple
+from sqlalchemy import JSON, and_, exists, false, insert, literal, true
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models.topics import Topic
+from app.db.models.subtopics import Subtopic
 from app.db.models.users import User
 from app.db.models.user_topics import UserTopic
+from app.db.models.user_subtopics import UserSubtopic
 from app.db.models.pre_assessments import PreAssessment
 from app.db.models.post_assessments import PostAssessment
 from app.schemas.topic import TopicCreate, TopicUpdate
 
 
-async def seed_new_topic_for_existing_users(db: AsyncSession, topic_id: int):
+async def seed_new_topic_for_existing_users(
+    db: AsyncSession,
+    topic_id: int,
+    user_id_range: Optional[Tuple[int, int]] = None
+) -> int:
     """
     When a new topic is created, create UserTopic and Pre/PostAssessment records
-    for all existing users. UserSubtopic records will be created when subtopics are added.
-    """
-    try:
-        # Get the new topic
-        topic = await db.execute(select(Topic).where(Topic.topic_id == topic_id))
-        topic = topic.scalar_one_or_none()
-        if not topic:
-            raise ValueError(f"Topic with ID {topic_id} not found")
+    for existing users with set-based INSERT ... SELECT FROM users statements.
+    UserSubtopic records for subtopics that already exist under the topic are
+    created as well, so a subtopic added while this runs is not missed.
 
-        # Get all existing users
-        users = await db.execute(select(User))
-        users = users.scalars().all()
+    `user_id_range` (inclusive lower, exclusive upper) limits the statements to
+    one chunk of users; see app/services/curriculum_fanout.py. Users that
+    already have the records are skipped, so chunks can be re-run safely.
+    Returns the number of UserTopic rows created. The caller commits.
+    """
+    def in_range(user_id_column):
+        if user_id_range is None:
+            return true()
+        return and_(user_id_column >= user_id_range[0], user_id_column < user_id_range[1])
 
-        for user in users:
-            # 1. Create UserTopic
-            user_topic = UserTopic(
-                user_id=user.id,
-                topic_id=topic.topic_id,
-                pre_assessment_completed=False,
-                post_assessment_completed=False,
-                is_unlocked=False,
-                is_completed=False,
-                completed_subtopics_count=0,
-                progress_percent=0.0,
-                unlocked_at=None,
-                completed_at=None,
-                last_accessed_at=None
+    # 1. Create UserTopic for every user in range that doesn't have one yet
+    result = await db.execute(
+        insert(UserTopic)
+        .from_select(
+            [
+                "user_id", "topic_id", "pre_assessment_completed", "post_assessment_completed",
+                "is_unlocked", "is_completed", "completed_subtopics_count", "progress_percent"
+            ],
+            select(
+                User.id, literal(topic_id), false(), false(),
+                false(), false(), literal(0), literal(0.0)
             )
-            db.add(user_topic)
-            await db.flush()  # To get user_topic.id for FKs
-
-            # 2. Create PreAssessment and PostAssessment for the topic
-            pre_assessment = PreAssessment(
-                user_topic_id=user_topic.id,
-                total_score=0.0,
-                total_items=0,
-                is_unlocked=False,
-                subtopic_scores={},
-                questions_answers_iscorrect={},
-                attempt_count=0
+            .where(in_range(User.id))
+            .where(
+                ~exists().where(UserTopic.user_id == User.id, UserTopic.topic_id == topic_id)
             )
-            db.add(pre_assessment)
+        )
+        .returning(UserTopic.id)
+    )
+    created = len(result.all())
 
-            post_assessment = PostAssessment(
-                user_topic_id=user_topic.id,
-                total_score=0.0,
-                total_items=0,
-                is_unlocked=False,
-                subtopic_scores={},
-                questions_answers_iscorrect={},
-                attempt_count=0
+    # 2. Create PreAssessment and PostAssessment for those user topics
+    for model in (PreAssessment, PostAssessment):
+        await db.execute(
+            insert(model).from_select(
+                [
+                    "user_topic_id", "total_score", "total_items", "is_unlocked",
+                    "subtopic_scores", "questions_answers_iscorrect", "attempt_count"
+                ],
+                select(
+                    UserTopic.id, literal(0.0), literal(0), false(),
+                    literal({}, JSON), literal({}, JSON), literal(0)
+                )
+                .where(UserTopic.topic_id == topic_id, in_range(UserTopic.user_id))
+                .where(~exists().where(model.user_topic_id == UserTopic.id))
             )
-            db.add(post_assessment)
+        )
 
-        await db.commit()
+    # 3. Create UserSubtopic for subtopics already under this topic
+    await db.execute(
+        insert(UserSubtopic).from_select(
+            [
+                "user_id", "subtopic_id", "lessons_completed", "practice_completed",
+                "challenges_completed", "is_unlocked", "is_completed", "progress_percent",
+                "knowledge_level"
+            ],
+            select(
+                UserTopic.user_id, Subtopic.subtopic_id, false(), false(),
+                false(), false(), false(), literal(0.0),
+                literal(0.1)
+            )
+            .join(Subtopic, Subtopic.topic_id == UserTopic.topic_id)
+            .where(UserTopic.topic_id == topic_id, in_range(UserTopic.user_id))
+            .where(
+                ~exists().where(
+                    UserSubtopic.user_id == UserTopic.user_id,
+                    UserSubtopic.subtopic_id == Subtopic.subtopic_id
+                )
+            )
+        )
+    )
 
-    except Exception as e:
-        await db.rollback()
-        raise
+    return created
 
 
 async def get_by_id(db: AsyncSession, topic_id: int) -> Topic | None:
@@ -90,11 +116,9 @@ async def create(db: AsyncSession, topic_in: TopicCreate) -> Topic:
     )
     db.add(new_topic)
     await db.commit()
-    await db.refresh(new_topic)
-    
-    # Seed user data for existing users
-    await seed_new_topic_for_existing_users(db, new_topic.topic_id)
     
+    # User data for existing users is seeded by a background job
+    # (app/services/curriculum_fanout.py) scheduled from the API route
     return new_topic
 
 async def update(db: AsyncSession, topic_db: Topic, topic_in: TopicUpdate) -> Topic:
@@ -102,7 +126,6 @@ async def update(db: AsyncSession, topic_db: Topic, topic_in: TopicUpdate) -> To
         setattr(topic_db, field, value)
     db.add(topic_db)
     await db.commit()
-    await db.refresh(topic_db)
     return topic_db
 
 async def delete(db: AsyncSession, topic_db: Topic) -> None:
@@ -6,7 +6,6 @@ from sqlalchemy import text
 from datetime import date, datetime, timezone
 import re
 import random
-from passlib.context import CryptContext
 
 from app.db.models.users             import User
 from app.db.models.topics            import Topic
@@ -17,9 +16,9 @@ from app.db.models.user_subtopics   import UserSubtopic
 from app.db.models.pre_assessments  import PreAssessment
 from app.db.models.post_assessments import PostAssessment
 from app.db.models.statistics       import Statistic
-
-# Password context for verification
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.db.models.q_values         import QValue
+from app.crud.q_value               import new_q_table_row
+from app.utils.security             import verify_password
 
 def generate_username(first_name: str, last_name: str, email: str) -> str:
     """
@@ -104,10 +103,9 @@ async def create_user(
     )
     db.add(user)
     await db.commit()
-    await db.refresh(user)
     
     # Initialize all user data (UserTopics, UserSubtopics, Pre/PostAssessments, Statistics)
-    await init_user_data(db, user.id)
+    await init_user_data(db, user.id, provision_q_tables=user.is_adaptive)
     
     return user
 
@@ -122,13 +120,14 @@ async def update_user(
         else:
             setattr(user, field, value)
     await db.commit()
-    await db.refresh(user)
     return user
 
-async def init_user_data(db: AsyncSession, user_id: int, login_days_this_week=None):
+async def init_user_data(db: AsyncSession, user_id: int, login_days_this_week=None, provision_q_tables: bool = False):
     """
     For each Topic/Subtopic/AssessmentQuestion in the system,
     create the corresponding UserTopic, UserSubtopic, Pre/PostAssessment, and a Statistic row.
+    With provision_q_tables (adaptive users), also a Q-table per UserSubtopic, so the
+    first challenge selection finds it instead of creating it.
     """
     if login_days_this_week is None:
         login_days_this_week = []
@@ -231,6 +230,10 @@ async def init_user_data(db: AsyncSession, user_id: int, login_days_this_week=No
     db.add_all(pre_assessments)
     db.add_all(post_assessments)
 
+    if provision_q_tables:
+        await db.flush()  # UserSubtopic IDs for the Q-tables
+        db.add_all(QValue(**new_q_table_row(us.id)) for us in user_subtopics)
+
     # 4. Create Statistic row
     stat = Statistic(
         user_id=user_id, 
@@ -253,7 +256,7 @@ async def delete_user(
     """
     try:
         # Verify password before deletion
-        if not pwd_context.verify(password, user_obj.password_hash):
+        if not verify_password(password, user_obj.password_hash):
             return {
                 "success": False,
                 "message": "Invalid password"
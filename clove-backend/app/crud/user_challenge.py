@@ -1,8 +1,10 @@
 # app/crud/user_challenge.py
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from sqlalchemy import select, update, func, desc
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models.user_challenges import UserChallenge
+from app.db.models.challenge_attempts import ChallengeAttempt
 from app.db.models.challenges import Challenge
 from sqlalchemy import delete
 from app.db.models.user_subtopics import UserSubtopic
@@ -38,7 +40,6 @@ async def create(
     )
     db.add(uc)
     await db.commit()
-    await db.refresh(uc)
     return uc
 
 async def upsert(
@@ -58,50 +59,40 @@ async def upsert(
     hints_enabled: Optional[bool] = None,
     was_cancelled: Optional[bool] = None
 ) -> UserChallenge:
-    print(f"upsert called: user_id={user_id}, challenge_id={challenge_id}, is_solved={is_solved}, status={status}")
-    uc = await get_by_user_and_challenge(db, user_id, challenge_id)
-    if uc:
-        print(f"Found existing user_challenge: id={uc.id}, current_status={uc.status}")
-        data = {"is_solved": is_solved, "last_attempted_at": func.now()}
-        if status is not None:
-            data["status"] = status
-        if session_token is not None:
-            data["session_token"] = session_token
-        if session_started_at is not None:
-            data["session_started_at"] = session_started_at
-        if last_activity_at is not None:
-            data["last_activity_at"] = last_activity_at
-        if time_spent is not None:
-            data["time_spent"] = time_spent
-        if hints_used is not None:
-            data["hints_used"] = hints_used
-        if partial_answer is not None:
-            data["partial_answer"] = partial_answer
-        if timer_enabled is not None:
-            data["timer_enabled"] = timer_enabled
-        if hints_enabled is not None:
-            data["hints_enabled"] = hints_enabled
-        if was_cancelled is not None:
-            data["was_cancelled"] = was_cancelled
-        print(f"Updating with data: {data}")
-        await db.execute(
-            update(UserChallenge)
-            .where(UserChallenge.id == uc.id)
-            .values(**data)
-        )
-        await db.commit()
-        updated_uc = await get_by_id(db, uc.id)
-        print(f"After update: id={updated_uc.id}, status={updated_uc.status}, is_solved={updated_uc.is_solved}")
-        return updated_uc
-    else:
-        print(f"No existing user_challenge found, creating new one")
-        return await create(
-            db,
-            user_id=user_id,
-            challenge_id=challenge_id,
-            is_solved=is_solved,
-            status=status or "pending"
-        )
+    """
+    Create or update the user's row for a challenge in one round trip with
+    INSERT ... ON CONFLICT (user_id, challenge_id) DO UPDATE ... RETURNING.
+    Optional fields left as None keep their stored value on update.
+    """
+    data = {
+        "status": status,
+        "session_token": session_token,
+        "session_started_at": session_started_at,
+        "last_activity_at": last_activity_at,
+        "time_spent": time_spent,
+        "hints_used": hints_used,
+        "partial_answer": partial_answer,
+        "timer_enabled": timer_enabled,
+        "hints_enabled": hints_enabled,
+        "was_cancelled": was_cancelled,
+    }
+    data = {key: value for key, value in data.items() if value is not None}
+
+    stmt = pg_insert(UserChallenge).values(
+        user_id=user_id,
+        challenge_id=challenge_id,
+        is_solved=is_solved,
+        **{**data, "status": status or "pending"}
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserChallenge.user_id, UserChallenge.challenge_id],
+        set_={"is_solved": is_solved, "last_attempted_at": func.now(), **data}
+    ).returning(UserChallenge)
+
+    result = await db.execute(stmt, execution_options={"populate_existing": True})
+    uc = result.scalars().one()
+    await db.commit()
+    return uc
 
 async def get_last_cancelled(
     db: AsyncSession,
@@ -163,16 +154,142 @@ async def get_all_active_sessions_by_user(
     result = await db.execute(stmt)
     return result.scalars().all()
 
+async def reset_challenge_fields_for_subtopic(
+    db: AsyncSession,
+    *,
+    user_id: int,
+    subtopic_id: int
+) -> List[int]:
+    """
+    Reset the per-attempt fields of every UserChallenge the user has in a subtopic
+    with a single UPDATE ... FROM challenges statement.
+    Returns the IDs of the reset rows.
+    """
+    stmt = (
+        update(UserChallenge)
+        .where(
+            UserChallenge.challenge_id == Challenge.id,
+            Challenge.subtopic_id == subtopic_id,
+            UserChallenge.user_id == user_id
+        )
+        .values(
+            partial_answer=None,
+            time_spent=0,
+            hints_used=0,
+            timer_enabled=None,
+            hints_enabled=None,
+            was_cancelled=False
+        )
+        .returning(UserChallenge.id)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    reset_ids = list(result.scalars().all())
+    await db.commit()
+    return reset_ids
+
+async def deactivate_all_sessions_for_user(
+    db: AsyncSession,
+    *,
+    user_id: int
+) -> List[int]:
+    """
+    Cancel every active challenge session of a user and clear its session data
+    with a single UPDATE statement. Returns the challenge IDs that were deactivated.
+    """
+    stmt = (
+        update(UserChallenge)
+        .where(
+            UserChallenge.user_id == user_id,
+            UserChallenge.status == "active"
+        )
+        .values(
+            status="cancelled",
+            session_token=None,
+            session_started_at=None,
+            last_activity_at=None,
+            last_attempted_at=func.now()
+        )
+        .returning(UserChallenge.challenge_id)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    challenge_ids = list(result.scalars().all())
+    await db.commit()
+    return challenge_ids
+
+# First key of the advisory lock taken by lock_user_sessions (second key: user_id)
+SESSION_ACTIVATION_LOCK = 4201
+
+async def lock_user_sessions(db: AsyncSession, user_id: int) -> None:
+    """
+    Serialize session activations of one user until the transaction ends, so
+    two workers cannot both find no active session and both activate one.
+    Uses a transaction-scoped advisory lock; no row is locked.
+    """
+    await db.execute(select(func.pg_advisory_xact_lock(SESSION_ACTIVATION_LOCK, user_id)))
+
+async def expire_idle_sessions(
+    db: AsyncSession,
+    *,
+    idle_before: datetime,
+    limit: int
+) -> List[Tuple[int, int]]:
+    """
+    End up to `limit` active sessions whose last activity is older than
+    `idle_before`: status goes back to pending and the session data is cleared,
+    as on deactivate-session. Sessions that never sent a heartbeat count from
+    last_attempted_at. Rows are picked with a range scan of the partial
+    expression index ix_user_challenges_active_idle_since (the filter must stay
+    `coalesce(...) < idle_before` to use it) with FOR UPDATE SKIP LOCKED, so
+    concurrent reapers take disjoint batches. Does not commit. Returns
+    (user_id, challenge_id) of expired rows.
+    """
+    idle_ids = (
+        select(UserChallenge.id)
+        .where(
+            UserChallenge.status == "active",
+            func.coalesce(UserChallenge.last_activity_at, UserChallenge.last_attempted_at) < idle_before
+        )
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(UserChallenge)
+        .where(UserChallenge.id.in_(idle_ids))
+        .values(
+            status="pending",
+            session_token=None,
+            session_started_at=None,
+            last_activity_at=None
+        )
+        .returning(UserChallenge.user_id, UserChallenge.challenge_id)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    return [tuple(row) for row in result.all()]
+
+async def count_active_sessions(db: AsyncSession) -> int:
+    """Number of user_challenges currently in an active session."""
+    stmt = select(func.count(UserChallenge.id)).where(UserChallenge.status == "active")
+    return (await db.execute(stmt)).scalar_one()
+
 async def delete_all_for_user(
     db: AsyncSession,
     *,
     user_id: int
 ) -> int:
     """
-    Delete all UserChallenge rows for a given user_id.
-    Returns the number of rows deleted.
+    Delete all UserChallenge rows for a given user_id, together with their
+    challenge attempts (the attempts' foreign key does not cascade).
+    Returns the number of UserChallenge rows deleted.
     """
     # Use direct DELETE query - much more efficient
+    user_challenge_ids = select(UserChallenge.id).where(UserChallenge.user_id == user_id)
+    await db.execute(
+        delete(ChallengeAttempt).where(ChallengeAttempt.user_challenge_id.in_(user_challenge_ids))
+    )
     stmt = delete(UserChallenge).where(UserChallenge.user_id == user_id)
     result = await db.execute(stmt)
     await db.commit()
@@ -183,10 +300,12 @@ async def delete_all(
     db: AsyncSession
 ) -> int:
     """
-    Delete all UserChallenge rows in the table (use with caution).
-    Returns the number of rows deleted.
+    Delete all UserChallenge rows in the table, and with them every
+    challenge attempt (use with caution).
+    Returns the number of UserChallenge rows deleted.
     """
     # Use direct DELETE query - much more efficient
+    await db.execute(delete(ChallengeAttempt))
     stmt = delete(UserChallenge)
     result = await db.execute(stmt)
     await db.commit()
@@ -1,4 +1,6 @@
 from sqlalchemy.future import select
+from typing import Iterable, Tuple
+from sqlalchemy import update as sql_update, case, column, values, Float, Integer
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models.user_subtopics import UserSubtopic
 from app.schemas.user_subtopic import UserSubtopicCreate, UserSubtopicUpdate
@@ -7,6 +9,9 @@ from app.db.models.user_topics import UserTopic
 from sqlalchemy.orm import joinedload
 from app.db.models.topics import Topic
 
+# asyncpg accepts at most 32767 bind parameters per statement; 3 per row
+KNOWLEDGE_LEVEL_BATCH_SIZE = 10000
+
 async def get_by_id(db: AsyncSession, user_subtopic_id: int) -> UserSubtopic | None:
     result = await db.execute(select(UserSubtopic).where(UserSubtopic.id == user_subtopic_id))
     return result.scalars().first()
@@ -34,7 +39,6 @@ async def create(db: AsyncSession, user_subtopic_in: UserSubtopicCreate) -> User
     new_user_subtopic = UserSubtopic(**user_subtopic_in.model_dump())
     db.add(new_user_subtopic)
     await db.commit()
-    await db.refresh(new_user_subtopic)
     return new_user_subtopic
 
 async def update(db: AsyncSession, user_subtopic_db: UserSubtopic, user_subtopic_in: UserSubtopicUpdate) -> UserSubtopic:
@@ -42,51 +46,95 @@ async def update(db: AsyncSession, user_subtopic_db: UserSubtopic, user_subtopic
         setattr(user_subtopic_db, field, value)
     db.add(user_subtopic_db)
     await db.commit()
-    await db.refresh(user_subtopic_db)
     return user_subtopic_db
 
 async def delete(db: AsyncSession, user_subtopic_db: UserSubtopic) -> None:
     await db.delete(user_subtopic_db)
     await db.commit() 
 
+MIN_KNOWLEDGE_LEVEL = 0.1  # Minimum 10% knowledge level
+DEFAULT_KNOWLEDGE_LEVEL = 0.1  # Default 10% knowledge level
+
+def knowledge_level_from_score(correct: int, total: int) -> float:
+    """Convert an assessment correct/total count into a 0-1 knowledge level."""
+    knowledge_level = correct / total if total > 0 else 0.0
+
+    # Apply minimum knowledge level constraint
+    # If calculated level is below minimum, use minimum
+    # If calculated level is 0 (no correct answers), use default
+    if knowledge_level < MIN_KNOWLEDGE_LEVEL:
+        if knowledge_level == 0.0:
+            knowledge_level = DEFAULT_KNOWLEDGE_LEVEL
+        else:
+            knowledge_level = MIN_KNOWLEDGE_LEVEL
+    return knowledge_level
+
 async def update_knowledge_levels_from_assessment(
     db: AsyncSession,
     user_id: int,
-    subtopic_scores: dict
+    subtopic_scores: dict,
+    commit: bool = True
 ):
-    """Update knowledge_level for multiple subtopics based on assessment scores"""
-    MIN_KNOWLEDGE_LEVEL = 0.1  # Minimum 10% knowledge level
-    DEFAULT_KNOWLEDGE_LEVEL = 0.1  # Default 10% knowledge level
-    
-    for subtopic_id, score_data in subtopic_scores.items():
-        # Calculate percentage from correct and total
-        correct = score_data.get('correct', 0)
-        total = score_data.get('total', 0)
-        
-        # Calculate percentage (avoid division by zero)
-        if total > 0:
-            score_percentage = (correct / total) * 100
-        else:
-            score_percentage = 0.0
-        
-        # Convert percentage to 0-1 scale (divide by 100)
-        knowledge_level = score_percentage / 100.0
-        
-        # Apply minimum knowledge level constraint
-        # If calculated level is below minimum, use minimum
-        # If calculated level is 0 (no correct answers), use default
-        if knowledge_level < MIN_KNOWLEDGE_LEVEL:
-            if knowledge_level == 0.0:
-                knowledge_level = DEFAULT_KNOWLEDGE_LEVEL
-            else:
-                knowledge_level = MIN_KNOWLEDGE_LEVEL
-        
-        # Get or create user_subtopic record
-        user_subtopic = await get_by_user_and_subtopic(db, user_id, int(subtopic_id))
-        if user_subtopic:
-            user_subtopic.knowledge_level = knowledge_level
-            await db.commit()
-            await db.refresh(user_subtopic)
+    """
+    Update knowledge_level for multiple subtopics based on assessment scores.
+    All subtopics are written with a single UPDATE ... CASE statement.
+    """
+    levels = {
+        int(subtopic_id): knowledge_level_from_score(score_data.get('correct', 0), score_data.get('total', 0))
+        for subtopic_id, score_data in subtopic_scores.items()
+    }
+    if not levels:
+        return
+
+    await db.execute(
+        sql_update(UserSubtopic)
+        .where(
+            UserSubtopic.user_id == user_id,
+            UserSubtopic.subtopic_id.in_(list(levels))
+        )
+        .values(knowledge_level=case(levels, value=UserSubtopic.subtopic_id))
+        .execution_options(synchronize_session=False)
+    )
+    if commit:
+        await db.commit()
+
+async def bulk_set_knowledge_levels(
+    db: AsyncSession,
+    rows: Iterable[Tuple[int, float, float]],
+    commit: bool = True
+) -> int:
+    """
+    Set many knowledge levels with one UPDATE ... FROM (VALUES ...) per
+    KNOWLEDGE_LEVEL_BATCH_SIZE rows, in one transaction.
+    `rows` are (user_subtopic_id, expected_knowledge_level, new_knowledge_level);
+    a row is only written if its level still equals the expected one, so levels
+    changed by live updates in the meantime are not overwritten.
+    Returns the number of rows updated.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    updated = 0
+    for start in range(0, len(rows), KNOWLEDGE_LEVEL_BATCH_SIZE):
+        new_levels = values(
+            column("id", Integer),
+            column("expected", Float),
+            column("knowledge_level", Float),
+            name="new_levels"
+        ).data(rows[start:start + KNOWLEDGE_LEVEL_BATCH_SIZE])
+        result = await db.execute(
+            sql_update(UserSubtopic)
+            .where(
+                UserSubtopic.id == new_levels.c.id,
+                UserSubtopic.knowledge_level.is_not_distinct_from(new_levels.c.expected)
+            )
+            .values(knowledge_level=new_levels.c.knowledge_level)
+            .execution_options(synchronize_session=False)
+        )
+        updated += result.rowcount
+    if commit:
+        await db.commit()
+    return updated
 
 async def update_user_subtopic_progress(db, user_id, subtopic_id):
     try:
@@ -117,7 +165,6 @@ async def update_user_subtopic_progress(db, user_id, subtopic_id):
             user_subtopic.completed_at = datetime.now(timezone.utc)
 
         await db.commit()
-        await db.refresh(user_subtopic)
 
         # Unlock next subtopic or post-assessment if just completed
         if not was_completed and user_subtopic.is_completed:
@@ -211,7 +258,6 @@ async def update_user_topic_progress(db, user_id, topic_id):
             user_topic.post_assessment_completed = True
         
         await db.commit()
-        await db.refresh(user_topic)
 
         # Unlock next topic if progress_percent >= 0.75
         if progress_percent >= 0.75:
@@ -233,7 +279,6 @@ async def update_user_topic_progress(db, user_id, topic_id):
                     # Note: All topics start unlocked, this is just a safety check
                     next_user_topic.is_unlocked = True
                     await db.commit()
-                    await db.refresh(next_user_topic)
 
 async def unlock_first_subtopic_for_user(db: AsyncSession, user_id: int, topic_id: int):
     """Unlock the first subtopic for a user in a given topic."""
@@ -254,7 +299,6 @@ async def unlock_first_subtopic_for_user(db: AsyncSession, user_id: int, topic_i
             user_subtopic.is_unlocked = True
             user_subtopic.unlocked_at = datetime.now(timezone.utc)
             await db.commit()
-            await db.refresh(user_subtopic)
     else:
         # Create if not exists
         from datetime import datetime, timezone
@@ -266,7 +310,6 @@ async def unlock_first_subtopic_for_user(db: AsyncSession, user_id: int, topic_i
         )
         db.add(new_user_subtopic)
         await db.commit()
-        await db.refresh(new_user_subtopic)
 
     # Update topic progress after unlocking first subtopic
     await update_user_topic_progress(db, user_id, topic_id)
@@ -295,7 +338,6 @@ async def unlock_next_subtopic_or_post_assessment(db: AsyncSession, user_id: int
             user_subtopic.is_unlocked = True
             user_subtopic.unlocked_at = datetime.now(timezone.utc)
             await db.commit()
-            await db.refresh(user_subtopic)
     elif idx is not None and idx + 1 == len(all_subtopics):
         # Last subtopic completed, unlock post-assessment
         # Get user_topic
@@ -311,5 +353,4 @@ async def unlock_next_subtopic_or_post_assessment(db: AsyncSession, user_id: int
             post_assessment = post_assessment.scalars().first()
             if post_assessment and not post_assessment.is_unlocked:
                 post_assessment.is_unlocked = True
-                await db.commit()
-                await db.refresh(post_assessment)
\ No newline at end of file
+                await db.commit()
\ No newline at end of file
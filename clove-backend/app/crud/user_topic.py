@@ -61,7 +61,6 @@ async def create(db: AsyncSession, user_topic_in: UserTopicCreate) -> UserTopic:
     new_user_topic = UserTopic(**user_topic_in.model_dump())
     db.add(new_user_topic)
     await db.commit()
-    await db.refresh(new_user_topic)
     return new_user_topic
 
 async def update(db: AsyncSession, user_topic_db: UserTopic, user_topic_in: UserTopicUpdate) -> UserTopic:
@@ -69,7 +68,6 @@ async def update(db: AsyncSession, user_topic_db: UserTopic, user_topic_in: User
         setattr(user_topic_db, field, value)
     db.add(user_topic_db)
     await db.commit()
-    await db.refresh(user_topic_db)
     return user_topic_db
 
 async def delete(db: AsyncSession, user_topic_db: UserTopic) -> None:
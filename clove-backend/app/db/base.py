@@ -1,4 +1,6 @@
 from sqlalchemy.orm import DeclarativeBase
 
 class Base(DeclarativeBase):
-    pass
\ No newline at end of file
+    # INSERT/UPDATE ... RETURNING the server-generated columns (ids, created_at,
+    # updated_at), so objects need no refresh() after a commit
+    __mapper_args__ = {"eager_defaults": True}
\ No newline at end of file
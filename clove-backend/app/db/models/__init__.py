@@ -13,3 +13,5 @@ from .q_values import QValue
 from .pre_assessments import PreAssessment
 from .post_assessments import PostAssessment
 from .retention_tests import RetentionTest
+from .bkt_parameters import BKTParameter
+from .backups import BackupRun, BackupDeletion
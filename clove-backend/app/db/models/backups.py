@@ -0,0 +1,24 @@
+# app/db/models/backups.py
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, JSON, ForeignKey, func
+from app.db.base import Base
+
+# One base or incremental backup; its watermark bounds the next incremental run
+class BackupRun(Base):
+    __tablename__ = "backup_runs"
+
+    id          = Column(Integer, primary_key=True, index=True)
+    kind        = Column(String(16), nullable=False, comment="base or delta")
+    base_run_id = Column(Integer, ForeignKey("backup_runs.id"), nullable=True)
+    since       = Column(DateTime(timezone=True), nullable=True, comment="Lower bound of the exported changes")
+    watermark   = Column(DateTime(timezone=True), nullable=False, comment="Snapshot time of the backup")
+    manifest    = Column(JSON, nullable=False)
+    created_at  = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+# Tombstone written by a trigger for every deleted row of an incrementally backed up table
+class BackupDeletion(Base):
+    __tablename__ = "backup_deletions"
+
+    id         = Column(BigInteger, primary_key=True)
+    table_name = Column(String, nullable=False)
+    row_id     = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
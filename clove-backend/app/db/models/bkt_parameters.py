@@ -0,0 +1,24 @@
+# app/db/models/bkt_parameter.py
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, UniqueConstraint, func
+from app.db.base import Base
+
+# challenge_type of the parameters fitted over all challenge types of a subtopic
+ALL_CHALLENGE_TYPES = "all"
+
+class BKTParameter(Base):
+    __tablename__ = "bkt_parameters"
+    __table_args__ = (
+        UniqueConstraint("subtopic_id", "challenge_type", name="uq_bkt_parameters_subtopic_type"),
+    )
+
+    id             = Column(Integer, primary_key=True, index=True)
+    subtopic_id    = Column(Integer, ForeignKey("subtopics.subtopic_id", ondelete="CASCADE"), nullable=False)
+    challenge_type = Column(String, nullable=False, default=ALL_CHALLENGE_TYPES)
+    p_init         = Column(Float, nullable=False)
+    p_transit      = Column(Float, nullable=False)
+    p_guess        = Column(Float, nullable=False)
+    p_slip         = Column(Float, nullable=False)
+    log_likelihood = Column(Float, nullable=True)
+    n_sequences    = Column(Integer, nullable=False, default=0)
+    n_attempts     = Column(Integer, nullable=False, default=0)
+    fitted_at      = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -1,5 +1,5 @@
 # app/db/models/challenge_attempt.py
-from sqlalchemy import Column, Integer, Boolean, Enum, ForeignKey, DateTime, func, Text
+from sqlalchemy import Column, Integer, Boolean, Enum, ForeignKey, DateTime, func, Text, Index, text
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 from datetime import datetime
@@ -9,18 +9,33 @@ DifficultyEnum      = Enum("easy", "medium", "hard", name="ca_difficulty_enum")
 
 class ChallengeAttempt(Base):
     __tablename__ = "challenge_attempts"
+    __table_args__ = (
+        # Attempts of the current take: user_subtopic + take, newest first
+        Index("ix_challenge_attempts_user_subtopic_take", "user_subtopic_id", "take_number", "attempted_at"),
+        Index("ix_challenge_attempts_user_challenge_id", "user_challenge_id"),
+        # Append-only history, partitioned by month (see app/db/partitions.py)
+        {"postgresql_partition_by": "RANGE (attempted_at)"},
+    )
 
-    id               = Column(Integer, primary_key=True, index=True)
+    # The partition key has to be part of the primary key
+    id               = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_challenge_id = Column(Integer, ForeignKey("user_challenges.id"), nullable=False)
+    user_subtopic_id = Column(Integer, ForeignKey("user_subtopics.id", ondelete="CASCADE"), nullable=False)
+    take_number      = Column(Integer, nullable=False, default=1, server_default=text("1"))
     user_answer      = Column(Text, nullable=True)  # Add this field for user's answer
     is_successful    = Column(Boolean, nullable=False)
     time_spent       = Column(Integer, comment="Seconds")
     hints_used       = Column(Integer, default=0)
     points           = Column(Integer)
-    attempted_at     = Column(DateTime(timezone=True), server_default=func.now())
+    attempted_at     = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+    updated_at       = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
 
     # Relationships
     user_challenge = relationship(
         "UserChallenge",
         back_populates="challenge_attempts"
+    )
+    user_subtopic = relationship(
+        "UserSubtopic",
+        back_populates="challenge_attempts"
     )
\ No newline at end of file
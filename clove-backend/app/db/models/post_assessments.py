@@ -16,6 +16,7 @@ class PostAssessment(Base):
     questions_answers_iscorrect = Column(JSON, nullable=False, default=dict)
     attempt_count          = Column(Integer, default=0)
     taken_at               = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at             = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
 
     # Relationships
     user_topic = relationship(
@@ -1,15 +1,20 @@
 # app/db/models/q_value.py
-from sqlalchemy import Column, Integer, JSON, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, JSON, Numeric, ForeignKey, DateTime, UniqueConstraint, func
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
 class QValue(Base):
     __tablename__ = "q_values"
+    __table_args__ = (
+        # One Q-table per user_subtopic; get_or_create_q_table relies on it for ON CONFLICT
+        UniqueConstraint("user_subtopic_id", name="uq_q_values_user_subtopic_id"),
+    )
 
     id               = Column(Integer, primary_key=True, index=True)
     user_subtopic_id = Column(Integer, ForeignKey("user_subtopics.id"), nullable=False)
     q_table          = Column(JSON, nullable=False, default=dict)
     epsilon          = Column(Numeric(10, 2), nullable=False, default=0.8)
+    updated_at       = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
 
     # Relationships
     user_subtopic = relationship(
@@ -16,6 +16,7 @@ class RetentionTest(Base):
     is_completed = Column(Boolean, nullable=True, default=False)
     completed_at = Column(TIMESTAMP(timezone=True), nullable=True)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
     # New fields for two-stage retention test system
     stage = Column(Integer, nullable=False, default=1)  # 1 for first retention test (10 hours), 2 for second (5 days)
     first_stage_completed = Column(Boolean, nullable=False, default=False)
@@ -55,5 +55,6 @@ class Statistic(Base):
         DateTime(timezone=True),
         server_default=func.now(),
         onupdate=func.now(),
-        nullable=False
+        nullable=False,
+        index=True
     )
@@ -7,8 +7,11 @@ from sqlalchemy import (
     ForeignKey,
     Enum as SQLEnum,
     func,
+    text,
+    Index,
     String,
     Text,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import relationship
 from app.db.base import Base
@@ -19,6 +22,17 @@ StatusEnum = SQLEnum(
 
 class UserChallenge(Base):
     __tablename__ = "user_challenges"
+    __table_args__ = (
+        # One row per user and challenge; upsert() relies on it for ON CONFLICT
+        UniqueConstraint("user_id", "challenge_id", name="uq_user_challenges_user_id_challenge_id"),
+        # Active sessions by idle time, for the stale-session reaper; the
+        # expression is the one expire_idle_sessions() filters on
+        Index(
+            "ix_user_challenges_active_idle_since",
+            text("coalesce(last_activity_at, last_attempted_at)"),
+            postgresql_where=text("status = 'active'")
+        ),
+    )
 
     id                = Column(Integer, primary_key=True, index=True)
     user_id           = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -31,6 +45,7 @@ class UserChallenge(Base):
     session_token     = Column(String(255), unique=True, nullable=True)
     session_started_at = Column(DateTime(timezone=True), nullable=True)
     last_activity_at  = Column(DateTime(timezone=True), nullable=True)
+    updated_at        = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
     
     # Cancelled challenge restoration fields
     time_spent        = Column(Integer, nullable=True, default=0, comment='Time spent on challenge in seconds')
@@ -1,5 +1,5 @@
 # app/db/models/user_subtopic.py
-from sqlalchemy import Column, Integer, Boolean, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Boolean, Float, DateTime, ForeignKey, func, text
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -18,6 +18,11 @@ class UserSubtopic(Base):
     knowledge_level       = Column(Float, default=0.1)
     unlocked_at           = Column(DateTime(timezone=True))
     completed_at          = Column(DateTime(timezone=True))
+    
+    # Challenge takes (5 attempts each); attempts of earlier takes are kept
+    current_take          = Column(Integer, nullable=False, default=1, server_default=text("1"))
+    current_take_started_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at            = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
 
     # Relationships
     user               = relationship(
@@ -33,3 +38,9 @@ class UserSubtopic(Base):
         back_populates="user_subtopic",
         cascade="all, delete-orphan"
     )
+    challenge_attempts = relationship(
+        "ChallengeAttempt",
+        back_populates="user_subtopic",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
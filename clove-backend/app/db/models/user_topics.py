@@ -19,6 +19,7 @@ class UserTopic(Base):
     unlocked_at                 = Column(DateTime(timezone=True), default=None)
     completed_at                = Column(DateTime(timezone=True), default=None)
     last_accessed_at            = Column(DateTime(timezone=True), default=None)
+    updated_at                  = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
 
     # Relationships
     user             = relationship(
@@ -15,7 +15,7 @@ class User(Base):
     is_adaptive   = Column(Boolean, nullable=False, default=True)
     password_hash = Column(String(255), nullable=False)
     created_at    = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at    = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    updated_at    = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
     last_login    = Column(DateTime(timezone=True), nullable=True)
     is_active     = Column(Boolean, nullable=False, default=False)
     is_superuser  = Column(Boolean, nullable=False, default=False)
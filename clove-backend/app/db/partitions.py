@@ -0,0 +1,120 @@
+# app/db/partitions.py
+"""
+Monthly range partitions of the append-only challenge_attempts table.
+
+Partitions are named challenge_attempts_yYYYYmMM. A DEFAULT partition
+catches rows outside the created months, so inserts never fail if no
+partition was created for a while. `ensure_challenge_attempt_partitions`
+creates the partitions for the current month and the next
+CHALLENGE_ATTEMPT_PARTITION_MONTHS_AHEAD months. It runs at startup and then
+periodically (app/services/partition_maintainer.py), each month in its own
+transaction, so one failure does not stop the others and is retried on the
+next run.
+
+PostgreSQL refuses to create a partition while the DEFAULT partition holds
+rows in its range. Those rows are moved: DEFAULT is detached, the month is
+created, the rows are moved into it and DEFAULT is attached again, all in
+one transaction.
+"""
+import logging
+from datetime import date
+from typing import List, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "challenge_attempts"
+DEFAULT_PARTITION = "challenge_attempts_default"
+# pg_advisory_xact_lock key: one worker changes the partitions at a time
+PARTITION_LOCK = 4202
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def monthly_ranges(start: date, months: int) -> List[Tuple[str, date, date]]:
+    """(partition name, from, to) for `months` months starting at start's month."""
+    first = date(start.year, start.month, 1)
+    ranges = []
+    for i in range(months):
+        lower = _add_months(first, i)
+        ranges.append((f"{PARENT_TABLE}_y{lower.year:04d}m{lower.month:02d}", lower, _add_months(lower, 1)))
+    return ranges
+
+
+async def _exists(conn: AsyncConnection, name: str) -> bool:
+    return (await conn.execute(select(func.to_regclass(name)))).scalar() is not None
+
+
+async def ensure_default_partition(conn: AsyncConnection) -> bool:
+    """Create the DEFAULT partition if missing; returns whether it was created."""
+    await conn.execute(select(func.pg_advisory_xact_lock(PARTITION_LOCK)))
+    if await _exists(conn, DEFAULT_PARTITION):
+        return False
+    await conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+    return True
+
+
+async def ensure_monthly_partition(conn: AsyncConnection, name: str, lower: date, upper: date) -> int:
+    """
+    Create one month's partition if missing, moving its rows out of the
+    DEFAULT partition. Returns the number of rows moved, or -1 if the
+    partition already existed.
+    """
+    await conn.execute(select(func.pg_advisory_xact_lock(PARTITION_LOCK)))
+    if await _exists(conn, name):
+        return -1
+    bounds = f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+    in_range = f"attempted_at >= '{lower.isoformat()}' AND attempted_at < '{upper.isoformat()}'"
+
+    stray = await _exists(conn, DEFAULT_PARTITION) and (await conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range})"
+    ))).scalar()
+    if not stray:
+        await conn.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} {bounds}"))
+        return 0
+
+    await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+    await conn.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} {bounds}"))
+    # The rows move, they are not deleted: no backup_deletions entries for them
+    await conn.execute(text("SET LOCAL clove.backup_restore = 'on'"))
+    moved = (await conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {in_range} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ))).rowcount
+    await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    return moved
+
+
+async def ensure_challenge_attempt_partitions(bind: AsyncEngine, months_ahead: int) -> List[str]:
+    """
+    Create the DEFAULT partition and the missing partitions up to `months_ahead`
+    months from now, each in its own transaction. Failures are logged and
+    skipped. Returns the names of the partitions created.
+    """
+    created = []
+    try:
+        async with bind.begin() as conn:
+            if await ensure_default_partition(conn):
+                created.append(DEFAULT_PARTITION)
+    except Exception as e:
+        logger.error(f"Could not create {DEFAULT_PARTITION}: {e}")
+
+    for name, lower, upper in monthly_ranges(date.today(), months_ahead + 1):
+        try:
+            async with bind.begin() as conn:
+                moved = await ensure_monthly_partition(conn, name, lower, upper)
+        except Exception as e:
+            logger.error(f"Could not create partition {name}: {e}")
+            continue
+        if moved >= 0:
+            created.append(name)
+        if moved > 0:
+            logger.warning(f"Moved {moved} challenge_attempts rows from {DEFAULT_PARTITION} into {name}")
+    if created:
+        logger.info(f"Created challenge_attempts partitions: {', '.join(created)}")
+    return created
@@ -0,0 +1,150 @@
+# app/db/pool_governor.py
+"""
+Connection pool sizing and request admission.
+
+Every worker process has its own pool, so DB_POOL_SIZE=20 with four workers is
+up to 120 connections. With DB_CONNECTION_BUDGET set, each worker instead gets
+an equal share of the budget (less DB_RESERVED_CONNECTIONS kept for migrations,
+backups and admin sessions), so adding workers cannot exceed max_connections.
+
+In front of the pool, AdmissionGovernor lets at most as many requests run as a
+worker has connections. The rest wait in priority lanes, submissions and
+challenge selection first, dashboards and stats last. Each lane waits a bounded
+time and is then turned away with a 503 instead of blocking DB_POOL_TIMEOUT
+seconds inside the pool. Low-priority requests leave a few slots free, so they
+are shed first when the worker is busy.
+"""
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, NamedTuple, Tuple
+
+from app.core.config import settings
+
+
+def worker_pool_limits(budget: int, workers: int, reserved: int, pool_size: int, max_overflow: int) -> Tuple[int, int]:
+    """(pool_size, max_overflow) of one worker; the configured sizes when there is no budget."""
+    if budget <= 0:
+        return pool_size, max_overflow
+    per_worker = max(2, (budget - reserved) // max(1, workers))
+    # A quarter of the share only opens under bursts and is closed again after use
+    overflow = per_worker // 4
+    return per_worker - overflow, overflow
+
+
+primary_pool_limits = worker_pool_limits(
+    settings.DB_CONNECTION_BUDGET, settings.WEB_CONCURRENCY, settings.DB_RESERVED_CONNECTIONS,
+    settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+)
+replica_pool_limits = worker_pool_limits(
+    settings.DB_REPLICA_CONNECTION_BUDGET, settings.WEB_CONCURRENCY, settings.DB_RESERVED_CONNECTIONS,
+    settings.DB_REPLICA_POOL_SIZE, settings.DB_REPLICA_MAX_OVERFLOW
+)
+
+
+class Lane(NamedTuple):
+    name: str
+    max_wait_seconds: float
+    retry_after_seconds: int
+
+
+# Highest priority first
+LANES = (
+    Lane("critical", settings.DB_ADMISSION_WAIT_MS_CRITICAL / 1000, 1),
+    Lane("normal", settings.DB_ADMISSION_WAIT_MS_NORMAL / 1000, 2),
+    Lane("low", settings.DB_ADMISSION_WAIT_MS_LOW / 1000, 5),
+)
+
+
+class AdmissionGovernor:
+    """
+    A counting semaphore with one FIFO queue per lane. A freed slot goes to the
+    oldest waiter of the highest lane; "low" only takes a slot while more than
+    low_reserved slots are free, and only queues while the queue is under half
+    full, so its requests are the first to be turned away.
+    """
+
+    def __init__(self, capacity: int, queue_limit: int, low_reserved: int):
+        self.capacity = max(1, capacity)
+        self.queue_limit = queue_limit
+        self.low_reserved = min(low_reserved, self.capacity - 1)
+        self.lanes = {lane.name: lane for lane in LANES}
+        self.in_use = 0
+        self._queues: Dict[str, Deque[asyncio.Future]] = {lane.name: deque() for lane in LANES}
+        self.admitted = {lane.name: 0 for lane in LANES}
+        self.rejected = {lane.name: 0 for lane in LANES}
+
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _can_take(self, lane: str) -> bool:
+        free = self.capacity - self.in_use
+        return free > (self.low_reserved if lane == "low" else 0)
+
+    def _queued_ahead(self, lane: str) -> bool:
+        for other in LANES:
+            if self._queues[other.name]:
+                return True
+            if other.name == lane:
+                return False
+        return False
+
+    def _can_queue(self, lane: str) -> bool:
+        limit = self.queue_limit // 2 if lane == "low" else self.queue_limit
+        return self.queue_depth() < limit
+
+    async def acquire(self, lane: str) -> bool:
+        """Take a slot, waiting at most the lane's max wait; False when turned away."""
+        if self._can_take(lane) and not self._queued_ahead(lane):
+            self.in_use += 1
+            self.admitted[lane] += 1
+            return True
+        if not self._can_queue(lane):
+            self.rejected[lane] += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[lane].append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.lanes[lane].max_wait_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended
+                self.release()
+            elif waiter in self._queues[lane]:
+                self._queues[lane].remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected[lane] += 1
+            return False
+        self.admitted[lane] += 1
+        return True
+
+    def release(self) -> None:
+        self.in_use -= 1
+        for lane in LANES:
+            queue = self._queues[lane.name]
+            while queue and self._can_take(lane.name):
+                waiter = queue.popleft()
+                if not waiter.done():
+                    self.in_use += 1
+                    waiter.set_result(None)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "in_use": self.in_use,
+            "queue_depth": self.queue_depth(),
+            "queued": {name: len(queue) for name, queue in self._queues.items()},
+            "admitted": dict(self.admitted),
+            "rejected": dict(self.rejected),
+            "pool_size": primary_pool_limits[0],
+            "max_overflow": primary_pool_limits[1],
+        }
+
+
+_capacity = settings.DB_ADMISSION_CONCURRENCY or sum(primary_pool_limits)
+admission = AdmissionGovernor(
+    capacity=_capacity,
+    queue_limit=settings.DB_ADMISSION_QUEUE_LIMIT,
+    low_reserved=settings.DB_ADMISSION_LOW_RESERVED_SLOTS or _capacity // 5
+)
@@ -237,7 +237,7 @@ class DatabaseSeeder:
         
         # Initialize user data for all seeded users (since merge() doesn't trigger create_user())
         for user in users_to_seed:
-            await init_user_data(self.session, user.id)
+            await init_user_data(self.session, user.id, provision_q_tables=user.is_adaptive)
         
         logger.info("Initialized user data (UserTopics, UserSubtopics, Pre/PostAssessments, Statistics) for all users")
 
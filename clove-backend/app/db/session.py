@@ -1,38 +1,222 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, AsyncEngine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import AsyncAdaptedQueuePool
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import text
+from sqlalchemy.exc import InvalidRequestError, SQLAlchemyError
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from fastapi import Request
 from app.core.config import settings
+from app.db.pool_governor import admission, primary_pool_limits, replica_pool_limits
+import asyncio
+import hashlib
+import hmac
 import logging
-from typing import AsyncGenerator, Dict, Any
+from typing import AsyncGenerator, Dict, Any, Optional
 import backoff
 import time
 
 logger = logging.getLogger(__name__)
 
-# Create an AsyncEngine with connection pooling
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    future=True,
-    poolclass=AsyncAdaptedQueuePool,
-    pool_size=settings.DB_POOL_SIZE,
-    max_overflow=settings.DB_MAX_OVERFLOW,
-    pool_timeout=settings.DB_POOL_TIMEOUT,
-    pool_recycle=settings.DB_POOL_RECYCLE,
-    pool_pre_ping=True,  # Enable connection health checks
-    connect_args={
-        "server_settings": {
-            "application_name": settings.PROJECT_NAME,
-            "timezone": "UTC"
-        },
-        "ssl": "require" if not settings.DEBUG else False,  # SSL required in production
-        "command_timeout": 60,  # Increase command timeout
-        "statement_cache_size": 0,  # Disable statement cache
-    }
+def _create_engine(url: str, pool_size: int, max_overflow: int) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=settings.DEBUG,
+        future=True,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True,  # Enable connection health checks
+        connect_args={
+            "server_settings": {
+                "application_name": settings.PROJECT_NAME,
+                "timezone": "UTC"
+            },
+            "ssl": "require" if not settings.DEBUG else False,  # SSL required in production
+            "command_timeout": 60,  # Increase command timeout
+            "statement_cache_size": 0,  # Disable statement cache
+        }
+    )
+
+# Create an AsyncEngine with connection pooling; sized from DB_CONNECTION_BUDGET when set
+engine = _create_engine(settings.DATABASE_URL, *primary_pool_limits)
+
+# Optional read replica with its own pool; without one, reads go to the primary
+replica_engine: Optional[AsyncEngine] = (
+    _create_engine(settings.DATABASE_REPLICA_URL, *replica_pool_limits)
+    if settings.DATABASE_REPLICA_URL else None
+)
+
+# Seconds the replica is behind; 0 when it has replayed everything it received
+# (or is not a standby at all, e.g. a second local instance)
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+# Response header with a signed marker of the user's latest write; the frontend
+# sends it back on every request, so whichever worker serves the next read knows
+WRITE_MARKER_HEADER = "X-Last-Write"
+
+
+class ReadRouter:
+    """
+    Picks the engine of each read session (get_read_db).
+
+    The replica is used while a background check finds it reachable and at most
+    DB_REPLICA_MAX_LAG_SECONDS behind; otherwise reads fall back to the primary.
+    A user whose request committed writes through get_db reads from the primary
+    for the next DB_READ_YOUR_WRITES_SECONDS, so they see their own writes. The
+    write is remembered twice: in this worker process, and in the signed
+    X-Last-Write marker the response carries, which the client sends back so
+    that every worker (and instance) can check it.
+    """
+
+    def __init__(
+        self,
+        replica: Optional[AsyncEngine],
+        sticky_seconds: int,
+        max_lag_seconds: float,
+        check_interval_seconds: int,
+        secret: str
+    ):
+        self.replica = replica
+        # Reads run outside a transaction block: no BEGIN / COMMIT round trips
+        self._replica_bind = replica.sync_engine.execution_options(isolation_level="AUTOCOMMIT") if replica else None
+        self._primary_bind = engine.sync_engine.execution_options(isolation_level="AUTOCOMMIT")
+        self.sticky_seconds = sticky_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self._secret = secret.encode()
+        self.replica_ok = replica is not None
+        self.replica_lag: Optional[float] = None
+        self._written_until: Dict[int, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def mark_write(self, user_id: int) -> None:
+        # Covers clients that do not send the marker back, on this worker only
+        if self.replica is not None:
+            self._written_until[user_id] = time.monotonic() + self.sticky_seconds
+
+    def _sign(self, user_id: int, written_at: str) -> str:
+        return hmac.new(self._secret, f"{user_id}:{written_at}".encode(), hashlib.sha256).hexdigest()[:32]
+
+    def write_marker(self, user_id: int) -> str:
+        """X-Last-Write value for a user who wrote just now: "<unix ms>.<signature>"."""
+        written_at = str(int(time.time() * 1000))
+        return f"{written_at}.{self._sign(user_id, written_at)}"
+
+    def marker_written_at(self, user_id: int, marker: Optional[str]) -> Optional[float]:
+        """Unix time of a marker's write; None if it is missing, malformed or not this user's."""
+        if not marker:
+            return None
+        written_at, _, signature = marker.partition(".")
+        if not written_at.isdigit() or not hmac.compare_digest(signature, self._sign(user_id, written_at)):
+            return None
+        return int(written_at) / 1000
+
+    def bind_for(self, user_id: Optional[int], written_at: Optional[float] = None) -> Engine:
+        if not self.replica_ok:
+            return self._primary_bind
+        if user_id is not None and self._written_until.get(user_id, 0) > time.monotonic():
+            return self._primary_bind
+        # Wall clock: the marker may come from another worker process
+        if written_at is not None and written_at + self.sticky_seconds > time.time():
+            return self._primary_bind
+        return self._replica_bind
+
+    async def check(self) -> None:
+        try:
+            async with self.replica.connect() as conn:
+                self.replica_lag = float((await conn.execute(REPLICA_LAG_SQL)).scalar() or 0)
+            ok = self.replica_lag <= self.max_lag_seconds
+            reason = f"lag {self.replica_lag:.1f}s"
+        except Exception as e:
+            self.replica_lag = None
+            ok, reason = False, str(e)
+        if ok != self.replica_ok:
+            if ok:
+                logger.info(f"Read replica back in use ({reason})")
+            else:
+                logger.warning(f"Read replica unavailable, reading from the primary: {reason}")
+        self.replica_ok = ok
+
+        now = time.monotonic()
+        self._written_until = {u: t for u, t in self._written_until.items() if t > now}
+
+    async def _loop(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval_seconds)
+
+    def start(self) -> None:
+        if self.replica is not None and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        if self.replica is None:
+            return {"configured": False}
+        return {"configured": True, "in_use": self.replica_ok, "lag_seconds": self.replica_lag}
+
+
+read_router = ReadRouter(
+    replica_engine,
+    sticky_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
+    max_lag_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval_seconds=settings.DB_REPLICA_CHECK_INTERVAL_SECONDS,
+    secret=settings.JWT_SECRET_KEY
 )
 
+
+class RoutingSession(Session):
+    """Binds to the engine read_router picks at the first statement, and keeps it."""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        bind = self.info.get("bind")
+        if bind is None:
+            bind = self.info["bind"] = read_router.bind_for(self.info.get("user_id"), self.info.get("written_at"))
+        return bind
+
+
+# Dirty tracking: "pending_commit" while flushed changes or statements other
+# than SELECT are uncommitted, "wrote" once such a transaction has committed
+@event.listens_for(Session, "after_flush")
+def _flag_flush(session, flush_context):
+    session.info["pending_commit"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _flag_dml(orm_execute_state):
+    if not orm_execute_state.is_select:
+        if isinstance(orm_execute_state.session, RoutingSession):
+            raise InvalidRequestError("get_read_db sessions are read-only")
+        orm_execute_state.session.info["pending_commit"] = True
+
+@event.listens_for(Session, "after_commit")
+def _flag_commit(session):
+    if session.info.pop("pending_commit", None):
+        session.info["wrote"] = True
+
+@event.listens_for(Session, "after_rollback")
+def _flag_rollback(session):
+    session.info.pop("pending_commit", None)
+
+@event.listens_for(RoutingSession, "before_flush")
+def _read_only(session, flush_context, instances):
+    if session.new or session.dirty or session.deleted:
+        raise InvalidRequestError("get_read_db sessions are read-only")
+
 # Create session factory once at module level
 async_session = sessionmaker(
     engine,
@@ -42,12 +226,39 @@ async_session = sessionmaker(
     autoflush=False
 )
 
+# Read sessions; bound per session by RoutingSession
+async_read_session = sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False
+)
+
+def _uncommitted(session: AsyncSession) -> bool:
+    return bool(session.new or session.dirty or session.deleted or session.info.get("pending_commit"))
+
+def has_writes(session: AsyncSession) -> bool:
+    """Whether the session committed writes, or holds some that get_db will commit."""
+    return bool(session.info.get("wrote")) or _uncommitted(session)
+
 # Session factory with retry mechanism
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+async def get_db(request: Request = None) -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
+        if request is not None:
+            # The code after the yield runs once the response has started, too
+            # late for headers: ReadYourWritesMiddleware looks at the session instead
+            request.state.db_session = session
         try:
             yield session
-            await session.commit()
+            # Commit only what is left: unflushed changes or uncommitted statements.
+            # A session that only read, or that CRUD helpers already committed, is
+            # just closed (which ends any read transaction with its one ROLLBACK)
+            if _uncommitted(session):
+                await session.commit()
+            # get_current_user puts the user on the session
+            if session.info.get("wrote") and session.info.get("user_id") is not None:
+                read_router.mark_write(session.info["user_id"])
         except SQLAlchemyError as e:
             await session.rollback()
             logger.error(f"Database error: {str(e)}")
@@ -59,6 +270,23 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         finally:
             await session.close()
 
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for endpoints that only read: on the replica when one is configured
+    and usable, else on the primary. Statements run in autocommit mode, so there
+    is no transaction to begin or end, and anything but a SELECT is rejected.
+    Set info["user_id"] and info["written_at"] (get_current_reader does) before
+    the first query to get read-your-writes.
+    """
+    async with async_read_session() as session:
+        try:
+            yield session
+        except Exception as e:
+            logger.error(f"Read session error: {str(e)}")
+            raise
+        finally:
+            await session.close()
+
 async def check_db_health() -> Dict[str, Any]:
     """
     Comprehensive database health check that follows industry standards.
@@ -117,7 +345,9 @@ async def check_db_health() -> Dict[str, Any]:
                     "response_time": f"{(time.time() - start_time):.3f}s",
                     "version": db_version,
                     "last_checked": time.strftime("%Y-%m-%d %H:%M:%S"),
-                    "long_running_queries": len(long_running)
+                    "long_running_queries": len(long_running),
+                    "replica": read_router.status(),
+                    "admission": admission.status()
                 }
             })
 
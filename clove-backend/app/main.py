@@ -12,8 +12,13 @@ from app.api import (
     user_challenges, auth, onboarding
 )
 from app.db.base import Base
-from app.db.session import engine
-from fastapi.responses import JSONResponse
+from app.db.session import engine, read_router, replica_engine
+from app.db.pool_governor import admission
+from app.db.partitions import ensure_challenge_attempt_partitions
+from app.services.session_registry import session_registry
+from app.services.session_reaper import session_reaper
+from app.services.partition_maintainer import partition_maintainer
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 # Import all models to ensure they are registered with SQLAlchemy
 import app.db.models
@@ -42,64 +47,89 @@ logging.config.dictConfig({
 
 logger = logging.getLogger(__name__)
 
+async def prepare_database() -> None:
+    """
+    Migrations (production) or create_all (development), seeding and the
+    upcoming challenge_attempts partitions. Run by each worker's lifespan, or
+    once by app.server before it forks the workers.
+    """
+    # Run migrations in production mode
+    if not settings.DEBUG:
+        import subprocess
+        import os
+        # Get the correct path - we're already in clove-backend when running
+        current_dir = os.getcwd()
+        logger.info(f"Current working directory: {current_dir}")
+        result = subprocess.run(["alembic", "upgrade", "head"], 
+                              capture_output=True, text=True)
+        if result.returncode == 0:
+            logger.info("Database migrations completed successfully")
+            
+            # Now run seeding after successful migrations
+            try:
+                from app.db.seeder import DatabaseSeeder
+                from app.db.session import get_db
+                
+                logger.info("Checking if database needs seeding...")
+                async for session in get_db():
+                    if await DatabaseSeeder.needs_seeding(session):
+                        logger.info("Starting database seeding...")
+                        seeder = DatabaseSeeder(session)
+                        await seeder.seed_database()
+                        logger.info("Database seeding completed successfully!")
+                    else:
+                        logger.info("Database already seeded, skipping...")
+                    break
+            except Exception as e:
+                logger.error(f"Seeding failed: {str(e)}")
+                # Don't fail startup if seeding fails
+        else:
+            logger.error(f"Migration failed. Return code: {result.returncode}")
+            logger.error(f"STDERR: {result.stderr}")
+            logger.error(f"STDOUT: {result.stdout}")
+    else:
+    # Only create tables in development mode
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        logger.info("Database tables created successfully (development mode)")
+    
+    # Upcoming monthly partitions of challenge_attempts, one transaction per
+    # month; failures are logged and retried by the partition maintainer
+    await ensure_challenge_attempt_partitions(engine, settings.CHALLENGE_ATTEMPT_PARTITION_MONTHS_AHEAD)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up application...")
-    try:
-        # Run migrations in production mode
-        if not settings.DEBUG:
-            import subprocess
-            import os
-            # Get the correct path - we're already in clove-backend when running
-            current_dir = os.getcwd()
-            logger.info(f"Current working directory: {current_dir}")
-            result = subprocess.run(["alembic", "upgrade", "head"], 
-                                  capture_output=True, text=True)
-            if result.returncode == 0:
-                logger.info("Database migrations completed successfully")
-                
-                # Now run seeding after successful migrations
-                try:
-                    from app.db.seeder import DatabaseSeeder
-                    from app.db.session import get_db
-                    
-                    logger.info("Checking if database needs seeding...")
-                    async for session in get_db():
-                        if await DatabaseSeeder.needs_seeding(session):
-                            logger.info("Starting database seeding...")
-                            seeder = DatabaseSeeder(session)
-                            await seeder.seed_database()
-                            logger.info("Database seeding completed successfully!")
-                        else:
-                            logger.info("Database already seeded, skipping...")
-                        break
-                except Exception as e:
-                    logger.error(f"Seeding failed: {str(e)}")
-                    # Don't fail startup if seeding fails
-            else:
-                logger.error(f"Migration failed. Return code: {result.returncode}")
-                logger.error(f"STDERR: {result.stderr}")
-                logger.error(f"STDOUT: {result.stdout}")
-        else:
-        # Only create tables in development mode
-            async with engine.begin() as conn:
-                await conn.run_sync(Base.metadata.create_all)
-            logger.info("Database tables created successfully (development mode)")
-    except Exception as e:
-        logger.error(f"Error during startup: {str(e)}")
-        raise
+    if settings.PREPARE_DATABASE_ON_STARTUP:
+        try:
+            await prepare_database()
+        except Exception as e:
+            logger.error(f"Error during startup: {str(e)}")
+            raise
+    
+    session_registry.start()
+    session_reaper.start()
+    partition_maintainer.start()
+    read_router.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down application...")
+    await read_router.stop()
+    await partition_maintainer.stop()
+    await session_reaper.stop()
+    await session_registry.stop()
     await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
     logger.info("Application shutdown complete")
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None
 )
@@ -114,7 +144,8 @@ async def health_check():
     db_health = await check_db_health()
     return {
         "status": "healthy" if db_health else "unhealthy",
-        "database": "connected" if db_health else "disconnected"
+        "database": "connected" if db_health else "disconnected",
+        "admission": admission.status()
     }
 
 # Include routers without version prefix
@@ -0,0 +1,201 @@
+# app/server.py
+"""
+Production server entry point.
+
+    python -m app.server --host 0.0.0.0 --port 8000 [--workers N]
+
+Runs N uvicorn workers (WEB_CONCURRENCY, default one per available core) on
+uvloop and httptools when they are installed. The app is imported once in
+this master process, and database preparation (migrations, seeding,
+partitions) runs here once. Only then is the socket bound and the workers
+forked, so they start with every module already imported and do not race each
+other through alembic. The master restarts a worker that dies and, on SIGTERM
+or SIGINT, sends SIGTERM to all of them. Each worker stops accepting connections, lets
+in-flight requests finish for up to SERVER_GRACEFUL_SHUTDOWN_SECONDS, then runs
+the lifespan shutdown (session flush, engine.dispose()).
+
+Without os.fork (Windows) or with one worker, a single server runs in-process.
+For development, `uvicorn app.main:app --reload` still works.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# uvicorn exits with 3 when the lifespan startup fails; restarting would loop
+STARTUP_FAILED = 3
+
+
+def default_workers() -> int:
+    if os.getenv("WEB_CONCURRENCY"):
+        return int(os.environ["WEB_CONCURRENCY"])
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _installed(module: str) -> bool:
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+def server_config(app):
+    import uvicorn
+    from app.core.config import settings
+
+    return uvicorn.Config(
+        app,
+        loop="uvloop" if _installed("uvloop") else "asyncio",
+        http="httptools" if _installed("httptools") else "h11",
+        lifespan="on",
+        timeout_keep_alive=settings.SERVER_KEEP_ALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        backlog=settings.SERVER_BACKLOG,
+        proxy_headers=True,
+        forwarded_allow_ips="*",
+        # LoggingMiddleware logs every request; keep the app's logging config
+        access_log=False,
+        log_config=None,
+    )
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def prepare_once() -> None:
+    """Run the lifespan's database preparation here, then skip it in the workers."""
+    import asyncio
+    from app.core.config import settings
+    from app.db.session import engine, replica_engine
+    from app.main import prepare_database
+
+    async def run():
+        try:
+            await prepare_database()
+        finally:
+            # No connections may be shared with the forked workers
+            await engine.dispose()
+            if replica_engine is not None:
+                await replica_engine.dispose()
+
+    asyncio.run(run())
+    settings.PREPARE_DATABASE_ON_STARTUP = False
+
+
+def serve(config, sock) -> int:
+    import uvicorn
+
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+    return 0 if server.started else STARTUP_FAILED
+
+
+def run_workers(config, sock, workers: int, grace_seconds: int) -> int:
+    children = {}
+    stopping = False
+    exit_code = 0
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 1
+            try:
+                code = serve(config, sock)
+            except BaseException:
+                logger.exception("Worker crashed")
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame=None) -> None:
+        nonlocal stopping
+        if not stopping:
+            logger.info(f"Draining {len(children)} workers...")
+        stopping = True
+        # A terminal's Ctrl-C already reached the workers; a second SIGINT
+        # would make uvicorn skip the drain, SIGTERM does not
+        forward = signal.SIGKILL if signum == signal.SIGKILL else signal.SIGTERM
+        for pid in children:
+            try:
+                os.kill(pid, forward)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    logger.info(f"Started {workers} workers on {sock.getsockname()[:2]}")
+
+    deadline = None
+    while children:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            if stopping:
+                # Requests get grace_seconds, the lifespan shutdown a little more
+                deadline = deadline or time.monotonic() + grace_seconds + 15
+                if time.monotonic() > deadline:
+                    logger.warning(f"Killing {len(children)} workers that did not stop in time")
+                    stop(signal.SIGKILL)
+                    deadline = float("inf")
+            time.sleep(0.2)
+            continue
+        if children.pop(pid, None) is None:
+            continue
+        code = os.waitstatus_to_exitcode(status)
+        if stopping:
+            continue
+        if code == STARTUP_FAILED:
+            logger.error(f"Worker {pid} failed to start; stopping")
+            exit_code = 1
+            stop(signal.SIGTERM)
+        else:
+            logger.warning(f"Worker {pid} exited with {code}; starting a new one")
+            spawn()
+    return exit_code
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the CLOVE backend")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=default_workers())
+    args = parser.parse_args()
+
+    forking = args.workers > 1 and hasattr(os, "fork")
+    workers = args.workers if forking else 1
+    # Read by settings at import: pool sizes are split across the workers
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+
+    from app.main import app
+    from app.core.config import settings
+
+    if forking and settings.PREPARE_DATABASE_ON_STARTUP:
+        prepare_once()
+    config = server_config(app)
+    sock = bind_socket(args.host, args.port, settings.SERVER_BACKLOG)
+    logger.info(f"Server: {workers} workers, loop={config.loop}, http={config.http}")
+    if not forking:
+        sys.exit(serve(config, sock))
+    sys.exit(run_workers(config, sock, workers, settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS))
+
+
+if __name__ == "__main__":
+    main()
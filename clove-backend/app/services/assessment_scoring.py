@@ -0,0 +1,194 @@
+# app/services/assessment_scoring.py
+"""
+Scoring shared by the pre- and post-assessment answer submission paths.
+
+Per-subtopic correct/total counters are kept in a `SubtopicTally` and updated
+in O(1) per answer, using the in-memory question bank for the
+question -> subtopic mapping, so no question rows are fetched while scoring.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.user_subtopic import update_knowledge_levels_from_assessment
+from app.services.question_bank import QuestionBank, get_question_bank
+
+ASSESSMENT_LENGTH = 15
+MAX_ATTEMPTS = 2
+
+
+class SubtopicTally:
+    """Running correct/total counts per subtopic for a single assessment attempt."""
+
+    def __init__(self, bank: QuestionBank):
+        self._bank = bank
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self.total_correct = 0
+        self.total_items = 0
+
+    @classmethod
+    def from_answers(cls, bank: QuestionBank, questions_answers: Dict[str, Any]) -> "SubtopicTally":
+        """Rebuild the counters from a stored questions_answers_iscorrect mapping."""
+        tally = cls(bank)
+        for qid_str, answer_data in questions_answers.items():
+            tally.add(int(qid_str), bool(answer_data.get('is_correct')))
+        return tally
+
+    def add(self, question_id: int, is_correct: bool, previous: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Count one answer. If `previous` is the stored answer for the same question
+        (a re-answer), its contribution is replaced rather than added twice.
+        """
+        question = self._bank.get(question_id)
+        if not question:
+            return
+        counts = self.counts.setdefault(str(question.subtopic_id), {'correct': 0, 'total': 0})
+
+        if previous is not None:
+            if previous.get('is_correct'):
+                counts['correct'] -= 1
+                self.total_correct -= 1
+        else:
+            counts['total'] += 1
+            self.total_items += 1
+
+        if is_correct:
+            counts['correct'] += 1
+            self.total_correct += 1
+
+    def subtopic_scores(self) -> Dict[str, float]:
+        """Per-subtopic ratios as stored in the assessment's subtopic_scores column."""
+        return {
+            sid: round(scores['correct'] / scores['total'], 2) if scores['total'] > 0 else 0.0
+            for sid, scores in self.counts.items()
+        }
+
+
+async def score_single_answer(
+    db: AsyncSession,
+    existing,
+    user_topic,
+    question_id: int,
+    user_answer: Any,
+    correct_answer: Any,
+    is_correct: bool,
+    on_attempt_completed: Callable[[AsyncSession, int, int], Awaitable[Any]]
+) -> Dict[str, Any]:
+    """
+    Apply one answer to a PreAssessment/PostAssessment record and persist the new
+    scores together with the user's subtopic knowledge levels in one commit.
+    `on_attempt_completed(db, user_id, topic_id)` runs when this answer finishes
+    the attempt (pre: unlock the first subtopic, post: refresh topic progress).
+    """
+    bank = await get_question_bank(db)
+    questions_answers = (existing.questions_answers_iscorrect or {}).copy()
+
+    s_question_id = str(question_id)
+
+    # If this is the start of a second attempt, reset previous answers
+    if existing.attempt_count == 1 and existing.total_items < ASSESSMENT_LENGTH and s_question_id not in questions_answers:
+        questions_answers = {}
+
+    tally = SubtopicTally.from_answers(bank, questions_answers)
+    tally.add(question_id, is_correct, previous=questions_answers.get(s_question_id))
+
+    # Update the specific answer, now including the correct_answer
+    questions_answers[s_question_id] = {
+        'user_answer': user_answer,
+        'correct_answer': correct_answer,
+        'is_correct': is_correct
+    }
+
+    total_correct = tally.total_correct
+    total_items = tally.total_items
+
+    # When an attempt is completed, decide the denominator for scoring
+    is_attempt_completed = total_items >= ASSESSMENT_LENGTH and existing.total_items < ASSESSMENT_LENGTH
+
+    if is_attempt_completed:
+        # The attempt is now finished, use 15 as the denominator
+        final_score = (total_correct / ASSESSMENT_LENGTH) * 100
+        if existing.attempt_count < MAX_ATTEMPTS:
+            existing.attempt_count += 1
+        existing.is_completed = True # Mark as completed
+    else:
+        # The attempt is still in progress, score based on answered questions
+        final_score = (total_correct / total_items) * 100 if total_items > 0 else 0
+
+    # Update the record
+    existing.questions_answers_iscorrect = questions_answers
+    existing.subtopic_scores = tally.subtopic_scores()
+    existing.total_score = round(final_score, 2)
+    existing.total_items = total_items
+
+    # Always update knowledge levels (even incomplete attempts), passing the detailed counts
+    await update_knowledge_levels_from_assessment(db, user_topic.user_id, tally.counts, commit=False)
+    await db.commit()
+
+    if is_attempt_completed:
+        await on_attempt_completed(db, user_topic.user_id, user_topic.topic_id)
+
+    return {
+        "message": "Answer submitted successfully",
+        "is_correct": is_correct,
+        "correct_answer": correct_answer,
+        "progress": {
+            "total_answered": total_items,
+            "total_correct": total_correct,
+            "score_percentage": final_score,
+            "attempt_count": existing.attempt_count,
+            "can_retry": existing.attempt_count < MAX_ATTEMPTS and existing.total_items < ASSESSMENT_LENGTH
+        }
+    }
+
+
+async def score_all_answers(
+    db: AsyncSession,
+    existing,
+    user_topic,
+    answers: Dict[int, Any]
+):
+    """
+    Score a full submission in one pass, applying the 15-item denominator as a
+    penalty for incomplete tests, and persist it with the knowledge levels.
+    """
+    bank = await get_question_bank(db)
+    if any(bank.get(question_id) is None for question_id in answers):
+        raise ValueError("Some question IDs are invalid")
+
+    questions_answers = {}
+    tally = SubtopicTally(bank)
+
+    for question_id, user_answer in answers.items():
+        correct_answer = bank.get(question_id).correct_answer
+        is_correct = user_answer == correct_answer
+
+        questions_answers[str(question_id)] = {
+            'user_answer': user_answer,
+            'correct_answer': correct_answer,
+            'is_correct': is_correct
+        }
+        tally.add(question_id, is_correct)
+
+    total_items = len(answers)
+
+    # Use 15 as the denominator if the user submits fewer than 15 answers
+    denominator = ASSESSMENT_LENGTH if total_items < ASSESSMENT_LENGTH else total_items
+    final_score = (tally.total_correct / denominator) * 100 if denominator > 0 else 0
+
+    # Since this is a submission, the attempt is considered completed.
+    if existing.attempt_count < MAX_ATTEMPTS:
+        existing.attempt_count += 1
+
+    # Update the record
+    existing.questions_answers_iscorrect = questions_answers
+    existing.subtopic_scores = tally.subtopic_scores()
+    existing.total_score = round(final_score, 2)
+    existing.total_items = total_items
+    existing.is_completed = True # Mark as completed
+
+    # Always update knowledge levels
+    await update_knowledge_levels_from_assessment(db, user_topic.user_id, tally.counts, commit=False)
+    await db.commit()
+
+    return existing
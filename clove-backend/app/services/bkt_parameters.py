@@ -0,0 +1,85 @@
+# app/services/bkt_parameters.py
+"""
+In-memory cache of the fitted per-subtopic BKT parameters.
+
+scripts/fit_bkt_parameters.py writes the bkt_parameters table; the engine
+asks `bkt_parameter_cache.get()` for the BKT model of a subtopic and
+challenge type on every attempt. The table is small (one row per subtopic
+and type), so it is loaded whole and reloaded once it is older than
+BKT_PARAMETER_CACHE_TTL_SECONDS. A subtopic without fitted parameters uses
+the global defaults in app/core/utils.py.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Mapping, Optional, Tuple
+
+from app.core.bkt import BKT
+from app.core.config import settings
+from app.crud.bkt_parameter import get_all
+from app.db.models.bkt_parameters import ALL_CHALLENGE_TYPES
+from app.db.session import async_session
+
+logger = logging.getLogger(__name__)
+
+
+def pick_model(
+    models: Mapping[Tuple[int, str], BKT],
+    default: BKT,
+    subtopic_id: int,
+    challenge_type: Optional[str] = None
+) -> BKT:
+    """Per-type parameters first, then the subtopic's, then the default."""
+    return (
+        (challenge_type is not None and models.get((subtopic_id, challenge_type)))
+        or models.get((subtopic_id, ALL_CHALLENGE_TYPES))
+        or default
+    )
+
+
+class BKTParameterCache:
+    def __init__(self, ttl_seconds: int, enabled: bool = True):
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._models: Dict[Tuple[int, str], BKT] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._default = BKT()
+
+    def _stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds
+
+    async def load(self) -> None:
+        # Own short session, so a failed load never aborts the caller's transaction
+        async with async_session() as db:
+            rows = await get_all(db)
+        self._models = {
+            (row.subtopic_id, row.challenge_type): BKT(row.p_transit, row.p_guess, row.p_slip)
+            for row in rows
+        }
+        self._loaded_at = time.monotonic()
+        logger.info(f"Loaded fitted BKT parameters for {len(self._models)} subtopic/type pairs")
+
+    async def get(self, subtopic_id: int, challenge_type: Optional[str] = None) -> BKT:
+        """BKT for a subtopic: per-type parameters first, then the subtopic's, then the defaults."""
+        if not self.enabled:
+            return self._default
+        if self._stale():
+            async with self._lock:
+                if self._stale():
+                    try:
+                        await self.load()
+                    except Exception as e:
+                        # Keep serving the previous parameters; retry after another TTL
+                        self._loaded_at = time.monotonic()
+                        logger.warning(f"Could not load BKT parameters: {str(e)}")
+        return pick_model(self._models, self._default, subtopic_id, challenge_type)
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+
+bkt_parameter_cache = BKTParameterCache(
+    ttl_seconds=settings.BKT_PARAMETER_CACHE_TTL_SECONDS,
+    enabled=settings.BKT_USE_FITTED_PARAMETERS
+)
@@ -0,0 +1,148 @@
+# app/services/curriculum_fanout.py
+"""
+Background fan-out of per-user records when a topic or subtopic is added.
+
+The API routes schedule `run_topic_fanout` / `run_subtopic_fanout` as
+background tasks after the new row is committed. The job walks the user ID
+space in chunks of FANOUT_BATCH_SIZE, runs the set-based INSERT ... SELECT
+from the CRUD layer for each chunk in its own short transaction, and records
+its progress. Every chunk skips users that already have the records, so a
+failed job can simply be scheduled again.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud.subtopic import seed_new_subtopic_for_existing_users
+from app.crud.topic import seed_new_topic_for_existing_users
+from app.db.models.subtopics import Subtopic
+from app.db.models.user_subtopics import UserSubtopic
+from app.db.models.user_topics import UserTopic
+from app.db.models.users import User
+from app.db.session import async_session
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FanoutJob:
+    kind: str
+    target_id: int
+    status: str = "pending"
+    chunks_total: int = 0
+    chunks_done: int = 0
+    rows_created: int = 0
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "target_id": self.target_id,
+            "status": self.status,
+            "chunks_total": self.chunks_total,
+            "chunks_done": self.chunks_done,
+            "rows_created": self.rows_created,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+# Jobs started by this worker process, keyed by (kind, target_id)
+_jobs: Dict[Tuple[str, int], FanoutJob] = {}
+
+
+async def _run(
+    kind: str,
+    target_id: int,
+    seed_chunk: Callable[[AsyncSession, int, Tuple[int, int]], Awaitable[int]]
+) -> None:
+    job = FanoutJob(kind=kind, target_id=target_id, status="running")
+    _jobs[(kind, target_id)] = job
+    batch_size = settings.FANOUT_BATCH_SIZE
+
+    try:
+        async with async_session() as db:
+            id_bounds = (await db.execute(select(func.min(User.id), func.max(User.id)))).one()
+        min_id, max_id = id_bounds
+        if min_id is None:
+            job.status = "completed"
+            job.finished_at = time.time()
+            return
+
+        job.chunks_total = (max_id - min_id) // batch_size + 1
+        for lower in range(min_id, max_id + 1, batch_size):
+            # One short transaction per chunk
+            async with async_session() as db:
+                job.rows_created += await seed_chunk(db, target_id, (lower, lower + batch_size))
+                await db.commit()
+            job.chunks_done += 1
+            logger.info(
+                f"{kind} {target_id} fan-out: chunk {job.chunks_done}/{job.chunks_total}, "
+                f"{job.rows_created} rows created"
+            )
+
+        job.status = "completed"
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)
+        logger.error(f"{kind} {target_id} fan-out failed after {job.chunks_done} chunks: {e}")
+    finally:
+        job.finished_at = time.time()
+
+
+async def run_topic_fanout(topic_id: int) -> None:
+    """Create UserTopic, Pre/PostAssessment and UserSubtopic rows for all users."""
+    await _run("topic", topic_id, seed_new_topic_for_existing_users)
+
+
+async def run_subtopic_fanout(subtopic_id: int) -> None:
+    """Create UserSubtopic rows for all users of the subtopic's topic."""
+    await _run("subtopic", subtopic_id, seed_new_subtopic_for_existing_users)
+
+
+async def get_topic_fanout_progress(db: AsyncSession, topic_id: int) -> dict:
+    """
+    Progress of a topic fan-out. The row counts come from the database, so they
+    are accurate on any worker; `job` is only present on the worker running it.
+    """
+    total_users = (await db.execute(select(func.count(User.id)))).scalar_one()
+    seeded = (await db.execute(
+        select(func.count(UserTopic.id)).where(UserTopic.topic_id == topic_id)
+    )).scalar_one()
+    job = _jobs.get(("topic", topic_id))
+    return {
+        "total_users": total_users,
+        "seeded_users": seeded,
+        "job": job.as_dict() if job else None
+    }
+
+
+async def get_subtopic_fanout_progress(db: AsyncSession, subtopic_id: int) -> dict:
+    """Progress of a subtopic fan-out, measured against the users of its topic."""
+    subtopic = (await db.execute(
+        select(Subtopic).where(Subtopic.subtopic_id == subtopic_id)
+    )).scalar_one_or_none()
+    if not subtopic:
+        raise ValueError(f"Subtopic with ID {subtopic_id} not found")
+
+    total_users = (await db.execute(
+        select(func.count(UserTopic.id)).where(UserTopic.topic_id == subtopic.topic_id)
+    )).scalar_one()
+    seeded = (await db.execute(
+        select(func.count(UserSubtopic.id)).where(UserSubtopic.subtopic_id == subtopic_id)
+    )).scalar_one()
+    job = _jobs.get(("subtopic", subtopic_id))
+    return {
+        "total_users": total_users,
+        "seeded_users": seeded,
+        "job": job.as_dict() if job else None
+    }
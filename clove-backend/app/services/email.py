@@ -1,11 +1,15 @@
 from typing import Optional
-from jinja2 import Template
-import requests
 import json
 
 from app.core.config import settings
 
 
+def _template(source: str):
+    """jinja2.Template, imported on the first email rather than at app startup."""
+    from jinja2 import Template as JinjaTemplate
+    return JinjaTemplate(source)
+
+
 class EmailService:
     def __init__(self):
         self.from_email = settings.EMAILS_FROM_EMAIL
@@ -48,6 +52,8 @@ class EmailService:
                 if text_content:
                     data["textContent"] = text_content
                 
+                import requests
+
                 response = requests.post(self.brevo_url, headers=headers, data=json.dumps(data))
                 
                 if response.status_code == 201:
@@ -68,7 +74,7 @@ class EmailService:
         """Send email verification email"""
         subject = "Verify your CLOVE email address"
         
-        html_template = Template("""
+        html_template = _template("""
         <!DOCTYPE html>
         <html>
         <head>
@@ -110,7 +116,7 @@ class EmailService:
         </html>
         """)
         
-        text_template = Template("""
+        text_template = _template("""
         Hi {{ user_name }}!
 
         Welcome to CLOVE Learning Platform!
@@ -135,7 +141,7 @@ class EmailService:
         """Send password reset email"""
         subject = "Reset your CLOVE password"
         
-        html_template = Template("""
+        html_template = _template("""
         <!DOCTYPE html>
         <html>
         <head>
@@ -183,7 +189,7 @@ class EmailService:
         </html>
         """)
         
-        text_template = Template("""
+        text_template = _template("""
         Hi {{ user_name }}!
 
         We received a request to reset your password for your CLOVE account.
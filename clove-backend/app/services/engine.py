@@ -1,18 +1,20 @@
 # app/services/adaptive_engine.py
 
-from app.core.bkt import BKT
 from app.core.rl import QLearning
-from app.core.utils import classify_mastery, determine_streak_flags, calculate_reward
+from app.core.rng import stream
+from app.core.rl_kernel import count_streaks, transition
+from app.services.bkt_parameters import bkt_parameter_cache
 
 # avoid circular imports
 from app.crud.challenge import get_by_id as get_challenge_by_id
 from app.crud.user_subtopic import get_by_id as get_user_subtopic_by_id, update as update_user_subtopic
-from app.crud.q_value import get_q_table, create_q_table, update_q_table
+from app.crud.q_value import get_or_create_q_table, update_q_table
 from app.schemas.user_subtopic import UserSubtopicUpdate
 
 async def _run_non_adaptive_update(
     db,
     user_subtopic_id: int,
+    challenge_id: int,
     is_correct: bool,
 ):
     """
@@ -20,10 +22,12 @@ async def _run_non_adaptive_update(
     This only updates the user's BKT knowledge level and does not touch the RL model.
     """
     us = await get_user_subtopic_by_id(db, user_subtopic_id)
+    chall = await get_challenge_by_id(db, challenge_id)
     
-    # BKT update
+    # BKT update with the subtopic's fitted parameters
     old_know = us.knowledge_level
-    new_know = BKT().update_knowledge(old_know, is_correct)
+    bkt = await bkt_parameter_cache.get(us.subtopic_id, chall.type)
+    new_know = bkt.update_knowledge(old_know, is_correct)
     await update_user_subtopic(db, us, UserSubtopicUpdate(knowledge_level=new_know))
 
     return new_know
@@ -40,47 +44,34 @@ async def _run_adaptive_update(
     # This import must be inside the function to avoid circular dependency
     from app.crud.challenge_attempt import get_last_attempts_for_user_subtopic
 
-    # 1) pull the last 2 UserChallenge rows
+    # 1) pull the take's earlier attempts (a take holds 5), newest first
     us = await get_user_subtopic_by_id(db, user_subtopic_id)
 
-    attempts = await get_last_attempts_for_user_subtopic(db, us.user_id, us.subtopic_id, 3)
-    attempts = [a for a in attempts if a.user_challenge.challenge_id != challenge_id][:2]
+    attempts = await get_last_attempts_for_user_subtopic(db, us, 5)
+    attempts = [a for a in attempts if a.user_challenge.challenge_id != challenge_id]
 
-    # 2) Compute streak flags over those two
-    correct_streak = incorrect_streak = 0
-    for attempt in attempts:
-        if attempt.is_successful:
-            correct_streak += 1
-            incorrect_streak = 0
-        else:
-            incorrect_streak += 1
-            correct_streak = 0
+    # 2) Compute streak flags over the last two
+    correct_streak, incorrect_streak = count_streaks(a.is_successful for a in attempts[:2])
 
-    # 3) BKT update
+    # 3) BKT update with the subtopic's fitted parameters
+    chall = await get_challenge_by_id(db, challenge_id)
     old_know = us.knowledge_level
-    new_know = BKT().update_knowledge(old_know, is_correct)
+    bkt = await bkt_parameter_cache.get(us.subtopic_id, chall.type)
+    new_know = bkt.update_knowledge(old_know, is_correct)
     await update_user_subtopic(db, us, UserSubtopicUpdate(knowledge_level=new_know))
 
-    # 4) Build RL states
-    mastery_before = classify_mastery(old_know)
-    timer, hint = determine_streak_flags(incorrect_streak, correct_streak)
-    current_state = (mastery_before, timer, hint)
-
-    # next state always rolls in current attempt
-    next_correct = correct_streak + (1 if is_correct else 0)
-    next_incorrect = incorrect_streak + (0 if is_correct else 1)
-    mastery_after = classify_mastery(new_know)
-    next_timer, next_hint = determine_streak_flags(next_incorrect, next_correct)
-    next_state = (mastery_after, next_timer, next_hint)
-
-    # 5) Reward calculation
-    chall = await get_challenge_by_id(db, challenge_id)
+    # 4-5) RL states and reward from the precomputed transition tables;
+    # the next state always rolls in the current attempt
     on_time = int(time_spent <= chall.timer)
-    reward = calculate_reward(is_correct, hints_used, current_state[1], on_time)
+    current_state, next_state, reward = transition(
+        old_know, new_know, incorrect_streak, correct_streak, is_correct, hints_used, on_time
+    )
 
     # 6) Q‑learning update
-    qobj = await get_q_table(db, user_subtopic_id) or await create_q_table(db, user_subtopic_id)
-    rl = QLearning()
+    qobj = await get_or_create_q_table(db, user_subtopic_id)
+    # Only draws if the stored table lacks a state; keyed by this attempt's
+    # position in the take, as the selection that picked it was
+    rl = QLearning(rng=stream(user_subtopic_id, "update", us.current_take, len(attempts)))
     rl.q_table, rl.epsilon = qobj.q_table, qobj.epsilon
     rl.update_q_value(current_state, chall.type, reward, next_state)
     rl.decay_epsilon()
@@ -108,5 +99,5 @@ async def run_updates(
         )
     else:
         # For non-adaptive users, we only update BKT and don't need a reward.
-        new_know = await _run_non_adaptive_update(db, user_subtopic_id, is_correct)
+        new_know = await _run_non_adaptive_update(db, user_subtopic_id, challenge_id, is_correct)
         return new_know, None # Return None for the reward
@@ -0,0 +1,72 @@
+# app/services/partition_maintainer.py
+"""
+Background creation of the upcoming challenge_attempts partitions.
+
+Startup creates them once (prepare_database), but a process can run for
+months. Every CHALLENGE_ATTEMPT_PARTITION_CHECK_INTERVAL_SECONDS each worker
+checks again, so the next months always exist before rows reach them and a
+failed month is retried. Workers take turns through an advisory lock; a
+check that finds every partition in place only reads the catalog.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.db.partitions import ensure_challenge_attempt_partitions
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionMaintainer:
+    def __init__(self, months_ahead: int, interval_seconds: int):
+        self.months_ahead = months_ahead
+        self.interval_seconds = interval_seconds
+        self.stats: Dict[str, Any] = {
+            "runs": 0,
+            "created_total": 0,
+            "last_created": [],
+            "last_run_at": None,
+            "last_run_duration_ms": None
+        }
+        self._task: Optional[asyncio.Task] = None
+
+    async def run(self) -> List[str]:
+        start = time.perf_counter()
+        created = await ensure_challenge_attempt_partitions(engine, self.months_ahead)
+        self.stats["runs"] += 1
+        self.stats["created_total"] += len(created)
+        self.stats["last_created"] = created
+        self.stats["last_run_at"] = datetime.utcnow().isoformat()
+        self.stats["last_run_duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return created
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.run()
+            except Exception as e:
+                logger.error(f"challenge_attempts partition check failed: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+partition_maintainer = PartitionMaintainer(
+    months_ahead=settings.CHALLENGE_ATTEMPT_PARTITION_MONTHS_AHEAD,
+    interval_seconds=settings.CHALLENGE_ATTEMPT_PARTITION_CHECK_INTERVAL_SECONDS
+)
@@ -0,0 +1,220 @@
+# app/services/question_bank.py
+"""
+In-memory view of the assessment question bank.
+
+Assessment questions and subtopics are seeded content that only changes through
+the superuser CRUD routes, so the bank is loaded once per process and indexed
+for the assessment and retention-test paths. The admin write paths call
+`invalidate_question_bank()` so the next read rebuilds it.
+"""
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.assessment_questions import AssessmentQuestion
+from app.db.models.subtopics import Subtopic
+
+# Questions with IDs at or above this value are reserved for retention tests
+RETENTION_QUESTION_START_ID = 136
+RETENTION_STAGES = (1, 2)
+RETENTION_QUESTIONS_PER_SUBTOPIC = 5
+RETENTION_TEST_SIZE = 15
+
+
+@dataclass(frozen=True)
+class BankQuestion:
+    """Read-only copy of an AssessmentQuestion row (compatible with AssessmentQuestionRead)."""
+    id: int
+    subtopic_id: int
+    topic_id: int
+    difficulty: str
+    question_choices_correctanswer: dict
+    subtopic_title: Optional[str] = None
+
+    @property
+    def correct_answer(self):
+        return self.question_choices_correctanswer.get('correct_answer')
+
+
+@dataclass(frozen=True)
+class RetentionSubtopicGroup:
+    subtopic_id: int
+    title: str
+    questions: Tuple[BankQuestion, ...]
+
+
+@dataclass(frozen=True)
+class RetentionSet:
+    """The fixed questions of one retention-test stage for a topic, grouped by subtopic."""
+    topic_id: int
+    stage: int
+    questions: Tuple[BankQuestion, ...]
+    subtopics: Tuple[RetentionSubtopicGroup, ...]
+
+    @property
+    def question_ids(self) -> List[int]:
+        return [q.id for q in self.questions]
+
+
+class QuestionBank:
+    def __init__(self, questions: List[BankQuestion], subtopic_ids_by_topic: Dict[int, List[int]]):
+        self.questions: Dict[int, BankQuestion] = {q.id: q for q in questions}
+        self.subtopic_ids_by_topic: Dict[int, Tuple[int, ...]] = {
+            topic_id: tuple(sorted(subtopic_ids)) for topic_id, subtopic_ids in subtopic_ids_by_topic.items()
+        }
+
+        # Index arrays of question IDs per subtopic, partitioned at the retention cutoff
+        assessment_ids: Dict[int, List[int]] = {}
+        retention_ids: Dict[int, List[int]] = {}
+        for question_id in sorted(self.questions):
+            question = self.questions[question_id]
+            partition = retention_ids if question_id >= RETENTION_QUESTION_START_ID else assessment_ids
+            partition.setdefault(question.subtopic_id, []).append(question_id)
+        self.assessment_ids_by_subtopic: Dict[int, Tuple[int, ...]] = {
+            sid: tuple(ids) for sid, ids in assessment_ids.items()
+        }
+        self.retention_ids_by_subtopic: Dict[int, Tuple[int, ...]] = {
+            sid: tuple(ids) for sid, ids in retention_ids.items()
+        }
+
+        self.retention_sets: Dict[Tuple[int, int], RetentionSet] = self._build_retention_sets()
+
+    def get(self, question_id: int) -> Optional[BankQuestion]:
+        return self.questions.get(question_id)
+
+    def get_many(self, question_ids: Iterable[int]) -> List[BankQuestion]:
+        """Return the known questions for the given IDs, preserving order."""
+        return [self.questions[qid] for qid in question_ids if qid in self.questions]
+
+    def sample_assessment(
+        self,
+        topic_id: int,
+        questions_per_subtopic: int,
+        answered_ids: Iterable[int] = ()
+    ) -> List[BankQuestion]:
+        """
+        Sample a balanced pre-assessment for a topic from the non-retention
+        partition: `questions_per_subtopic` per subtopic, minus the questions
+        already answered in that subtopic, which are never drawn again.
+        """
+        subtopic_ids = self.subtopic_ids_by_topic.get(topic_id)
+        if not subtopic_ids:
+            raise ValueError(f"No subtopics found for topic_id {topic_id}")
+
+        answered_ids = set(answered_ids)
+        answered_count_by_subtopic: Dict[int, int] = {}
+        for qid in answered_ids:
+            question = self.questions.get(qid)
+            if question:
+                answered_count_by_subtopic[question.subtopic_id] = answered_count_by_subtopic.get(question.subtopic_id, 0) + 1
+
+        selected_ids: List[int] = []
+        for sid in subtopic_ids:
+            needed_count = questions_per_subtopic - answered_count_by_subtopic.get(sid, 0)
+            if needed_count <= 0:
+                continue
+
+            pool = self.assessment_ids_by_subtopic.get(sid, ())
+            if answered_ids:
+                pool = [qid for qid in pool if qid not in answered_ids]
+                if len(pool) < needed_count:
+                    raise ValueError(
+                        f"Not enough new questions available for subtopic {sid} to create a balanced assessment. "
+                        f"Need {needed_count}, but only {len(pool)} found."
+                    )
+            elif len(pool) < needed_count:
+                raise ValueError(
+                    f"Not enough questions available for subtopic {sid}. "
+                    f"Need {needed_count}, but only {len(pool)} found."
+                )
+            selected_ids.extend(random.sample(pool, needed_count))
+
+        random.shuffle(selected_ids)
+        return [self.questions[qid] for qid in selected_ids]
+
+    def get_retention_set(self, topic_id: int, stage: int) -> RetentionSet:
+        if stage not in RETENTION_STAGES:
+            raise ValueError("Invalid retention test stage. Must be 1 or 2.")
+        retention_set = self.retention_sets.get((topic_id, stage))
+        if not retention_set:
+            raise ValueError(f"Retention test not available for topic {topic_id}")
+        return retention_set
+
+    def _build_retention_sets(self) -> Dict[Tuple[int, int], RetentionSet]:
+        """
+        Each subtopic contributes RETENTION_QUESTIONS_PER_SUBTOPIC questions per stage,
+        taken in ID order from its retention questions: the first block is stage 1,
+        the next block is stage 2. For the seed data this reproduces the
+        Topic 1: 136-150 / 181-195, Topic 2: 151-165 / 196-210,
+        Topic 3: 166-180 / 211-225 ranges.
+        """
+        groups_by_key: Dict[Tuple[int, int], List[RetentionSubtopicGroup]] = {}
+        for subtopic_id in sorted(self.retention_ids_by_subtopic):
+            subtopic_questions = self.get_many(self.retention_ids_by_subtopic[subtopic_id])
+            for index, stage in enumerate(RETENTION_STAGES):
+                start = index * RETENTION_QUESTIONS_PER_SUBTOPIC
+                block = subtopic_questions[start:start + RETENTION_QUESTIONS_PER_SUBTOPIC]
+                if not block:
+                    continue
+                group = RetentionSubtopicGroup(
+                    subtopic_id=subtopic_id,
+                    title=block[0].subtopic_title or f"Subtopic {subtopic_id}",
+                    questions=tuple(block)
+                )
+                groups_by_key.setdefault((block[0].topic_id, stage), []).append(group)
+
+        return {
+            (topic_id, stage): RetentionSet(
+                topic_id=topic_id,
+                stage=stage,
+                questions=tuple(q for group in groups for q in group.questions),
+                subtopics=tuple(groups)
+            )
+            for (topic_id, stage), groups in groups_by_key.items()
+        }
+
+
+_question_bank: Optional[QuestionBank] = None
+_question_bank_lock = asyncio.Lock()
+
+
+async def _load_question_bank(db: AsyncSession) -> QuestionBank:
+    subtopics = (await db.execute(select(Subtopic))).scalars().all()
+    subtopics_by_id = {s.subtopic_id: s for s in subtopics}
+    subtopic_ids_by_topic: Dict[int, List[int]] = {}
+    for subtopic in subtopics:
+        subtopic_ids_by_topic.setdefault(subtopic.topic_id, []).append(subtopic.subtopic_id)
+
+    rows = (await db.execute(select(AssessmentQuestion))).scalars().all()
+    questions = []
+    for row in rows:
+        subtopic = subtopics_by_id.get(row.subtopic_id)
+        questions.append(BankQuestion(
+            id=row.id,
+            subtopic_id=row.subtopic_id,
+            topic_id=subtopic.topic_id if subtopic else None,
+            difficulty=row.difficulty,
+            question_choices_correctanswer=row.question_choices_correctanswer or {},
+            subtopic_title=subtopic.title if subtopic else None
+        ))
+    return QuestionBank(questions, subtopic_ids_by_topic)
+
+
+async def get_question_bank(db: AsyncSession) -> QuestionBank:
+    """Return the process-wide question bank, loading it on first use."""
+    global _question_bank
+    if _question_bank is None:
+        async with _question_bank_lock:
+            if _question_bank is None:
+                _question_bank = await _load_question_bank(db)
+    return _question_bank
+
+
+def invalidate_question_bank() -> None:
+    """Drop the cached bank; called after questions or subtopics are changed."""
+    global _question_bank
+    _question_bank = None
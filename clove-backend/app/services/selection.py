@@ -1,9 +1,11 @@
-import random
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.rl import QLearning
+from app.core.rng import stream
+from app.core.rl_kernel import count_streaks
+from app.core.selection_rules import NON_ADAPTIVE_SEQUENCE, partition_by_progress
 from app.core.utils import classify_mastery, determine_streak_flags, get_difficulty
-from app.crud.q_value import get_q_table, create_q_table
+from app.crud.q_value import get_or_create_q_table
 from app.crud.challenge import get_challenges_by_type_and_difficulty, get_by_id as get_challenge_by_id, get_unsolved_challenges_by_difficulty, get_all_challenges_by_subtopic, get_challenges_by_difficulty
 from app.crud.user_subtopic import get_by_id as get_user_subtopic_by_id
 from app.crud.user_challenge import get_by_user_and_challenge, get_last_cancelled 
@@ -12,7 +14,6 @@ from app.crud.user import get_by_id as get_user_by_id
 
 from app.db.models.challenges import Challenge
 
-
 async def _select_non_adaptive_challenge(
     db: AsyncSession,
     user_subtopic_id: int, 
@@ -31,25 +32,20 @@ async def _select_non_adaptive_challenge(
         return await get_challenge_by_id(db, cancelled_uc.challenge_id)
 
     # 2) Determine the current position in the 5-challenge sequence based on attempt count.
-    # The API endpoint logic deletes attempts after a take of 5 is full.
-    recent_attempts = await get_last_attempts_for_user_subtopic(db, user_id, subtopic_id, 5)
+    # The API endpoint logic starts a new take once a take of 5 is full.
+    recent_attempts = await get_last_attempts_for_user_subtopic(db, us, 5)
     attempt_index = len(recent_attempts)
+    # Draws for this position of this take; the same history picks the same challenge
+    rng = stream(user_subtopic_id, "select", us.current_take, attempt_index)
 
-    # This handles the case where a take is full but not yet deleted, or for any count > 4.
+    # This handles the case where a take is full but not yet closed, or for any count > 4.
     if attempt_index >= 5:
         attempt_index = 4 # Default to the last step in the sequence
 
     # Extract challenge IDs that have already been attempted in this take to prevent duplication
     attempted_challenge_ids = {attempt.user_challenge.challenge_id for attempt in recent_attempts}
 
-    sequence_map = {
-        0: "easy",
-        1: "easy",
-        2: "medium",
-        3: "medium",
-        4: "hard"
-    }
-    target_difficulty = sequence_map[attempt_index]
+    target_difficulty = NON_ADAPTIVE_SEQUENCE[attempt_index]
 
     # 3) Fetch all candidate challenges matching the target difficulty for the subtopic.
     # This might require a new CRUD function: get_challenges_by_difficulty
@@ -69,34 +65,20 @@ async def _select_non_adaptive_challenge(
         # Filter out already attempted challenges from fallback candidates
         all_unsolved = [c for c in all_unsolved if c.id not in attempted_challenge_ids]
         if all_unsolved:
-            return random.choice(all_unsolved)
+            return rng.choice(all_unsolved)
         # If all are solved, just return any challenge from the subtopic
         all_challenges = await get_all_challenges_by_subtopic(db, subtopic_id)
         # Filter out already attempted challenges
         all_challenges = [c for c in all_challenges if c.id not in attempted_challenge_ids]
-        return random.choice(all_challenges)
+        return rng.choice(all_challenges)
 
     # 4) Partition candidates using the same priority as the adaptive system
-    pending, unsolved, solved = [], [], []
-    for c in candidates:
-        uc = await get_by_user_and_challenge(db, user_id, c.id)
-        if not uc or uc.status == 'pending':
-            pending.append(c)
-        elif uc.status == 'completed' and not uc.is_solved:
-            unsolved.append(c)
-        elif uc.status == 'completed' and uc.is_solved:
-            solved.append(c)
+    progress = {c.id: await get_by_user_and_challenge(db, user_id, c.id) for c in candidates}
+    pending, unsolved, solved, _ = partition_by_progress(candidates, progress)
     
     # 5) Return a challenge based on the priority: pending -> unsolved -> solved
-    if pending:
-        return random.choice(pending)
-    if unsolved:
-        return random.choice(unsolved)
-    if solved:
-        return random.choice(solved)
-    
     # Ultimate fallback: If candidates were found but none fit the partitions (unlikely), return any of them.
-    return random.choice(candidates)
+    return rng.choice(pending or unsolved or solved or candidates)
 
 
 async def _select_adaptive_challenge(
@@ -117,29 +99,24 @@ async def _select_adaptive_challenge(
         return await get_challenge_by_id(db, cancelled_uc.challenge_id)
 
     # 1) Get previous attempts to determine streaks and prevent duplication
-    attempts = await get_last_attempts_for_user_subtopic(db, us.user_id, us.subtopic_id, 2)
-    recent_attempts = await get_last_attempts_for_user_subtopic(db, us.user_id, us.subtopic_id, 5)
+    attempts = await get_last_attempts_for_user_subtopic(db, us, 2)
+    recent_attempts = await get_last_attempts_for_user_subtopic(db, us, 5)
+    # Exploration and tie-breaking draws for this position of this take
+    rng = stream(user_subtopic_id, "select", us.current_take, len(recent_attempts))
     
     # Extract challenge IDs that have already been attempted in this take to prevent duplication
     attempted_challenge_ids = {attempt.user_challenge.challenge_id for attempt in recent_attempts}
 
     # 2) Timer/hint flags - compute for all challenges
-    correct_streak, incorrect_streak = 0, 0
-    for attempt in attempts:
-        if attempt.is_successful:
-            correct_streak += 1
-            incorrect_streak = 0
-        else:
-            incorrect_streak += 1
-            correct_streak = 0
+    correct_streak, incorrect_streak = count_streaks(a.is_successful for a in attempts)
 
     # Always use streak flags for timer/hint
     timer_active, hint_active = determine_streak_flags(incorrect_streak, correct_streak)
     state = (mastery, timer_active, hint_active)
 
     # 3) Q‑learning pick
-    q_obj = await get_q_table(db, user_subtopic_id) or await create_q_table(db, user_subtopic_id)
-    rl = QLearning()
+    q_obj = await get_or_create_q_table(db, user_subtopic_id)
+    rl = QLearning(rng=rng)
     rl.q_table, rl.epsilon = q_obj.q_table, q_obj.epsilon
     action = rl.select_action(state)
 
@@ -161,33 +138,21 @@ async def _select_adaptive_challenge(
         # Filter out already attempted challenges from fallback candidates
         all_unsolved = [c for c in all_unsolved if c.id not in attempted_challenge_ids]
         if all_unsolved:
-            return random.choice(all_unsolved)
+            return rng.choice(all_unsolved)
         
         # If all challenges are solved, just pick a random one from the subtopic for review.
         all_challenges = await get_all_challenges_by_subtopic(db, us.subtopic_id)
         # Filter out already attempted challenges
         all_challenges = [c for c in all_challenges if c.id not in attempted_challenge_ids]
-        return random.choice(all_challenges)
+        return rng.choice(all_challenges)
 
     # 6) Partition candidates using the standard priority
-    pending, unsolved, solved = [], [], []
-    for c in candidates:
-        uc = await get_by_user_and_challenge(db, us.user_id, c.id)
-        if not uc or uc.status == 'pending':
-            pending.append(c)
-        elif uc.status == 'completed' and not uc.is_solved:
-            unsolved.append(c)
-        else: # Handles uc.status == 'completed' and uc.is_solved
-            solved.append(c)
+    progress = {c.id: await get_by_user_and_challenge(db, us.user_id, c.id) for c in candidates}
+    pending, unsolved, solved, other = partition_by_progress(candidates, progress)
 
     # 7) Final priority: pending -> unsolved -> solved
-    if pending:
-        return random.choice(pending)
-    if unsolved:
-        return random.choice(unsolved)
-    
     # If only solved challenges are left from the candidates, return one of them for review.
-    return random.choice(solved)
+    return rng.choice(pending or unsolved or solved + other)
 
 
 async def select_challenge(
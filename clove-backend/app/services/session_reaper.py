@@ -0,0 +1,99 @@
+# app/services/session_reaper.py
+"""
+Background expiry of abandoned challenge sessions.
+
+A session only ends when the frontend deactivates it, so a closed tab leaves
+its user_challenge in status 'active' for good. The reaper runs every
+SESSION_REAPER_INTERVAL_SECONDS and ends sessions without activity for
+SESSION_IDLE_TIMEOUT_MINUTES, in batches of SESSION_REAPER_BATCH_SIZE rows,
+each in its own short transaction. Every worker runs one; the batches are
+claimed with SKIP LOCKED, so they never contend for the same rows.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.crud.user_challenge import count_active_sessions, expire_idle_sessions
+from app.db.session import async_session
+from app.services.session_registry import session_registry
+
+logger = logging.getLogger(__name__)
+
+
+class SessionReaper:
+    def __init__(self, idle_timeout_minutes: int, interval_seconds: int, batch_size: int):
+        self.idle_timeout = timedelta(minutes=idle_timeout_minutes)
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.stats: Dict[str, Any] = {
+            "runs": 0,
+            "reaped_total": 0,
+            "last_reaped": 0,
+            "last_run_at": None,
+            "last_run_duration_ms": None,
+            "active_sessions": None
+        }
+        self._task: Optional[asyncio.Task] = None
+
+    async def reap(self) -> int:
+        """Expire every session idle for longer than the timeout; returns how many."""
+        start = time.perf_counter()
+        # Write this worker's pending heartbeats first, so live sessions are not
+        # mistaken for idle ones
+        await session_registry.flush()
+        idle_before = datetime.utcnow() - self.idle_timeout
+
+        reaped = 0
+        while True:
+            async with async_session() as db:
+                expired = await expire_idle_sessions(db, idle_before=idle_before, limit=self.batch_size)
+                await db.commit()
+            for user_id, challenge_id in expired:
+                await session_registry.forget(user_id, challenge_id)
+            reaped += len(expired)
+            if len(expired) < self.batch_size:
+                break
+
+        async with async_session() as db:
+            active = await count_active_sessions(db)
+
+        self.stats["runs"] += 1
+        self.stats["reaped_total"] += reaped
+        self.stats["last_reaped"] = reaped
+        self.stats["last_run_at"] = datetime.utcnow().isoformat()
+        self.stats["last_run_duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        self.stats["active_sessions"] = active
+        if reaped:
+            logger.info(f"Expired {reaped} idle challenge sessions, {active} still active")
+        return reaped
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.reap()
+            except Exception as e:
+                logger.error(f"Stale session reaper failed: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+session_reaper = SessionReaper(
+    idle_timeout_minutes=settings.SESSION_IDLE_TIMEOUT_MINUTES,
+    interval_seconds=settings.SESSION_REAPER_INTERVAL_SECONDS,
+    batch_size=settings.SESSION_REAPER_BATCH_SIZE
+)
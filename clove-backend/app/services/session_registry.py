@@ -0,0 +1,386 @@
+# app/services/session_registry.py
+"""
+Registry of challenge sessions for the session heartbeat endpoints.
+
+While a challenge is open the frontend calls validate-session repeatedly.
+With every backend, a valid heartbeat's activity timestamp goes into a dirty
+map, and a background task writes all pending `last_activity_at` values to
+user_challenges in one batched UPDATE every SESSION_FLUSH_INTERVAL_SECONDS,
+instead of one UPDATE per heartbeat. Whether the heartbeat also reads the
+database depends on the backend:
+
+`LocalSessionBackend` keeps each session's token and status in this worker
+process, so a valid heartbeat is answered without touching the database.
+Entries expire after SESSION_REGISTRY_TTL_SECONDS and are re-read from the
+database. Failed validations are always confirmed against the database before
+rejecting. It is only correct with a single worker: a session ended on
+another worker would stay valid here until its entry expires.
+
+`DatabaseSessionBackend` is the one shared between workers: it keeps no
+session state, so every heartbeat and activation reads the user_challenges
+row itself (one lookup on its unique (user_id, challenge_id) index); only the
+write is saved. SESSION_REGISTRY_BACKEND=auto (the default) picks it whenever
+WEB_CONCURRENCY is above 1, which includes the production deployment
+(render.yaml runs two workers).
+"""
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import DateTime, Integer, String, column, update, values
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.challenges import Challenge
+from app.db.models.subtopics import Subtopic
+from app.db.models.user_challenges import UserChallenge
+from app.db.session import async_session
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[int, int]  # (user_id, challenge_id)
+
+
+@dataclass
+class SessionEntry:
+    user_id: int
+    challenge_id: int
+    subtopic_id: int
+    subtopic_title: Optional[str]
+    status: str
+    session_token: Optional[str]
+    session_started_at: Optional[datetime]
+    cached_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def key(self) -> SessionKey:
+        return (self.user_id, self.challenge_id)
+
+    @property
+    def is_active(self) -> bool:
+        return self.status == "active" and self.session_token is not None
+
+
+class SessionBackend(ABC):
+    """
+    Storage interface of the registry; every method may be called concurrently.
+    The pending activity timestamps are kept per worker by every backend: the
+    flush matches them on session_token, so it never revives a session another
+    worker ended.
+    """
+
+    def __init__(self):
+        self._activity: Dict[SessionKey, Tuple[str, datetime]] = {}
+
+    @abstractmethod
+    async def get(self, key: SessionKey) -> Optional[SessionEntry]:
+        ...
+
+    @abstractmethod
+    async def put(self, entry: SessionEntry) -> None:
+        ...
+
+    @abstractmethod
+    async def discard(self, key: SessionKey) -> None:
+        ...
+
+    @abstractmethod
+    async def user_sessions(self, user_id: int) -> Optional[List[SessionEntry]]:
+        """All known entries of a user, or None if the user's set is not loaded."""
+
+    @abstractmethod
+    async def put_user_sessions(self, user_id: int, entries: Iterable[SessionEntry]) -> None:
+        """Replace the user's loaded set of active sessions."""
+
+    @abstractmethod
+    async def discard_user(self, user_id: int) -> None:
+        ...
+
+    async def record_activity(self, key: SessionKey, token: str, at: datetime) -> None:
+        self._activity[key] = (token, at)
+
+    async def drain_activity(self) -> Dict[SessionKey, Tuple[str, datetime]]:
+        """Return and clear the pending activity timestamps."""
+        activity, self._activity = self._activity, {}
+        return activity
+
+
+class DatabaseSessionBackend(SessionBackend):
+    """
+    Backend for several workers or instances: user_challenges is the shared
+    state. Nothing is cached, so the registry reads the row on every call.
+    """
+
+    async def get(self, key: SessionKey) -> Optional[SessionEntry]:
+        return None
+
+    async def put(self, entry: SessionEntry) -> None:
+        pass
+
+    async def discard(self, key: SessionKey) -> None:
+        pass
+
+    async def user_sessions(self, user_id: int) -> Optional[List[SessionEntry]]:
+        return None
+
+    async def put_user_sessions(self, user_id: int, entries: Iterable[SessionEntry]) -> None:
+        pass
+
+    async def discard_user(self, user_id: int) -> None:
+        pass
+
+
+class LocalSessionBackend(SessionBackend):
+    """In-process backend for a single worker, with TTL-based revalidation."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int = 100_000):
+        super().__init__()
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[SessionKey, SessionEntry] = {}
+        self._user_loaded_at: Dict[int, float] = {}
+
+    def _fresh(self, cached_at: float) -> bool:
+        return time.monotonic() - cached_at <= self.ttl_seconds
+
+    async def get(self, key: SessionKey) -> Optional[SessionEntry]:
+        entry = self._entries.get(key)
+        if entry and not self._fresh(entry.cached_at):
+            self._entries.pop(key, None)
+            return None
+        return entry
+
+    async def put(self, entry: SessionEntry) -> None:
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+            self._user_loaded_at.clear()
+        self._entries[entry.key] = entry
+
+    async def discard(self, key: SessionKey) -> None:
+        self._entries.pop(key, None)
+        self._user_loaded_at.pop(key[0], None)
+
+    async def user_sessions(self, user_id: int) -> Optional[List[SessionEntry]]:
+        loaded_at = self._user_loaded_at.get(user_id)
+        if loaded_at is None or not self._fresh(loaded_at):
+            return None
+        return [entry for key, entry in self._entries.items() if key[0] == user_id]
+
+    async def put_user_sessions(self, user_id: int, entries: Iterable[SessionEntry]) -> None:
+        for key in [key for key in self._entries if key[0] == user_id]:
+            del self._entries[key]
+        for entry in entries:
+            await self.put(entry)
+        self._user_loaded_at[user_id] = time.monotonic()
+
+    async def discard_user(self, user_id: int) -> None:
+        for key in [key for key in self._entries if key[0] == user_id]:
+            del self._entries[key]
+        self._user_loaded_at.pop(user_id, None)
+
+
+def _entry_from_row(row) -> SessionEntry:
+    uc, subtopic_id, subtopic_title = row
+    return SessionEntry(
+        user_id=uc.user_id,
+        challenge_id=uc.challenge_id,
+        subtopic_id=subtopic_id,
+        subtopic_title=subtopic_title,
+        status=uc.status,
+        session_token=uc.session_token,
+        session_started_at=uc.session_started_at
+    )
+
+
+def _session_query():
+    return (
+        select(UserChallenge, Challenge.subtopic_id, Subtopic.title)
+        .join(Challenge, UserChallenge.challenge_id == Challenge.id)
+        .join(Subtopic, Challenge.subtopic_id == Subtopic.subtopic_id)
+    )
+
+
+class SessionRegistry:
+    def __init__(self, backend: SessionBackend, flush_interval_seconds: int):
+        self.backend = backend
+        self.flush_interval_seconds = flush_interval_seconds
+        self.stats = {"hits": 0, "misses": 0, "flushes": 0, "flushed_rows": 0}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def _load(self, db: AsyncSession, user_id: int, challenge_id: int) -> Optional[SessionEntry]:
+        row = (await db.execute(
+            _session_query().where(
+                UserChallenge.user_id == user_id,
+                UserChallenge.challenge_id == challenge_id
+            )
+        )).one_or_none()
+        if row is None:
+            return None
+        entry = _entry_from_row(row)
+        await self.backend.put(entry)
+        return entry
+
+    async def validate(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        challenge_id: int,
+        session_token: str
+    ) -> Tuple[bool, str]:
+        """
+        Check a heartbeat's session token and record its activity.
+        Returns (valid, message) with the messages of the validate-session endpoint.
+        """
+        key = (user_id, challenge_id)
+        entry = await self.backend.get(key)
+        if entry is not None and entry.is_active and entry.session_token == session_token:
+            self.stats["hits"] += 1
+        else:
+            # Unknown or failing in memory: confirm against the database
+            self.stats["misses"] += 1
+            entry = await self._load(db, user_id, challenge_id)
+            if entry is None:
+                return False, "User challenge not found"
+            if entry.status != "active":
+                return False, "Challenge session is not active"
+            if entry.session_token != session_token:
+                return False, "Invalid session token"
+
+        await self.backend.record_activity(key, session_token, datetime.utcnow())
+        return True, "Session is valid"
+
+    async def active_sessions(self, db: AsyncSession, user_id: int) -> List[SessionEntry]:
+        """
+        The user's active sessions across all subtopics, newest first. Served from
+        the backend when loaded, otherwise with a single joined query.
+        """
+        entries = await self.backend.user_sessions(user_id)
+        if entries is None:
+            rows = (await db.execute(
+                _session_query().where(
+                    UserChallenge.user_id == user_id,
+                    UserChallenge.status == "active"
+                )
+            )).all()
+            entries = [_entry_from_row(row) for row in rows]
+            await self.backend.put_user_sessions(user_id, entries)
+        active = [entry for entry in entries if entry.status == "active"]
+        return sorted(active, key=lambda e: e.session_started_at or datetime.min, reverse=True)
+
+    async def record_activation(self, uc: UserChallenge, subtopic_id: int) -> None:
+        """
+        Store a session that was just written by activate-session, so its first
+        heartbeat is served from memory. The user's set of active sessions is
+        reloaded on the next activation.
+        """
+        await self.backend.discard((uc.user_id, uc.challenge_id))
+        await self.backend.put(SessionEntry(
+            user_id=uc.user_id,
+            challenge_id=uc.challenge_id,
+            subtopic_id=subtopic_id,
+            subtopic_title=None,
+            status=uc.status,
+            session_token=uc.session_token,
+            session_started_at=uc.session_started_at
+        ))
+
+    async def forget(self, user_id: int, challenge_id: int) -> None:
+        """Drop a session whose row was changed outside the registry (deactivate, submit, cancel)."""
+        await self.backend.discard((user_id, challenge_id))
+
+    async def forget_user(self, user_id: int) -> None:
+        await self.backend.discard_user(user_id)
+
+    async def flush(self) -> int:
+        """
+        Write pending activity timestamps with one UPDATE ... FROM (VALUES ...).
+        Rows whose session was ended or replaced meanwhile are left untouched.
+        """
+        activity = await self.backend.drain_activity()
+        if not activity:
+            return 0
+
+        pending = values(
+            column("user_id", Integer),
+            column("challenge_id", Integer),
+            column("session_token", String),
+            column("last_activity_at", DateTime(timezone=True)),
+            name="pending_activity"
+        ).data([
+            (user_id, challenge_id, token, at)
+            for (user_id, challenge_id), (token, at) in activity.items()
+        ])
+        stmt = (
+            update(UserChallenge)
+            .where(
+                UserChallenge.user_id == pending.c.user_id,
+                UserChallenge.challenge_id == pending.c.challenge_id,
+                UserChallenge.session_token == pending.c.session_token,
+                UserChallenge.status == "active"
+            )
+            .values(last_activity_at=pending.c.last_activity_at)
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            async with async_session() as db:
+                result = await db.execute(stmt)
+                await db.commit()
+        except Exception:
+            # Put the timestamps back; activity recorded meanwhile is newer and wins
+            retry = {**activity, **(await self.backend.drain_activity())}
+            for key, (token, at) in retry.items():
+                await self.backend.record_activity(key, token, at)
+            raise
+
+        self.stats["flushes"] += 1
+        self.stats["flushed_rows"] += result.rowcount
+        logger.debug(f"Flushed last_activity_at for {result.rowcount} of {len(activity)} challenge sessions")
+        return result.rowcount
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Session activity flush failed: {e}")
+
+    def start(self) -> None:
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the flush task and write whatever activity is still pending."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Final session activity flush failed: {e}")
+
+
+def _create_backend() -> SessionBackend:
+    backend = settings.SESSION_REGISTRY_BACKEND
+    if backend == "auto":
+        backend = "local" if settings.WEB_CONCURRENCY <= 1 else "database"
+    if backend == "local":
+        return LocalSessionBackend(ttl_seconds=settings.SESSION_REGISTRY_TTL_SECONDS)
+    if backend == "database":
+        return DatabaseSessionBackend()
+    raise ValueError(f"Unknown SESSION_REGISTRY_BACKEND: {settings.SESSION_REGISTRY_BACKEND}")
+
+
+session_registry = SessionRegistry(
+    backend=_create_backend(),
+    flush_interval_seconds=settings.SESSION_FLUSH_INTERVAL_SECONDS
+)
@@ -0,0 +1,160 @@
+# app/utils/cache.py
+"""
+Server-side response cache for the read-only curriculum endpoints
+(/topics, /subtopics, /lessons, /challenges).
+
+Responses are serialized once and kept as bytes together with a strong ETag
+derived from the body, so every worker hands out the same ETag for the same
+content. Clients revalidating with If-None-Match get a 304 without a body.
+The admin write routes call `curriculum_cache.invalidate()`; other workers
+pick the change up once their entries reach CURRICULUM_CACHE_TTL_SECONDS.
+
+Large rows (lessons, challenges) are additionally kept pre-encoded per row in
+`curriculum_cache.rows`, so list responses and payloads that embed a row
+(e.g. challenge selection) splice the stored bytes instead of re-validating
+and re-encoding the row's JSON columns on every request.
+"""
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple, Type
+
+import orjson
+from fastapi import Request, Response
+from pydantic import BaseModel, TypeAdapter
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    created_at: float
+
+
+class RowPayloadCache:
+    """Encoded JSON of individual rows, keyed by read schema and primary key."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int = 8192):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple[Type[BaseModel], Any], Tuple[bytes, float]] = {}
+
+    def encode(self, schema: Type[BaseModel], row: Any) -> bytes:
+        key = (schema, row.id)
+        cached = self._entries.get(key)
+        now = time.monotonic()
+        if cached and now - cached[1] <= self.ttl_seconds:
+            return cached[0]
+
+        body = schema.model_validate(row).model_dump_json().encode()
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+        self._entries[key] = (body, now)
+        return body
+
+    def encode_many(self, schema: Type[BaseModel], rows: Iterable[Any]) -> bytes:
+        """Encode a JSON array by splicing the per-row bytes."""
+        return b"[" + b",".join(self.encode(schema, row) for row in rows) + b"]"
+
+    def fragment(self, schema: Type[BaseModel], row: Any) -> orjson.Fragment:
+        """Pre-encoded row for embedding in a payload rendered with orjson."""
+        return orjson.Fragment(self.encode(schema, row))
+
+    def invalidate(self) -> None:
+        self._entries.clear()
+
+
+class ResponseCache:
+    def __init__(self, ttl_seconds: int, max_age: int, max_entries: int = 2048):
+        self.ttl_seconds = ttl_seconds
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._entries: Dict[str, CachedResponse] = {}
+        self._adapters: Dict[Any, TypeAdapter] = {}
+        self.rows = RowPayloadCache(ttl_seconds)
+
+    @staticmethod
+    def _key(request: Request) -> str:
+        query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        return f"{request.url.path}?{query}"
+
+    def _adapter(self, response_model: Any) -> TypeAdapter:
+        adapter = self._adapters.get(response_model)
+        if adapter is None:
+            adapter = self._adapters[response_model] = TypeAdapter(response_model)
+        return adapter
+
+    def _get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry.created_at > self.ttl_seconds:
+            self._entries.pop(key, None)
+            return None
+        return entry
+
+    def _store(self, key: str, body: bytes) -> CachedResponse:
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+        entry = CachedResponse(
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            created_at=time.monotonic()
+        )
+        self._entries[key] = entry
+        return entry
+
+    def _respond(self, request: Request, entry: CachedResponse) -> Response:
+        headers = {
+            "ETag": entry.etag,
+            "Cache-Control": f"public, max-age={self.max_age}, must-revalidate"
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or entry.etag in [t.strip() for t in if_none_match.split(",")]):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    async def respond(
+        self,
+        request: Request,
+        response_model: Any,
+        load: Callable[[], Awaitable[Any]],
+        row_schema: Optional[Type[BaseModel]] = None
+    ) -> Response:
+        """
+        Serve the cached body for this request's path and query string, calling
+        `load()` and serializing its result with `response_model` on a miss.
+        With `row_schema`, the result (a row or a list of rows) is encoded from
+        the per-row payload cache instead.
+        Exceptions from `load()` (e.g. 404s) propagate and are not cached.
+        """
+        key = self._key(request)
+        entry = self._get(key)
+        if entry is None:
+            result = await load()
+            if row_schema is not None:
+                if isinstance(result, (list, tuple)):
+                    body = self.rows.encode_many(row_schema, result)
+                else:
+                    body = self.rows.encode(row_schema, result)
+            else:
+                adapter = self._adapter(response_model)
+                body = adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+            entry = self._store(key, body)
+        return self._respond(request, entry)
+
+    def invalidate(self) -> None:
+        """Drop every cached response and row payload; called from the admin write routes."""
+        if self._entries:
+            logger.info(f"Invalidating {len(self._entries)} cached curriculum responses")
+        self._entries.clear()
+        self.rows.invalidate()
+
+
+curriculum_cache = ResponseCache(
+    ttl_seconds=settings.CURRICULUM_CACHE_TTL_SECONDS,
+    max_age=settings.CURRICULUM_CACHE_MAX_AGE
+)
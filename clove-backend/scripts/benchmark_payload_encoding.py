@@ -0,0 +1,103 @@
+# /scripts/benchmark_payload_encoding.py
+"""
+Benchmark response encoding for the lesson list and challenge selection payloads.
+
+Compares the previous path (Pydantic validation of every row, then FastAPI's
+jsonable_encoder + JSONResponse) with the pre-encoded per-row path
+(RowPayloadCache bytes spliced into the body / an orjson Fragment).
+Uses the seed JSON files, so no database is needed:
+
+    python scripts/benchmark_payload_encoding.py [--iterations 2000]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from pathlib import Path
+from types import SimpleNamespace
+
+# Make the app module importable when run from the backend root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel
+
+from app.schemas.lesson import LessonRead
+from app.schemas.challenge import ChallengeRead
+from app.utils.cache import RowPayloadCache
+
+SEED_DIR = Path(__file__).resolve().parent.parent / 'app' / 'data' / 'seed'
+
+
+class ChallengeSelectionResponse(BaseModel):
+    challenge: ChallengeRead
+    user_challenge_id: int
+    user_challenge_status: str
+
+
+def load_rows(filename: str) -> list:
+    """Seed rows wrapped as attribute objects, like ORM instances."""
+    with open(SEED_DIR / filename, encoding='utf-8') as f:
+        return [SimpleNamespace(**row) for row in json.load(f)]
+
+
+def fastapi_json(model, content) -> bytes:
+    """What FastAPI did before: validate through the response model, then JSONResponse."""
+    return JSONResponse(jsonable_encoder(model(content))).body
+
+
+def report(name: str, before, after, iterations: int, rows: RowPayloadCache) -> None:
+    t_before = timeit.timeit(before, number=iterations) / iterations * 1e6
+    # Cold: every row encoded again, as after a curriculum change or TTL expiry
+    t_cold = timeit.timeit(lambda: (rows.invalidate(), after()), number=iterations) / iterations * 1e6
+    t_after = timeit.timeit(after, number=iterations) / iterations * 1e6
+    print(f"{name:<32} before {t_before:9.1f} us   after (cold) {t_cold:9.1f} us   "
+          f"after (warm) {t_after:9.1f} us   speedup {t_before / t_after:5.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    lessons = load_rows('lessons.json')
+    challenges = load_rows('challenges.json')
+    rows = RowPayloadCache(ttl_seconds=3600)
+
+    # GET /lessons?subtopic_id= (one subtopic's lessons)
+    subtopic_lessons = [l for l in lessons if l.subtopic_id == lessons[0].subtopic_id]
+    report(
+        "GET /lessons?subtopic_id=",
+        lambda: fastapi_json(lambda ls: [LessonRead.model_validate(l) for l in ls], subtopic_lessons),
+        lambda: rows.encode_many(LessonRead, subtopic_lessons),
+        args.iterations, rows
+    )
+
+    # GET /challenge_attempts/select-challenge/... (largest challenge payload)
+    challenge = max(challenges, key=lambda c: len(json.dumps(c.challenge_data)))
+    report(
+        "select-challenge payload",
+        lambda: fastapi_json(
+            lambda c: ChallengeSelectionResponse(
+                challenge=ChallengeRead.model_validate(c), user_challenge_id=1, user_challenge_status="pending"
+            ),
+            challenge
+        ),
+        lambda: ORJSONResponse({
+            "challenge": rows.fragment(ChallengeRead, challenge),
+            "user_challenge_id": 1,
+            "user_challenge_status": "pending"
+        }).body,
+        args.iterations, rows
+    )
+
+    # Sanity check: both paths produce the same JSON
+    assert json.loads(rows.encode_many(LessonRead, subtopic_lessons)) == json.loads(
+        fastapi_json(lambda ls: [LessonRead.model_validate(l) for l in ls], subtopic_lessons)
+    )
+
+
+if __name__ == "__main__":
+    main()
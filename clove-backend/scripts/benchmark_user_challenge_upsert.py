@@ -0,0 +1,157 @@
+# /scripts/benchmark_user_challenge_upsert.py
+"""
+Concurrency check and per-call latency comparison for user_challenge upserts.
+
+1. Fires --concurrency simultaneous upserts for one (user, challenge) pair,
+   each in its own session, and asserts exactly one row exists afterwards.
+2. Times --iterations sequential calls of the previous SELECT/UPDATE/commit/
+   re-SELECT upsert against the INSERT ... ON CONFLICT ... RETURNING upsert.
+3. Runs the same --iterations calls from --concurrency sessions at once, all on
+   the same row, and reports throughput and latency under contention.
+
+Runs against DATABASE_URL with migrations applied. It uses an existing user and
+challenge, and restores (or removes) their user_challenge row when it is done:
+
+    python scripts/benchmark_user_challenge_upsert.py --user-id 1 --challenge-id 1
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Make the app module importable when run from the backend root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import delete, func, select, update
+
+from app.crud.user_challenge import get_by_id, get_by_user_and_challenge, upsert
+from app.db.models.user_challenges import UserChallenge
+from app.db.session import async_session, engine
+
+
+async def legacy_upsert(db, *, user_id: int, challenge_id: int, is_solved: bool, status: str):
+    """The previous implementation: select, update, commit, select again."""
+    uc = await get_by_user_and_challenge(db, user_id, challenge_id)
+    await db.execute(
+        update(UserChallenge)
+        .where(UserChallenge.id == uc.id)
+        .values(is_solved=is_solved, status=status, last_attempted_at=func.now())
+    )
+    await db.commit()
+    return await get_by_id(db, uc.id)
+
+
+async def check_concurrency(user_id: int, challenge_id: int, concurrency: int) -> None:
+    async def one_call(i: int):
+        async with async_session() as db:
+            await upsert(db, user_id=user_id, challenge_id=challenge_id, is_solved=False, status="pending")
+
+    await asyncio.gather(*(one_call(i) for i in range(concurrency)))
+
+    async with async_session() as db:
+        count = (await db.execute(
+            select(func.count(UserChallenge.id)).where(
+                UserChallenge.user_id == user_id,
+                UserChallenge.challenge_id == challenge_id
+            )
+        )).scalar_one()
+    assert count == 1, f"expected 1 user_challenge row, found {count}"
+    print(f"concurrency: {concurrency} simultaneous upserts -> {count} row")
+
+
+async def time_calls(label: str, call, iterations: int) -> None:
+    timings = []
+    async with async_session() as db:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await call(db)
+            timings.append((time.perf_counter() - start) * 1000)
+    print(
+        f"{label:<22} median {statistics.median(timings):7.2f} ms   "
+        f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:7.2f} ms"
+    )
+
+
+async def time_concurrent_calls(label: str, call, iterations: int, concurrency: int) -> None:
+    timings = []
+
+    async def worker(calls: int):
+        async with async_session() as db:
+            for _ in range(calls):
+                start = time.perf_counter()
+                await call(db)
+                timings.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(iterations // concurrency) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<22} {len(timings) / elapsed:7.0f} calls/s   median {statistics.median(timings):7.2f} ms   "
+        f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:7.2f} ms   ({concurrency} sessions)"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--user-id', type=int, required=True)
+    parser.add_argument('--challenge-id', type=int, required=True)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    async with async_session() as db:
+        original = await get_by_user_and_challenge(db, args.user_id, args.challenge_id)
+        original_state = (original.is_solved, original.status) if original else None
+
+    try:
+        await check_concurrency(args.user_id, args.challenge_id, args.concurrency)
+        await time_calls(
+            "legacy select/update",
+            lambda db: legacy_upsert(
+                db, user_id=args.user_id, challenge_id=args.challenge_id, is_solved=False, status="pending"
+            ),
+            args.iterations
+        )
+        await time_calls(
+            "ON CONFLICT upsert",
+            lambda db: upsert(
+                db, user_id=args.user_id, challenge_id=args.challenge_id, is_solved=False, status="pending"
+            ),
+            args.iterations
+        )
+        await time_concurrent_calls(
+            "legacy select/update",
+            lambda db: legacy_upsert(
+                db, user_id=args.user_id, challenge_id=args.challenge_id, is_solved=False, status="pending"
+            ),
+            args.iterations, args.concurrency
+        )
+        await time_concurrent_calls(
+            "ON CONFLICT upsert",
+            lambda db: upsert(
+                db, user_id=args.user_id, challenge_id=args.challenge_id, is_solved=False, status="pending"
+            ),
+            args.iterations, args.concurrency
+        )
+    finally:
+        async with async_session() as db:
+            if original_state:
+                await upsert(
+                    db, user_id=args.user_id, challenge_id=args.challenge_id,
+                    is_solved=original_state[0], status=original_state[1]
+                )
+            else:
+                await db.execute(
+                    delete(UserChallenge).where(
+                        UserChallenge.user_id == args.user_id,
+                        UserChallenge.challenge_id == args.challenge_id
+                    )
+                )
+                await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
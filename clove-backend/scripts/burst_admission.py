@@ -0,0 +1,75 @@
+# /scripts/burst_admission.py
+"""
+Send a burst of concurrent requests to a running server and report, per
+admission lane, how many were served or turned away (503) and their latency.
+
+    python scripts/burst_admission.py --base-url http://localhost:8000 --user-id 1 --concurrency 300
+
+Mixes challenge selection (critical), lesson reads (normal) and the stats and
+topic dashboards (low). With the governor in place the low lane should be shed
+first and no request should wait anywhere near DB_POOL_TIMEOUT. Compare with
+/health's "admission" block, which is printed at the end.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Make the app module importable when run from the backend root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def requests_for(args):
+    u, t, s = args.user_id, args.topic_id, args.subtopic_id
+    return [
+        ("critical", f"/challenge_attempts/select-challenge/user/{u}/subtopic/{s}"),
+        ("normal", f"/lessons/?subtopic_id={s}"),
+        ("low", "/statistics/me"),
+        ("low", f"/user_topics/user/{u}/topic/{t}/overview"),
+    ]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--user-id', type=int, required=True)
+    parser.add_argument('--topic-id', type=int, default=1)
+    parser.add_argument('--subtopic-id', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, default=200)
+    args = parser.parse_args()
+
+    import httpx
+    from app.utils.security import create_access_token
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(args.user_id)})}"}
+    mix = requests_for(args)
+    results = {}
+
+    async def one(client, lane, path):
+        start = time.perf_counter()
+        response = await client.get(path)
+        results.setdefault(lane, []).append((response.status_code, time.perf_counter() - start))
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, limits=limits, timeout=60) as client:
+        await asyncio.gather(*(one(client, *mix[i % len(mix)]) for i in range(args.concurrency)))
+        health = (await client.get("/health")).json()
+
+    print(f"{'lane':<10} {'sent':>5} {'ok':>5} {'503':>5} {'other':>5} {'p50 s':>7} {'max s':>7}")
+    for lane in ("critical", "normal", "low"):
+        rows = results.get(lane, [])
+        if not rows:
+            continue
+        codes = [code for code, _ in rows]
+        times = [elapsed for _, elapsed in rows]
+        ok = sum(code < 400 for code in codes)
+        busy = codes.count(503)
+        print(f"{lane:<10} {len(rows):>5} {ok:>5} {busy:>5} {len(rows) - ok - busy:>5} "
+              f"{statistics.median(times):>7.3f} {max(times):>7.3f}")
+    print(f"admission: {health.get('admission')}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
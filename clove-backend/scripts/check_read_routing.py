@@ -0,0 +1,60 @@
+# /scripts/check_read_routing.py
+"""
+Check where get_read_db sessions go, against two running Postgres instances.
+
+A second local instance works as the "replica" (it needs no replication; the
+lag check reports 0 for a server that is not a standby):
+
+    DATABASE_URL=postgresql+asyncpg://clove:pw@localhost:5432/clove_db \\
+    DATABASE_REPLICA_URL=postgresql+asyncpg://clove:pw@localhost:5433/clove_db \\
+        python scripts/check_read_routing.py
+
+Prints the server port each read session runs on: without a user, for a user
+after a write (sticky primary window), and after the replica is marked
+unavailable. Stop the replica instance and rerun to see the fallback.
+"""
+import asyncio
+import os
+import sys
+
+# Make the app module importable when run from the backend root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func, select, text
+
+from app.db.session import async_read_session, engine, read_router, replica_engine
+
+
+async def server_port(user_id=None) -> int:
+    async with async_read_session() as db:
+        if user_id is not None:
+            db.info["user_id"] = user_id
+        return (await db.execute(select(func.inet_server_port()))).scalar()
+
+
+async def main() -> None:
+    if replica_engine is None:
+        print("DATABASE_REPLICA_URL is not set; every read goes to the primary")
+    async with engine.connect() as conn:
+        primary = (await conn.execute(text("SELECT inet_server_port()"))).scalar()
+    print(f"primary port: {primary}")
+
+    await read_router.check()
+    print(f"replica status: {read_router.status()}")
+    print(f"anonymous read: port {await server_port()}")
+    print(f"user 1 read: port {await server_port(1)}")
+
+    read_router.mark_write(1)
+    print(f"user 1 read after a write: port {await server_port(1)} (sticky for {read_router.sticky_seconds}s)")
+    print(f"user 2 read meanwhile: port {await server_port(2)}")
+
+    read_router.replica_ok = False
+    print(f"user 2 read with the replica unavailable: port {await server_port(2)}")
+
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
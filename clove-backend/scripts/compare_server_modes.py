@@ -0,0 +1,129 @@
+# /scripts/compare_server_modes.py
+"""
+Compare startup time, throughput and shutdown of the old single-process
+command with app.server.
+
+    python scripts/compare_server_modes.py --path /topics/ --user-id 1 --seconds 20 --concurrency 64
+
+Each mode is started on a free port with the current environment. The script
+reports:
+- startup: seconds until the first 200 on --path;
+- throughput: requests per second and latency while --concurrency clients
+  loop on --path for --seconds;
+- shutdown: seconds from SIGTERM to exit.
+The server is stopped between modes. Use PREPARE_DATABASE_ON_STARTUP=false to
+time the server alone rather than the migrations. Also raise
+RATE_LIMIT_PER_MINUTE (e.g. to 100000000): all requests come from one IP, and
+the rate limiter would otherwise answer most of them with 429.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+# Make the app module importable when run from the backend root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def modes(workers):
+    return [
+        ("uvicorn (single process)", ["uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", "{port}"]),
+        (f"app.server ({workers} workers)", [sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", "{port}", "--workers", str(workers)]),
+    ]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_ready(client, path, timeout) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            if (await client.get(path)).status_code == 200:
+                return time.perf_counter() - start
+        except Exception:
+            pass
+        await asyncio.sleep(0.05)
+    raise TimeoutError(f"not ready after {timeout}s")
+
+
+async def load(client, path, seconds, concurrency):
+    latencies, errors = [], 0
+    end = time.perf_counter() + seconds
+
+    async def loop():
+        nonlocal errors
+        while time.perf_counter() < end:
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code != 200:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(loop() for _ in range(concurrency)))
+    return latencies, errors
+
+
+async def run_mode(name, command, args, headers):
+    import httpx
+
+    port = free_port()
+    process = subprocess.Popen(
+        [part.format(port=port) for part in command], cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", headers=headers, limits=limits, timeout=30) as client:
+            startup = await wait_ready(client, args.path, args.startup_timeout)
+            await load(client, args.path, 2, args.concurrency)  # warm up
+            latencies, errors = await load(client, args.path, args.seconds, args.concurrency)
+    finally:
+        start = time.perf_counter()
+        process.send_signal(signal.SIGTERM)
+        process.wait()
+        shutdown = time.perf_counter() - start
+
+    latencies.sort()
+    print(
+        f"{name:<28} {startup:>8.2f} {len(latencies) / args.seconds:>9.0f} "
+        f"{statistics.median(latencies) * 1000:>8.1f} {latencies[int(len(latencies) * 0.99)] * 1000:>8.1f} "
+        f"{errors:>7} {shutdown:>9.2f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--path', default='/topics/')
+    parser.add_argument('--user-id', type=int, help='send a bearer token for this user')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seconds', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--startup-timeout', type=int, default=120)
+    args = parser.parse_args()
+
+    headers = {}
+    if args.user_id is not None:
+        from app.utils.security import create_access_token
+        headers["Authorization"] = f"Bearer {create_access_token({'sub': str(args.user_id)})}"
+
+    print(f"{'mode':<28} {'start s':>8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'stop s':>9}")
+    for name, command in modes(args.workers):
+        await run_mode(name, command, args, headers)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
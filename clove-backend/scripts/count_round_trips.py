@@ -0,0 +1,141 @@
+# /scripts/count_round_trips.py
+"""
+Count the database round trips of API requests.
+
+Starts a small TCP proxy in front of the Postgres server of DATABASE_URL and
+points the app at it, then calls each endpoint in-process (httpx ASGI
+transport, no lifespan) as the given user. A round trip is a client message
+the server must answer before the client can go on: a simple Query (BEGIN,
+COMMIT, ROLLBACK, the pool's ping) or the Sync that ends an extended-protocol
+exchange (prepare, execute). Each endpoint is called twice; the second call
+runs with warm statement and response caches.
+
+    ENV=development python scripts/count_round_trips.py --user-id 1 --topic-id 1 --subtopic-id 1
+
+The connection must not use SSL, so the messages can be read (ENV=development
+turns it off). To compare with an earlier version, run the same script against
+that checkout. POST endpoints are only called with --writes, and they change
+that user's data.
+"""
+import argparse
+import asyncio
+import os
+import sys
+from urllib.parse import urlsplit, urlunsplit
+
+# Make the app module importable when run from the backend root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+SSL_REQUEST = 80877103
+GSSENC_REQUEST = 80877104
+# Frontend messages that wait for the server: Query, Sync
+ROUND_TRIP_MESSAGES = (b'Q', b'S')
+
+
+class RoundTripProxy:
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.round_trips = 0
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _handle(self, client_reader, client_writer):
+        server_reader, server_writer = await asyncio.open_connection(self.host, self.port)
+        # When either side hangs up, close both: a client that sent Terminate
+        # waits for its socket to close
+        tasks = [
+            asyncio.create_task(self._from_client(client_reader, server_writer)),
+            asyncio.create_task(self._pipe(server_reader, client_writer)),
+        ]
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        client_writer.close()
+        server_writer.close()
+
+    async def _from_client(self, reader, writer):
+        # Startup packets have no type byte; SSL / GSS requests are refused by
+        # the server (no SSL here) and followed by the real startup packet
+        while True:
+            header = await reader.readexactly(4)
+            body = await reader.readexactly(int.from_bytes(header, 'big') - 4)
+            writer.write(header + body)
+            await writer.drain()
+            if int.from_bytes(body[:4], 'big') not in (SSL_REQUEST, GSSENC_REQUEST):
+                break
+        while True:
+            kind = await reader.readexactly(1)
+            header = await reader.readexactly(4)
+            body = await reader.readexactly(int.from_bytes(header, 'big') - 4)
+            if kind in ROUND_TRIP_MESSAGES:
+                self.round_trips += 1
+            writer.write(kind + header + body)
+            await writer.drain()
+
+    async def _pipe(self, reader, writer):
+        while data := await reader.read(65536):
+            writer.write(data)
+            await writer.drain()
+
+
+def endpoints(args):
+    u, t, s = args.user_id, args.topic_id, args.subtopic_id
+    reads = [
+        ("GET", f"/user_topics/user/{u}"),
+        ("GET", f"/user_topics/user/{u}/topic/{t}/overview"),
+        ("GET", f"/user_subtopics/user/{u}"),
+        ("GET", "/q_values/me"),
+        ("GET", "/challenge_attempts/me"),
+        ("GET", "/statistics/me"),
+        ("GET", f"/lessons/?subtopic_id={s}"),
+        ("GET", f"/challenges/?subtopic_id={s}"),
+        ("GET", f"/assessment_questions/topic/{t}/retention-test/status"),
+    ]
+    writes = [
+        ("POST", "/statistics/update-streak"),
+        ("POST", f"/statistics/update-recent-topic/{t}"),
+        ("POST", f"/user_subtopics/user/{u}/subtopic/{s}/complete-lesson"),
+    ]
+    return reads + (writes if args.writes else [])
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--user-id', type=int, required=True)
+    parser.add_argument('--topic-id', type=int, default=1)
+    parser.add_argument('--subtopic-id', type=int, default=1)
+    parser.add_argument('--writes', action='store_true', help="also call POST endpoints (changes the user's data)")
+    args = parser.parse_args()
+
+    url = urlsplit(os.environ["DATABASE_URL"])
+    proxy = RoundTripProxy(url.hostname, url.port or 5432)
+    port = await proxy.start()
+    userinfo = url.netloc.rsplit('@', 1)[0] + '@' if '@' in url.netloc else ''
+    os.environ["DATABASE_URL"] = urlunsplit(url._replace(netloc=f"{userinfo}127.0.0.1:{port}"))
+    os.environ.pop("DATABASE_REPLICA_URL", None)
+
+    import httpx
+    from app.main import app
+    from app.db.session import engine
+    from app.utils.security import create_access_token
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(args.user_id)})}"}
+    transport = httpx.ASGITransport(app=app)
+    print(f"{'endpoint':<60} {'status':>6} {'cold':>5} {'warm':>5}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=headers) as client:
+        for method, path in endpoints(args):
+            counts = []
+            for _ in range(2):
+                before = proxy.round_trips
+                response = await client.request(method, path)
+                counts.append(proxy.round_trips - before)
+            print(f"{method + ' ' + path:<60} {response.status_code:>6} {counts[0]:>5} {counts[1]:>5}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,150 @@
+# /scripts/fit_bkt_parameters.py
+"""
+Fit per-subtopic BKT parameters from the challenge attempt log.
+
+Every user_subtopic's attempts, ordered by attempted_at over all takes, form
+one sequence. The sequences of each subtopic are fitted with the vectorized
+Baum-Welch in app/core/bkt_fit.py. With --per-type, each (subtopic,
+challenge type) pair is also fitted on the attempts of that type alone. The
+groups are fitted in parallel in a process pool, and the results are
+upserted into bkt_parameters. The API workers pick them up once their
+parameter cache expires (BKT_PARAMETER_CACHE_TTL_SECONDS):
+
+    python scripts/fit_bkt_parameters.py --dry-run
+    python scripts/fit_bkt_parameters.py --per-type --workers 8
+
+Groups with fewer than --min-sequences sequences are not written, so they
+keep using the global defaults in app/core/utils.py.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+# Make the app module importable when run from the backend root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.future import select
+
+from app.core.bkt_fit import BKTFit, fit_sequences
+from app.core.utils import p_T, p_G, p_S
+from app.crud.bkt_parameter import upsert_many
+from app.db.models.bkt_parameters import ALL_CHALLENGE_TYPES
+from app.db.models.challenge_attempts import ChallengeAttempt
+from app.db.models.challenges import Challenge
+from app.db.models.user_challenges import UserChallenge
+from app.db.models.user_subtopics import UserSubtopic
+from app.db.session import async_session, engine
+
+# (subtopic_id, challenge_type) -> list of outcome sequences
+Groups = Dict[Tuple[int, str], List[List[bool]]]
+
+
+async def load_sequences(per_type: bool, yield_per: int) -> Groups:
+    """Attempt outcome sequences per user_subtopic, grouped by subtopic (and type)."""
+    groups: Groups = {}
+    current: Dict[str, List[bool]] = {}
+    current_us = None
+
+    def close(us_subtopic) -> None:
+        for challenge_type, outcomes in current.items():
+            groups.setdefault((us_subtopic, challenge_type), []).append(outcomes)
+
+    async with async_session() as db:
+        stream = await db.stream(
+            select(
+                ChallengeAttempt.user_subtopic_id,
+                UserSubtopic.subtopic_id,
+                Challenge.type,
+                ChallengeAttempt.is_successful
+            )
+            .join(UserSubtopic, ChallengeAttempt.user_subtopic_id == UserSubtopic.id)
+            .join(UserChallenge, ChallengeAttempt.user_challenge_id == UserChallenge.id)
+            .join(Challenge, UserChallenge.challenge_id == Challenge.id)
+            .order_by(ChallengeAttempt.user_subtopic_id, ChallengeAttempt.attempted_at, ChallengeAttempt.id)
+            .execution_options(yield_per=yield_per)
+        )
+        subtopic_id = None
+        # One await per batch rather than per attempt row
+        async for partition in stream.partitions():
+            for us_id, us_subtopic, challenge_type, is_successful in partition:
+                if us_id != current_us:
+                    close(subtopic_id)
+                    current, current_us, subtopic_id = {}, us_id, us_subtopic
+                current.setdefault(ALL_CHALLENGE_TYPES, []).append(bool(is_successful))
+                if per_type:
+                    current.setdefault(challenge_type, []).append(bool(is_successful))
+        close(subtopic_id)
+    return groups
+
+
+def fit_group(sequences: List[List[bool]], max_length: int, max_iterations: int) -> BKTFit:
+    return fit_sequences(
+        sequences,
+        max_length=max_length,
+        p_transit=p_T,
+        p_guess=p_G,
+        p_slip=p_S,
+        max_iterations=max_iterations
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--per-type', action='store_true', help='also fit each challenge type of a subtopic')
+    parser.add_argument('--min-sequences', type=int, default=50, help='smallest group that is written')
+    parser.add_argument('--max-length', type=int, default=200, help='attempts kept per sequence (0 = all)')
+    parser.add_argument('--max-iterations', type=int, default=100)
+    parser.add_argument('--yield-per', type=int, default=20000, help='attempt rows fetched per round trip')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--dry-run', action='store_true', help='print the fits without writing')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    groups = await load_sequences(args.per_type, args.yield_per)
+    loaded = time.perf_counter()
+    print(f"loaded {sum(len(s) for s in groups.values())} sequences in {len(groups)} groups "
+          f"in {loaded - started:.1f} s", file=sys.stderr)
+
+    keys = [key for key, sequences in groups.items() if len(sequences) >= args.min_sequences]
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        # Largest groups first, so one big subtopic does not finish last
+        keys.sort(key=lambda key: -sum(len(s) for s in groups[key]))
+        fits = await asyncio.gather(*(
+            loop.run_in_executor(pool, fit_group, groups[key], args.max_length, args.max_iterations)
+            for key in keys
+        ))
+
+    print(f"{'subtopic':>8} {'type':<16} {'seqs':>7} {'attempts':>9} {'p_L0':>6} {'p_T':>6} {'p_G':>6} {'p_S':>6} {'iter':>4}")
+    rows = []
+    for (subtopic_id, challenge_type), fit in sorted(zip(keys, fits)):
+        print(f"{subtopic_id:>8} {challenge_type:<16} {fit.n_sequences:>7} {fit.n_attempts:>9} "
+              f"{fit.p_init:>6.3f} {fit.p_transit:>6.3f} {fit.p_guess:>6.3f} {fit.p_slip:>6.3f} {fit.iterations:>4}")
+        rows.append({
+            "subtopic_id": subtopic_id,
+            "challenge_type": challenge_type,
+            "p_init": fit.p_init,
+            "p_transit": fit.p_transit,
+            "p_guess": fit.p_guess,
+            "p_slip": fit.p_slip,
+            "log_likelihood": fit.log_likelihood,
+            "n_sequences": fit.n_sequences,
+            "n_attempts": fit.n_attempts
+        })
+    skipped = len(groups) - len(keys)
+    print(f"fitted {len(rows)} groups in {time.perf_counter() - loaded:.1f} s"
+          + (f", {skipped} below --min-sequences kept on the defaults" if skipped else ""))
+
+    if rows and not args.dry_run:
+        async with async_session() as db:
+            await upsert_many(db, rows)
+        print(f"wrote {len(rows)} rows to bkt_parameters")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
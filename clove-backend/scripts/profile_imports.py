@@ -0,0 +1,112 @@
+# /scripts/profile_imports.py
+"""
+Report what importing the app costs, per module and per package.
+
+    python scripts/profile_imports.py
+    python scripts/profile_imports.py --module app.main --repeat 5 --top 30 --save before.json
+    python scripts/profile_imports.py --compare before.json
+
+Imports --module in a fresh interpreter under `python -X importtime`, --repeat
+times, and keeps the run with the median wall time. Then it prints:
+- the wall time of the whole import (interpreter start-up included);
+- the slowest modules by cumulative time (the module and everything it imported
+  first);
+- self time summed per top-level package (fastapi, sqlalchemy, numpy, app, ...).
+--save writes the per-package totals to JSON. --compare prints the change
+against such a file, so a before/after of a change is one command each.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, NamedTuple
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def run_once(module: str):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        raise SystemExit(f"import {module} failed:\n" + "\n".join(errors[-20:]))
+    return wall, parse(result.stderr)
+
+
+def parse(stderr: str) -> List[ImportTime]:
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append(ImportTime(name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def by_package(rows: List[ImportTime]) -> Dict[str, int]:
+    totals = defaultdict(int)
+    for row in rows:
+        totals[row.module.split('.')[0]] += row.self_us
+    return dict(totals)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--module', default='app.main')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=25)
+    parser.add_argument('--save', help='write per-package totals to this JSON file')
+    parser.add_argument('--compare', help='JSON file from an earlier --save to diff against')
+    args = parser.parse_args()
+
+    runs = sorted((run_once(args.module) for _ in range(args.repeat)), key=lambda run: run[0])
+    wall, rows = runs[len(runs) // 2]
+    packages = by_package(rows)
+    total_us = sum(packages.values())
+
+    print(f"import {args.module}: {wall * 1000:.0f} ms wall (median of {args.repeat}), "
+          f"{total_us / 1000:.0f} ms in imports, {len(rows)} modules")
+
+    print("\nSlowest modules (cumulative):")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for row in sorted(rows, key=lambda r: r.cumulative_us, reverse=True)[:args.top]:
+        print(f"{row.cumulative_us / 1000:>14.1f} {row.self_us / 1000:>9.1f}  {'  ' * row.depth}{row.module}")
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['packages']
+    print("\nSelf time per package:")
+    print(f"{'ms':>9} {'change':>9}  package")
+    for package, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        change = f"{(us - baseline.get(package, 0)) / 1000:>+9.1f}" if baseline else ''
+        print(f"{us / 1000:>9.1f} {change:>9}  {package}")
+    if baseline:
+        gone = sorted(set(baseline) - set(packages), key=lambda p: -baseline[p])
+        for package in gone[:args.top]:
+            print(f"{0:>9.1f} {-baseline[package] / 1000:>+9.1f}  {package} (no longer imported)")
+        print(f"\nTotal: {total_us / 1000:.0f} ms, {(total_us - sum(baseline.values())) / 1000:+.0f} ms")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'module': args.module, 'wall_seconds': wall, 'packages': packages}, f, indent=2)
+        print(f"\nSaved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
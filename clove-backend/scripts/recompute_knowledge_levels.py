@@ -0,0 +1,252 @@
+# /scripts/recompute_knowledge_levels.py
+"""
+Recompute user_subtopics.knowledge_level after a change of the BKT parameters.
+
+For every user_subtopic the knowledge trajectory is replayed with the new
+parameters: the baseline comes from the user's pre-assessment answers on
+that subtopic, as update_knowledge_levels_from_assessment sets it, and each
+stored challenge attempt, of every take, is then applied in attempted_at
+order with BKT.update_knowledge. Like the engine, each attempt uses the
+fitted bkt_parameters row of its subtopic and challenge type, then the
+subtopic's row, then --p-t / --p-g / --p-s (all attempts with
+--ignore-fitted or BKT_USE_FITTED_PARAMETERS=false). A level set by a completed post-assessment does not
+depend on the BKT parameters, so those user_subtopics are left untouched.
+
+user_subtopics are read in ordered ID-range chunks, with their attempts
+streamed per chunk. Each chunk is replayed in a process pool, and the changed
+levels are written back with one UPDATE ... FROM (VALUES ...) per chunk. A
+row is skipped if its level changed while the job ran. With --dry-run
+nothing is written, and the shift of the distribution is reported instead:
+
+    python scripts/recompute_knowledge_levels.py --dry-run
+    python scripts/recompute_knowledge_levels.py --p-t 0.12 --workers 8
+
+The fallback parameters default to the values in app/core/utils.py.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Make the app module importable when run from the backend root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import and_, func
+from sqlalchemy.future import select
+
+from app.core.bkt import BKT
+from app.core.config import settings
+from app.core.utils import classify_mastery, p_T, p_G, p_S
+from app.crud.bkt_parameter import get_all as get_fitted_parameters
+from app.crud.user_subtopic import (
+    DEFAULT_KNOWLEDGE_LEVEL, bulk_set_knowledge_levels, knowledge_level_from_score
+)
+from app.db.models.challenge_attempts import ChallengeAttempt
+from app.db.models.challenges import Challenge
+from app.db.models.user_challenges import UserChallenge
+from app.db.models.post_assessments import PostAssessment
+from app.db.models.pre_assessments import PreAssessment
+from app.db.models.subtopics import Subtopic
+from app.db.models.user_subtopics import UserSubtopic
+from app.db.models.user_topics import UserTopic
+from app.db.session import async_session, engine
+from app.services.bkt_parameters import pick_model
+from app.services.question_bank import get_question_bank
+
+# (challenge_type, is_successful) of one attempt
+Outcome = Tuple[str, bool]
+# (user_subtopic_id, subtopic_id, current_level, pre_answers, post_completed, post_answers, outcomes)
+WorkItem = Tuple[int, int, Optional[float], Optional[dict], bool, Optional[dict], Tuple[Outcome, ...]]
+# (user_subtopic_id, current_level, recomputed_level or None if left untouched)
+Result = Tuple[int, Optional[float], Optional[float]]
+# (subtopic_id, challenge_type) -> (p_transit, p_guess, p_slip)
+Fitted = Dict[Tuple[int, str], Tuple[float, float, float]]
+
+_question_subtopics: Dict[int, int] = {}
+_models: Dict[Tuple[int, str], BKT] = {}
+_default: Optional[BKT] = None
+
+
+def _init_worker(question_subtopics: Dict[int, int], fitted: Fitted, p_transit: float, p_guess: float, p_slip: float) -> None:
+    global _question_subtopics, _models, _default
+    _question_subtopics = question_subtopics
+    _models = {key: BKT(*parameters) for key, parameters in fitted.items()}
+    _default = BKT(p_transit, p_guess, p_slip)
+
+
+def replay(subtopic_id: int, baseline: float, outcomes: Iterable[Outcome]) -> float:
+    """Apply each attempt with the parameters of its subtopic and challenge type."""
+    knowledge = baseline
+    for challenge_type, is_correct in outcomes:
+        knowledge = pick_model(_models, _default, subtopic_id, challenge_type).update_knowledge(knowledge, is_correct)
+    return knowledge
+
+
+def _answered(answers: Optional[dict], subtopic_id: int) -> Tuple[int, int]:
+    """(correct, total) of the stored assessment answers on one subtopic."""
+    correct = total = 0
+    for question_id, answer in (answers or {}).items():
+        if _question_subtopics.get(int(question_id)) == subtopic_id:
+            total += 1
+            correct += bool(answer.get('is_correct'))
+    return correct, total
+
+
+def recompute_chunk(items: List[WorkItem]) -> List[Result]:
+    results = []
+    for us_id, subtopic_id, current, pre_answers, post_completed, post_answers, outcomes in items:
+        if post_completed and _answered(post_answers, subtopic_id)[1] > 0:
+            results.append((us_id, current, None))
+            continue
+        correct, total = _answered(pre_answers, subtopic_id)
+        baseline = knowledge_level_from_score(correct, total) if total > 0 else DEFAULT_KNOWLEDGE_LEVEL
+        results.append((us_id, current, replay(subtopic_id, baseline, outcomes)))
+    return results
+
+
+async def load_chunk(lower: int, upper: int, yield_per: int) -> List[WorkItem]:
+    """user_subtopics with IDs in [lower, upper), their assessments and ordered (type, outcome) attempts."""
+    async with async_session() as db:
+        rows = (await db.execute(
+            select(
+                UserSubtopic.id,
+                UserSubtopic.subtopic_id,
+                UserSubtopic.knowledge_level,
+                PreAssessment.questions_answers_iscorrect,
+                PostAssessment.is_completed,
+                PostAssessment.questions_answers_iscorrect
+            )
+            .join(Subtopic, Subtopic.subtopic_id == UserSubtopic.subtopic_id)
+            .join(UserTopic, and_(
+                UserTopic.user_id == UserSubtopic.user_id,
+                UserTopic.topic_id == Subtopic.topic_id
+            ))
+            .outerjoin(PreAssessment, PreAssessment.user_topic_id == UserTopic.id)
+            .outerjoin(PostAssessment, PostAssessment.user_topic_id == UserTopic.id)
+            .where(UserSubtopic.id >= lower, UserSubtopic.id < upper)
+        )).all()
+
+        outcomes: Dict[int, List[Outcome]] = {}
+        # One str object per type, so the pickled chunk stores each type once
+        types: Dict[str, str] = {}
+        stream = await db.stream(
+            select(ChallengeAttempt.user_subtopic_id, Challenge.type, ChallengeAttempt.is_successful)
+            .join(UserChallenge, ChallengeAttempt.user_challenge_id == UserChallenge.id)
+            .join(Challenge, UserChallenge.challenge_id == Challenge.id)
+            .where(ChallengeAttempt.user_subtopic_id >= lower, ChallengeAttempt.user_subtopic_id < upper)
+            .order_by(ChallengeAttempt.user_subtopic_id, ChallengeAttempt.attempted_at, ChallengeAttempt.id)
+            .execution_options(yield_per=yield_per)
+        )
+        # One await per batch: iterating the async result row by row costs a
+        # greenlet switch per attempt, more than the query itself
+        async for partition in stream.partitions():
+            for us_id, challenge_type, is_successful in partition:
+                outcomes.setdefault(us_id, []).append((types.setdefault(challenge_type, challenge_type), is_successful))
+
+    return [
+        (us_id, subtopic_id, level, pre_answers, bool(post_completed), post_answers, tuple(outcomes.get(us_id, ())))
+        for us_id, subtopic_id, level, pre_answers, post_completed, post_answers in rows
+    ]
+
+
+class Report:
+    def __init__(self):
+        self.processed = 0
+        self.skipped = 0
+        self.changed = 0
+        self.written = 0
+        self.deltas: List[float] = []
+        self.mastery_moves: Counter = Counter()
+
+    def add(self, results: List[Result]) -> List[Tuple[int, float, float]]:
+        """Record a chunk's results; returns the rows to write."""
+        changes = []
+        for us_id, current, new in results:
+            self.processed += 1
+            if new is None:
+                self.skipped += 1
+                continue
+            old = current if current is not None else DEFAULT_KNOWLEDGE_LEVEL
+            self.mastery_moves[(classify_mastery(old), classify_mastery(new))] += 1
+            if new != current:
+                self.changed += 1
+                self.deltas.append(new - old)
+                changes.append((us_id, current, new))
+        return changes
+
+    def print(self, elapsed: float, dry_run: bool) -> None:
+        print(f"{self.processed} user_subtopics in {elapsed:.1f} s: {self.changed} changed, "
+              f"{self.skipped} left to their post-assessment level"
+              + ("" if dry_run else f", {self.written} written"))
+        if self.deltas:
+            deltas = sorted(self.deltas)
+            print(f"knowledge shift: mean {statistics.mean(deltas):+.3f}, median {statistics.median(deltas):+.3f}, "
+                  f"min {deltas[0]:+.2f}, max {deltas[-1]:+.2f}")
+        print("mastery level transitions (old -> new: count):")
+        for (old, new), count in sorted(self.mastery_moves.items()):
+            print(f"  {old} -> {new}: {count}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--p-t', type=float, default=p_T, help='BKT transition probability without a fitted row')
+    parser.add_argument('--p-g', type=float, default=p_G, help='BKT guess probability without a fitted row')
+    parser.add_argument('--p-s', type=float, default=p_S, help='BKT slip probability without a fitted row')
+    parser.add_argument('--ignore-fitted', action='store_true', help='use --p-t / --p-g / --p-s for every attempt')
+    parser.add_argument('--chunk-size', type=int, default=20000, help='user_subtopic IDs per chunk')
+    parser.add_argument('--yield-per', type=int, default=10000, help='attempt rows fetched per round trip')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--dry-run', action='store_true', help='report the shift without writing')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    async with async_session() as db:
+        bank = await get_question_bank(db)
+        min_id, max_id = (await db.execute(select(func.min(UserSubtopic.id), func.max(UserSubtopic.id)))).one()
+        fitted: Fitted = {}
+        if settings.BKT_USE_FITTED_PARAMETERS and not args.ignore_fitted:
+            fitted = {
+                (row.subtopic_id, row.challenge_type): (row.p_transit, row.p_guess, row.p_slip)
+                for row in await get_fitted_parameters(db)
+            }
+    question_subtopics = {q.id: q.subtopic_id for q in bank.questions.values()}
+
+    report = Report()
+    if min_id is not None:
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(
+            max_workers=args.workers,
+            initializer=_init_worker,
+            initargs=(question_subtopics, fitted, args.p_t, args.p_g, args.p_s)
+        ) as pool:
+            in_flight = deque()
+
+            async def drain_one() -> None:
+                changes = report.add(await in_flight.popleft())
+                if changes and not args.dry_run:
+                    async with async_session() as db:
+                        report.written += await bulk_set_knowledge_levels(db, changes)
+
+            # Load the next chunks while earlier ones are replayed in the pool
+            for lower in range(min_id, max_id + 1, args.chunk_size):
+                items = await load_chunk(lower, lower + args.chunk_size, args.yield_per)
+                in_flight.append(loop.run_in_executor(pool, recompute_chunk, items))
+                if len(in_flight) >= args.workers * 2:
+                    await drain_one()
+                print(f"loaded user_subtopics < {lower + args.chunk_size} / {max_id + 1}", file=sys.stderr)
+            while in_flight:
+                await drain_one()
+
+    print(f"BKT parameters: {len(fitted)} fitted subtopic/type rows, otherwise "
+          f"p_T={args.p_t}, p_G={args.p_g}, p_S={args.p_s}" + (" (dry run)" if args.dry_run else ""))
+    report.print(time.perf_counter() - started, args.dry_run)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
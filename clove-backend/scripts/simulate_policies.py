@@ -0,0 +1,339 @@
+# /scripts/simulate_policies.py
+"""
+Offline simulator comparing adaptive (Q-learning) and non-adaptive challenge selection.
+
+Synthetic students answer challenges from the real catalog (the seed
+challenges.json, no database). Each student has a hidden mastery state per
+subtopic that follows a BKT-style generative model with its own initial
+mastery, learning, guess and slip rates. Guessing gets harder and slipping
+more likely as difficulty goes up. For every student and subtopic, both
+policies are run from the same starting point:
+
+- non-adaptive: the fixed 2 easy / 2 medium / 1 hard take;
+- adaptive: epsilon-greedy Q-learning over (mastery, timer, hint) states.
+
+Selection uses the same partitioning and sequence as app/services/selection.py.
+Updates use BKT.update_knowledge and the rl_kernel transition/reward tables,
+as app/services/engine.py does, including the 5-attempt take that the API
+clears when it is full. The policy's draws (initial Q-table, exploration,
+tie-breaking) come from app.core.rng streams keyed like the API's, with the
+run in place of the user_subtopic and --seed in place of RL_RANDOM_SEED. The
+student's draws (parameters, mastery, hints, answers, time) come from streams
+of their own, so a run replays exactly from --seed. Only numpy is needed
+besides the app.core modules; nothing touches the database or the settings.
+
+Writes learning curves (mean estimated knowledge and true mastery rate per
+attempt) and time-to-mastery per student to --output-dir:
+
+    python scripts/simulate_policies.py --students 5000 --attempts 30 --workers 8
+"""
+import argparse
+import csv
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from random import Random
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+# Make the app module importable when run from the backend root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from app.core.bkt import BKT
+from app.core.rl import QLearning
+from app.core.rng import stream
+from app.core.rl_kernel import count_streaks, transition
+from app.core.selection_rules import NON_ADAPTIVE_SEQUENCE, partition_by_progress
+from app.core.utils import (
+    classify_mastery, determine_streak_flags, get_difficulty,
+    initialize_q_table, round_q_table_values
+)
+
+SEED_DIR = Path(__file__).resolve().parent.parent / 'app' / 'data' / 'seed'
+POLICIES = ("adaptive", "non_adaptive")
+TAKE_SIZE = 5
+INITIAL_EPSILON = 0.8  # as in create_q_table
+ADVANCED_MASTERY = 3
+
+# Shift applied to a student's guess / slip rate per difficulty
+GUESS_SHIFT = {"easy": 0.10, "medium": 0.0, "hard": -0.10}
+SLIP_SHIFT = {"easy": -0.05, "medium": 0.0, "hard": 0.10}
+
+
+@dataclass(frozen=True)
+class StudentParams:
+    p_init: float    # probability of already mastering a subtopic
+    p_learn: float   # probability of acquiring mastery after an attempt
+    p_guess: float
+    p_slip: float
+    speed: float     # time spent relative to the challenge timer
+    hint_rate: float  # probability of using each of 3 hints when hints are on
+
+
+def _beta(rng: Random, mean: float, concentration: float) -> float:
+    return rng.betavariate(mean * concentration, (1 - mean) * concentration)
+
+
+def sample_student(rng: Random, args) -> StudentParams:
+    return StudentParams(
+        p_init=_beta(rng, args.p_init, args.concentration),
+        p_learn=_beta(rng, args.p_learn, args.concentration),
+        p_guess=_beta(rng, args.p_guess, args.concentration),
+        p_slip=_beta(rng, args.p_slip, args.concentration),
+        speed=rng.lognormvariate(0.0, 0.3) * args.speed,
+        hint_rate=_beta(rng, args.hint_rate, args.concentration)
+    )
+
+
+def load_catalog() -> Dict[int, List[SimpleNamespace]]:
+    """Challenges per subtopic, with only the fields selection and updates use."""
+    with open(SEED_DIR / 'challenges.json', 'r', encoding='utf-8') as f:
+        rows = json.load(f)
+    catalog: Dict[int, List[SimpleNamespace]] = {}
+    for row in rows:
+        catalog.setdefault(row['subtopic_id'], []).append(SimpleNamespace(
+            id=row['id'],
+            subtopic_id=row['subtopic_id'],
+            type=row['type'],
+            difficulty=row['difficulty'],
+            timer=row['timer']
+        ))
+    return catalog
+
+
+def _select(
+    challenges: List[SimpleNamespace],
+    progress: Dict[int, SimpleNamespace],
+    take: List[Tuple[SimpleNamespace, bool]],
+    adaptive: bool,
+    knowledge: float,
+    q_table: dict,
+    epsilon: float,
+    rng: Random
+) -> SimpleNamespace:
+    """In-memory counterpart of _select_adaptive_challenge / _select_non_adaptive_challenge."""
+    attempted = {c.id for c, _ in take}
+    if adaptive:
+        mastery = classify_mastery(knowledge)
+        correct_streak, incorrect_streak = count_streaks(s for _, s in reversed(take[-2:]))
+        timer_active, hint_active = determine_streak_flags(incorrect_streak, correct_streak)
+        rl = QLearning(rng=rng)
+        rl.q_table, rl.epsilon = q_table, epsilon
+        action = rl.select_action((mastery, timer_active, hint_active))
+        difficulty = get_difficulty(mastery)
+        candidates = [
+            c for c in challenges
+            if c.type == action and c.difficulty == difficulty and c.id not in attempted
+        ]
+    else:
+        difficulty = NON_ADAPTIVE_SEQUENCE[min(len(take), TAKE_SIZE - 1)]
+        candidates = [c for c in challenges if c.difficulty == difficulty and c.id not in attempted]
+
+    if not candidates:
+        unsolved = [
+            c for c in challenges
+            if c.id not in attempted and not (c.id in progress and progress[c.id].is_solved)
+        ]
+        return rng.choice(unsolved or [c for c in challenges if c.id not in attempted])
+
+    pending, unsolved, solved, other = partition_by_progress(candidates, progress)
+    if adaptive:
+        return rng.choice(pending or unsolved or solved + other)
+    return rng.choice(pending or unsolved or solved or candidates)
+
+
+def simulate_run(
+    params: StudentParams,
+    challenges: List[SimpleNamespace],
+    adaptive: bool,
+    attempts: int,
+    initial_knowledge: float,
+    run_key: str,
+    seed: str
+) -> Tuple[List[float], List[int]]:
+    """One student on one subtopic under one policy; returns per-attempt (estimated knowledge, true mastery)."""
+    bkt = BKT()
+    # The student's own draws. Only the adaptive policy uses hints, so they
+    # draw from a stream per attempt: otherwise they would shift every later
+    # answer and time draw of the adaptive run against the random one
+    student = stream(run_key, "student", seed=seed)
+    knows = student.random() < params.p_init
+    knowledge = initial_knowledge
+    progress: Dict[int, SimpleNamespace] = {}
+    take: List[Tuple[SimpleNamespace, bool]] = []
+    q_table = round_q_table_values(initialize_q_table(stream(run_key, "init", seed=seed)))
+    epsilon = INITIAL_EPSILON
+    take_number = 1
+
+    estimated, true_mastery = [], []
+    for _ in range(attempts):
+        if len(take) == TAKE_SIZE:
+            take = []  # close_take_if_full
+            take_number += 1
+        rng = stream(run_key, "select", take_number, len(take), seed=seed)
+        challenge = _select(challenges, progress, take, adaptive, knowledge, q_table, epsilon, rng)
+
+        correct_streak, incorrect_streak = count_streaks(s for _, s in reversed(take[-2:]))
+        _, hint_active = determine_streak_flags(incorrect_streak, correct_streak)
+        if adaptive and hint_active:
+            hint_rng = stream(run_key, "hint", take_number, len(take), seed=seed)
+            hints_used = sum(hint_rng.random() < params.hint_rate for _ in range(3))
+        else:
+            hints_used = 0
+
+        if knows:
+            p_correct = 1 - min(0.95, max(0.0, params.p_slip + SLIP_SHIFT[challenge.difficulty]))
+        else:
+            p_correct = min(0.95, max(0.0, params.p_guess + GUESS_SHIFT[challenge.difficulty]) + 0.05 * hints_used)
+        is_correct = student.random() < p_correct
+        time_spent = challenge.timer * params.speed * student.lognormvariate(0.0, 0.35) * (0.7 if knows else 1.0)
+        on_time = int(time_spent <= challenge.timer)
+
+        new_knowledge = bkt.update_knowledge(knowledge, is_correct)
+        if adaptive:
+            current_state, next_state, reward = transition(
+                knowledge, new_knowledge, incorrect_streak, correct_streak, is_correct, hints_used, on_time
+            )
+            rl = QLearning(rng=stream(run_key, "update", take_number, len(take), seed=seed))
+            rl.q_table, rl.epsilon = q_table, epsilon
+            rl.update_q_value(current_state, challenge.type, reward, next_state)
+            rl.decay_epsilon()
+            q_table, epsilon = round_q_table_values(rl.q_table), rl.epsilon
+        knowledge = new_knowledge
+
+        progress[challenge.id] = SimpleNamespace(status="completed", is_solved=is_correct)
+        take.append((challenge, is_correct))
+        if not knows:
+            knows = student.random() < params.p_learn
+
+        estimated.append(knowledge)
+        true_mastery.append(int(knows))
+    return estimated, true_mastery
+
+
+def _first_index(values: List[float], predicate) -> Optional[int]:
+    for i, value in enumerate(values):
+        if predicate(value):
+            return i + 1
+    return None
+
+
+_catalog: Dict[int, List[SimpleNamespace]] = {}
+
+
+def _init_worker() -> None:
+    global _catalog
+    _catalog = load_catalog()
+
+
+def simulate_chunk(task) -> dict:
+    """Simulate students [start, stop) on every subtopic under both policies."""
+    start, stop, args = task
+    curves = {
+        (policy, subtopic_id): (np.zeros(args.attempts), np.zeros(args.attempts), [0])
+        for policy in POLICIES for subtopic_id in _catalog
+    }
+    mastery_rows = []
+    seed = f"sim:{args.seed}"
+    for student in range(start, stop):
+        params = sample_student(stream(student, "params", seed=seed), args)
+        for subtopic_id, challenges in _catalog.items():
+            run_key = f"{student}:{subtopic_id}"
+            for policy in POLICIES:
+                # Same run key for both policies: identical starting mastery and Q-table
+                estimated, true_mastery = simulate_run(
+                    params, challenges, policy == "adaptive", args.attempts, args.initial_knowledge, run_key, seed
+                )
+                est_sum, true_sum, count = curves[(policy, subtopic_id)]
+                est_sum += estimated
+                true_sum += true_mastery
+                count[0] += 1
+                mastery_rows.append((
+                    policy, subtopic_id, student,
+                    _first_index(estimated, lambda k: classify_mastery(k) == ADVANCED_MASTERY),
+                    _first_index(true_mastery, bool)
+                ))
+    return {"curves": curves, "mastery": mastery_rows}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--attempts', type=int, default=30, help='attempts per student and subtopic')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=100, help='students per worker task')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--initial-knowledge', type=float, default=0.1, help='starting knowledge_level')
+    parser.add_argument('--p-init', type=float, default=0.2, help='mean initial mastery probability')
+    parser.add_argument('--p-learn', type=float, default=0.15, help='mean learning rate per attempt')
+    parser.add_argument('--p-guess', type=float, default=0.25, help='mean guess rate')
+    parser.add_argument('--p-slip', type=float, default=0.1, help='mean slip rate')
+    parser.add_argument('--hint-rate', type=float, default=0.5, help='mean chance of using each hint')
+    parser.add_argument('--speed', type=float, default=0.8, help='median time spent / challenge timer')
+    parser.add_argument('--concentration', type=float, default=20.0, help='Beta concentration of student parameters')
+    parser.add_argument('--output-dir', type=Path, default=Path('simulation_results'))
+    args = parser.parse_args()
+
+    catalog = load_catalog()
+    tasks = [
+        (start, min(start + args.chunk_size, args.students), args)
+        for start in range(0, args.students, args.chunk_size)
+    ]
+
+    started = time.perf_counter()
+    curves = {
+        (policy, subtopic_id): (np.zeros(args.attempts), np.zeros(args.attempts), [0])
+        for policy in POLICIES for subtopic_id in catalog
+    }
+    mastery_rows = []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+        for result in pool.map(simulate_chunk, tasks):
+            for key, (est_sum, true_sum, count) in result["curves"].items():
+                curves[key][0][:] += est_sum
+                curves[key][1][:] += true_sum
+                curves[key][2][0] += count[0]
+            mastery_rows.extend(result["mastery"])
+    elapsed = time.perf_counter() - started
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    with open(args.output_dir / 'learning_curves.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['policy', 'subtopic_id', 'attempt', 'mean_estimated_knowledge', 'true_mastery_rate'])
+        for (policy, subtopic_id), (est_sum, true_sum, count) in sorted(curves.items()):
+            for i in range(args.attempts):
+                writer.writerow([
+                    policy, subtopic_id, i + 1,
+                    round(est_sum[i] / count[0], 4), round(true_sum[i] / count[0], 4)
+                ])
+    with open(args.output_dir / 'time_to_mastery.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['policy', 'subtopic_id', 'student', 'attempts_to_estimated_mastery', 'attempts_to_true_mastery'])
+        writer.writerows(mastery_rows)
+
+    runs = len(mastery_rows)
+    print(f"{runs} runs ({args.students} students x {len(catalog)} subtopics x {len(POLICIES)} policies) "
+          f"in {elapsed:.1f} s with {args.workers} workers")
+    for policy in POLICIES:
+        rows = [r for r in mastery_rows if r[0] == policy]
+        for label, column in (("estimated", 3), ("true", 4)):
+            reached = sorted(r[column] for r in rows if r[column] is not None)
+            if reached:
+                p90 = reached[max(0, int(len(reached) * 0.9) - 1)]
+                print(f"{policy:<13} {label:<9} mastery: {len(reached) / len(rows):6.1%} reached, "
+                      f"median {statistics.median(reached):5.1f}, p90 {p90:3d} attempts")
+            else:
+                print(f"{policy:<13} {label:<9} mastery: never reached")
+        final = [curves[(policy, s)][0][-1] / curves[(policy, s)][2][0] for s in catalog]
+        print(f"{policy:<13} final mean estimated knowledge {statistics.mean(final):.3f}")
+    print(f"Results written to {args.output_dir}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ setup(
         "uvicorn[standard]",
         "starlette",
         "python-multipart",
+        "orjson",
         
         # Database
         "SQLAlchemy",
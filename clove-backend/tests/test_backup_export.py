@@ -0,0 +1,51 @@
+# tests/test_backup_export.py
+"""export_copy of scripts/incremental_backup.py (repository root) when the upload fails."""
+import argparse
+import os
+import shutil
+import sys
+import threading
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+if not shutil.which("zstd"):
+    pytest.skip("zstd is not installed", allow_module_level=True)
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+
+import incremental_backup  # noqa: E402
+from upload_backup_oauth import LocalTarget, UploadError  # noqa: E402
+
+
+class FailingTarget(LocalTarget):
+    def put(self, upload, data, start, total):
+        raise UploadError("upload refused")
+
+
+@pytest.mark.database
+def test_failed_upload_stops_the_copy(tmp_path):
+    args = argparse.Namespace(zstd_level=1, zstd_threads=1, chunk_size=256 * 1024, retries=0)
+    conn = psycopg2.connect(os.environ["TEST_DATABASE_URL"].replace("+asyncpg", ""))
+    outcome = {}
+
+    def export():
+        try:
+            # Far more output than the pipes between COPY, zstd and the uploader hold
+            incremental_backup.export_copy(
+                conn.cursor(), "SELECT g, md5(g::text) FROM generate_series(1, %s) g", (2_000_000,),
+                FailingTarget(str(tmp_path)), 'out.copy.zst', args
+            )
+        except Exception as e:
+            outcome['error'] = e
+
+    try:
+        worker = threading.Thread(target=export, daemon=True)
+        worker.start()
+        worker.join(60)
+        assert not worker.is_alive(), "export_copy hung after the upload failed"
+        assert isinstance(outcome.get('error'), UploadError)
+        assert not os.path.exists(tmp_path / 'out.copy.zst')
+        conn.rollback()
+    finally:
+        conn.close()
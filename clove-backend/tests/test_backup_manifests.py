@@ -0,0 +1,92 @@
+# tests/test_backup_manifests.py
+"""Manifest chains of the incremental backups (scripts/restore_backup.py at the repository root)."""
+import hashlib
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+
+import restore_backup  # noqa: E402
+
+
+def write_file(directory, name, data):
+    with open(os.path.join(directory, name), 'wb') as f:
+        f.write(data)
+    return {'file': name, 'sha256': hashlib.sha256(data).hexdigest(), 'bytes': len(data)}
+
+
+def write_manifest(directory, manifest):
+    with open(os.path.join(directory, manifest['name']), 'w') as f:
+        json.dump(manifest, f)
+
+
+@pytest.fixture
+def backups(tmp_path):
+    """base <- delta1 <- delta2, with delta2 also carrying deletions."""
+    directory = str(tmp_path)
+    write_manifest(directory, {
+        'kind': 'base', 'name': 'base.manifest.json', 'parent': None,
+        'dump': write_file(directory, 'base.dump.zst', b'dump'),
+    })
+    write_manifest(directory, {
+        'kind': 'delta', 'name': 'delta1.manifest.json', 'parent': 'base.manifest.json',
+        'files': [write_file(directory, 'delta1.users.copy.zst', b'users 1')],
+        'deletions': None,
+    })
+    write_manifest(directory, {
+        'kind': 'delta', 'name': 'delta2.manifest.json', 'parent': 'delta1.manifest.json',
+        'files': [
+            write_file(directory, 'delta2.users.copy.zst', b'users 2'),
+            write_file(directory, 'delta2.user_challenges.copy.zst', b'challenges 2'),
+        ],
+        'deletions': write_file(directory, 'delta2.deletions.copy.zst', b'deletions 2'),
+    })
+    return directory
+
+
+def test_chain_runs_from_the_base_to_the_chosen_manifest(backups):
+    chain = restore_backup.manifest_chain(backups, 'delta2.manifest.json')
+    assert [m['name'] for m in chain] == ['base.manifest.json', 'delta1.manifest.json', 'delta2.manifest.json']
+    assert [m['name'] for m in restore_backup.manifest_chain(backups, 'delta1.manifest.json')] == [
+        'base.manifest.json', 'delta1.manifest.json'
+    ]
+    assert [m['name'] for m in restore_backup.manifest_chain(backups, 'base.manifest.json')] == ['base.manifest.json']
+
+
+def test_chain_files_in_replay_order(backups):
+    chain = restore_backup.manifest_chain(backups, 'delta2.manifest.json')
+    assert [entry['file'] for entry in restore_backup.chain_files(chain)] == [
+        'base.dump.zst',
+        'delta1.users.copy.zst',
+        'delta2.users.copy.zst',
+        'delta2.user_challenges.copy.zst',
+        'delta2.deletions.copy.zst',
+    ]
+
+
+def test_delta_without_parent_is_rejected(backups):
+    write_manifest(backups, {'kind': 'delta', 'name': 'orphan.manifest.json', 'parent': None, 'files': []})
+    with pytest.raises(ValueError, match='orphan.manifest.json has no parent'):
+        restore_backup.manifest_chain(backups, 'orphan.manifest.json')
+
+
+def test_missing_parent_manifest_fails(backups):
+    os.remove(os.path.join(backups, 'delta1.manifest.json'))
+    with pytest.raises(FileNotFoundError):
+        restore_backup.manifest_chain(backups, 'delta2.manifest.json')
+
+
+def test_verify_catches_missing_and_corrupted_files(backups):
+    chain = restore_backup.manifest_chain(backups, 'delta2.manifest.json')
+    assert restore_backup.verify(backups, chain)
+
+    with open(os.path.join(backups, 'delta1.users.copy.zst'), 'wb') as f:
+        f.write(b'tampered')
+    assert not restore_backup.verify(backups, chain)
+
+    write_file(backups, 'delta1.users.copy.zst', b'users 1')
+    os.remove(os.path.join(backups, 'delta2.deletions.copy.zst'))
+    assert not restore_backup.verify(backups, chain)
@@ -0,0 +1,83 @@
+# tests/test_backup_restore.py
+"""apply_delta of scripts/restore_backup.py (repository root) against a real database."""
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+if not shutil.which("zstd"):
+    pytest.skip("zstd is not installed", allow_module_level=True)
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+
+import restore_backup  # noqa: E402
+
+pytestmark = pytest.mark.database
+
+
+def write_copy(directory, name, rows):
+    """A zstd-compressed COPY text stream, as incremental_backup.py exports it."""
+    data = ''.join('\t'.join(str(value) for value in row) + '\n' for row in rows).encode()
+    with open(os.path.join(directory, name), 'wb') as f:
+        f.write(subprocess.run(['zstd', '-q', '-c'], input=data, stdout=subprocess.PIPE, check=True).stdout)
+    return name
+
+
+@pytest.fixture
+def conn():
+    conn = psycopg2.connect(os.environ["TEST_DATABASE_URL"].replace("+asyncpg", ""))
+    with conn.cursor() as cursor:
+        # Shaped like q_values: a serial ID plus a column unique per owner
+        cursor.execute("CREATE TABLE restore_test_parent (id integer PRIMARY KEY, slot integer UNIQUE NOT NULL)")
+        cursor.execute(
+            "CREATE TABLE restore_test_child (id integer PRIMARY KEY, "
+            "parent_id integer NOT NULL REFERENCES restore_test_parent (id))"
+        )
+        cursor.execute("INSERT INTO restore_test_parent VALUES (1, 7)")
+        cursor.execute("INSERT INTO restore_test_child VALUES (10, 1)")
+    conn.commit()
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS restore_test_child, restore_test_parent")
+        conn.commit()
+        conn.close()
+
+
+def test_row_deleted_and_recreated_in_one_window(conn, tmp_path):
+    directory = str(tmp_path)
+    # Between the two backups the parent (and its child) were deleted, and a
+    # new parent with the same slot was created under a new ID
+    manifest = {
+        'kind': 'delta',
+        'tables': ['restore_test_parent', 'restore_test_child'],
+        'files': [
+            {
+                'table': 'restore_test_parent', 'columns': ['id', 'slot'], 'key': ['id'],
+                'file': write_copy(directory, 'parent.copy.zst', [(2, 7)]),
+            },
+            {
+                'table': 'restore_test_child', 'columns': ['id', 'parent_id'], 'key': ['id'],
+                'file': write_copy(directory, 'child.copy.zst', [(11, 2)]),
+            },
+        ],
+        'deletions': {
+            'columns': ['table_name', 'row_id'],
+            'file': write_copy(directory, 'deletions.copy.zst', [
+                ('restore_test_parent', 1), ('restore_test_child', 10),
+            ]),
+        },
+    }
+
+    restore_backup.apply_delta(conn, directory, manifest)
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT id, slot FROM restore_test_parent")
+        assert cursor.fetchall() == [(2, 7)]
+        cursor.execute("SELECT id, parent_id FROM restore_test_child")
+        assert cursor.fetchall() == [(11, 2)]
@@ -0,0 +1,71 @@
+# tests/test_bkt_fit.py
+import itertools
+import math
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.core.bkt_fit import fit_bkt, fit_sequences, pack_sequences
+
+
+def generate(n, p_init, p_transit, p_guess, p_slip, seed=1):
+    """Sequences of 5-30 attempts from the BKT generative model."""
+    rng = random.Random(seed)
+    sequences = []
+    for _ in range(n):
+        known = rng.random() < p_init
+        sequence = []
+        for _ in range(rng.randint(5, 30)):
+            sequence.append(rng.random() < ((1 - p_slip) if known else p_guess))
+            known = known or rng.random() < p_transit
+        sequences.append(sequence)
+    return sequences
+
+
+def path_likelihood(sequence, p_init, p_transit, p_guess, p_slip):
+    """P(sequence) by summing over every hidden path (no learning is ever undone)."""
+    total = 0.0
+    for states in itertools.product((0, 1), repeat=len(sequence)):
+        if any(a > b for a, b in zip(states, states[1:])):
+            continue
+        p = p_init if states[0] else 1 - p_init
+        for before, after in zip(states, states[1:]):
+            p *= 1.0 if before else (p_transit if after else 1 - p_transit)
+        for state, correct in zip(states, sequence):
+            p_correct = 1 - p_slip if state else p_guess
+            p *= p_correct if correct else 1 - p_correct
+        total += p
+    return total
+
+
+def test_pack_sequences_pads_truncates_and_drops_empty():
+    outcomes, mask = pack_sequences([[True, False, True], [], [False]], max_length=2)
+    assert outcomes.tolist() == [[True, False], [False, False]]
+    assert mask.tolist() == [[True, True], [True, False]]
+
+
+def test_log_likelihood_matches_the_sum_over_hidden_paths():
+    sequences = [[True, False, True, True], [False, False], [True]]
+    parameters = dict(p_init=0.3, p_transit=0.2, p_guess=0.25, p_slip=0.1)
+    outcomes, mask = pack_sequences(sequences)
+    # One iteration: the likelihood is computed with the starting parameters
+    fit = fit_bkt(outcomes, mask, max_iterations=1, **parameters)
+    expected = sum(math.log(path_likelihood(s, **parameters)) for s in sequences)
+    assert fit.log_likelihood == pytest.approx(expected, rel=1e-9)
+
+
+def test_recovers_the_generating_parameters():
+    truth = dict(p_init=0.3, p_transit=0.15, p_guess=0.2, p_slip=0.1)
+    fit = fit_sequences(generate(8000, **truth))
+    assert fit.n_sequences == 8000
+    assert fit.p_init == pytest.approx(truth["p_init"], abs=0.03)
+    assert fit.p_transit == pytest.approx(truth["p_transit"], abs=0.02)
+    assert fit.p_guess == pytest.approx(truth["p_guess"], abs=0.02)
+    assert fit.p_slip == pytest.approx(truth["p_slip"], abs=0.02)
+
+
+def test_empty_input_keeps_the_starting_parameters():
+    fit = fit_sequences([[], []], p_transit=0.1, p_guess=0.2, p_slip=0.1)
+    assert (fit.p_transit, fit.p_guess, fit.p_slip, fit.n_attempts) == (0.1, 0.2, 0.1, 0)
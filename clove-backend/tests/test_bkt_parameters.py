@@ -0,0 +1,36 @@
+# tests/test_bkt_parameters.py
+import os
+import sys
+
+from app.core.bkt import BKT
+from app.db.models.bkt_parameters import ALL_CHALLENGE_TYPES
+from app.services.bkt_parameters import pick_model
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import recompute_knowledge_levels as recompute  # noqa: E402
+
+DEFAULT = BKT(0.1, 0.2, 0.1)
+SUBTOPIC = BKT(0.3, 0.2, 0.1)
+FIXER = BKT(0.05, 0.1, 0.2)
+MODELS = {(1, ALL_CHALLENGE_TYPES): SUBTOPIC, (1, "code_fixer"): FIXER}
+
+
+def test_pick_model_prefers_type_then_subtopic_then_default():
+    assert pick_model(MODELS, DEFAULT, 1, "code_fixer") is FIXER
+    assert pick_model(MODELS, DEFAULT, 1, "output_tracing") is SUBTOPIC
+    assert pick_model(MODELS, DEFAULT, 1) is SUBTOPIC
+    assert pick_model(MODELS, DEFAULT, 2, "code_fixer") is DEFAULT
+
+
+def test_recompute_replays_each_attempt_with_its_type():
+    fitted = {(1, ALL_CHALLENGE_TYPES): (0.3, 0.2, 0.1), (1, "code_fixer"): (0.05, 0.1, 0.2)}
+    recompute._init_worker({}, fitted, 0.1, 0.2, 0.1)
+    outcomes = [("code_fixer", True), ("output_tracing", False), ("code_fixer", False)]
+
+    expected = 0.3
+    for model, is_correct in ((FIXER, True), (SUBTOPIC, False), (FIXER, False)):
+        expected = model.update_knowledge(expected, is_correct)
+    assert recompute.replay(1, 0.3, outcomes) == expected
+    # A subtopic without fitted rows uses the command-line parameters
+    assert recompute.replay(2, 0.3, outcomes) == DEFAULT.replay(0.3, [True, False, False])
@@ -0,0 +1,28 @@
+# tests/test_knowledge_levels.py
+import pytest
+from sqlalchemy.future import select
+
+from app.crud import user_subtopic as crud_user_subtopic
+from app.db.models.user_subtopics import UserSubtopic
+
+pytestmark = pytest.mark.database
+
+
+async def _levels(db, ids):
+    rows = await db.execute(select(UserSubtopic.id, UserSubtopic.knowledge_level).where(UserSubtopic.id.in_(ids)))
+    return dict(rows.all())
+
+
+async def test_bulk_set_knowledge_levels_in_batches(db, monkeypatch):
+    monkeypatch.setattr(crud_user_subtopic, "KNOWLEDGE_LEVEL_BATCH_SIZE", 2)
+    ids = (await db.execute(select(UserSubtopic.id).order_by(UserSubtopic.id).limit(5))).scalars().all()
+    assert len(ids) == 5, "needs a seeded database"
+    current = await _levels(db, ids)
+
+    rows = [(us_id, current[us_id], 0.42) for us_id in ids]
+    rows[3] = (ids[3], 0.99 if current[ids[3]] != 0.99 else 0.98, 0.42)  # changed since it was read
+    written = await crud_user_subtopic.bulk_set_knowledge_levels(db, rows, commit=False)
+
+    assert written == 4
+    levels = await _levels(db, ids)
+    assert [levels[us_id] for us_id in ids] == [0.42, 0.42, 0.42, current[ids[3]], 0.42]
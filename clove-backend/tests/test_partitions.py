@@ -0,0 +1,79 @@
+# tests/test_partitions.py
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.future import select
+
+from app.db import partitions
+from app.db.models.challenge_attempts import ChallengeAttempt
+from app.db.models.user_challenges import UserChallenge
+from app.db.models.user_subtopics import UserSubtopic
+from app.db.models.challenges import Challenge
+
+
+def test_monthly_ranges_cross_the_year():
+    assert partitions.monthly_ranges(date(2026, 11, 17), 3) == [
+        ("challenge_attempts_y2026m11", date(2026, 11, 1), date(2026, 12, 1)),
+        ("challenge_attempts_y2026m12", date(2026, 12, 1), date(2027, 1, 1)),
+        ("challenge_attempts_y2027m01", date(2027, 1, 1), date(2027, 2, 1)),
+    ]
+
+
+async def _attempt(db, attempted_at):
+    """A new attempt of some seeded user_challenge, at the given time."""
+    user_challenge = (await db.execute(select(UserChallenge).limit(1))).scalar_one()
+    challenge = await db.get(Challenge, user_challenge.challenge_id)
+    user_subtopic = (await db.execute(select(UserSubtopic).where(
+        UserSubtopic.user_id == user_challenge.user_id,
+        UserSubtopic.subtopic_id == challenge.subtopic_id
+    ))).scalar_one()
+    attempt = ChallengeAttempt(
+        user_challenge_id=user_challenge.id,
+        user_subtopic_id=user_subtopic.id,
+        is_successful=True,
+        attempted_at=attempted_at
+    )
+    db.add(attempt)
+    await db.flush()
+    return attempt
+
+
+async def _partition_of(db, attempt):
+    return (await db.execute(text(
+        "SELECT tableoid::regclass::text FROM challenge_attempts WHERE id = :id"
+    ), {"id": attempt.id})).scalar_one()
+
+
+async def _partition_bound(db, name):
+    return (await db.execute(text(
+        "SELECT pg_get_expr(relpartbound, oid) FROM pg_class WHERE relname = :name AND relispartition"
+    ), {"name": name})).scalar_one_or_none()
+
+
+@pytest.mark.database
+async def test_attempts_are_routed_to_their_month(db):
+    now = datetime.now(timezone.utc)
+    attempt = await _attempt(db, now)
+    assert await _partition_of(db, attempt) == partitions.monthly_ranges(now.date(), 1)[0][0]
+
+
+@pytest.mark.database
+async def test_month_created_over_rows_in_the_default_partition(db):
+    name, lower, upper = partitions.monthly_ranges(date(2099, 3, 1), 1)[0]
+    conn = await db.connection()
+    stray = await _attempt(db, datetime(2099, 3, 15, tzinfo=timezone.utc))
+    later = await _attempt(db, datetime(2099, 4, 2, tzinfo=timezone.utc))
+    assert await _partition_of(db, stray) == partitions.DEFAULT_PARTITION
+
+    assert await partitions.ensure_monthly_partition(conn, name, lower, upper) == 1
+    assert await _partition_of(db, stray) == name
+    assert await _partition_of(db, later) == partitions.DEFAULT_PARTITION
+    assert await _partition_bound(db, partitions.DEFAULT_PARTITION) == "DEFAULT"
+    # The move is not a deletion for the incremental backups
+    deleted = (await db.execute(text(
+        "SELECT count(*) FROM backup_deletions WHERE table_name = 'challenge_attempts' AND row_id = :id"
+    ), {"id": stray.id})).scalar_one()
+    assert deleted == 0
+
+    assert await partitions.ensure_monthly_partition(conn, name, lower, upper) == -1
@@ -0,0 +1,88 @@
+# tests/test_q_tables.py
+import asyncio
+
+import pytest
+from sqlalchemy import delete, func
+from sqlalchemy.future import select
+
+from app.core.rng import stream
+from app.core.utils import initialize_q_table, round_q_table_values
+from app.crud import q_value as crud_q_value
+from app.crud.user import init_user_data
+from app.db.models.q_values import QValue
+from app.db.models.user_subtopics import UserSubtopic
+from app.db.models.users import User
+
+pytestmark = pytest.mark.database
+
+
+async def _user_subtopic_without_q_table(db):
+    return (await db.execute(
+        select(UserSubtopic.id)
+        .where(UserSubtopic.id.not_in(select(QValue.user_subtopic_id)))
+        .order_by(UserSubtopic.id)
+        .limit(1)
+    )).scalar_one()
+
+
+async def _q_table_count(db, user_subtopic_id):
+    return (await db.execute(
+        select(func.count(QValue.id)).where(QValue.user_subtopic_id == user_subtopic_id)
+    )).scalar_one()
+
+
+async def test_q_table_is_created_once_from_its_stream(db):
+    user_subtopic_id = await _user_subtopic_without_q_table(db)
+
+    created = await crud_q_value.get_or_create_q_table(db, user_subtopic_id)
+    again = await crud_q_value.get_or_create_q_table(db, user_subtopic_id)
+
+    assert again.id == created.id
+    assert await _q_table_count(db, user_subtopic_id) == 1
+    assert created.q_table == round_q_table_values(initialize_q_table(stream(user_subtopic_id, "init")))
+    assert float(created.epsilon) == 0.8
+
+
+async def test_racing_first_requests_share_one_q_table():
+    from app.db.session import async_session
+
+    async with async_session() as first, async_session() as second:
+        user_subtopic_id = await _user_subtopic_without_q_table(first)
+        try:
+            winner = await crud_q_value.get_or_create_q_table(first, user_subtopic_id)
+            # The second insert waits on the first one's uncommitted row
+            racing = asyncio.create_task(crud_q_value.get_or_create_q_table(second, user_subtopic_id))
+            await asyncio.sleep(0.3)
+            assert not racing.done()
+            await first.commit()
+
+            loser = await racing
+            assert loser.id == winner.id
+            await second.commit()
+            assert await _q_table_count(first, user_subtopic_id) == 1
+        finally:
+            await first.rollback()
+            await first.execute(delete(QValue).where(QValue.user_subtopic_id == user_subtopic_id))
+            await first.commit()
+
+
+@pytest.mark.parametrize("adaptive", [True, False])
+async def test_signup_provisions_q_tables_for_adaptive_users(db, adaptive):
+    user = User(
+        username=f"qtable_{adaptive}", email=f"qtable_{adaptive}@example.com",
+        password_hash="x", is_adaptive=adaptive
+    )
+    db.add(user)
+    await db.flush()
+
+    await init_user_data(db, user.id, provision_q_tables=adaptive)
+    await db.flush()
+
+    user_subtopic_ids = (await db.execute(
+        select(UserSubtopic.id).where(UserSubtopic.user_id == user.id)
+    )).scalars().all()
+    q_tables = (await db.execute(
+        select(QValue.user_subtopic_id).where(QValue.user_subtopic_id.in_(user_subtopic_ids))
+    )).scalars().all()
+    assert user_subtopic_ids
+    assert sorted(q_tables) == (sorted(user_subtopic_ids) if adaptive else [])
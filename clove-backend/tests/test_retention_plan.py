@@ -0,0 +1,136 @@
+# tests/test_retention_plan.py
+"""Tiered retention of the Drive backups (scripts/cleanup_old_backups_oauth.py at the repository root)."""
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+
+import cleanup_old_backups_oauth as cleanup  # noqa: E402
+from cleanup_old_backups_oauth import BackupSet, group_backup_sets, plan_retention  # noqa: E402
+
+NOW = datetime(2026, 6, 15, 12, 0, 0)
+
+
+def backup(kind, days_ago, hour=2):
+    return BackupSet(NOW.replace(hour=hour) - timedelta(days=days_ago), kind, [])
+
+
+def summary(keep, delete):
+    """(kind, days ago, reasons) of the kept sets and (kind, days ago) of the deleted ones."""
+    age = lambda b: (NOW - b.time).days
+    return [(b.kind, age(b), reasons) for b, reasons in keep], [(b.kind, age(b)) for b in delete]
+
+
+def test_files_of_one_backup_form_one_set():
+    stamp = '20260601_020000'
+    files = [
+        {'id': '1', 'name': f'clove_db_backup_delta_{stamp}.users.copy.zst', 'createdTime': '2026-06-01T02:05:00.000Z'},
+        {'id': '2', 'name': f'clove_db_backup_delta_{stamp}.manifest.json', 'createdTime': '2026-06-01T02:06:00.000Z'},
+        {'id': '3', 'name': f'clove_db_backup_base_{stamp}.dump.zst', 'createdTime': '2026-06-01T02:05:00.000Z'},
+        {'id': '4', 'name': 'clove_db_backup_20260531.sql.gz', 'createdTime': '2026-05-31T02:05:00.000Z'},
+        {'id': '5', 'name': 'clove_db_backup_full_20260530_020000.sql.gz', 'createdTime': '2026-05-30T02:05:00.000Z'},
+    ]
+    sets = group_backup_sets(files)
+
+    assert [(s.kind, s.time, sorted(f['id'] for f in s.files)) for s in sets] == [
+        # Same timestamp, but a base and a delta are different backups
+        ('delta', datetime(2026, 6, 1, 2), ['1', '2']),
+        ('base', datetime(2026, 6, 1, 2), ['3']),
+        # No timestamp in the name: the file's creation time, and a set of its own
+        ('unknown:4', datetime(2026, 5, 31, 2, 5), ['4']),
+        ('full', datetime(2026, 5, 30, 2), ['5']),
+    ]
+
+
+def test_daily_window_keeps_everything():
+    sets = [backup('delta', 1), backup('base', 2), backup('unknown:9', 3), backup('full', 9)]
+    keep, delete = plan_retention(sets, NOW, keep_days=7, chain_open=False)
+
+    assert summary(keep, delete) == (
+        [('delta', 1, ['daily']), ('base', 2, ['daily', 'chain']), ('unknown:9', 3, ['daily'])],
+        [('full', 9)],
+    )
+
+
+def test_weekly_and_monthly_keep_the_newest_full_or_base_backup():
+    sets = [
+        backup('full', 8),
+        backup('full', 10),
+        backup('unknown:9', 15),  # only full and base backups stand for a week
+        backup('full', 16),
+        backup('full', 40),
+        backup('full', 47),
+        backup('full', 80),
+    ]
+    keep, delete = plan_retention(sets, NOW, keep_days=7, keep_weeks=2, keep_months=3, chain_open=False)
+
+    # Weeks count back from now, months are calendar months: 16 days ago was in May
+    assert summary(keep, delete) == (
+        [
+            ('full', 8, ['weekly', 'monthly']),
+            ('full', 16, ['monthly']),
+            ('full', 47, ['monthly']),
+        ],
+        [('full', 10), ('unknown:9', 15), ('full', 40), ('full', 80)],
+    )
+
+
+def test_kept_delta_keeps_its_chain_back_to_the_base():
+    sets = [
+        backup('delta', 8),
+        backup('base', 9),
+        backup('delta', 10),  # daily: keeps everything down to its base
+        backup('delta', 11),
+        backup('base', 12),
+        backup('delta', 13),
+        backup('base', 14),
+    ]
+    keep, delete = plan_retention(sets, NOW, keep_days=11, chain_open=False)
+
+    assert summary(keep, delete) == (
+        [
+            ('delta', 8, ['daily']),
+            ('base', 9, ['daily', 'chain']),
+            ('delta', 10, ['daily']),
+            ('delta', 11, ['chain']),
+            ('base', 12, ['chain']),
+        ],
+        [('delta', 13), ('base', 14)],
+    )
+
+
+def test_open_chain_keeps_the_newest_listed_chain():
+    # The unlisted deltas of the daily window may build on the newest listed base
+    sets = [backup('delta', 20), backup('delta', 21), backup('base', 22), backup('delta', 23), backup('base', 24)]
+    keep, delete = plan_retention(sets, NOW, keep_days=7)
+
+    assert summary(keep, delete) == (
+        [('delta', 20, ['chain']), ('delta', 21, ['chain']), ('base', 22, ['chain'])],
+        [('delta', 23), ('base', 24)],
+    )
+
+
+def test_cleanup_leaves_every_kept_delta_restorable():
+    drive = cleanup.FakeDriveService()
+    cleanup.seed_fake_drive(drive, 'folder', nights=200)
+    before = group_backup_sets(list(drive.stored.values()))
+
+    assert cleanup.cleanup_old_backups(drive, 'folder', keep_days=7, keep_weeks=4, keep_months=3, workers=1)
+
+    after = {(s.kind, s.time) for s in group_backup_sets(list(drive.stored.values()))}
+    assert len(after) < len(before)
+    # Oldest first: each remaining delta needs every older set up to and including its base
+    oldest_first = list(reversed(before))
+    for index, candidate in enumerate(oldest_first):
+        if candidate.kind != 'delta' or (candidate.kind, candidate.time) not in after:
+            continue
+        for older in reversed(oldest_first[:index]):
+            assert (older.kind, older.time) in after, f"{older.kind} {older.time} missing under a kept delta"
+            if older.kind == 'base':
+                break
+    # Each set was kept or deleted whole
+    remaining_names = {f['name'] for f in drive.stored.values()}
+    for s in before:
+        kept = [f['name'] in remaining_names for f in s.files]
+        assert all(kept) or not any(kept)
@@ -0,0 +1,81 @@
+# tests/test_rl_kernel.py
+import itertools
+
+import pytest
+
+from app.core import rl_kernel
+from app.core.bkt import BKT
+from app.core.utils import calculate_reward, classify_mastery, determine_streak_flags, initialize_q_table
+
+np = pytest.importorskip("numpy")
+
+KNOWLEDGE = [0.0, 0.1, 0.2, 0.33, 0.3300001, 0.5, 0.66, 0.6600001, 0.9, 1.0]
+STREAKS = range(5)
+
+
+def branching_transition(old_know, new_know, incorrect_streak, correct_streak, is_correct, hints_used, on_time):
+    """What the engine computed before the kernel, from the pseudocode functions."""
+    timer, hint = determine_streak_flags(incorrect_streak, correct_streak)
+    # The next state adds this attempt to its streak; the other one is kept
+    next_flags = determine_streak_flags(incorrect_streak + (not is_correct), correct_streak + is_correct)
+    return (
+        (classify_mastery(old_know), timer, hint),
+        (classify_mastery(new_know), *next_flags),
+        calculate_reward(is_correct, hints_used, timer, on_time),
+    )
+
+
+def grid():
+    return itertools.product(KNOWLEDGE, KNOWLEDGE[::3], STREAKS, STREAKS, (False, True), (0, 1, 3), (0, 1))
+
+
+def test_states_follow_initialize_q_table_order():
+    assert rl_kernel.STATE_KEYS == tuple(initialize_q_table())
+    assert rl_kernel.ACTIONS == ("code_fixer", "code_completion", "output_tracing")
+
+
+@pytest.mark.parametrize("p_kn", KNOWLEDGE)
+def test_mastery_index_matches_classify_mastery(p_kn):
+    assert rl_kernel.mastery_index(p_kn) + 1 == classify_mastery(p_kn)
+
+
+def test_transition_matches_branching_functions():
+    for args in grid():
+        state, next_state, reward = rl_kernel.transition(*args)
+        expected_state, expected_next, expected_reward = branching_transition(*args)
+        assert (state, next_state) == (expected_state, expected_next), args
+        assert reward == pytest.approx(expected_reward), args
+
+
+def test_transition_batch_matches_scalar():
+    rows = list(grid())
+    columns = [np.array(column) for column in zip(*rows)]
+    states, next_states, rewards = rl_kernel.transition_batch(*columns)
+    for i, args in enumerate(rows):
+        state, next_state, reward = rl_kernel.transition(*args)
+        assert rl_kernel.STATES[states[i]] == state
+        assert rl_kernel.STATES[next_states[i]] == next_state
+        assert rewards[i] == pytest.approx(reward)
+
+
+@pytest.mark.parametrize("params", [(), (0.05, 0.25, 0.15), (0.3, 0.1, 0.05)])
+def test_bkt_update_batch_matches_bkt(params):
+    bkt = BKT(*params)
+    knowledge = np.linspace(0, 1, 101)
+    for is_correct in (False, True):
+        batch = rl_kernel.bkt_update_batch(knowledge, np.full(knowledge.shape, is_correct), *params)
+        assert batch.tolist() == [bkt.update_knowledge(k, is_correct) for k in knowledge]
+
+
+def test_count_streaks_most_recent_first():
+    assert rl_kernel.count_streaks([]) == (0, 0)
+    assert rl_kernel.count_streaks([True, True, False]) == (0, 1)
+    assert rl_kernel.count_streaks([False, True, True]) == (2, 0)
+
+
+def test_q_table_round_trip():
+    q_table = initialize_q_table()
+    array = rl_kernel.q_table_to_array(q_table)
+    assert array.shape == (9, 3)
+    assert rl_kernel.array_to_q_table(array) == q_table
+    assert rl_kernel.q_table_to_array({}).sum() == 0
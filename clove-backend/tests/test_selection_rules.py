@@ -0,0 +1,39 @@
+# tests/test_selection_rules.py
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from app.core.selection_rules import NON_ADAPTIVE_SEQUENCE, partition_by_progress
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_non_adaptive_take_is_two_easy_two_medium_one_hard():
+    assert NON_ADAPTIVE_SEQUENCE == ("easy", "easy", "medium", "medium", "hard")
+
+
+def test_partition_by_progress():
+    candidates = [SimpleNamespace(id=i) for i in range(1, 6)]
+    progress = {
+        2: SimpleNamespace(status="pending", is_solved=False),
+        3: SimpleNamespace(status="completed", is_solved=False),
+        4: SimpleNamespace(status="completed", is_solved=True),
+        5: SimpleNamespace(status="active", is_solved=False),
+    }
+    pending, unsolved, solved, other = partition_by_progress(candidates, progress)
+    assert [c.id for c in pending] == [1, 2]
+    assert [c.id for c in unsolved] == [3]
+    assert [c.id for c in solved] == [4]
+    assert [c.id for c in other] == [5]
+
+
+def test_simulator_imports_without_database_or_settings():
+    code = (
+        "import sys; sys.path.insert(0, 'scripts'); import simulate_policies; "
+        "print(sorted(m for m in sys.modules if m.split('.')[0] == 'sqlalchemy' or m == 'app.core.config'))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    assert out.strip() == "[]"
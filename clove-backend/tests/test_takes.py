@@ -0,0 +1,89 @@
+# tests/test_takes.py
+import pytest
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from app.crud import challenge_attempt as crud_attempt
+from app.crud import user_challenge as crud_user_challenge
+from app.db.models.challenge_attempts import ChallengeAttempt
+from app.db.models.challenges import Challenge
+from app.db.models.user_challenges import UserChallenge
+from app.db.models.user_subtopics import UserSubtopic
+
+pytestmark = pytest.mark.database
+
+
+async def _take(db, statuses):
+    """A user_subtopic with one attempt per status in its current take."""
+    user_subtopic = (await db.execute(
+        select(UserSubtopic)
+        .where(UserSubtopic.user_id.not_in(select(UserChallenge.user_id)))
+        .order_by(UserSubtopic.id)
+        .limit(1)
+    )).scalar_one()
+    challenges = (await db.execute(
+        select(Challenge).where(Challenge.subtopic_id == user_subtopic.subtopic_id).order_by(Challenge.id)
+    )).scalars().all()
+    for status, challenge in zip(statuses, challenges):
+        user_challenge = UserChallenge(
+            user_id=user_subtopic.user_id, challenge_id=challenge.id, status=status, is_solved=True
+        )
+        db.add(user_challenge)
+        await db.flush()
+        db.add(ChallengeAttempt(
+            user_challenge_id=user_challenge.id,
+            user_subtopic_id=user_subtopic.id,
+            take_number=user_subtopic.current_take,
+            is_successful=True
+        ))
+    await db.flush()
+    return user_subtopic
+
+
+async def _count(db, user_subtopic):
+    return await crud_attempt.get_attempt_count_by_user_and_subtopic(
+        db, user_subtopic.user_id, user_subtopic.subtopic_id
+    )
+
+
+async def test_full_take_is_closed_and_kept_as_history(db):
+    user_subtopic = await _take(db, ["completed"] * 5)
+    take = user_subtopic.current_take
+    assert await _count(db, user_subtopic) == 5
+
+    assert await crud_attempt.close_take_if_full(db, user_subtopic) is True
+    assert user_subtopic.current_take == take + 1
+    assert await _count(db, user_subtopic) == 0
+    assert await crud_attempt.get_last_attempts_for_user_subtopic(db, user_subtopic, 5) == []
+    history = (await db.execute(
+        select(func.count()).where(
+            ChallengeAttempt.user_subtopic_id == user_subtopic.id, ChallengeAttempt.take_number == take
+        )
+    )).scalar_one()
+    assert history == 5
+
+
+async def test_take_with_an_open_challenge_stays_open(db):
+    user_subtopic = await _take(db, ["completed"] * 4 + ["active"])
+    take = user_subtopic.current_take
+    assert await crud_attempt.close_take_if_full(db, user_subtopic) is False
+    assert user_subtopic.current_take == take
+
+
+async def test_abandoning_an_empty_take_keeps_its_number(db):
+    user_subtopic = await _take(db, ["completed"] * 2)
+    take = user_subtopic.current_take
+    assert await crud_attempt.abandon_current_take(db, user_subtopic.user_id, user_subtopic.subtopic_id) == 2
+    assert (await db.get(UserSubtopic, user_subtopic.id)).current_take == take + 1
+    assert await crud_attempt.abandon_current_take(db, user_subtopic.user_id, user_subtopic.subtopic_id) == 0
+    assert (await db.get(UserSubtopic, user_subtopic.id)).current_take == take + 1
+
+
+async def test_deleting_a_users_challenges_removes_their_attempts(db):
+    user_subtopic = await _take(db, ["completed"] * 3)
+
+    assert await crud_user_challenge.delete_all_for_user(db, user_id=user_subtopic.user_id) == 3
+    attempts = (await db.execute(
+        select(func.count()).where(ChallengeAttempt.user_subtopic_id == user_subtopic.id)
+    )).scalar_one()
+    assert attempts == 0
@@ -0,0 +1,111 @@
+# tests/test_upload_stream.py
+"""Chunked, resumable uploads of scripts/upload_backup_oauth.py (repository root) through LocalTarget."""
+import hashlib
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+
+import upload_backup_oauth  # noqa: E402
+from upload_backup_oauth import ChunkedSource, LocalTarget, upload_stream, verify_checksums  # noqa: E402
+
+CHUNK = 1024
+
+
+class TrickleReader(io.BytesIO):
+    """A pipe that returns fewer bytes than asked for, like pg_dump | zstd."""
+
+    def read(self, size=-1):
+        return super().read(min(size, 100))
+
+
+class InterruptedTarget(LocalTarget):
+    """Stores only part of one chunk, then drops the connection."""
+
+    def __init__(self, directory, fail_at, keep):
+        super().__init__(directory)
+        self.fail_at = fail_at
+        self.keep = keep
+        self.puts = []
+
+    def put(self, upload, data, start, total):
+        self.puts.append((start, len(data), total))
+        if start == self.fail_at and self.keep is not None:
+            super().put(upload, data[:self.keep], start, None)
+            self.keep = None
+            raise ConnectionError("connection reset")
+        return super().put(upload, data, start, total)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(upload_backup_oauth.time, 'sleep', lambda seconds: None)
+
+
+def payload(size):
+    return bytes(i * 7 % 251 for i in range(size))
+
+
+def chunk_sizes(source):
+    return [(len(chunk), is_last) for chunk, is_last in source.chunks()]
+
+
+def test_chunks_are_full_except_the_last():
+    source = ChunkedSource(TrickleReader(payload(2 * CHUNK + 300)), CHUNK)
+    assert chunk_sizes(source) == [(CHUNK, False), (CHUNK, False), (300, True)]
+    assert source.size == 2 * CHUNK + 300
+
+
+def test_stream_ending_on_a_chunk_boundary():
+    # The last full chunk is only known to be last once the next read is empty
+    source = ChunkedSource(io.BytesIO(payload(2 * CHUNK)), CHUNK)
+    assert chunk_sizes(source) == [(CHUNK, False), (CHUNK, True)]
+    assert chunk_sizes(ChunkedSource(io.BytesIO(b''), CHUNK)) == [(0, True)]
+
+
+def test_producer_is_checked_before_the_last_chunk():
+    seen = []
+    source = ChunkedSource(io.BytesIO(payload(CHUNK + 1)), CHUNK, before_last=lambda: seen.append('check'))
+    for chunk, is_last in source.chunks():
+        seen.append(is_last)
+    assert seen == [False, 'check', True]
+
+
+def test_upload_matches_the_streamed_checksums(tmp_path):
+    data = payload(3 * CHUNK + 17)
+    source = ChunkedSource(TrickleReader(data), CHUNK)
+    result = upload_stream(LocalTarget(str(tmp_path)), source, 'backup.dump.zst', 'application/zstd')
+
+    assert result['sha256Checksum'] == hashlib.sha256(data).hexdigest()
+    assert verify_checksums(source, result)
+    with open(tmp_path / 'backup.dump.zst', 'rb') as f:
+        assert f.read() == data
+    assert os.listdir(tmp_path / '.uploads') == []
+
+
+@pytest.mark.parametrize("fail_at, keep", [(CHUNK, 300), (2 * CHUNK, 0), (3 * CHUNK, 10)])
+def test_interrupted_chunk_resumes_from_the_acknowledged_offset(tmp_path, fail_at, keep):
+    data = payload(3 * CHUNK + 17)
+    target = InterruptedTarget(str(tmp_path), fail_at, keep)
+    source = ChunkedSource(io.BytesIO(data), CHUNK)
+    result = upload_stream(target, source, 'backup.dump.zst', 'application/zstd', retries=1)
+
+    # The retry sends only the part of the chunk the target did not store
+    resumed = [put for put in target.puts if put[0] == fail_at + keep]
+    assert resumed and resumed[-1][1] == min(CHUNK, len(data) - fail_at) - keep
+    assert verify_checksums(source, result)
+    with open(tmp_path / 'backup.dump.zst', 'rb') as f:
+        assert f.read() == data
+
+
+def test_chunk_that_keeps_failing_gives_up(tmp_path):
+    class DeadTarget(LocalTarget):
+        def put(self, upload, data, start, total):
+            raise ConnectionError("connection refused")
+
+    source = ChunkedSource(io.BytesIO(payload(CHUNK)), CHUNK)
+    with pytest.raises(upload_backup_oauth.UploadError, match="failed 3 times"):
+        upload_stream(DeadTarget(str(tmp_path)), source, 'backup.dump.zst', 'application/zstd', retries=2)
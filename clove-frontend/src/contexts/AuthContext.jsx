@@ -14,6 +14,21 @@ export function registerLogoutReset(fn) {
 
 const API_BASE = import.meta.env.VITE_API_BASE_URL || "";
 
+// Signed marker of the user's latest write. Sent back with every request so the
+// backend reads from the primary database until the replica has caught up
+const LAST_WRITE_HEADER = "X-Last-Write";
+
+function withLastWrite(headers) {
+  const lastWrite = localStorage.getItem("lastWrite");
+  return lastWrite ? { ...headers, [LAST_WRITE_HEADER]: lastWrite } : headers;
+}
+
+function rememberLastWrite(response) {
+  const lastWrite = response.headers.get(LAST_WRITE_HEADER);
+  if (lastWrite) localStorage.setItem("lastWrite", lastWrite);
+  return response;
+}
+
 export function AuthProvider({ children }) {
   // --- State for user and tokens ---
   const [user, setUser] = useState(null); // Current user info
@@ -59,6 +74,7 @@ export function AuthProvider({ children }) {
     setRefreshToken(null);
     localStorage.removeItem("token");
     localStorage.removeItem("refreshToken");
+    localStorage.removeItem("lastWrite");
     
     // Call all registered reset callbacks (e.g., MyDeckContext)
     resetCallbacks.forEach(fn => {
@@ -158,13 +174,13 @@ export function AuthProvider({ children }) {
     if (!token) throw new Error("No access token available");
     try {
       // Try with current token
-      const response = await fetch(url, {
+      const response = rememberLastWrite(await fetch(url, {
         ...options,
-        headers: {
+        headers: withLastWrite({
           ...options.headers,
           Authorization: `Bearer ${token}`,
-        },
-      });
+        }),
+      }));
       // If token expired, try to refresh and retry
       if (response.status === 401 && refreshToken) {
         if (!refreshPromiseRef.current) {
@@ -174,13 +190,13 @@ export function AuthProvider({ children }) {
           const newToken = await refreshPromiseRef.current;
           refreshPromiseRef.current = null;
           // Retry with new token
-          const retryResponse = await fetch(url, {
+          const retryResponse = rememberLastWrite(await fetch(url, {
             ...options,
-            headers: {
+            headers: withLastWrite({
               ...options.headers,
               Authorization: `Bearer ${newToken}`,
-            },
-          });
+            }),
+          }));
           return retryResponse;
         } catch (refreshError) {
           refreshPromiseRef.current = null;
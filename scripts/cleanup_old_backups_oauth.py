@@ -1,32 +1,77 @@
 #!/usr/bin/env python3
 """
 Cleanup script for old database backups in Google Drive.
-This script removes backup files older than the specified number of days.
+
+Retention is tiered (grandfather-father-son) and computed in one pass over
+the backups, newest first:
+
+- every backup of the last --keep-days days;
+- the newest full or base backup of each of the last --keep-weeks weeks;
+- the newest full or base backup of each of the last --keep-months months.
+
+Files are grouped into backup sets by the type and timestamp in their name,
+so a delta's manifest and table files are kept or deleted together. A kept
+delta also keeps the deltas before it and their base, so every kept
+incremental chain stays restorable.
+
+Backups inside the daily window are always kept, so only older files are
+listed: the query filters on createdTime server-side and is paged with
+pageToken. Deletions are sent as batch requests from a small thread pool,
+and deletes that are rate limited are retried with exponential backoff.
+
+    python cleanup_old_backups_oauth.py --folder-id ID --keep-days 7 --keep-weeks 8 --keep-months 6
+    # Offline: an in-memory Drive seeded with 3000 nights of incremental backups
+    python cleanup_old_backups_oauth.py --fake-drive 3000 --fake-latency-ms 50 --keep-days 7 --keep-weeks 8
 """
 
 import argparse
 import json
-import os
+import random
+import re
 import sys
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
+
+BACKUP_PREFIX = 'clove_db_backup'
+# Plain dumps were gzipped; streamed dumps are zstd-compressed pg_dump archives,
+# incremental backups zstd-compressed COPY streams listed in a JSON manifest
+BACKUP_SUFFIXES = ('.sql.gz', '.dump.zst', '.copy.zst', '.manifest.json')
+TIMESTAMP_PATTERN = re.compile(r'_(\d{8}_\d{6})[._]')
+# clove_db_backup_{type}_{timestamp}[.{table}].{suffix}
+NAME_PATTERN = re.compile(rf'^{BACKUP_PREFIX}_(?P<kind>.+?)_(?P<stamp>\d{{8}}_\d{{6}})[._]')
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+# Backup types that restore on their own, and so can represent a week or a month
+RESTORABLE_KINDS = ('full', 'base')
+# Drive allows 100 calls per batch request; smaller batches are rate limited less
+MAX_BATCH_SIZE = 100
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
 
 
-def load_oauth_credentials() -> Credentials:
+class BackupSet(NamedTuple):
+    time: datetime
+    kind: str
+    files: List[Dict[str, Any]]
+
+
+def load_oauth_credentials():
     """Load OAuth credentials from token.json file."""
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+
     try:
         with open('token.json', 'r') as f:
             token_data = json.load(f)
-        
+
         # Create credentials object with scopes (must match token.json scope)
         SCOPES = ['https://www.googleapis.com/auth/drive.file']
         creds = Credentials.from_authorized_user_info(token_data, SCOPES)
-        
+
         # Refresh token if needed
         if creds.expired and creds.refresh_token:
             print("🔄 Token expired, refreshing...")
@@ -35,7 +80,7 @@ def load_oauth_credentials() -> Credentials:
             with open('token.json', 'w') as f:
                 f.write(creds.to_json())
             print("✅ Token refreshed successfully!")
-            
+
         return creds
     except FileNotFoundError:
         print("❌ Error: token.json file not found. Make sure OAuth credentials are set up.")
@@ -45,36 +90,62 @@ def load_oauth_credentials() -> Credentials:
         sys.exit(1)
 
 
-def get_backup_files(service, folder_id: str) -> List[Dict[str, Any]]:
-    """Get all backup files from the specified Google Drive folder."""
+def http_status(error: Exception) -> Optional[int]:
+    return getattr(getattr(error, 'resp', None), 'status', None)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits (429, or 403 with a rate limit reason) and server errors."""
+    status = http_status(error)
+    if status in RETRYABLE_STATUS:
+        return True
+    if status == 403:
+        content = getattr(error, 'content', b'') or b''
+        if isinstance(content, bytes):
+            content = content.decode('utf-8', 'replace')
+        return any(reason in content for reason in RATE_LIMIT_REASONS)
+    return False
+
+
+def list_backup_files(service, folder_id: str, created_before: Optional[datetime] = None,
+                      page_size: int = 1000) -> List[Dict[str, Any]]:
+    """All backup files in the folder, optionally only those created before a time, page by page."""
+    query = f"'{folder_id}' in parents and name contains '{BACKUP_PREFIX}' and trashed = false"
+    if created_before:
+        query += f" and createdTime < '{created_before.strftime('%Y-%m-%dT%H:%M:%S')}'"
+
+    files = []
+    page_token = None
+    pages = 0
     try:
-        # Query for files in the folder that match backup naming pattern
-        query = f"'{folder_id}' in parents and name contains 'clove_db_backup' and name contains '.sql.gz'"
-        
-        results = service.files().list(
-            q=query,
-            fields="files(id, name, createdTime, size)",
-            orderBy="createdTime desc"
-        ).execute()
-        
-        files = results.get('files', [])
-        print(f"📁 Found {len(files)} backup files in Google Drive folder")
-        return files
-        
-    except HttpError as error:
+        while True:
+            response = service.files().list(
+                q=query,
+                pageSize=page_size,
+                pageToken=page_token,
+                fields="nextPageToken, files(id, name, createdTime, size)"
+            ).execute(num_retries=5)
+            pages += 1
+            files.extend(f for f in response.get('files', []) if f['name'].endswith(BACKUP_SUFFIXES))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+    except Exception as error:
         print(f"❌ Error accessing Google Drive: {error}")
         sys.exit(1)
 
+    print(f"📁 Found {len(files)} backup files in {pages} pages")
+    return files
+
 
 def parse_backup_filename(filename: str) -> datetime:
     """Parse backup filename to extract timestamp."""
     try:
-        # Expected format: clove_db_backup_{type}_{timestamp}.sql.gz
+        # Expected format: clove_db_backup_{type}_{timestamp}[.{table}].{suffix}
         # Extract timestamp part (format: YYYYMMDD_HHMMSS)
-        parts = filename.replace('.sql.gz', '').split('_')
-        if len(parts) >= 4:
-            timestamp_str = f"{parts[-2]}_{parts[-1]}"  # Last two parts should be date and time
-            return datetime.strptime(timestamp_str, '%Y%m%d_%H%M%S')
+        match = TIMESTAMP_PATTERN.search(filename)
+        if match:
+            return datetime.strptime(match.group(1), '%Y%m%d_%H%M%S')
         else:
             # Fallback to file creation time if filename parsing fails
             return None
@@ -83,100 +154,388 @@ def parse_backup_filename(filename: str) -> datetime:
         return None
 
 
-def cleanup_old_backups(service, folder_id: str, keep_days: int) -> None:
-    """Delete backup files older than the specified number of days."""
-    files = get_backup_files(service, folder_id)
-    
-    if not files:
-        print("📭 No backup files found to clean up")
-        return
-    
-    cutoff_date = datetime.now() - timedelta(days=keep_days)
-    files_to_delete = []
-    files_to_keep = []
-    
+def group_backup_sets(files: List[Dict[str, Any]]) -> List[BackupSet]:
+    """Group files by backup type and timestamp, newest set first."""
+    sets: Dict[Tuple[str, datetime], BackupSet] = {}
     for file in files:
-        filename = file['name']
-        created_time = datetime.fromisoformat(file['createdTime'].replace('Z', '+00:00'))
-        
-        # Try to parse timestamp from filename first
-        backup_time = parse_backup_filename(filename)
+        match = NAME_PATTERN.match(file['name'])
+        backup_time = parse_backup_filename(file['name'])
         if backup_time:
-            file_time = backup_time
+            kind = match.group('kind') if match else 'unknown'
         else:
-            # Fallback to file creation time
-            file_time = created_time.replace(tzinfo=None)
-        
-        if file_time < cutoff_date:
-            files_to_delete.append(file)
+            # Fallback to file creation time; such a file is a set on its own
+            created_time = datetime.fromisoformat(file['createdTime'].replace('Z', '+00:00'))
+            backup_time = created_time.astimezone(timezone.utc).replace(tzinfo=None)
+            kind = f"unknown:{file['id']}"
+        sets.setdefault((kind, backup_time), BackupSet(backup_time, kind, [])).files.append(file)
+    return sorted(sets.values(), key=lambda s: s.time, reverse=True)
+
+
+def plan_retention(backup_sets: List[BackupSet], now: datetime, keep_days: int, keep_weeks: int = 0,
+                   keep_months: int = 0, chain_open: bool = True):
+    """
+    Split backup sets (newest first) into kept (set, reasons) pairs and deleted sets.
+    chain_open means newer, unlisted backups may be deltas of the first listed chain.
+    """
+    daily_cutoff = now - timedelta(days=keep_days)
+    weeks, months = set(), set()
+    keep, delete = [], []
+
+    for backup in backup_sets:
+        reasons = []
+        if backup.time >= daily_cutoff:
+            reasons.append('daily')
+        if backup.kind in RESTORABLE_KINDS:
+            week = (now - backup.time).days // 7
+            if week < keep_weeks and week not in weeks:
+                weeks.add(week)
+                reasons.append('weekly')
+            month = (now.year - backup.time.year) * 12 + now.month - backup.time.month
+            if month < keep_months and month not in months:
+                months.add(month)
+                reasons.append('monthly')
+        if chain_open and backup.kind in ('delta', 'base'):
+            reasons.append('chain')
+
+        # Walking back in time, a kept delta needs every older delta up to its base
+        if backup.kind == 'delta':
+            chain_open = chain_open or bool(reasons)
+        elif backup.kind == 'base':
+            chain_open = False
+
+        if reasons:
+            keep.append((backup, reasons))
         else:
-            files_to_keep.append(file)
-    
-    print(f"🗑️  Files to delete: {len(files_to_delete)}")
-    print(f"💾 Files to keep: {len(files_to_keep)}")
-    
+            delete.append(backup)
+    return keep, delete
+
+
+def delete_files(service_factory, files: List[Dict[str, Any]], batch_size: int = 50, workers: int = 4,
+                 retries: int = 5):
+    """
+    Delete files in batch requests from a thread pool. Returns (deleted, failed),
+    failed as (file, error) pairs. Files already gone count as deleted.
+    """
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    by_id = {file['id']: file for file in files}
+    local = threading.local()
+
+    def run_batch(batch_files):
+        # Drive service objects are not thread-safe, so each worker builds its own
+        if not hasattr(local, 'service'):
+            local.service = service_factory()
+        service = local.service
+        done, retry, failed = [], [], []
+
+        def callback(request_id, response, exception):
+            file = by_id[request_id]
+            if exception is None or http_status(exception) == 404:
+                done.append(file)
+            elif is_retryable(exception):
+                retry.append(file)
+            else:
+                failed.append((file, exception))
+
+        batch = service.new_batch_http_request(callback=callback)
+        for file in batch_files:
+            batch.add(service.files().delete(fileId=file['id']), request_id=file['id'])
+        try:
+            batch.execute()
+        except Exception as error:
+            # The batch request itself failed; whatever got no callback shares its fate
+            reported = {f['id'] for f in done + retry} | {f['id'] for f, _ in failed}
+            missing = [f for f in batch_files if f['id'] not in reported]
+            if is_retryable(error):
+                retry.extend(missing)
+            else:
+                failed.extend((f, error) for f in missing)
+        return done, retry, failed
+
+    deleted, failed = [], []
+    pending = list(files)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for attempt in range(retries + 1):
+            batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+            pending = []
+            for done, retry, errors in pool.map(run_batch, batches):
+                deleted.extend(done)
+                pending.extend(retry)
+                failed.extend(errors)
+            if not pending or attempt == retries:
+                break
+            delay = min(2 ** attempt, 32) + random.random()
+            print(f"⏳ {len(pending)} deletes rate limited, retrying in {delay:.1f}s...")
+            time.sleep(delay)
+    failed.extend((file, 'still rate limited after retries') for file in pending)
+    return deleted, failed
+
+
+def cleanup_old_backups(service, folder_id: str, keep_days: int, keep_weeks: int = 0, keep_months: int = 0,
+                        dry_run: bool = False, service_factory=None, batch_size: int = 50, workers: int = 4,
+                        retries: int = 5, page_size: int = 1000) -> bool:
+    """Delete the backups outside the retention tiers; returns False if any delete failed."""
+    now = datetime.utcnow()
+    daily_cutoff = now - timedelta(days=keep_days)
+    files = list_backup_files(service, folder_id, created_before=daily_cutoff, page_size=page_size)
+
+    if not files:
+        print("📭 No backup files found to clean up")
+        return True
+
+    keep, delete = plan_retention(group_backup_sets(files), now, keep_days, keep_weeks, keep_months)
+    files_to_delete = [file for backup in delete for file in backup.files]
+    tiers = Counter(reason for _, reasons in keep for reason in reasons)
+
+    print(f"🗑️  Files to delete: {len(files_to_delete)} in {len(delete)} backups")
+    print(f"💾 Older files to keep: {sum(len(b.files) for b, _ in keep)} in {len(keep)} backups "
+          f"({', '.join(f'{tier}: {n}' for tier, n in sorted(tiers.items())) or 'none'})")
+
     if not files_to_delete:
         print("✅ No old files to clean up")
-        return
-    
-    # Show files that will be deleted
-    print("\n📋 Files to be deleted:")
-    for file in files_to_delete:
-        size_mb = int(file.get('size', 0)) / (1024 * 1024)
-        print(f"  - {file['name']} ({size_mb:.1f} MB)")
-    
-    # Delete old files
-    deleted_count = 0
-    total_size_freed = 0
-    
-    for file in files_to_delete:
-        try:
-            file_id = file['id']
-            file_size = int(file.get('size', 0))
-            
-            service.files().delete(fileId=file_id).execute()
-            deleted_count += 1
-            total_size_freed += file_size
-            
-            print(f"🗑️  Deleted: {file['name']}")
-            
-        except HttpError as error:
-            print(f"❌ Error deleting {file['name']}: {error}")
-        except Exception as e:
-            print(f"❌ Unexpected error deleting {file['name']}: {e}")
-    
+        return True
+
+    # Show backups that will be deleted
+    print("\n📋 Backups to be deleted:")
+    for backup in delete[:20]:
+        size_mb = sum(int(f.get('size', 0)) for f in backup.files) / (1024 * 1024)
+        print(f"  - {backup.kind} {backup.time:%Y-%m-%d %H:%M:%S} ({len(backup.files)} files, {size_mb:.1f} MB)")
+    if len(delete) > 20:
+        print(f"  ... and {len(delete) - 20} more")
+
+    if dry_run:
+        print("\n🔍 Dry run, nothing deleted")
+        return True
+
+    started = time.perf_counter()
+    deleted, failed = delete_files(
+        service_factory or (lambda: service),
+        files_to_delete,
+        batch_size=batch_size,
+        workers=workers,
+        retries=retries
+    )
+    for file, error in failed[:20]:
+        print(f"❌ Error deleting {file['name']}: {error}")
+
     # Summary
-    total_size_mb = total_size_freed / (1024 * 1024)
-    print(f"\n✅ Cleanup completed!")
-    print(f"📊 Deleted {deleted_count} files")
+    total_size_mb = sum(int(f.get('size', 0)) for f in deleted) / (1024 * 1024)
+    print(f"\n✅ Cleanup completed in {time.perf_counter() - started:.1f}s!")
+    print(f"📊 Deleted {len(deleted)} files" + (f", {len(failed)} failed" if failed else ""))
     print(f"💾 Freed up {total_size_mb:.1f} MB of space")
-    print(f"📅 Kept files newer than {cutoff_date.strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"📅 Kept everything newer than {daily_cutoff.strftime('%Y-%m-%d %H:%M:%S')} UTC")
+    return not failed
+
+
+class FakeHttpError(Exception):
+    """Stands in for googleapiclient's HttpError, with the same .resp.status and .content."""
+
+    def __init__(self, status: int, reason: str):
+        super().__init__(f'<HttpError {status} "{reason}">')
+        self.resp = SimpleNamespace(status=status)
+        self.content = json.dumps({'error': {'code': status, 'errors': [{'reason': reason}]}}).encode()
+
+
+class FakeRequest:
+    def __init__(self, drive, call):
+        self.drive = drive
+        self.call = call
+
+    def execute(self, num_retries: int = 0):
+        self.drive.round_trip()
+        return self.call()
+
+
+class FakeBatch:
+    def __init__(self, drive, callback):
+        self.drive = drive
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        if len(self.requests) >= MAX_BATCH_SIZE:
+            raise ValueError(f"A batch holds at most {MAX_BATCH_SIZE} requests")
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        # One HTTP round trip for the whole batch; each part succeeds or fails on its own
+        self.drive.round_trip()
+        for request_id, request in self.requests:
+            try:
+                response, exception = request.call(), None
+            except FakeHttpError as error:
+                response, exception = None, error
+            self.callback(request_id, response, exception)
+
+
+class FakeFiles:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def list(self, q: str, pageSize: int = 100, pageToken: Optional[str] = None, fields=None, orderBy=None):
+        return FakeRequest(self.drive, lambda: self.drive.list_files(q, pageSize, pageToken))
+
+    def delete(self, fileId: str):
+        return FakeRequest(self.drive, lambda: self.drive.delete_file(fileId))
+
+
+class FakeDriveService:
+    """
+    In-memory stand-in for the Drive v3 service: files().list with the query terms
+    this script uses and pageToken paging, files().delete, and batch requests.
+    Every HTTP round trip sleeps `latency` seconds, and with rate_limit_every = n
+    every n-th delete fails with a 403 userRateLimitExceeded.
+    """
+    QUERY_TERMS = (
+        (re.compile(r"^'(.+)' in parents$"), lambda value, f: f['parent'] == value),
+        (re.compile(r"^name contains '(.+)'$"), lambda value, f: value in f['name']),
+        (re.compile(r"^createdTime < '(.+)'$"), lambda value, f: f['createdTime'] < value),
+        (re.compile(r"^trashed = (false)$"), lambda value, f: True),
+    )
+
+    def __init__(self, latency: float = 0.0, rate_limit_every: int = 0):
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.stored: Dict[str, Dict[str, Any]] = {}
+        self.round_trips = 0
+        self.delete_calls = 0
+        self.created = 0
+        self.lock = threading.Lock()
+
+    def files(self):
+        return FakeFiles(self)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
+
+    def round_trip(self):
+        with self.lock:
+            self.round_trips += 1
+        time.sleep(self.latency)
+
+    def add_file(self, parent: str, name: str, created: datetime, size: int = 0):
+        with self.lock:
+            self.created += 1
+            file_id = f"fake{self.created:08d}"
+            self.stored[file_id] = {
+                'id': file_id,
+                'name': name,
+                'parent': parent,
+                'createdTime': created.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+                'size': str(size),
+            }
+
+    def list_files(self, query: str, page_size: int, page_token: Optional[str]):
+        filters = []
+        for term in query.split(' and '):
+            for pattern, test in self.QUERY_TERMS:
+                match = pattern.match(term.strip())
+                if match:
+                    filters.append((test, match.group(1)))
+                    break
+            else:
+                raise FakeHttpError(400, f'invalidQuery: {term}')
+        with self.lock:
+            matches = [f for _, f in sorted(self.stored.items()) if all(test(v, f) for test, v in filters)]
+        offset = int(page_token or 0)
+        page_size = min(page_size, 1000)
+        response = {'files': [{k: v for k, v in f.items() if k != 'parent'} for f in matches[offset:offset + page_size]]}
+        if offset + page_size < len(matches):
+            response['nextPageToken'] = str(offset + page_size)
+        return response
+
+    def delete_file(self, file_id: str):
+        with self.lock:
+            self.delete_calls += 1
+            if self.rate_limit_every and self.delete_calls % self.rate_limit_every == 0:
+                raise FakeHttpError(403, 'userRateLimitExceeded')
+            if self.stored.pop(file_id, None) is None:
+                raise FakeHttpError(404, 'notFound')
+        return ''
+
+
+def seed_fake_drive(drive: FakeDriveService, folder_id: str, nights: int, base_every_days: int = 7) -> None:
+    """Nightly incremental backups for the last `nights` nights, like the workflow writes."""
+    today = datetime.utcnow().replace(hour=2, minute=0, second=0, microsecond=0)
+    for night in range(nights, 0, -1):
+        created = today - timedelta(days=night)
+        stamp = created.strftime('%Y%m%d_%H%M%S')
+        if night % base_every_days == 0 or night == nights:
+            names = [f"{BACKUP_PREFIX}_base_{stamp}.dump.zst"]
+            kind = 'base'
+        else:
+            names = [f"{BACKUP_PREFIX}_delta_{stamp}.{table}.copy.zst"
+                     for table in ('users', 'user_subtopics', 'user_challenges', 'challenge_attempts', 'deletions')]
+            kind = 'delta'
+        names.append(f"{BACKUP_PREFIX}_{kind}_{stamp}.manifest.json")
+        for name in names:
+            drive.add_file(folder_id, name, created + timedelta(minutes=5), size=64 * 1024 * 1024 if kind == 'base' else 256 * 1024)
 
 
 def main():
     parser = argparse.ArgumentParser(description='Clean up old database backups from Google Drive')
-    parser.add_argument('--folder-id', required=True, help='Google Drive folder ID containing backups')
-    parser.add_argument('--keep-days', type=int, default=30, help='Number of days to keep backups (default: 30)')
-    
+    parser.add_argument('--folder-id', help='Google Drive folder ID containing backups')
+    parser.add_argument('--keep-days', type=int, default=30, help='Keep every backup of this many days (default: 30)')
+    parser.add_argument('--keep-weeks', type=int, default=0, help='Keep one full/base backup per week for this many weeks')
+    parser.add_argument('--keep-months', type=int, default=0, help='Keep one full/base backup per month for this many months')
+    parser.add_argument('--dry-run', action='store_true', help='Show what would be deleted without deleting')
+    parser.add_argument('--batch-size', type=int, default=50, help=f'Deletes per batch request (max {MAX_BATCH_SIZE})')
+    parser.add_argument('--workers', type=int, default=4, help='Batch requests in flight at once')
+    parser.add_argument('--retries', type=int, default=5, help='Retries of rate-limited deletes')
+    parser.add_argument('--page-size', type=int, default=1000, help='Files per listing page (max 1000)')
+    parser.add_argument('--fake-drive', type=int, metavar='NIGHTS',
+                        help='Run against an in-memory Drive seeded with NIGHTS nightly incremental backups')
+    parser.add_argument('--fake-latency-ms', type=float, default=0, help='Round-trip latency of the fake Drive')
+    parser.add_argument('--fake-rate-limit-every', type=int, default=0, help='Fail every n-th fake delete with a rate limit')
+
     args = parser.parse_args()
-    
+    if not args.folder_id and not args.fake_drive:
+        parser.error('--folder-id is required')
+
     print("🧹 Starting Google Drive backup cleanup...")
-    print(f"📁 Folder ID: {args.folder_id}")
-    print(f"📅 Keeping files newer than {args.keep_days} days")
-    
-    # Load OAuth credentials
-    creds = load_oauth_credentials()
-    
-    # Build Google Drive service
-    try:
-        service = build('drive', 'v3', credentials=creds)
-        print("✅ Connected to Google Drive API")
-    except Exception as e:
-        print(f"❌ Error connecting to Google Drive API: {e}")
-        sys.exit(1)
-    
+    print(f"📅 Keeping every backup of {args.keep_days} days, "
+          f"{args.keep_weeks} weekly and {args.keep_months} monthly backups")
+
+    if args.fake_drive:
+        folder_id = args.folder_id or 'fake-folder'
+        service = FakeDriveService(args.fake_latency_ms / 1000, args.fake_rate_limit_every)
+        seed_fake_drive(service, folder_id, args.fake_drive)
+        service_factory = lambda: service
+        print(f"🧪 Fake Drive with {len(service.stored)} files in {args.fake_drive} nightly backups")
+    else:
+        folder_id = args.folder_id
+        print(f"📁 Folder ID: {folder_id}")
+        # Load OAuth credentials
+        creds = load_oauth_credentials()
+
+        # Build Google Drive service
+        try:
+            from googleapiclient.discovery import build
+
+            service = build('drive', 'v3', credentials=creds)
+            service_factory = lambda: build('drive', 'v3', credentials=creds, cache_discovery=False)
+            print("✅ Connected to Google Drive API")
+        except Exception as e:
+            print(f"❌ Error connecting to Google Drive API: {e}")
+            sys.exit(1)
+
     # Perform cleanup
-    cleanup_old_backups(service, args.folder_id, args.keep_days)
+    ok = cleanup_old_backups(
+        service,
+        folder_id,
+        args.keep_days,
+        keep_weeks=args.keep_weeks,
+        keep_months=args.keep_months,
+        dry_run=args.dry_run,
+        service_factory=service_factory,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        retries=args.retries,
+        page_size=args.page_size
+    )
+    if args.fake_drive:
+        print(f"🧪 {service.round_trips} round trips, {len(service.stored)} files left")
+    if not ok:
+        sys.exit(1)
 
 
 if __name__ == '__main__':
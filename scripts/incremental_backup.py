@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Incremental database backups keyed on table change watermarks
+
+A base backup is a full streamed pg_dump (see upload_backup_oauth.py). An
+incremental (delta) backup exports only the rows of the user-data tables
+whose watermark column (updated_at, or statistics.last_updated) is at or
+after the previous run's watermark. It also exports the tombstones the
+delete triggers wrote to backup_deletions in that window. Every table
+becomes one zstd-compressed COPY stream, uploaded without touching the
+disk. A JSON manifest lists the files, their columns, primary keys, row
+counts and checksums, and links to its parent and base manifests.
+
+The static content (challenges, lessons, assessment questions, topics) only
+changes with deployments and is only in the base. Each run is recorded in
+backup_runs, whose watermark is the start of the next window. Windows
+overlap by --overlap-minutes, so rows committed by transactions that were
+still running at the previous snapshot are not missed. Replaying a row
+twice is harmless, because restore_backup.py upserts.
+
+    python incremental_backup.py --mode auto --folder-id ID       # base weekly, delta otherwise
+    python incremental_backup.py --mode delta --local-target ./backups
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import psycopg2
+
+from upload_backup_oauth import (
+    CHUNK_ALIGNMENT, DEFAULT_CHUNK_SIZE_MB, ChunkedSource, DriveTarget, DumpPipeline,
+    LocalTarget, UploadError, get_credentials, upload_stream, verify_checksums
+)
+
+BACKUP_PREFIX = 'clove_db_backup'
+MANIFEST_FORMAT = 1
+
+# Tables exported by delta backups, in foreign key order, with their watermark column
+TRACKED_TABLES = [
+    ('users', 'updated_at'),
+    ('statistics', 'last_updated'),
+    ('user_topics', 'updated_at'),
+    ('pre_assessments', 'updated_at'),
+    ('post_assessments', 'updated_at'),
+    ('retention_tests', 'updated_at'),
+    ('user_subtopics', 'updated_at'),
+    ('q_values', 'updated_at'),
+    ('user_challenges', 'updated_at'),
+    ('challenge_attempts', 'updated_at'),
+]
+
+
+def iso(value):
+    return value.isoformat() if value else None
+
+
+def table_columns(cursor, table):
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = %s ORDER BY ordinal_position",
+        (table,)
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def primary_key(cursor, table):
+    cursor.execute(
+        "SELECT a.attname FROM pg_index i "
+        "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) "
+        "WHERE i.indrelid = %s::regclass AND i.indisprimary "
+        "ORDER BY array_position(i.indkey, a.attnum)",
+        (table,)
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def upload_bytes(target, data, filename, mimetype, args):
+    source = ChunkedSource(io.BytesIO(data), args.chunk_size)
+    result = upload_stream(target, source, filename, mimetype, retries=args.retries)
+    if not verify_checksums(source, result):
+        raise UploadError(f"Checksum mismatch for {filename}")
+    return source
+
+
+def export_copy(cursor, query, params, target, filename, args):
+    """
+    COPY (query) TO STDOUT | zstd, uploaded while the COPY runs.
+    Returns (rows, bytes, sha256) of the compressed stream.
+    """
+    compressor = subprocess.Popen(
+        ['zstd', '-q', '-c', f'-{args.zstd_level}', f'-T{args.zstd_threads}'],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE
+    )
+
+    def check():
+        returncode = compressor.wait()
+        if returncode != 0:
+            raise UploadError(f"COPY for {filename} did not finish (zstd status {returncode}); file not finalized")
+
+    source = ChunkedSource(compressor.stdout, args.chunk_size, before_last=check)
+    outcome = {}
+
+    def upload():
+        try:
+            outcome['result'] = upload_stream(target, source, filename, 'application/zstd', retries=args.retries)
+        except Exception as e:
+            outcome['error'] = e
+            # Nobody reads zstd's output anymore: once the pipe is full, zstd
+            # and the COPY writing into it would block for good
+            compressor.kill()
+
+    uploader = threading.Thread(target=upload)
+    uploader.start()
+    copy_error = None
+    try:
+        cursor.copy_expert(cursor.mogrify(f"COPY ({query}) TO STDOUT", params).decode(), compressor.stdin)
+        compressor.stdin.close()
+    except Exception as e:
+        # Never let a partial COPY become a finished file. If the upload
+        # failed first, the COPY only broke because zstd was killed.
+        if 'error' not in outcome:
+            copy_error = e
+        compressor.kill()
+    uploader.join()
+    if copy_error is not None:
+        raise copy_error
+    if 'error' in outcome:
+        raise outcome['error']
+    if not verify_checksums(source, outcome['result']):
+        raise UploadError(f"Checksum mismatch for {filename}")
+    return (cursor.rowcount if cursor.rowcount >= 0 else None), source.size, source.sha256.hexdigest()
+
+
+def latest_runs(conn):
+    """(latest base run, latest run) as (id, kind, watermark, created_at, manifest) tuples."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT id, kind, watermark, created_at, manifest FROM backup_runs "
+            "WHERE kind = 'base' ORDER BY id DESC LIMIT 1"
+        )
+        base = cursor.fetchone()
+        cursor.execute("SELECT id, kind, watermark, created_at, manifest FROM backup_runs ORDER BY id DESC LIMIT 1")
+        latest = cursor.fetchone()
+    conn.rollback()
+    return base, latest
+
+
+def record_run(conn, kind, base_run_id, since, watermark, manifest):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO backup_runs (kind, base_run_id, since, watermark, manifest) "
+            "VALUES (%s, %s, %s, %s, %s) RETURNING id",
+            (kind, base_run_id, since, watermark, json.dumps(manifest))
+        )
+        run_id = cursor.fetchone()[0]
+    conn.commit()
+    return run_id
+
+
+def run_base(conn, target, args, stamp):
+    with conn.cursor() as cursor:
+        # Changes after this point are picked up by the next delta
+        cursor.execute("SELECT now()")
+        watermark = cursor.fetchone()[0]
+    conn.commit()
+
+    filename = f"{BACKUP_PREFIX}_base_{stamp}.dump.zst"
+    pipeline = DumpPipeline(argparse.Namespace(**{**vars(args), 'backup_type': 'full'}))
+    try:
+        source = ChunkedSource(pipeline.stdout, args.chunk_size, before_last=pipeline.check)
+        result = upload_stream(target, source, filename, 'application/zstd', retries=args.retries)
+        if not verify_checksums(source, result):
+            raise UploadError(f"Checksum mismatch for {filename}")
+    finally:
+        pipeline.close()
+
+    manifest = {
+        'format': MANIFEST_FORMAT,
+        'kind': 'base',
+        'name': f"{BACKUP_PREFIX}_base_{stamp}.manifest.json",
+        'created_at': iso(datetime.utcnow()),
+        'since': None,
+        'watermark': iso(watermark),
+        'base': None,
+        'parent': None,
+        'dump': {
+            'file': filename,
+            'format': 'pg_dump-directory-tar' if args.jobs > 1 else 'pg_dump-custom',
+            'bytes': source.size,
+            'sha256': source.sha256.hexdigest(),
+        },
+    }
+    upload_bytes(target, json.dumps(manifest, indent=2).encode(), manifest['name'], 'application/json', args)
+    record_run(conn, 'base', None, None, watermark, manifest)
+
+    # Tombstones older than the base are in no window anymore
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM backup_deletions WHERE deleted_at < %s",
+            (watermark - timedelta(minutes=args.overlap_minutes),)
+        )
+        pruned = cursor.rowcount
+    conn.commit()
+    print(f"✅ Base backup {filename} ({source.size:,} bytes); pruned {pruned} old tombstones")
+    return manifest
+
+
+def run_delta(conn, target, args, stamp, base, previous):
+    since = previous[2] - timedelta(minutes=args.overlap_minutes)
+    files = []
+    # One snapshot for every table, so the delta is consistent
+    conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT now()")
+            watermark = cursor.fetchone()[0]
+            for table, column in TRACKED_TABLES:
+                cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table} WHERE {column} >= %s)", (since,))
+                if not cursor.fetchone()[0]:
+                    continue
+                columns = table_columns(cursor, table)
+                filename = f"{BACKUP_PREFIX}_delta_{stamp}.{table}.copy.zst"
+                rows, size, sha256 = export_copy(
+                    cursor,
+                    f"SELECT {', '.join(columns)} FROM {table} WHERE {column} >= %s",
+                    (since,), target, filename, args
+                )
+                files.append({
+                    'table': table,
+                    'file': filename,
+                    'columns': columns,
+                    'key': primary_key(cursor, table),
+                    'rows': rows,
+                    'bytes': size,
+                    'sha256': sha256,
+                })
+                print(f"📦 {table}: {rows if rows is not None else '?'} changed rows")
+
+            deletions = None
+            cursor.execute("SELECT count(*) FROM backup_deletions WHERE deleted_at >= %s", (since,))
+            if cursor.fetchone()[0]:
+                filename = f"{BACKUP_PREFIX}_delta_{stamp}.deletions.copy.zst"
+                rows, size, sha256 = export_copy(
+                    cursor,
+                    "SELECT table_name, row_id FROM backup_deletions WHERE deleted_at >= %s",
+                    (since,), target, filename, args
+                )
+                deletions = {
+                    'file': filename,
+                    'columns': ['table_name', 'row_id'],
+                    'rows': rows,
+                    'bytes': size,
+                    'sha256': sha256,
+                }
+                print(f"🗑️  {rows if rows is not None else '?'} deleted rows")
+        conn.commit()
+    finally:
+        conn.rollback()
+        conn.set_session(isolation_level='READ COMMITTED', readonly=False)
+
+    manifest = {
+        'format': MANIFEST_FORMAT,
+        'kind': 'delta',
+        'name': f"{BACKUP_PREFIX}_delta_{stamp}.manifest.json",
+        'created_at': iso(datetime.utcnow()),
+        'since': iso(since),
+        'watermark': iso(watermark),
+        'base': base[4]['name'],
+        'parent': previous[4]['name'],
+        'tables': [table for table, _ in TRACKED_TABLES],
+        'files': files,
+        'deletions': deletions,
+    }
+    upload_bytes(target, json.dumps(manifest, indent=2).encode(), manifest['name'], 'application/json', args)
+    record_run(conn, 'delta', base[0], since, watermark, manifest)
+    print(f"✅ Delta backup of {len(files)} tables since {iso(since)}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Base and incremental database backups')
+    parser.add_argument('--mode', choices=['auto', 'base', 'delta'], default='auto')
+    parser.add_argument('--base-every-days', type=int, default=7, help='auto: take a base when the last is older')
+    parser.add_argument('--overlap-minutes', type=int, default=30, help='Overlap between consecutive delta windows')
+    parser.add_argument('--folder-id', help='Google Drive folder ID')
+    parser.add_argument('--local-target', help='Store the backup in this directory instead of Google Drive')
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL'), help='Defaults to $DATABASE_URL')
+    parser.add_argument('--jobs', type=int, default=1, help='Parallel pg_dump jobs for a base')
+    parser.add_argument('--zstd-level', type=int, default=6)
+    parser.add_argument('--zstd-threads', type=int, default=0, help='0 = one per core')
+    parser.add_argument('--chunk-size-mb', type=int, default=DEFAULT_CHUNK_SIZE_MB, help='Upload chunk size')
+    parser.add_argument('--retries', type=int, default=5, help='Retries per chunk')
+    parser.add_argument('--pg-dump', default='pg_dump', help='pg_dump executable')
+    args = parser.parse_args()
+    args.chunk_size = max(CHUNK_ALIGNMENT, args.chunk_size_mb * 1024 * 1024 // CHUNK_ALIGNMENT * CHUNK_ALIGNMENT)
+    if not args.database_url:
+        parser.error('--database-url or $DATABASE_URL is required')
+
+    if args.local_target:
+        target = LocalTarget(args.local_target)
+    else:
+        if not args.folder_id:
+            parser.error('--folder-id is required unless --local-target is given')
+        creds = get_credentials()
+        if not creds:
+            sys.exit(1)
+        target = DriveTarget(creds, args.folder_id)
+
+    conn = psycopg2.connect(args.database_url)
+    try:
+        base, latest = latest_runs(conn)
+        mode = args.mode
+        if mode == 'auto':
+            due = base is None or datetime.now(base[3].tzinfo) - base[3] >= timedelta(days=args.base_every_days)
+            mode = 'base' if due else 'delta'
+        if mode == 'delta' and base is None:
+            print("⚠️  No base backup yet; taking a base backup instead")
+            mode = 'base'
+
+        stamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+        print(f"🚀 {mode} backup to {target.describe()}")
+        if mode == 'base':
+            run_base(conn, target, args, stamp)
+        else:
+            run_delta(conn, target, args, stamp, base, latest)
+    except (UploadError, subprocess.CalledProcessError, psycopg2.Error) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Restore a base backup and replay its incremental backups
+
+Reads the manifests written by incremental_backup.py from a directory
+holding the downloaded backup files. It follows the chain from the chosen
+manifest back to its base and verifies every file's SHA-256. Then it
+restores the base with pg_restore and replays each delta in order, in one
+transaction per delta:
+
+- rows recorded in the deletion tombstones are deleted, children first;
+- changed rows are upserted on their primary key.
+
+Deletes go first: a row deleted and recreated in the same window (e.g. a
+Q-table or a user_challenge, unique per user_subtopic or per user and
+challenge) would otherwise make the upsert of its new ID collide with the
+old row. The export never holds a deleted ID, so no upsert is undone.
+
+Triggers are told (clove.backup_restore = 'on') to keep the restored
+watermarks, and the ID sequences are moved past the restored rows at the end.
+
+    python restore_backup.py --dir ./backups --database-url postgresql://...
+    python restore_backup.py --dir ./backups --manifest clove_db_backup_delta_20250107_020000.manifest.json --verify-only
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+
+def load_manifest(directory, name):
+    with open(os.path.join(directory, name)) as f:
+        return json.load(f)
+
+
+def manifest_chain(directory, name):
+    """Manifests from the base to the named one, oldest first."""
+    chain = [load_manifest(directory, name)]
+    while chain[-1]['kind'] != 'base':
+        parent = chain[-1].get('parent')
+        if not parent:
+            raise ValueError(f"{chain[-1]['name']} has no parent manifest")
+        chain.append(load_manifest(directory, parent))
+    chain.reverse()
+    return chain
+
+
+def chain_files(chain):
+    for manifest in chain:
+        if manifest['kind'] == 'base':
+            yield manifest['dump']
+        else:
+            yield from manifest['files']
+            if manifest.get('deletions'):
+                yield manifest['deletions']
+
+
+def verify(directory, chain):
+    ok = True
+    for entry in chain_files(chain):
+        path = os.path.join(directory, entry['file'])
+        if not os.path.exists(path):
+            print(f"❌ Missing {entry['file']}")
+            ok = False
+            continue
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(block)
+        if sha256.hexdigest() != entry['sha256']:
+            print(f"❌ Checksum mismatch for {entry['file']}")
+            ok = False
+    return ok
+
+
+def decompress(path):
+    return subprocess.Popen(['zstd', '-q', '-dc', path], stdout=subprocess.PIPE)
+
+
+def restore_base(directory, manifest, database_url, jobs):
+    dump = manifest['dump']
+    path = os.path.join(directory, dump['file'])
+    restore = ['pg_restore', '--clean', '--if-exists', '--no-owner', '--no-privileges', '-d', database_url]
+    print(f"🗄️  Restoring base {dump['file']}...")
+    if dump['format'] == 'pg_dump-directory-tar':
+        staging = tempfile.mkdtemp(prefix='clove_restore_')
+        try:
+            reader = decompress(path)
+            subprocess.run(['tar', '-x', '-C', staging], stdin=reader.stdout, check=True)
+            if reader.wait() != 0:
+                raise subprocess.CalledProcessError(reader.returncode, reader.args)
+            subprocess.run(restore + [f'--jobs={jobs}', staging], check=True)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    else:
+        reader = decompress(path)
+        subprocess.run(restore, stdin=reader.stdout, check=True)
+        if reader.wait() != 0:
+            raise subprocess.CalledProcessError(reader.returncode, reader.args)
+
+
+def copy_into(cursor, directory, entry, table):
+    reader = decompress(os.path.join(directory, entry['file']))
+    cursor.copy_expert(f"COPY {table} ({', '.join(entry['columns'])}) FROM STDIN", reader.stdout)
+    if reader.wait() != 0:
+        raise subprocess.CalledProcessError(reader.returncode, reader.args)
+
+
+def apply_delta(conn, directory, manifest):
+    with conn.cursor() as cursor:
+        cursor.execute("SET LOCAL clove.backup_restore = 'on'")
+        delete_tombstones(cursor, directory, manifest)
+        for entry in manifest['files']:
+            table, columns, key = entry['table'], entry['columns'], entry['key']
+            staging = f"_restore_{table}"
+            cursor.execute(f"CREATE TEMP TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+            copy_into(cursor, directory, entry, staging)
+            updates = ', '.join(f"{c} = EXCLUDED.{c}" for c in columns if c not in key)
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) SELECT {', '.join(columns)} FROM {staging} "
+                f"ON CONFLICT ({', '.join(key)}) DO " + (f"UPDATE SET {updates}" if updates else "NOTHING")
+            )
+            print(f"  📦 {table}: {cursor.rowcount} rows upserted")
+    conn.commit()
+
+
+def delete_tombstones(cursor, directory, manifest):
+    deletions = manifest.get('deletions')
+    if not deletions:
+        return
+    cursor.execute("CREATE TEMP TABLE _restore_deletions (table_name text, row_id bigint) ON COMMIT DROP")
+    copy_into(cursor, directory, deletions, '_restore_deletions')
+    keys = {entry['table']: entry['key'][0] for entry in manifest['files']}
+    cursor.execute("SELECT DISTINCT table_name FROM _restore_deletions")
+    tables = [row[0] for row in cursor.fetchall()]
+    # Children before parents; 'tables' lists them in foreign key order
+    order = manifest['tables']
+    tables.sort(key=lambda t: -order.index(t) if t in order else 0)
+    for table in tables:
+        key = keys.get(table) or primary_key_column(cursor, table)
+        cursor.execute(
+            f"DELETE FROM {table} WHERE {key} IN "
+            f"(SELECT row_id FROM _restore_deletions WHERE table_name = %s)",
+            (table,)
+        )
+        print(f"  🗑️  {table}: {cursor.rowcount} rows deleted")
+
+
+def primary_key_column(cursor, table):
+    cursor.execute(
+        "SELECT a.attname FROM pg_index i "
+        "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0] "
+        "WHERE i.indrelid = %s::regclass AND i.indisprimary",
+        (table,)
+    )
+    return cursor.fetchone()[0]
+
+
+def reset_sequences(conn, chain):
+    """Move serial sequences past the IDs the deltas inserted."""
+    tables = {entry['table']: entry['key'][0] for m in chain if m['kind'] == 'delta' for entry in m['files']}
+    with conn.cursor() as cursor:
+        for table, key in tables.items():
+            cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", (table, key))
+            sequence = cursor.fetchone()[0]
+            if sequence:
+                cursor.execute(
+                    f"SELECT setval(%s, GREATEST((SELECT max({key}) FROM {table}), 1))",
+                    (sequence,)
+                )
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Restore a base backup and replay its incremental backups')
+    parser.add_argument('--dir', required=True, help='Directory with the downloaded backup files and manifests')
+    parser.add_argument('--manifest', help='Manifest to restore up to (default: the newest)')
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL'), help='Defaults to $DATABASE_URL')
+    parser.add_argument('--jobs', type=int, default=4, help='pg_restore jobs for directory-format bases')
+    parser.add_argument('--verify-only', action='store_true', help='Check the chain and checksums without restoring')
+    args = parser.parse_args()
+
+    name = args.manifest
+    if not name:
+        manifests = sorted(
+            glob.glob(os.path.join(args.dir, '*.manifest.json')),
+            key=lambda path: load_manifest(args.dir, os.path.basename(path))['watermark']
+        )
+        if not manifests:
+            print(f"❌ No manifests in {args.dir}")
+            sys.exit(1)
+        name = os.path.basename(manifests[-1])
+
+    chain = manifest_chain(args.dir, name)
+    print(f"🔗 {chain[0]['name']} + {len(chain) - 1} deltas, up to {chain[-1]['watermark']}")
+    if not verify(args.dir, chain):
+        sys.exit(1)
+    print("🔒 All checksums verified")
+    if args.verify_only:
+        return
+    if not args.database_url:
+        parser.error('--database-url or $DATABASE_URL is required')
+
+    import psycopg2
+
+    restore_base(args.dir, chain[0], args.database_url, args.jobs)
+    conn = psycopg2.connect(args.database_url)
+    try:
+        for manifest in chain[1:]:
+            print(f"⏩ Replaying {manifest['name']}")
+            apply_delta(conn, args.dir, manifest)
+        reset_sequences(conn, chain)
+    finally:
+        conn.close()
+    print(f"✅ Restored to {chain[-1]['watermark']}")
+
+if __name__ == '__main__':
+    main()
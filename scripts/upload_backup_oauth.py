@@ -1,132 +1,459 @@
-#!/usr/bin/env python3
-"""
-Upload database backup to Google Drive using OAuth 2.0
-"""
-import argparse
-import os
-import sys
-import json
-from datetime import datetime
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from googleapiclient.errors import HttpError
-
-# Scopes for Google Drive access (must match token.json scope)
-SCOPES = ['https://www.googleapis.com/auth/drive.file']
-
-def get_drive_service():
-    """
-    Initialize Google Drive service using OAuth 2.0
-    """
-    try:
-        # For GitHub Actions, we'll use a pre-authorized token
-        # This requires manual setup but works in CI/CD
-        token_file = 'token.json'
-        
-        if not os.path.exists(token_file):
-            print("❌ Error: token.json not found. Please run the setup script first.")
-            return None
-        
-        # Load credentials from token file
-        with open(token_file, 'r') as f:
-            token_data = json.load(f)
-        
-        creds = Credentials.from_authorized_user_info(token_data, SCOPES)
-        
-        # Check if token is expired and refresh if needed
-        if creds.expired and creds.refresh_token:
-            print("🔄 Token expired, refreshing...")
-            try:
-                creds.refresh(Request())
-                # Save the refreshed token
-                with open(token_file, 'w') as token:
-                    token.write(creds.to_json())
-                print("✅ Token refreshed successfully!")
-            except Exception as e:
-                print(f"❌ Error refreshing token: {e}")
-                print("💡 You may need to re-run the setup script to get a new token.")
-                return None
-        
-        # Build the service
-        service = build('drive', 'v3', credentials=creds)
-        return service
-        
-    except Exception as e:
-        print(f"❌ Error initializing Google Drive service: {e}")
-        return None
-
-def upload_to_drive(file_path, folder_id, filename, service):
-    """
-    Upload a file to Google Drive folder
-    """
-    try:
-        # Check if file exists
-        if not os.path.exists(file_path):
-            print(f"❌ Error: File {file_path} does not exist")
-            return False
-            
-        # Get file size
-        file_size = os.path.getsize(file_path)
-        print(f"📁 Uploading {file_path} ({file_size:,} bytes) to Google Drive")
-        
-        # Create file metadata
-        file_metadata = {
-            'name': filename,
-            'parents': [folder_id]
-        }
-        
-        # Create media upload
-        media = MediaFileUpload(
-            file_path,
-            mimetype='application/gzip',
-            resumable=True
-        )
-        
-        # Upload file
-        file = service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields='id,name,size,createdTime'
-        ).execute()
-        
-        print(f"✅ Successfully uploaded to Google Drive")
-        print(f"📄 File ID: {file.get('id')}")
-        print(f"📁 Name: {file.get('name')}")
-        print(f"📊 Size: {file.get('size')} bytes")
-        print(f"🕒 Created: {file.get('createdTime')}")
-        
-        return True
-        
-    except HttpError as e:
-        if e.resp.status == 401:
-            print("❌ Authentication error: Token may be expired or invalid")
-            print("💡 Please re-run the setup script to get a new token")
-        else:
-            print(f"❌ Google Drive API error: {e}")
-        return False
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-        return False
-
-def main():
-    parser = argparse.ArgumentParser(description='Upload database backup to Google Drive using OAuth 2.0')
-    parser.add_argument('--file', required=True, help='Path to backup file')
-    parser.add_argument('--folder-id', required=True, help='Google Drive folder ID')
-    parser.add_argument('--filename', required=True, help='Filename in Google Drive')
-    
-    args = parser.parse_args()
-    
-    # Initialize Google Drive service
-    service = get_drive_service()
-    if not service:
-        sys.exit(1)
-    
-    # Upload file
-    success = upload_to_drive(args.file, args.folder_id, args.filename, service)
-    sys.exit(0 if success else 1)
-
-if __name__ == '__main__':
-    main()
+#!/usr/bin/env python3
+"""
+Upload database backup to Google Drive using OAuth 2.0
+
+With --dump the backup is streamed: pg_dump writes to a pipe, zstd
+compresses it with all cores, and the compressed bytes are sent to a
+resumable upload session in fixed-size chunks while the dump is still
+running. Nothing is written to disk (except with --jobs, see below). The
+MD5/SHA-256 of the streamed bytes are compared with the checksums the
+target reports. If pg_dump or zstd fails, the last chunk is never sent, so
+no truncated backup is left behind.
+
+    python upload_backup_oauth.py --dump --folder-id ID --filename clove_db_backup_full_20250101_020000.dump.zst
+    python upload_backup_oauth.py --file backup.sql.gz --folder-id ID --filename backup.sql.gz
+    python upload_backup_oauth.py --dump --local-target ./uploads --filename test.dump.zst
+
+--jobs N > 1 runs a parallel directory-format pg_dump -j N. That format can
+only be written to a directory, so the (uncompressed) dump directory is
+staged in a temporary directory and then streamed as a tar through zstd.
+--local-target stores the upload in a local directory through the same
+chunked protocol, so the pipeline can be tested offline.
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import json
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+# Scopes for Google Drive access (must match token.json scope)
+SCOPES = ['https://www.googleapis.com/auth/drive.file']
+
+# Drive requires every chunk but the last to be a multiple of 256 KiB
+CHUNK_ALIGNMENT = 256 * 1024
+DEFAULT_CHUNK_SIZE_MB = 16
+UPLOAD_URL = 'https://www.googleapis.com/upload/drive/v3/files?uploadType=resumable'
+RESULT_FIELDS = 'id,name,size,createdTime,md5Checksum,sha256Checksum'
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+DUMP_TYPE_FLAGS = {
+    'full': [],
+    'schema_only': ['--schema-only'],
+    'data_only': ['--data-only'],
+}
+
+
+def get_credentials():
+    """
+    Load (and refresh if needed) the OAuth 2.0 credentials from token.json
+    """
+    from google.oauth2.credentials import Credentials
+    from google.auth.transport.requests import Request
+
+    try:
+        # For GitHub Actions, we'll use a pre-authorized token
+        # This requires manual setup but works in CI/CD
+        token_file = 'token.json'
+
+        if not os.path.exists(token_file):
+            print("❌ Error: token.json not found. Please run the setup script first.")
+            return None
+
+        # Load credentials from token file
+        with open(token_file, 'r') as f:
+            token_data = json.load(f)
+
+        creds = Credentials.from_authorized_user_info(token_data, SCOPES)
+
+        # Check if token is expired and refresh if needed
+        if creds.expired and creds.refresh_token:
+            print("🔄 Token expired, refreshing...")
+            try:
+                creds.refresh(Request())
+                # Save the refreshed token
+                with open(token_file, 'w') as token:
+                    token.write(creds.to_json())
+                print("✅ Token refreshed successfully!")
+            except Exception as e:
+                print(f"❌ Error refreshing token: {e}")
+                print("💡 You may need to re-run the setup script to get a new token.")
+                return None
+
+        return creds
+
+    except Exception as e:
+        print(f"❌ Error loading OAuth credentials: {e}")
+        return None
+
+def get_drive_service():
+    """
+    Initialize Google Drive service using OAuth 2.0
+    """
+    from googleapiclient.discovery import build
+
+    creds = get_credentials()
+    if not creds:
+        return None
+    try:
+        # Build the service
+        service = build('drive', 'v3', credentials=creds)
+        return service
+    except Exception as e:
+        print(f"❌ Error initializing Google Drive service: {e}")
+        return None
+
+
+class UploadError(Exception):
+    pass
+
+
+class ChunkedSource:
+    """
+    Reads a byte stream in fixed-size chunks, one chunk ahead, so the last
+    chunk is known before it is sent. Every byte is hashed once as it is read.
+    """
+
+    def __init__(self, fileobj, chunk_size, before_last=None):
+        self.fileobj = fileobj
+        self.chunk_size = chunk_size
+        self.before_last = before_last
+        self.md5 = hashlib.md5()
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def _read(self):
+        buffer = bytearray()
+        while len(buffer) < self.chunk_size:
+            data = self.fileobj.read(self.chunk_size - len(buffer))
+            if not data:
+                break
+            buffer += data
+        self.md5.update(buffer)
+        self.sha256.update(buffer)
+        self.size += len(buffer)
+        return bytes(buffer)
+
+    def chunks(self):
+        """Yields (chunk, is_last); an empty stream yields one empty last chunk."""
+        current = self._read()
+        while True:
+            following = self._read() if len(current) == self.chunk_size else b''
+            if not following:
+                # The producer must have succeeded before the upload is finalized
+                if self.before_last:
+                    self.before_last()
+                yield current, True
+                return
+            yield current, False
+            current = following
+
+
+class DriveTarget:
+    """Google Drive resumable upload session, driven chunk by chunk."""
+
+    def __init__(self, creds, folder_id, timeout=300):
+        from google.auth.transport.requests import AuthorizedSession
+
+        self.session = AuthorizedSession(creds)
+        self.folder_id = folder_id
+        self.timeout = timeout
+
+    def describe(self):
+        return f"Google Drive folder {self.folder_id}"
+
+    def start(self, filename, mimetype):
+        response = self.session.post(
+            f"{UPLOAD_URL}&fields={RESULT_FIELDS}",
+            json={'name': filename, 'parents': [self.folder_id]},
+            headers={'X-Upload-Content-Type': mimetype},
+            timeout=self.timeout
+        )
+        if response.status_code == 401:
+            raise UploadError("Authentication error: Token may be expired or invalid")
+        response.raise_for_status()
+        return response.headers['Location']
+
+    @staticmethod
+    def _acknowledged(response):
+        # "Range: bytes=0-N" lists what the server has; no header means nothing yet
+        received = response.headers.get('Range')
+        return int(received.rsplit('-', 1)[1]) + 1 if received else 0
+
+    def put(self, upload, data, start, total):
+        """Send data at offset start; returns (bytes acknowledged, file metadata once complete)."""
+        end = start + len(data)
+        if data:
+            content_range = f"bytes {start}-{end - 1}/{total if total is not None else '*'}"
+        else:
+            content_range = f"bytes */{total}"
+        response = self.session.put(upload, data=data, headers={'Content-Range': content_range}, timeout=self.timeout)
+        if response.status_code in (200, 201):
+            return end, response.json()
+        if response.status_code == 308:
+            return self._acknowledged(response), None
+        if response.status_code in RETRYABLE_STATUS:
+            raise ConnectionError(f"HTTP {response.status_code}")
+        raise UploadError(f"Google Drive API error: HTTP {response.status_code} {response.text[:200]}")
+
+    def status(self, upload):
+        """Bytes the server holds for an interrupted session."""
+        response = self.session.put(upload, headers={'Content-Range': 'bytes */*'}, timeout=self.timeout)
+        if response.status_code == 308:
+            return self._acknowledged(response)
+        raise UploadError(f"Upload session is gone: HTTP {response.status_code}")
+
+
+class LocalTarget:
+    """
+    Stand-in for Drive that stores uploads in a local directory, with the
+    same start/put/status protocol, for testing the pipeline offline.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(os.path.join(directory, '.uploads'), exist_ok=True)
+
+    def describe(self):
+        return f"local directory {self.directory}"
+
+    def start(self, filename, mimetype):
+        upload = os.path.join(self.directory, '.uploads', uuid.uuid4().hex)
+        with open(upload + '.json', 'w') as f:
+            json.dump({'name': filename, 'mimeType': mimetype}, f)
+        open(upload, 'wb').close()
+        return upload
+
+    def put(self, upload, data, start, total):
+        with open(upload, 'r+b') as f:
+            f.seek(start)
+            f.write(data)
+            f.truncate()
+        end = start + len(data)
+        if total is None or end < total:
+            return end, None
+
+        with open(upload + '.json') as f:
+            meta = json.load(f)
+        md5, sha256 = hashlib.md5(), hashlib.sha256()
+        with open(upload, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                md5.update(block)
+                sha256.update(block)
+        path = os.path.join(self.directory, meta['name'])
+        os.replace(upload, path)
+        os.remove(upload + '.json')
+        return end, {
+            'id': path,
+            'name': meta['name'],
+            'size': str(end),
+            'createdTime': datetime.utcnow().isoformat() + 'Z',
+            'md5Checksum': md5.hexdigest(),
+            'sha256Checksum': sha256.hexdigest(),
+        }
+
+    def status(self, upload):
+        return os.path.getsize(upload)
+
+
+def upload_stream(target, source, filename, mimetype, retries=5):
+    """
+    Upload a ChunkedSource through a resumable session. Interrupted chunks
+    are resumed from the offset the target acknowledges, with backoff.
+    """
+    upload = target.start(filename, mimetype)
+    offset = 0
+    started = time.perf_counter()
+    for chunk, is_last in source.chunks():
+        end = offset + len(chunk)
+        total = end if is_last else None
+        sent = offset
+        failures = 0
+        while True:
+            try:
+                acknowledged, result = target.put(upload, chunk[sent - offset:], sent, total)
+                if result is not None:
+                    elapsed = time.perf_counter() - started
+                    print(f"📤 {end:,} bytes uploaded in {elapsed:.1f} s ({end / max(elapsed, 1e-6) / 1e6:.1f} MB/s)")
+                    return result
+                if acknowledged >= end:
+                    break
+                # Partially received; send the rest of this chunk
+                sent = acknowledged
+            except (ConnectionError, TimeoutError, OSError) as e:
+                failures += 1
+                if failures > retries:
+                    raise UploadError(f"Chunk at offset {sent:,} failed {failures} times: {e}")
+                delay = min(2 ** failures, 60)
+                print(f"⚠️  Chunk at offset {sent:,} failed ({e}); resuming in {delay} s")
+                time.sleep(delay)
+                sent = max(offset, target.status(upload))
+        offset = end
+        print(f"📤 {offset:,} bytes uploaded")
+    raise UploadError("Upload session ended without a result")
+
+
+def verify_checksums(source, result):
+    """Compare the streamed bytes with the size and checksums the target reports."""
+    checks = [
+        ('size', str(source.size), result.get('size')),
+        ('md5Checksum', source.md5.hexdigest(), result.get('md5Checksum')),
+        ('sha256Checksum', source.sha256.hexdigest(), result.get('sha256Checksum')),
+    ]
+    ok = True
+    for field, local, remote in checks:
+        if remote is None:
+            continue
+        if local != remote:
+            print(f"❌ {field} mismatch: streamed {local}, target reports {remote}")
+            ok = False
+    if ok:
+        print(f"🔒 Checksums verified (sha256 {source.sha256.hexdigest()})")
+    return ok
+
+
+def print_result(result):
+    print(f"✅ Successfully uploaded")
+    print(f"📄 File ID: {result.get('id')}")
+    print(f"📁 Name: {result.get('name')}")
+    print(f"📊 Size: {result.get('size')} bytes")
+    print(f"🕒 Created: {result.get('createdTime')}")
+
+
+class DumpPipeline:
+    """pg_dump | zstd, with the compressed bytes on self.stdout."""
+
+    def __init__(self, args):
+        self.processes = []
+        self.staging_dir = None
+        dump = [args.pg_dump, args.database_url, '--no-password', *DUMP_TYPE_FLAGS[args.backup_type]]
+
+        if args.jobs > 1:
+            # Parallel dumps exist only in directory format; stage it uncompressed
+            self.staging_dir = tempfile.mkdtemp(prefix='clove_dump_')
+            dump_dir = os.path.join(self.staging_dir, 'dump')
+            print(f"🗄️  Running pg_dump -j {args.jobs} into {dump_dir}...")
+            subprocess.run(
+                dump + ['--format=directory', f'--jobs={args.jobs}', '--compress=0', f'--file={dump_dir}'],
+                check=True
+            )
+            producer = subprocess.Popen(['tar', '-C', dump_dir, '-cf', '-', '.'], stdout=subprocess.PIPE)
+        else:
+            print("🗄️  Streaming pg_dump (custom format)...")
+            producer = subprocess.Popen(dump + ['--format=custom', '--compress=0'], stdout=subprocess.PIPE)
+
+        compressor = subprocess.Popen(
+            ['zstd', '-q', '-c', f'-{args.zstd_level}', f'-T{args.zstd_threads}'],
+            stdin=producer.stdout,
+            stdout=subprocess.PIPE
+        )
+        # Only zstd reads the producer's output from here on
+        producer.stdout.close()
+        self.processes = [producer, compressor]
+        self.stdout = compressor.stdout
+
+    def check(self):
+        """Wait for pg_dump/tar and zstd; raise if any of them failed."""
+        for process in self.processes:
+            returncode = process.wait()
+            if returncode != 0:
+                raise UploadError(f"{process.args[0]} exited with status {returncode}; backup not finalized")
+
+    def close(self):
+        for process in self.processes:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+        if self.staging_dir:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+
+def stream_backup(target, args):
+    """Dump, compress and upload in one pass; returns True on a verified upload."""
+    pipeline = DumpPipeline(args)
+    try:
+        source = ChunkedSource(pipeline.stdout, args.chunk_size, before_last=pipeline.check)
+        result = upload_stream(target, source, args.filename, 'application/zstd', retries=args.retries)
+        print_result(result)
+        return verify_checksums(source, result)
+    except (UploadError, subprocess.CalledProcessError) as e:
+        print(f"❌ {e}")
+        return False
+    finally:
+        pipeline.close()
+
+
+def upload_file(target, file_path, filename, args):
+    """Upload an existing file through the same chunked, verified path."""
+    if not os.path.exists(file_path):
+        print(f"❌ Error: File {file_path} does not exist")
+        return False
+    print(f"📁 Uploading {file_path} ({os.path.getsize(file_path):,} bytes) to {target.describe()}")
+    mimetype = 'application/zstd' if file_path.endswith('.zst') else 'application/gzip'
+    try:
+        with open(file_path, 'rb') as f:
+            source = ChunkedSource(f, args.chunk_size)
+            result = upload_stream(target, source, filename, mimetype, retries=args.retries)
+        print_result(result)
+        return verify_checksums(source, result)
+    except UploadError as e:
+        print(f"❌ {e}")
+        return False
+
+def upload_to_drive(file_path, folder_id, filename, service=None):
+    """
+    Upload a file to Google Drive folder
+    """
+    creds = get_credentials()
+    if not creds:
+        return False
+    args = argparse.Namespace(chunk_size=DEFAULT_CHUNK_SIZE_MB * 1024 * 1024, retries=5)
+    return upload_file(DriveTarget(creds, folder_id), file_path, filename, args)
+
+def main():
+    parser = argparse.ArgumentParser(description='Upload database backup to Google Drive using OAuth 2.0')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--file', help='Path to an existing backup file')
+    source.add_argument('--dump', action='store_true', help='Stream pg_dump | zstd straight into the upload')
+    parser.add_argument('--folder-id', help='Google Drive folder ID')
+    parser.add_argument('--local-target', help='Store the upload in this directory instead of Google Drive')
+    parser.add_argument('--filename', required=True, help='Filename in Google Drive')
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL'), help='Defaults to $DATABASE_URL')
+    parser.add_argument('--backup-type', choices=sorted(DUMP_TYPE_FLAGS), default='full')
+    parser.add_argument('--jobs', type=int, default=1, help='Parallel pg_dump jobs (> 1 stages a directory dump)')
+    parser.add_argument('--zstd-level', type=int, default=6)
+    parser.add_argument('--zstd-threads', type=int, default=0, help='0 = one per core')
+    parser.add_argument('--chunk-size-mb', type=int, default=DEFAULT_CHUNK_SIZE_MB, help='Upload chunk size')
+    parser.add_argument('--retries', type=int, default=5, help='Retries per chunk')
+    parser.add_argument('--pg-dump', default='pg_dump', help='pg_dump executable')
+
+    args = parser.parse_args()
+    args.chunk_size = max(CHUNK_ALIGNMENT, args.chunk_size_mb * 1024 * 1024 // CHUNK_ALIGNMENT * CHUNK_ALIGNMENT)
+    if args.dump and not args.database_url:
+        parser.error('--dump needs --database-url or $DATABASE_URL')
+
+    # Upload target: Google Drive, or a local directory for offline runs
+    if args.local_target:
+        target = LocalTarget(args.local_target)
+    else:
+        if not args.folder_id:
+            parser.error('--folder-id is required unless --local-target is given')
+        creds = get_credentials()
+        if not creds:
+            sys.exit(1)
+        target = DriveTarget(creds, args.folder_id)
+
+    if args.dump:
+        print(f"🚀 Streaming {args.backup_type} backup to {target.describe()} as {args.filename}")
+        success = stream_backup(target, args)
+    else:
+        success = upload_file(target, args.file, args.filename, args)
+    sys.exit(0 if success else 1)
+
+if __name__ == '__main__':
+    main()